@@ -6,17 +6,112 @@ import json
 import logging
 import requests
 import os
+import time
 from typing import Dict, Any, List, Optional
 
+from llm_json import parse_llm_json, validate_action_payload
+from llm_rate_limiter import get_rate_limiter, parse_retry_after, current_request_priority, record_shed, shed_count
+from emoji_cache import EmojiInterpretationCache, emoji_cache_key
+from single_flight import llm_single_flight, prompt_fingerprint, remaining_seconds
+from llm_telemetry import llm_telemetry, llm_caller
+from llm_router import (
+    LLMRouter, RouteCandidate, load_route_config,
+    TASK_INTENT, TASK_ACTION, TASK_EMOJI, TASK_MEDICINE_SCAN, TASK_PRESCRIPTION_OCR
+)
+from image_preprocessing import (
+    prepare_image, VisionResultCache, MEDICINE_MAX_DIMENSION, PRESCRIPTION_MAX_DIMENSION
+)
+
+# Created at the bottom of this module once the default clients exist
+llm_router: Optional[LLMRouter] = None
+
+
+def route_llm_call(task: str, fn, default_client):
+    """Run fn(client) on the provider the router picks for task (default_client when routing is off)"""
+    if llm_router is None:
+        return fn(default_client)
+    return llm_router.call(task, fn)
+
+
+def completion_body(response) -> Optional[Dict[str, Any]]:
+    """Parsed JSON body of a successful completion response; None for errors or unparseable bodies"""
+    if response is None or response.status_code != 200:
+        return None
+    try:
+        body = response.json()
+    except ValueError:
+        return None
+    return body if isinstance(body, dict) else None
+
+
+def record_llm_call(model: str, endpoint: str, status, latency_ms: float, retries: int,
+                    body: Optional[Dict[str, Any]] = None) -> None:
+    """Record one upstream completion (status, timing and the usage block of its parsed body) in telemetry"""
+    usage = body.get("usage") if body else None
+    llm_telemetry.record(model, endpoint, status, latency_ms, usage=usage, retries=retries)
+
 class ApiClient:
     """Enhanced client for interacting with API-based LLM service (e.g., Groq)"""
     
-    def __init__(self, api_key: str = None, base_url: str = "https://api.groq.com/openai/v1", model: str = "llama-3.1-8b-instant"):
+    def __init__(self, api_key: str = None, base_url: str = None, model: str = "llama-3.1-8b-instant"):
         self.api_key = api_key or os.getenv('GROQ_API_KEY') or os.getenv('API_KEY')
-        self.base_url = base_url
+        # LLM_BASE_URL points the client at llm_stub_server.py (or any OpenAI-compatible endpoint)
+        self.base_url = (base_url or os.getenv('LLM_BASE_URL') or "https://api.groq.com/openai/v1").rstrip('/')
         self.model = model
         self.logger = logging.getLogger(__name__)
+        # Provider-side JSON mode (OpenAI-compatible response_format); disabled if the provider rejects it
+        self.supports_json_mode = True
         self.is_available = self.check_availability()
+
+    def _send_completion(self, headers: Dict[str, str], payload: Dict[str, Any], timeout: int = 90):
+        """
+        POST through the shared provider rate limiter. Returns (response, parsed body);
+        the body is None unless the completion succeeded, and both are None when the request is shed.
+        """
+        limiter = get_rate_limiter(self.base_url)
+        endpoint = f"{self.base_url}/chat/completions"
+        response = None
+        upstream_ms = 0.0
+        attempts = 0
+        try:
+            for _ in range(2):  # one retry after honouring Retry-After
+                if not limiter.acquire():
+                    record_llm_call(self.model, endpoint, "shed", upstream_ms, max(0, attempts - 1))
+                    return None, None
+                attempts += 1
+                start_time = time.time()
+                response = requests.post(
+                    endpoint,
+                    headers=headers,
+                    json=payload,
+                    timeout=timeout
+                )
+                upstream_ms += (time.time() - start_time) * 1000
+                if response.status_code != 429:
+                    break
+                limiter.penalize(parse_retry_after(response.headers.get("Retry-After")))
+        except requests.exceptions.Timeout:
+            llm_telemetry.record(self.model, endpoint, "timeout", upstream_ms, retries=max(0, attempts - 1))
+            raise
+        except requests.exceptions.RequestException:
+            llm_telemetry.record(self.model, endpoint, "error", upstream_ms, retries=max(0, attempts - 1))
+            raise
+        body = completion_body(response)
+        record_llm_call(self.model, endpoint, response.status_code, upstream_ms, attempts - 1, body)
+        return response, body
+
+    def _post_completion(self, headers: Dict[str, str], payload: Dict[str, Any], json_mode: bool = False,
+                         timeout: int = 90):
+        """POST a chat completion, requesting JSON mode when asked and supported"""
+        if json_mode and self.supports_json_mode:
+            response, body = self._send_completion(headers, {**payload, "response_format": {"type": "json_object"}},
+                                                   timeout=timeout)
+            if response is None or response.status_code != 400 or "response_format" not in response.text:
+                return response, body
+            self.logger.warning(f"Model {self.model} rejected JSON mode, retrying without it")
+            self.supports_json_mode = False
+
+        return self._send_completion(headers, payload, timeout=timeout)
         
     def check_availability(self) -> bool:
         """Check if API service is available and API key is valid"""
@@ -59,67 +154,46 @@ class ApiClient:
             self.logger.error(f"Error checking API availability: {e}")
             return False
     
-    def generate_response(self, prompt: str, system_prompt: str = "", max_tokens: int = 500, temperature: float = 0.7) -> Optional[str]:
+    def generate_response(self, prompt: str, system_prompt: str = "", max_tokens: int = 500, temperature: float = 0.7,
+                          json_mode: bool = False) -> Optional[str]:
         """Generate completion using API with enhanced error handling"""
         if not self.is_available:
             return None
-            
-        try:
-            headers = {
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json"
-            }
-            
-            messages = []
-            if system_prompt:
-                messages.append({"role": "system", "content": system_prompt})
-            messages.append({"role": "user", "content": prompt})
-            
-            payload = {
-                "model": self.model,
-                "messages": messages,
-                "max_tokens": max_tokens,
-                "temperature": temperature,
-                "top_p": 0.9,
-                "stream": False
-            }
-            
-            response = requests.post(
-                f"{self.base_url}/chat/completions",
-                headers=headers,
-                json=payload,
-                timeout=90
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                generated_text = result.get("choices", [{}])[0].get("message", {}).get("content", "").strip()
-                
-                if generated_text:
-                    self.logger.debug(f"Generated response: {len(generated_text)} chars")
-                    return generated_text
-                else:
-                    self.logger.warning("API returned empty response")
-                    return None
-            else:
-                self.logger.error(f"API error: {response.status_code} - {response.text}")
-                return None
-                
-        except requests.exceptions.Timeout:
-            self.logger.warning("API request timed out")
-            return None
-        except requests.exceptions.RequestException as e:
-            self.logger.error(f"API request failed: {e}")
-            return None
-        except Exception as e:
-            self.logger.error(f"Unexpected error in API generation: {e}")
-            return None
+
+        messages = []
+        if system_prompt:
+            messages.append({"role": "system", "content": system_prompt})
+        messages.append({"role": "user", "content": prompt})
+        return self._coalesced_completion(messages, max_tokens, temperature, json_mode, "API")
     
-    def chat_completion(self, messages: List[Dict[str, str]], max_tokens: int = 500, temperature: float = 0.7) -> Optional[str]:
+    def chat_completion(self, messages: List[Dict[str, Any]], max_tokens: int = 500, temperature: float = 0.7,
+                        json_mode: bool = False, timeout: int = 90) -> Optional[str]:
         """Generate chat completion using API with conversation context"""
         if not self.is_available:
             return None
-            
+        return self._coalesced_completion(messages, max_tokens, temperature, json_mode, "API chat", timeout=timeout)
+
+    def _coalesced_completion(self, messages: List[Dict[str, Any]], max_tokens: int, temperature: float,
+                              json_mode: bool, label: str, timeout: int = 90) -> Optional[str]:
+        """Share one upstream call between identical concurrent requests (same prompt, options and priority)"""
+        priority, deadline = current_request_priority()
+        key = prompt_fingerprint(base_url=self.base_url, model=self.model, messages=messages, max_tokens=max_tokens,
+                                 temperature=temperature, json_mode=json_mode, priority=priority)
+
+        def request():
+            sheds = shed_count()
+            text = self._request_completion(messages, max_tokens, temperature, json_mode, label, timeout)
+            return text, shed_count() > sheds
+
+        sheds = shed_count()
+        text, shed = llm_single_flight.do(key, request, timeout=remaining_seconds(deadline)) or (None, False)
+        if shed and shed_count() == sheds:
+            record_shed()  # a follower shares the leader's shed, so its router must not count a failure either
+        return text
+
+    def _request_completion(self, messages: List[Dict[str, Any]], max_tokens: int, temperature: float,
+                            json_mode: bool, label: str, timeout: int = 90) -> Optional[str]:
+        """Single upstream chat completion; returns the stripped text or None on any failure"""
         try:
             headers = {
                 "Authorization": f"Bearer {self.api_key}",
@@ -135,35 +209,32 @@ class ApiClient:
                 "stream": False
             }
             
-            response = requests.post(
-                f"{self.base_url}/chat/completions",
-                headers=headers,
-                json=payload,
-                timeout=90
-            )
+            response, result = self._post_completion(headers, payload, json_mode=json_mode, timeout=timeout)
+            if response is None:
+                self.logger.warning("API request shed by rate limiter, using local fallback")
+                return None
             
-            if response.status_code == 200:
-                result = response.json()
+            if result is not None:
                 generated_text = result.get("choices", [{}])[0].get("message", {}).get("content", "").strip()
                 
                 if generated_text:
-                    self.logger.debug(f"Generated chat response: {len(generated_text)} chars")
+                    self.logger.debug(f"Generated {label} response: {len(generated_text)} chars")
                     return generated_text
                 else:
-                    self.logger.warning("API returned empty chat response")
+                    self.logger.warning(f"{label} returned empty response")
                     return None
             else:
-                self.logger.error(f"API chat error: {response.status_code} - {response.text}")
+                self.logger.error(f"{label} error: {response.status_code} - {response.text}")
                 return None
                 
         except requests.exceptions.Timeout:
-            self.logger.warning("API chat request timed out")
+            self.logger.warning(f"{label} request timed out")
             return None
         except requests.exceptions.RequestException as e:
-            self.logger.error(f"API chat request failed: {e}")
+            self.logger.error(f"{label} request failed: {e}")
             return None
         except Exception as e:
-            self.logger.error(f"Unexpected error in API chat: {e}")
+            self.logger.error(f"Unexpected error in {label} generation: {e}")
             return None
     
     def test_connection(self) -> Dict[str, Any]:
@@ -200,29 +271,93 @@ class ApiClient:
 
 class GroqScoutClient:
     """Client for openrouter's Llama 4 Scout (used for emoji/image interpretation)."""
-    def __init__(self, api_key: str = None, base_url: str = "https://openrouter.ai/api/v1", model: str = "qwen/qwen2.5-vl-72b-instruct:free"):
+    def __init__(self, api_key: str = None, base_url: str = None, model: str = "qwen/qwen2.5-vl-72b-instruct:free"):
         # Separate API key to allow different security policy if desired
         self.api_key = api_key or os.getenv('GROQ_SCOUT_API_KEY') or os.getenv('GROQ_API_KEY') or os.getenv('API_KEY')
-        self.base_url = base_url
+        self.base_url = (base_url or os.getenv('SCOUT_BASE_URL') or "https://openrouter.ai/api/v1").rstrip('/')
         self.model = model
         self.logger = logging.getLogger(__name__)
         self.is_available = bool(self.api_key)
+        # Vision results keyed by image hash so re-scans skip the upstream call
+        self.vision_cache = VisionResultCache()
+        self.emoji_cache = EmojiInterpretationCache(
+            max_entries=int(os.getenv('EMOJI_CACHE_MAX_ENTRIES', 2000)),
+            ttl_seconds=float(os.getenv('EMOJI_CACHE_TTL_SECONDS', 7 * 24 * 3600))
+        )
 
     def _headers(self) -> Dict[str, str]:
         return {"Authorization": f"Bearer {self.api_key}", "Content-Type": "application/json"}
 
     def _post(self, path: str, payload: Dict[str, Any], timeout: int = 90) -> Optional[Dict[str, Any]]:
+        limiter = get_rate_limiter(self.base_url)
+        endpoint = f"{self.base_url}{path}"
+        upstream_ms = 0.0
+        attempts = 0
         try:
-            response = requests.post(f"{self.base_url}{path}", headers=self._headers(), json=payload, timeout=timeout)
-            if response.status_code == 200:
-                return response.json()
+            for _ in range(2):  # one retry after honouring Retry-After
+                if not limiter.acquire():
+                    self.logger.warning("Groq Scout request shed by rate limiter")
+                    record_llm_call(self.model, endpoint, "shed", upstream_ms, max(0, attempts - 1))
+                    return None
+                attempts += 1
+                start_time = time.time()
+                response = requests.post(endpoint, headers=self._headers(), json=payload, timeout=timeout)
+                upstream_ms += (time.time() - start_time) * 1000
+                if response.status_code != 429:
+                    break
+                limiter.penalize(parse_retry_after(response.headers.get("Retry-After")))
+            body = completion_body(response)
+            record_llm_call(self.model, endpoint, response.status_code, upstream_ms, attempts - 1, body)
+            if body is not None:
+                return body
             self.logger.error(f"Groq Scout API error: {response.status_code} - {response.text}")
             return None
         except Exception as e:
+            status = "timeout" if isinstance(e, requests.exceptions.Timeout) else "error"
+            llm_telemetry.record(self.model, endpoint, status, upstream_ms, retries=max(0, attempts - 1))
             self.logger.error(f"Groq Scout request failed: {e}")
             return None
 
+    def chat_completion(self, messages: List[Dict[str, Any]], max_tokens: int = 500, temperature: float = 0.7,
+                        json_mode: bool = False, timeout: int = 90) -> Optional[str]:
+        """
+        Chat completion text with the same signature as ApiClient.chat_completion, so a route can mix
+        both client types. json_mode is not sent upstream; callers parse replies with parse_llm_json.
+        """
+        payload = {"model": self.model, "messages": messages, "max_tokens": max_tokens, "temperature": temperature}
+        result = self._post("/chat/completions", payload, timeout=timeout)
+        if result:
+            return result.get("choices", [{}])[0].get("message", {}).get("content", "").strip()
+        return None
+
+    def generate_response(self, prompt: str, system_prompt: str = "", max_tokens: int = 500, temperature: float = 0.7,
+                          json_mode: bool = False) -> Optional[str]:
+        """Single-prompt completion, mirroring ApiClient.generate_response"""
+        messages = [{"role": "system", "content": system_prompt}] if system_prompt else []
+        messages.append({"role": "user", "content": prompt})
+        return self.chat_completion(messages, max_tokens=max_tokens, temperature=temperature, json_mode=json_mode)
+
     def interpret_emojis(self, user_message: str, language: str = "en", context_history: List[Dict[str,str]] = None) -> Optional[str]:
+        # Emoji-only / emoji-heavy messages repeat heavily; reuse interpretations by emoji sequence and words
+        cached = self.emoji_cache.get(user_message, language)
+        if cached is not None:
+            llm_telemetry.record(self.model, "emoji_cache", "cache", cache_hit=True, caller="scout_emoji")
+            return cached
+        # A reusable interpretation must depend on its cache key alone, so it is made without the history
+        if emoji_cache_key(user_message, language) is not None:
+            context_history = None
+        interpretation = self._interpret_emojis_upstream(user_message, language, context_history)
+        self.emoji_cache.set(user_message, language, interpretation)
+        return interpretation
+
+    def precompute_emoji_interpretations(self, languages: List[str] = None) -> int:
+        """Warm the emoji cache with the most common sequences (call at low priority, off the request path)"""
+        if not self.is_available:
+            return 0
+        return self.emoji_cache.precompute(lambda sequence, language: self._interpret_emojis_upstream(sequence, language),
+                                           languages=languages)
+
+    def _interpret_emojis_upstream(self, user_message: str, language: str = "en", context_history: List[Dict[str,str]] = None) -> Optional[str]:
         system_prompt = (
             "ROLE: You are a compassionate mental health support assistant speaking like the user's closest friend. "
             "CONTEXT: The user pasted emojis or emoji-heavy text they received and wants quick, supportive advice. "
@@ -243,11 +378,9 @@ class GroqScoutClient:
             for msg in context_history[-6:]:
                 messages.append({"role": msg.get("role", "user"), "content": msg.get("content", "")})
         messages.append({"role": "user", "content": user_message})
-        payload = {"model": self.model, "messages": messages, "max_tokens": 220, "temperature": 0.55}
-        result = self._post("/chat/completions", payload)
-        if result:
-            return result.get("choices", [{}])[0].get("message", {}).get("content", "").strip()
-        return None
+        with llm_caller("scout_emoji"):
+            return route_llm_call(
+                TASK_EMOJI, lambda client: client.chat_completion(messages, max_tokens=220, temperature=0.55), self)
 
     def interpret_medicine_image(self, user_message: str, image_b64: str, language: str = "en", context_history: List[Dict[str,str]] = None) -> Optional[str]:
         system_prompt = (
@@ -257,6 +390,19 @@ class GroqScoutClient:
             "OUTPUT: Under 100 words in the user's language. No markdown.\n"
             "If uncertain, say so clearly.\n"
         )
+        image = prepare_image(image_b64, max_dimension=MEDICINE_MAX_DIMENSION)
+        if not image:
+            return None
+
+        # Same photo + same question + same language gives the same interpretation
+        cache_variant = f"{language}:{(user_message or '').strip().lower()}"
+        # Exact content only: near-identical photos of different strips must not share a result
+        cached = self.vision_cache.get("medicine", cache_variant, image, allow_perceptual=False)
+        if cached is not None:
+            self.logger.info("Medicine scan served from vision cache")
+            llm_telemetry.record(self.model, "vision_cache", "cache", cache_hit=True, caller="scout_medicine")
+            return cached
+
         messages = [{"role": "system", "content": system_prompt}]
         if context_history:
             for msg in context_history[-6:]:
@@ -264,12 +410,18 @@ class GroqScoutClient:
 
         user_content = [
             {"type": "text", "text": user_message or "Please help identify this medicine from the image."},
-            {"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{image_b64}" }}
+            {"type": "image_url", "image_url": {"url": image.data_url}}
         ]
-        payload = {"model": self.model, "messages": [*messages, {"role": "user", "content": user_content}], "max_tokens": 220, "temperature": 0.4}
-        result = self._post("/chat/completions", payload, timeout=120)
-        if result:
-            return result.get("choices", [{}])[0].get("message", {}).get("content", "").strip()
+        messages.append({"role": "user", "content": user_content})
+        start_time = time.time()
+        with llm_caller("scout_medicine"):
+            content = route_llm_call(
+                TASK_MEDICINE_SCAN,
+                lambda client: client.chat_completion(messages, max_tokens=220, temperature=0.4, timeout=120), self)
+        self.vision_cache.record_upstream(image, (time.time() - start_time) * 1000)
+        if content:
+            self.vision_cache.set("medicine", cache_variant, image, content)
+            return content
         return None
 
     def interpret_image(self, user_message: str, image_b64: str, language: str = "en", context_history: List[Dict[str,str]] = None) -> Optional[str]:
@@ -282,27 +434,40 @@ class GroqScoutClient:
             '{"doctor_name": "Doctor\'s full name", "medications": [{"name": "Medicine name", "dosage": "dosage instructions", "time": "when to take"}], "tests": ["test names"], "diagnosis": "illness/diagnosis if mentioned"}'
             "\nIf information is not visible, use empty strings or arrays. Return only valid JSON."
         )
+        image = prepare_image(image_b64, max_dimension=PRESCRIPTION_MAX_DIMENSION)
+        if not image:
+            return None
+
+        # Exact content match only: different prescriptions on the same letterhead look alike
+        cached = self.vision_cache.get("prescription", language, image, allow_perceptual=False)
+        if cached is not None:
+            self.logger.info("Prescription analysis served from vision cache")
+            llm_telemetry.record(self.model, "vision_cache", "cache", cache_hit=True, caller="scout_prescription")
+            return dict(cached)
+
         messages = [
             {"role": "system", "content": system_prompt},
             {"role": "user", "content": [
                 {"type": "text", "text": "Please analyze this prescription image and extract the information."},
-                {"type": "image_url", "image_url": {"url": f"data:image/jpeg;base64,{image_b64}"}}
+                {"type": "image_url", "image_url": {"url": image.data_url}}
             ]}
         ]
-        payload = {"model": self.model, "messages": messages, "max_tokens": 500, "temperature": 0.1}
-        result = self._post("/chat/completions", payload, timeout=120)
-        if result:
-            content = result.get("choices", [{}])[0].get("message", {}).get("content", "").strip()
-            try:
-                return json.loads(content)
-            except json.JSONDecodeError:
-                return None
+        start_time = time.time()
+        with llm_caller("scout_prescription"):
+            content = route_llm_call(
+                TASK_PRESCRIPTION_OCR,
+                lambda client: client.chat_completion(messages, max_tokens=500, temperature=0.1, timeout=120), self)
+        self.vision_cache.record_upstream(image, (time.time() - start_time) * 1000)
+        if content:
+            extracted = parse_llm_json(content, source="prescription_ocr")
+            self.vision_cache.set("prescription", language, image, extracted)
+            return extracted
         return None
 
 class SehatSaharaApiClient:
     """Enhanced mental health specific client using API service"""
     
-    def __init__(self, model: str = "llama-3.1-8b-instant", api_key: str = None, base_url: str = "https://api.groq.com/openai/v1"):
+    def __init__(self, model: str = "llama-3.1-8b-instant", api_key: str = None, base_url: str = None):
         self.client = ApiClient(api_key=api_key, base_url=base_url, model=model)
         self.is_available = self.client.is_available
         self.logger = logging.getLogger(__name__)
@@ -393,7 +558,9 @@ Remember: Output must be valid JSON only, no explanations or markdown.
             )
             temperature = self.get_temperature_for_language(language)
             max_tokens = self.get_max_tokens_for_language(language)
-            response_text = self.client.chat_completion(messages, max_tokens=max_tokens, temperature=temperature)
+            with llm_caller("generation"):
+                response_text = route_llm_call(TASK_ACTION, lambda client: client.chat_completion(
+                    messages, max_tokens=max_tokens, temperature=temperature, json_mode=True), self.client)
 
             # Fallback to single-prompt generation if chat completion fails
             if not response_text:
@@ -419,17 +586,15 @@ User: {user_message}
 
 Response Template:
 Sehat Sahara: [Your response here]"""
-                response_text = self.client.generate_response(final_prompt)
+                with llm_caller("generation"):
+                    response_text = route_llm_call(TASK_ACTION, lambda client: client.generate_response(final_prompt), self.client)
 
             if response_text:
-                try:
-                    response_json = json.loads(response_text)
-                    if "response" in response_json and "action" in response_json:
-                        self.logger.info(f"API response generated successfully: {response_json['action']}")
-                        return response_json
-                except json.JSONDecodeError:
-                    self.logger.warning("API returned invalid JSON for response generation")
-                    return None
+                response_json = validate_action_payload(parse_llm_json(response_text, source="response_generation"))
+                if response_json:
+                    self.logger.info(f"API response generated successfully: {response_json['action']}")
+                    return response_json
+                self.logger.warning("API returned invalid JSON for response generation")
             return None
         except Exception as e:
             self.logger.error(f"Error in API response generation: {e}")
@@ -510,21 +675,18 @@ Sehat Sahara: [Your response here]"""
             )
 
             # Ask the model to return strictly JSON
-            response_text = self.client.chat_completion(messages, max_tokens=260, temperature=0.4)
+            with llm_caller("generation"):
+                response_text = route_llm_call(TASK_ACTION, lambda client: client.chat_completion(
+                    messages, max_tokens=260, temperature=0.4, json_mode=True), self.client)
 
-            # Try to parse JSON strictly
+            # Tolerant parse: a malformed completion would otherwise cost an extra intent-analysis call
             parsed = None
             if response_text:
-                json_start = response_text.find("{")
-                json_end = response_text.rfind("}") + 1
-                if json_start >= 0 and json_end > json_start:
-                    json_str = response_text[json_start:json_end]
-                    try:
-                        parsed = json.loads(json_str)
-                    except json.JSONDecodeError:
-                        parsed = None
-
-            if isinstance(parsed, dict) and "response" in parsed and "action" in parsed:
+                parsed = validate_action_payload(
+                    parse_llm_json(response_text, fallback_cost=1, source="sehatsahara_response")
+                )
+
+            if parsed:
                 # Return compact JSON string
                 return json.dumps(parsed, ensure_ascii=False)
 
@@ -592,16 +754,14 @@ Rules:
 
 User message: {user_message}
 """
-            response = self.client.generate_response(prompt=analysis_prompt, max_tokens=220, temperature=0.2)
+            with llm_caller("nlu"):
+                response = route_llm_call(TASK_INTENT, lambda client: client.generate_response(
+                    prompt=analysis_prompt, max_tokens=220, temperature=0.2, json_mode=True), self.client)
             if response:
-                json_start = response.find("{")
-                json_end = response.rfind("}") + 1
-                if json_start >= 0 and json_end > json_start:
-                    json_str = response[json_start:json_end]
-                    analysis = json.loads(json_str)
-                    # Minimal validation
-                    if "primary_intent" in analysis and "language_detected" in analysis and "urgency_level" in analysis:
-                        return analysis
+                analysis = parse_llm_json(response, source="intent_analysis")
+                # Minimal validation
+                if analysis and "primary_intent" in analysis and "language_detected" in analysis and "urgency_level" in analysis:
+                    return analysis
         except Exception as e:
             self.logger.error(f"Error in Sehat Sahara intent analysis: {e}")
         return None
@@ -648,6 +808,24 @@ User message: {user_message}
 sehat_sahara_client = SehatSaharaApiClient()  # new canonical instance
 groq_scout = GroqScoutClient()
 
+
+def _route_client_factory(candidate: RouteCandidate):
+    """Client for a route candidate, reusing the default clients when the candidate matches them"""
+    base_url = candidate.base_url.rstrip('/')
+    api_key = os.getenv(candidate.api_key_env) if candidate.api_key_env else None
+    if candidate.kind == "vision":
+        if (base_url, candidate.model) == (groq_scout.base_url, groq_scout.model):
+            return groq_scout
+        return GroqScoutClient(api_key=api_key, base_url=base_url, model=candidate.model)
+    default = sehat_sahara_client.client
+    if (base_url, candidate.model) == (default.base_url, default.model):
+        return default
+    return ApiClient(api_key=api_key, base_url=base_url, model=candidate.model)
+
+
+# Per-task provider/model routing with failover (configure via LLM_ROUTES_FILE / LLM_ROUTES_JSON)
+llm_router = LLMRouter(load_route_config(), client_factory=_route_client_factory)
+
 # Legacy/compatibility aliases
 api_llama3 = sehat_sahara_client
 ollama_llama3 = sehat_sahara_client
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Benchmark prompt-size reduction from rolling conversation summaries.
+Replays long synthetic sessions through ProgressiveConversationMemory and compares
+the context sent with the old full-history approach against summary + last 2 turns.
+"""
+
+import json
+import random
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from conversation_memory import ProgressiveConversationMemory
+from conversation_summarizer import ConversationSummarizer, turns_to_messages
+
+USER_MESSAGES = [
+    ("I have had a fever and headache since two days", "symptom_triage"),
+    ("Can you book an appointment with a general physician?", "appointment_booking"),
+    ("Mujhe pet mein dard ho raha hai", "symptom_triage"),
+    ("Where can I find paracetamol nearby?", "medicine_search"),
+    ("Show me my last prescription", "prescription_inquiry"),
+    ("When should I take my medicines?", "medicine_reminder"),
+    ("My cough is getting worse at night", "symptom_triage"),
+    ("Cancel my appointment for tomorrow", "appointment_cancellation"),
+]
+
+BOT_RESPONSE = (
+    "I understand. Based on what you shared I can help you with the next step. "
+    "Please tell me if the symptoms are getting worse, and I can connect you with a doctor "
+    "or show nearby pharmacies that have your medicines in stock."
+)
+
+
+def run_session(memory, summarizer, user_id, turns, legacy_turns):
+    """Replay one session, returning (legacy_chars, summary_chars) accumulated per request"""
+    legacy_chars = 0
+    summary_chars = 0
+    for _ in range(turns):
+        # Context is built before the new turn, as in /v1/predict
+        legacy_history = turns_to_messages(memory.get_conversation_context(user_id, turns=legacy_turns))
+        legacy_chars += sum(len(m['content']) for m in legacy_history)
+        summary_chars += sum(len(m['content']) for m in summarizer.build_context_history(user_id))
+
+        message, intent = random.choice(USER_MESSAGES)
+        memory.add_conversation_turn(
+            user_id=user_id,
+            user_message=message,
+            bot_response=json.dumps({'response': BOT_RESPONSE}),
+            nlu_result={'primary_intent': intent, 'language_detected': 'en'},
+            action_taken='CONTINUE_CONVERSATION'
+        )
+        summarizer.record_turn(user_id)
+        summarizer.wait_until_idle()
+    return legacy_chars, summary_chars
+
+
+def main():
+    random.seed(42)
+    print("=" * 60)
+    print("CONVERSATION SUMMARY PROMPT-SIZE BENCHMARK")
+    print("=" * 60)
+
+    for turns in (10, 30, 50):
+        for legacy_turns in (4, 50):
+            memory = ProgressiveConversationMemory()
+            summarizer = ConversationSummarizer(memory)  # local summaries, no network
+            legacy_total = 0
+            summary_total = 0
+            for i in range(20):
+                legacy, summary = run_session(memory, summarizer, f"bench_user_{i}", turns, legacy_turns)
+                legacy_total += legacy
+                summary_total += summary
+
+            reduction = 1 - summary_total / legacy_total if legacy_total else 0.0
+            print(f"turns={turns:3d} baseline_window={legacy_turns:2d} "
+                  f"baseline_chars={legacy_total:9d} summary_chars={summary_total:9d} "
+                  f"reduction={reduction:6.1%}")
+
+    print("\nBaseline window 4 matches the previous /v1/predict context; 50 is the full stored history.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Benchmark messages per second through multi-turn symptom-check flows for 100k concurrent
+users (every user one turn further each round), the memory held by their dialog states,
+and expiring them all.
+"""
+
+import gc
+import logging
+import os
+import sys
+import time
+import types
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import dialog_engine
+from dialog_engine import DialogStateStore
+from sehat_sahara_assistant import SehatSaharaAssistant
+
+USERS = 100000
+FLOWS = [
+    ["Namaste, mujhe bukhar hai", "do din se", "haan, khansi bhi hai", "book appointment"],
+    ["Hello, I have fever", "Since yesterday", "Yes, I also have cough", "No chest pain"],
+    ["ਮੈਨੂੰ sir dukh hai", "kal ton", "thakan vi hai", "appointment"],
+    ["mujhe sir dard hai", "kya dawai lun?", "ulti bhi ho rahi hai", "teen din se"],
+]
+
+
+def main():
+    logging.disable(logging.INFO)
+    print("=" * 60)
+    print("DIALOG ENGINE THROUGHPUT BENCHMARK")
+    print("=" * 60)
+
+    store = DialogStateStore(ttl_seconds=1800, max_users=USERS)
+    assistant = SehatSaharaAssistant(state_store=store)
+    user_ids = [f"user_{i}" for i in range(USERS)]
+
+    gc.collect()
+    messages = 0
+    start = time.perf_counter()
+    for turn in range(len(FLOWS[0])):
+        round_start = time.perf_counter()
+        for i, user_id in enumerate(user_ids):
+            assistant.process_message(FLOWS[i % len(FLOWS)][turn], user_id)
+        messages += USERS
+        print(f"  turn {turn + 1}: {USERS / (time.perf_counter() - round_start):9.0f} msg/s")
+    elapsed = time.perf_counter() - start
+    print(f"users={USERS} messages={messages} total={messages / elapsed:.0f} msg/s")
+
+    # States are ints in one ordered map; user id strings belong to the caller
+    state_bytes = sys.getsizeof(store._states) + sum(sys.getsizeof(v) for v in store._states.values())
+    print(f"dialog state memory: {state_bytes / 1024 / 1024:.1f}MB ({state_bytes / USERS:.0f} bytes/user)")
+
+    # An hour later every state is past its TTL
+    real_time = time.time
+    dialog_engine.time = types.SimpleNamespace(time=lambda: real_time() + 3600)
+    start = time.perf_counter()
+    expired = store.purge_expired()
+    print(f"purge_expired: {expired} states in {(time.perf_counter() - start) * 1000:.1f}ms, "
+          f"{len(store)} left")
+    dialog_engine.time = time
+
+
+if __name__ == "__main__":
+    main()
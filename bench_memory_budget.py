@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Benchmark bounded conversation memory under a Zipfian access pattern over 1M users.
+Each configuration runs in its own process so RSS growth is comparable: the unbounded dict
+keeps every profile ever touched resident, the budgeted map spills cold profiles to SQLite
+and rehydrates them on the next access.
+"""
+
+import itertools
+import logging
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from conversation_memory import ProgressiveConversationMemory
+
+USERS = 1_000_000
+OPERATIONS = 300_000
+ZIPF_EXPONENT = 1.1
+REMINDER = {
+    'name': 'Paracetamol', 'dosage': '500mg', 'frequency': 'twice daily',
+    'times': ['08:00', '20:00'], 'duration_days': 5, 'start_date': '2026-03-01'
+}
+MESSAGE = "Mujhe do din se bukhar aur sir dard hai, kya doctor se appointment mil sakti hai?"
+RESPONSE = '{"response": "Main aapke liye appointment book karne mein madad kar sakta hoon.", "action": "NAVIGATE_TO_APPOINTMENT_BOOKING"}'
+
+
+def zipf_user_ids(count, seed=7):
+    random.seed(seed)
+    cum_weights = list(itertools.accumulate(1.0 / (rank ** ZIPF_EXPONENT) for rank in range(1, USERS + 1)))
+    ranks = random.choices(range(USERS), cum_weights=cum_weights, k=count)
+    # Shuffle rank -> user id so hot users are not also the lowest ids
+    return [f"user_{(rank * 7919) % USERS}" for rank in ranks]
+
+
+def rss_mb():
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+
+
+def run(label, max_profiles, max_bytes, user_ids, results):
+    logging.disable(logging.INFO)
+    baseline_rss = rss_mb()
+    memory = ProgressiveConversationMemory()
+    with tempfile.TemporaryDirectory() as tmp:
+        if max_profiles or max_bytes:
+            memory.enable_profile_budget(max_profiles=max_profiles, max_bytes=max_bytes,
+                                         spill_path=os.path.join(tmp, 'spill.db'))
+        latencies = []
+        start = time.perf_counter()
+        for op, user_id in enumerate(user_ids):
+            op_start = time.perf_counter()
+            memory.create_or_get_user(user_id)
+            memory.get_conversation_context(user_id)
+            if op % 3 == 0:
+                memory.add_conversation_turn(user_id, MESSAGE, RESPONSE, {'primary_intent': 'appointment_booking'})
+            elif op % 10 == 1 and len(memory.get_medicine_reminders(user_id)) < 3:
+                memory.schedule_medicine_reminder(user_id, REMINDER)
+            latencies.append((time.perf_counter() - op_start) * 1000)
+        elapsed = time.perf_counter() - start
+
+        latencies.sort()
+        stats = memory.get_storage_stats().get('profiles', {})
+        resident = stats.get('resident', len(memory.user_profiles))
+        results.put({
+            'label': label,
+            'ops_per_sec': len(user_ids) / elapsed,
+            'p50_ms': latencies[len(latencies) // 2],
+            'p99_ms': latencies[int(len(latencies) * 0.99)],
+            'resident': resident,
+            'hit_rate': stats.get('hit_rate', 1.0),
+            'evictions': stats.get('evictions', 0),
+            'rehydrations': stats.get('rehydrations', 0),
+            'rss_growth_mb': rss_mb() - baseline_rss
+        })
+
+
+def main():
+    print("=" * 60)
+    print(f"BOUNDED MEMORY BENCHMARK ({USERS:,} users, zipf s={ZIPF_EXPONENT}, {OPERATIONS:,} ops)")
+    print("=" * 60)
+    user_ids = zipf_user_ids(OPERATIONS)
+    print(f"distinct users touched: {len(set(user_ids)):,}")
+
+    ctx = multiprocessing.get_context('fork')
+    configs = [
+        ('unbounded dict', 0, 0),
+        ('budget 50k profiles', 50_000, 0),
+        ('budget 10k profiles', 10_000, 0),
+        ('budget 32 MB', 0, 32 * 1024 * 1024),
+    ]
+    for label, max_profiles, max_bytes in configs:
+        results = ctx.Queue()
+        process = ctx.Process(target=run, args=(label, max_profiles, max_bytes, user_ids, results))
+        process.start()
+        r = results.get()
+        process.join()
+        print(f"{r['label']:22s} ops/s={r['ops_per_sec']:8.0f} p50={r['p50_ms']:.3f}ms p99={r['p99_ms']:.3f}ms "
+              f"resident={r['resident']:7d} hit_rate={r['hit_rate']:.3f} evictions={r['evictions']:7d} "
+              f"rehydrations={r['rehydrations']:7d} rss_growth={r['rss_growth_mb']:.0f}MB")
+
+
+if __name__ == "__main__":
+    main()
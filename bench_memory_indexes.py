@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Benchmark conversation memory housekeeping at 1M sessions.
+Compares the previous full scans (delete_user_data walking every session, cleanup_old_sessions
+checking every start_time, get_system_stats walking every profile) with the user->sessions
+index, the session expiry heap and the incremental aggregate counters.
+"""
+
+import logging
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from conversation_memory import ProgressiveConversationMemory
+
+SESSIONS = 1_000_000
+SESSIONS_PER_USER = 4
+DELETES = 200
+
+
+def build_memory():
+    memory = ProgressiveConversationMemory(max_history_per_user=1)
+    start = datetime.now() - timedelta(hours=48)
+    for i in range(SESSIONS):
+        user_id = f"user_{i // SESSIONS_PER_USER}"
+        if i % SESSIONS_PER_USER == 0:
+            memory.create_or_get_user(user_id)
+        # Sessions start evenly over the last 48 hours, oldest first
+        memory.session_contexts[f"session_{i}"] = {
+            'user_id': user_id, 'start_time': start + timedelta(seconds=i * 48 * 3600 / SESSIONS),
+            'turns_count': 1, 'actions_taken': []
+        }
+    memory._rebuild_indexes()
+    return memory
+
+
+def legacy_delete_sessions(memory, user_id):
+    sessions_to_remove = [
+        session_id for session_id, context in memory.session_contexts.items()
+        if context.get('user_id') == user_id
+    ]
+    for session_id in sessions_to_remove:
+        del memory.session_contexts[session_id]
+
+
+def legacy_cleanup(memory, cutoff_time):
+    old_sessions = [session_id for session_id, context in memory.session_contexts.items()
+                    if context.get('start_time', datetime.now()) < cutoff_time]
+    for session_id in old_sessions:
+        del memory.session_contexts[session_id]
+    return len(old_sessions)
+
+
+def legacy_stats(memory):
+    active = len([p for p in memory.user_profiles.values() if (datetime.now() - p.last_interaction).days < 7])
+    tasks = sum([p.total_appointments_booked + p.total_health_records_accessed for p in memory.user_profiles.values()])
+    return active, tasks
+
+
+def timed(fn, repeat=1):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) / repeat * 1000, result
+
+
+def main():
+    logging.disable(logging.INFO)
+    print("=" * 60)
+    print(f"MEMORY INDEX BENCHMARK ({SESSIONS:,} sessions)")
+    print("=" * 60)
+
+    memory = build_memory()
+    users = [f"user_{i * 997 % (SESSIONS // SESSIONS_PER_USER)}" for i in range(DELETES)]
+    # Cutoff at the 1st percentile of session age, so cleanup removes 1% of sessions
+    cutoff_hours = 48 * 0.99
+
+    legacy_ms, _ = timed(lambda: [legacy_delete_sessions(memory, u) for u in users[:20]])
+    indexed_ms, _ = timed(lambda: [memory.delete_user_data(u) for u in users[20:]])
+    print(f"delete_user_data:     legacy={legacy_ms / 20:9.3f}ms/op  indexed={indexed_ms / (DELETES - 20):9.3f}ms/op")
+
+    cutoff_time = datetime.now() - timedelta(hours=cutoff_hours)
+    legacy_ms, legacy_removed = timed(lambda: legacy_cleanup(memory, cutoff_time))
+    memory._rebuild_indexes()
+    indexed_ms, removed = timed(lambda: memory.cleanup_old_sessions(hours=cutoff_hours * 0.99))
+    print(f"cleanup_old_sessions: legacy={legacy_ms:9.3f}ms ({legacy_removed} removed)  "
+          f"indexed={indexed_ms:9.3f}ms ({removed} removed)")
+
+    legacy_ms, _ = timed(lambda: legacy_stats(memory), repeat=3)
+    indexed_ms, _ = timed(memory.get_system_stats, repeat=100)
+    print(f"get_system_stats:     legacy={legacy_ms:9.3f}ms  indexed={indexed_ms:9.3f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Benchmark per-write persistence latency of conversation memory.
+Compares the old full-file rewrite (save_to_file with indent=2 on every reminder write)
+against journal appends, buffered and fsync-waited, at 10k and 100k users.
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from conversation_memory import ProgressiveConversationMemory
+
+REMINDER = {
+    'name': 'Paracetamol', 'dosage': '500mg', 'frequency': 'twice daily',
+    'times': ['08:00', '20:00'], 'duration_days': 5, 'start_date': '2026-03-01'
+}
+
+
+def populate(memory, users):
+    for i in range(users):
+        user_id = f"user_{i}"
+        memory.create_or_get_user(user_id, preferred_language='hi')
+        memory.add_conversation_turn(user_id, "Mujhe bukhar hai", '{"response": "..."}',
+                                     {'primary_intent': 'symptom_triage', 'language_detected': 'hi'})
+        memory.user_profiles[user_id].user_data['medicine_reminders'] = []
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def time_writes(write, count):
+    samples = []
+    for i in range(count):
+        start = time.perf_counter()
+        write(i)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def report(label, samples):
+    print(f"  {label:28s} n={len(samples):5d} p50={percentile(samples, 0.5):9.3f}ms "
+          f"p99={percentile(samples, 0.99):9.3f}ms max={max(samples):9.3f}ms")
+
+
+def main():
+    print("=" * 60)
+    print("CONVERSATION MEMORY WRITE LATENCY BENCHMARK")
+    print("=" * 60)
+
+    for users in (10_000, 100_000):
+        print(f"\nusers={users}")
+        with tempfile.TemporaryDirectory() as tmp:
+            memory = ProgressiveConversationMemory()
+            populate(memory, users)
+
+            legacy_path = os.path.join(tmp, 'legacy.json')
+            legacy = time_writes(lambda i: (memory.schedule_medicine_reminder(f"user_{i}", REMINDER),
+                                            memory.save_to_file(legacy_path)),
+                                 5 if users > 10_000 else 20)
+            report("full rewrite (old)", legacy)
+            print(f"  full file size              {os.path.getsize(legacy_path) / 1e6:.1f} MB")
+
+            path = os.path.join(tmp, 'conversation_memory.json')
+            memory.enable_journal(path, compact_every=0)
+            buffered = time_writes(lambda i: memory.schedule_medicine_reminder(f"user_{i % users}", REMINDER), 5000)
+            report("journal append (buffered)", buffered)
+
+            memory.journal.sync_appends = True
+            synced = time_writes(lambda i: memory.schedule_medicine_reminder(f"user_{i % users}", REMINDER), 200)
+            report("journal append (fsync wait)", synced)
+            memory.journal.sync_appends = False
+
+            stats = memory.journal.get_stats()
+            print(f"  fsync batches={stats['batches']} records={stats['appended']} "
+                  f"fsync_p50={stats['fsync_ms']['p50']}ms")
+
+            start = time.perf_counter()
+            memory.journal.compact()
+            print(f"  compaction                  {(time.perf_counter() - start) * 1000:9.1f}ms (off the request path)")
+            memory.schedule_medicine_reminder("user_0", REMINDER)
+            memory.journal.stop()
+
+            start = time.perf_counter()
+            restored = ProgressiveConversationMemory()
+            replayed = restored.enable_journal(path)
+            restored.journal.stop()
+            print(f"  startup snapshot + replay   {(time.perf_counter() - start) * 1000:9.1f}ms "
+                  f"({len(restored.user_profiles)} users, {replayed} records)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Benchmark conversation memory snapshots at 100k profiles.
+Compares the JSON snapshot (save_to_file / load_from_file) against the sharded binary
+snapshot: full save, incremental save after touching 1% of users, load, and size on disk.
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from conversation_memory import ProgressiveConversationMemory
+from memory_snapshot import ShardedSnapshot, MSGPACK_AVAILABLE, ZSTD_AVAILABLE
+
+USERS = 100_000
+REMINDER = {
+    'name': 'Paracetamol', 'dosage': '500mg', 'frequency': 'twice daily',
+    'times': ['08:00', '20:00'], 'duration_days': 5, 'start_date': '2026-03-01'
+}
+
+
+def populate(memory, users):
+    for i in range(users):
+        user_id = f"user_{i}"
+        memory.create_or_get_user(user_id, preferred_language='hi')
+        for turn in range(3):
+            memory.add_conversation_turn(user_id, f"Mujhe bukhar hai {turn}", '{"response": "..."}',
+                                         {'primary_intent': 'symptom_triage', 'language_detected': 'hi'},
+                                         session_id=f"session_{i}")
+        if i % 4 == 0:
+            memory.schedule_medicine_reminder(user_id, REMINDER)
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, (time.perf_counter() - start) * 1000
+
+
+def main():
+    print("=" * 60)
+    print("CONVERSATION MEMORY SNAPSHOT BENCHMARK")
+    print("=" * 60)
+    print(f"users={USERS} msgpack={MSGPACK_AVAILABLE} zstd={ZSTD_AVAILABLE}")
+
+    memory = ProgressiveConversationMemory()
+    populate(memory, USERS)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = os.path.join(tmp, 'conversation_memory.json')
+        _, save_ms = timed(lambda: memory.save_to_file(json_path))
+        restored = ProgressiveConversationMemory()
+        _, load_ms = timed(lambda: restored.load_from_file(json_path))
+        print(f"\n  json   save {save_ms:9.1f}ms  load {load_ms:9.1f}ms  "
+              f"size {os.path.getsize(json_path) / 1e6:7.1f} MB")
+
+        memory.snapshot = ShardedSnapshot(os.path.join(tmp, 'conversation_memory.snap'))
+        stats, full_ms = timed(memory.save_snapshot)
+        print(f"  binary full save {full_ms:9.1f}ms  shards={stats['shards_written']} "
+              f"size {memory.snapshot.size_bytes() / 1e6:7.1f} MB")
+
+        for i in range(0, USERS, 100):  # 1% of users change between compactions
+            memory.add_conversation_turn(f"user_{i}", "Dawai kab leni hai", '{"response": "..."}',
+                                         {'primary_intent': 'prescription_inquiry'})
+        stats, incremental_ms = timed(memory.save_snapshot)
+        print(f"  binary 1% save   {incremental_ms:9.1f}ms  shards={stats['shards_written']} "
+              f"written {stats['bytes_written'] / 1e6:7.1f} MB")
+
+        for shards in (64, 256):
+            directory = os.path.join(tmp, f'snap_{shards}')
+            memory.snapshot = ShardedSnapshot(directory, shards=shards)
+            memory.save_snapshot()
+            for i in range(0, USERS, 1000):  # 0.1%
+                memory.add_conversation_turn(f"user_{i}", "ok", '{"response": "..."}', {'primary_intent': 'general_inquiry'})
+            stats, ms = timed(memory.save_snapshot)
+            print(f"  shards={shards:<4d} 0.1% save {ms:8.1f}ms  shards={stats['shards_written']}")
+
+        directory = memory.snapshot.directory
+        for workers in (1, 4):
+            restored = ProgressiveConversationMemory()
+            restored.snapshot = ShardedSnapshot(directory, shards=256, workers=workers)
+            _, ms = timed(restored.load_snapshot)
+            print(f"  binary load workers={workers}  {ms:9.1f}ms  ({len(restored.user_profiles)} users)")
+
+
+if __name__ == "__main__":
+    main()
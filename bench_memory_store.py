@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Benchmark cross-worker conversation memory.
+Runs N worker processes against one store with a read-heavy mix of reminder/task traffic and
+measures throughput plus cross-worker consistency: the share of writes made by one worker that
+another worker sees on its very next read. The per-process dict baseline shows what gunicorn
+workers saw before the shared store.
+"""
+
+import logging
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from conversation_memory import ProgressiveConversationMemory
+from memory_store import SQLiteMemoryStore
+
+USERS = 2000
+OPS_PER_WORKER = 4000
+REMINDER = {
+    'name': 'Paracetamol', 'dosage': '500mg', 'frequency': 'twice daily',
+    'times': ['08:00', '20:00'], 'duration_days': 5, 'start_date': '2026-03-01'
+}
+
+
+def worker(worker_id, mode, path, revalidate, published, results):
+    logging.disable(logging.INFO)
+    random.seed(worker_id)
+    memory = ProgressiveConversationMemory()
+    if mode == 'sqlite':
+        memory.attach_store(SQLiteMemoryStore(path), cache_entries=500, revalidate_seconds=revalidate)
+
+    checked = seen = 0
+    start = time.perf_counter()
+    for op in range(OPS_PER_WORKER):
+        user_id = f"user_{random.randint(0, USERS - 1)}"
+        roll = random.random()
+        if roll < 0.7:
+            memory.get_medicine_reminders(user_id)
+            memory.get_current_task(user_id)
+        elif roll < 0.85:
+            memory.schedule_medicine_reminder(user_id, REMINDER) if roll < 0.78 else \
+                memory.set_current_task(user_id, 'appointment_booking', {'step': op})
+        else:
+            # Consistency probe: publish a write, then read another worker's latest published write
+            memory.update_user_preferences(f"probe_{worker_id}", {'location': str(op)})
+            published[worker_id] = op
+            writer = random.choice([w for w in range(len(published)) if w != worker_id])
+            expected = published[writer]
+            if expected < 0:
+                continue
+            checked += 1
+            profile = memory.user_profiles.get(f"probe_{writer}")
+            current = int(profile.location) if profile and profile.location else -1
+            seen += current >= expected
+    results.put((time.perf_counter() - start, checked, seen))
+
+
+def run(mode, workers, revalidate=0.0):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'memory.db')
+        if mode == 'sqlite':
+            SQLiteMemoryStore(path)  # create schema before the workers race for it
+        ctx = multiprocessing.get_context('fork')
+        published, results = ctx.Array('i', [-1] * workers), ctx.Queue()
+        processes = [ctx.Process(target=worker, args=(i, mode, path, revalidate, published, results))
+                     for i in range(workers)]
+        wall_start = time.perf_counter()
+        for p in processes:
+            p.start()
+        outcomes = [results.get() for _ in processes]
+        for p in processes:
+            p.join()
+        wall = time.perf_counter() - wall_start
+
+    checked = sum(o[1] for o in outcomes)
+    seen = sum(o[2] for o in outcomes)
+    label = mode if mode != 'sqlite' else f"sqlite revalidate={revalidate * 1000:.0f}ms"
+    print(f"workers={workers} {label:28s} ops/s={workers * OPS_PER_WORKER / wall:9.0f} "
+          f"consistency={seen / checked if checked else 0.0:6.1%} (probes={checked})")
+
+
+def main():
+    print("=" * 60)
+    print("CROSS-WORKER CONVERSATION MEMORY BENCHMARK")
+    print("=" * 60)
+    for workers in (4, 8):
+        run('local', workers)
+        run('sqlite', workers, revalidate=0.0)
+        run('sqlite', workers, revalidate=0.5)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Benchmark the compact UserProfile layout.
+Compares bytes per profile (tracemalloc) and per-turn append cost of the slotted profile with
+its ring-buffer history against the previous layout: a __dict__ object whose history is a list
+of per-turn dicts trimmed by slicing.
+"""
+
+import gc
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from types import SimpleNamespace
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from conversation_memory import UserProfile
+from turn_history import TurnRecord
+
+PROFILES = 5000
+MESSAGE = "Mujhe do din se bukhar hai, kya doctor se appointment mil sakti hai?"
+RESPONSE = '{"response": "Main appointment book karne mein madad kar sakta hoon.", "action": "NAVIGATE_TO_APPOINTMENT_BOOKING"}'
+
+
+def legacy_turn(i):
+    return {
+        'timestamp': datetime.now().isoformat(),
+        'user_message': MESSAGE,
+        'bot_response': RESPONSE,
+        'intent': 'appointment_booking',
+        'language': 'hi',
+        'urgency_level': 'low',
+        'action_taken': 'NAVIGATE_TO_APPOINTMENT_BOOKING',
+        'session_id': f"session_{i % 7}"
+    }
+
+
+def legacy_append(profile, i, max_history):
+    profile.conversation_history.append(legacy_turn(i))
+    if len(profile.conversation_history) > max_history:
+        profile.conversation_history = profile.conversation_history[-max_history:]
+
+
+def compact_append(profile, i, max_history):
+    profile.conversation_history.append(TurnRecord.build(
+        MESSAGE, RESPONSE, intent='appointment_booking', language='hi', urgency='low',
+        action='NAVIGATE_TO_APPOINTMENT_BOOKING', session_id=f"session_{i % 7}"))
+
+
+def make_legacy(i):
+    data = UserProfile(user_id=f"user_{i}").to_dict()
+    data['conversation_history'] = []
+    data['last_interaction'] = datetime.now()
+    data['last_appointment_date'] = None
+    return SimpleNamespace(**data)
+
+
+def make_compact(i):
+    return UserProfile(user_id=f"user_{i}")
+
+
+def bytes_per_profile(factory, append, turns):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    profiles = [factory(i) for i in range(PROFILES)]
+    for profile in profiles:
+        for i in range(turns):
+            append(profile, i, 50)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (after - before) / PROFILES
+
+
+def append_cost_us(factory, append, appends=200_000):
+    profile = factory(0)
+    for i in range(50):
+        append(profile, i, 50)  # start at capacity so every append also trims
+    start = time.perf_counter()
+    for i in range(appends):
+        append(profile, i, 50)
+    return (time.perf_counter() - start) / appends * 1e6
+
+
+def main():
+    print("=" * 60)
+    print("USER PROFILE LAYOUT BENCHMARK")
+    print("=" * 60)
+    for turns in (0, 10, 50):
+        legacy = bytes_per_profile(make_legacy, legacy_append, turns)
+        compact = bytes_per_profile(make_compact, compact_append, turns)
+        print(f"turns={turns:2d} legacy={legacy:9.0f} B/profile compact={compact:9.0f} B/profile "
+              f"saving={1 - compact / legacy:6.1%}")
+
+    legacy = append_cost_us(make_legacy, legacy_append)
+    compact = append_cost_us(make_compact, compact_append)
+    print(f"append at capacity: legacy={legacy:.2f}us compact={compact:.2f}us")
+
+
+if __name__ == "__main__":
+    main()
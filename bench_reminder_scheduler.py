@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Benchmark the medicine reminder scheduler with 1M active reminders.
+Compares the previous per-poll recomputation in get_reminder_alerts (and the full scan it would
+take to find what is due across all users) with the scheduler's per-user pending lookup, its
+heap updates on add/adherence/disable, and firing a simulated day of slots into the feed.
+"""
+
+import logging
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from conversation_memory import ProgressiveConversationMemory
+
+REMINDERS = 1_000_000
+REMINDERS_PER_USER = 4
+LOOKUPS = 20_000
+UPDATES = 20_000
+
+
+def random_times(rng):
+    return sorted({f"{rng.randrange(6, 23):02d}:{rng.choice((0, 15, 30, 45)):02d}" for _ in range(rng.randint(1, 3))})
+
+
+def build_memory(rng):
+    memory = ProgressiveConversationMemory(max_history_per_user=1)
+    for i in range(REMINDERS):
+        user_id = f"user_{i // REMINDERS_PER_USER}"
+        if i % REMINDERS_PER_USER == 0:
+            profile = memory.create_or_get_user(user_id)
+            profile.user_data['medicine_reminders'] = []
+        memory.user_profiles[user_id].user_data['medicine_reminders'].append({
+            'medicine_name': f"medicine_{i % REMINDERS_PER_USER}", 'dosage': '1 tab', 'frequency': 'daily',
+            'times': random_times(rng), 'duration_days': 30, 'start_date': '2026-03-01',
+            'instructions': '', 'reminder_enabled': True
+        })
+    return memory
+
+
+def per_op_us(fn, args):
+    start = time.perf_counter()
+    for arg in args:
+        fn(arg)
+    return (time.perf_counter() - start) / len(args) * 1e6
+
+
+def main():
+    logging.disable(logging.INFO)
+    print("=" * 60)
+    print(f"REMINDER SCHEDULER BENCHMARK ({REMINDERS:,} reminders)")
+    print("=" * 60)
+    rng = random.Random(7)
+    memory = build_memory(rng)
+    users = [f"user_{rng.randrange(REMINDERS // REMINDERS_PER_USER)}" for _ in range(LOOKUPS)]
+
+    legacy_us = per_op_us(memory.get_reminder_alerts, users)
+    start = time.perf_counter()
+    legacy_scan = sum(len(memory.get_reminder_alerts(uid)) for uid in list(memory.user_profiles))
+    legacy_scan_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    scheduler = memory.enable_reminder_scheduler(start=False)
+    index_s = time.perf_counter() - start
+    indexed_us = per_op_us(memory.get_reminder_alerts, users)
+    print(f"index build:          {index_s:.1f}s for {scheduler.reminder_count():,} reminders")
+    print(f"alerts per poll:      legacy={legacy_us:8.2f}us  scheduler={indexed_us:8.2f}us")
+    print(f"due across all users: legacy full scan={legacy_scan_s:.2f}s ({legacy_scan:,} alerts)  "
+          f"scheduler=pending per user, pushed as slots fire")
+
+    reminder = {'name': 'Iron', 'dosage': '1 tab', 'frequency': 'daily', 'times': ['21:00'],
+                'duration_days': 30, 'start_date': '2026-03-01'}
+    add_us = per_op_us(lambda uid: memory.schedule_medicine_reminder(uid, reminder), users[:UPDATES])
+    adherence_us = per_op_us(lambda uid: memory.update_reminder_adherence(uid, 'medicine_0', '08:00'), users[:UPDATES])
+    disable_us = per_op_us(lambda uid: memory.set_reminder_enabled(uid, 'medicine_1', False), users[:UPDATES])
+    print(f"updates:              add={add_us:.2f}us  adherence={adherence_us:.2f}us  disable={disable_us:.2f}us")
+
+    # Fire one simulated day minute by minute
+    day = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+    start = time.perf_counter()
+    fired = sum(scheduler.poll(day + timedelta(minutes=m)) for m in range(24 * 60))
+    elapsed = time.perf_counter() - start
+    print(f"simulated day:        fired={fired:,} in {elapsed:.2f}s ({fired / elapsed:,.0f} slots/s), "
+          f"feed published={scheduler.feed.published:,}")
+
+
+if __name__ == "__main__":
+    main()
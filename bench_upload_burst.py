@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Upload burst benchmark for /v1/upload-prescription.
+Fires a burst of concurrent uploads at a running server and reports how long each
+request held an HTTP worker, plus the average worker occupancy during the burst.
+Optionally polls /v1/jobs/<id> until the background OCR jobs finish.
+
+Usage: python bench_upload_burst.py --base-url http://localhost:5000 --user-id PAT123 --burst 20
+"""
+
+import argparse
+import base64
+import json
+import os
+import statistics
+import sys
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+
+def _post_json(url, payload, timeout=180):
+    request = urllib.request.Request(url, data=json.dumps(payload).encode('utf-8'),
+                                     headers={'Content-Type': 'application/json'}, method='POST')
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return response.status, json.loads(response.read() or b'{}')
+    except urllib.error.HTTPError as e:
+        return e.code, {}
+
+
+def _get_json(url, timeout=30):
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            return response.status, json.loads(response.read() or b'{}')
+    except urllib.error.HTTPError as e:
+        return e.code, {}
+
+
+def upload_once(base_url, user_id, image_data):
+    start = time.time()
+    status, body = _post_json(f"{base_url}/v1/upload-prescription", {
+        'userId': user_id, 'providerName': 'Burst Test Clinic', 'imageData': image_data
+    })
+    return start, time.time(), status, body
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Burst uploads and report HTTP worker occupancy")
+    parser.add_argument('--base-url', default=os.environ.get('BENCH_BASE_URL', 'http://localhost:5000'))
+    parser.add_argument('--user-id', required=True, help="patient_id of an existing test user")
+    parser.add_argument('--image', help="path to a prescription photo (defaults to a tiny placeholder)")
+    parser.add_argument('--burst', type=int, default=20)
+    parser.add_argument('--wait-jobs', action='store_true', help="poll job status until all jobs finish")
+    args = parser.parse_args()
+
+    if args.image:
+        with open(args.image, 'rb') as f:
+            image_data = "data:image/jpeg;base64," + base64.b64encode(f.read()).decode('ascii')
+    else:
+        image_data = "data:image/jpeg;base64," + base64.b64encode(b'\xff\xd8\xff\xe0' + b'\x00' * 1024).decode('ascii')
+
+    print("=" * 60)
+    print(f"UPLOAD BURST: {args.burst} concurrent uploads -> {args.base_url}")
+    print("=" * 60)
+
+    burst_start = time.time()
+    with ThreadPoolExecutor(max_workers=args.burst) as pool:
+        results = list(pool.map(lambda _: upload_once(args.base_url, args.user_id, image_data), range(args.burst)))
+    burst_end = time.time()
+
+    hold_times = [(end - start) * 1000 for start, end, _, _ in results]
+    statuses = {}
+    for _, _, status, _ in results:
+        statuses[status] = statuses.get(status, 0) + 1
+    wall_ms = (burst_end - burst_start) * 1000
+
+    print(f"Status codes: {statuses}")
+    print(f"Request hold time ms: p50={statistics.median(hold_times):.0f} "
+          f"p95={sorted(hold_times)[int(0.95 * (len(hold_times) - 1))]:.0f} max={max(hold_times):.0f}")
+    print(f"Burst wall time: {wall_ms:.0f} ms")
+    print(f"Average HTTP workers occupied during burst: {sum(hold_times) / wall_ms:.2f}")
+
+    job_ids = [body.get('jobId') for _, _, _, body in results if body.get('jobId')]
+    if args.wait_jobs and job_ids:
+        pending = set(job_ids)
+        jobs_start = time.time()
+        while pending and time.time() - jobs_start < 900:
+            for job_id in list(pending):
+                _, body = _get_json(f"{args.base_url}/v1/jobs/{job_id}?userId={args.user_id}")
+                if body.get('job', {}).get('status') in ('succeeded', 'failed'):
+                    pending.discard(job_id)
+            time.sleep(1)
+        print(f"Background jobs drained in {time.time() - jobs_start:.1f}s ({len(pending)} still pending)")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
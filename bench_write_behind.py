@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Benchmark request-thread latency of conversation memory mutations.
+Compares synchronous persistence against the write-behind flusher for
+add_prescription_summary, update_reminder_adherence and set_current_task,
+with the local journal and with a shared SQLite store.
+"""
+
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from conversation_memory import ProgressiveConversationMemory
+from memory_store import SQLiteMemoryStore
+
+USERS = 2000
+ROUNDS = 3
+REMINDER = {
+    'name': 'Paracetamol', 'dosage': '500mg', 'frequency': 'twice daily',
+    'times': ['08:00', '20:00'], 'duration_days': 5, 'start_date': '2026-03-01'
+}
+PRESCRIPTION = {'doctor_name': 'Dr. Kaur', 'medicines': [{'name': 'Paracetamol', 'dosage': '500mg'}]}
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def populate(memory):
+    for i in range(USERS):
+        user_id = f"user_{i}"
+        for turn in range(5):
+            memory.add_conversation_turn(user_id, f"Mujhe bukhar hai {turn}", '{"response": "..."}',
+                                         {'primary_intent': 'symptom_triage'})
+        memory.schedule_medicine_reminder(user_id, REMINDER)
+
+
+def run(memory):
+    """Per-call latency in microseconds for each mutation"""
+    mutations = {
+        'add_prescription_summary': lambda uid: memory.add_prescription_summary(uid, PRESCRIPTION),
+        'update_reminder_adherence': lambda uid: memory.update_reminder_adherence(uid, 'Paracetamol', '08:05'),
+        'set_current_task': lambda uid: memory.set_current_task(uid, 'appointment_booking', {'step': 1}),
+    }
+    results = {}
+    for name, mutate in mutations.items():
+        samples = []
+        for _ in range(ROUNDS):
+            for i in range(USERS):
+                start = time.perf_counter()
+                mutate(f"user_{i}")
+                samples.append((time.perf_counter() - start) * 1e6)
+        results[name] = samples
+    return results
+
+
+def report(label, results):
+    for name, samples in results.items():
+        print(f"  {label:13s} {name:26s} p50={percentile(samples, 0.5):8.1f}us "
+              f"p99={percentile(samples, 0.99):8.1f}us")
+
+
+def main():
+    logging.disable(logging.INFO)
+    print("=" * 60)
+    print("CONVERSATION MEMORY MUTATION LATENCY BENCHMARK")
+    print("=" * 60)
+
+    for backend in ('journal', 'sqlite store'):
+        print(f"\nbackend={backend} users={USERS}")
+        for write_behind in (False, True):
+            with tempfile.TemporaryDirectory() as tmp:
+                memory = ProgressiveConversationMemory()
+                if backend == 'journal':
+                    memory.enable_journal(os.path.join(tmp, 'conversation_memory.json'), compact_every=0)
+                else:
+                    memory.attach_store(SQLiteMemoryStore(os.path.join(tmp, 'memory.db')),
+                                        cache_entries=USERS * 2, revalidate_seconds=5)
+                populate(memory)
+                if write_behind:
+                    memory.enable_write_behind()
+                report('write-behind' if write_behind else 'synchronous', run(memory))
+                if write_behind:
+                    start = time.perf_counter()
+                    memory.stop_write_behind()
+                    stats = memory.write_behind.get_stats()
+                    print(f"  drain on stop {(time.perf_counter() - start) * 1000:.1f}ms  "
+                          f"enqueued={stats['enqueued']} written={stats['written']} "
+                          f"coalesced={stats['coalesced']} lag_p99={stats['lag_ms']['p99']}ms")
+                if memory.journal:
+                    memory.journal.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Sehat Sahara Bounded Cache
+Thread-safe LRU cache with optional TTL, shared by the LLM result caches
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+
+class BoundedTTLCache:
+    """Thread-safe LRU cache with a maximum size and per-entry time-to-live"""
+
+    def __init__(self, max_entries: int = 512, ttl_seconds: Optional[float] = 3600):
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _expired(self, stored_at: float, now: float) -> bool:
+        return self.ttl_seconds is not None and now - stored_at > self.ttl_seconds
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        now = time.time()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or self._expired(entry[0], now):
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (time.time(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def find(self, predicate: Callable[[Hashable], bool]) -> Any:
+        """Return the most recently used live value whose key matches `predicate`"""
+        now = time.time()
+        with self._lock:
+            for key in reversed(self._data):
+                stored_at, value = self._data[key]
+                if not self._expired(stored_at, now) and predicate(key):
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+            self.misses += 1
+            return None
+
+    def items(self) -> List[Tuple[Hashable, Any]]:
+        """Live (key, value) pairs, least recently used first"""
+        now = time.time()
+        with self._lock:
+            return [(key, value) for key, (stored_at, value) in self._data.items() if not self._expired(stored_at, now)]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get_stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            'entries': len(self._data),
+            'max_entries': self.max_entries,
+            'ttl_seconds': self.ttl_seconds,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': round(self.hits / total, 3) if total else 0.0
+        }
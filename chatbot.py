@@ -42,10 +42,43 @@ from ko import ProgressiveResponseGenerator
 # Remove crisis detector import and usage
 # from optimized_crisis_detector import OptimizedCrisisDetector  # removed
 
-from api_ollama_integration import sehat_sahara_client, groq_scout
+from api_ollama_integration import sehat_sahara_client, groq_scout, llm_router
+from llm_json import get_parse_stats
+from single_flight import get_single_flight_stats
+from llm_telemetry import get_llm_telemetry_stats
+from sql_instrumentation import sql_instrumentation, get_sql_stats
+from llm_rate_limiter import (
+    llm_priority, get_rate_limiter_stats,
+    PRIORITY_EMERGENCY, PRIORITY_TRIAGE, PRIORITY_NORMAL, PRIORITY_BACKGROUND, PRIORITY_LOW
+)
+
+from image_preprocessing import decode_base64_image, detect_mime_type
+
+IMAGE_EXTENSIONS = {
+    'image/jpeg': 'jpg', 'image/png': 'png', 'image/webp': 'webp',
+    'image/gif': 'gif', 'image/bmp': 'bmp', 'image/heic': 'heic'
+}
 
 # Import Sehat Sahara Assistant
 from sehat_sahara_assistant import SehatSaharaAssistant
+from dialog_engine import DialogStateStore
+
+# Background job queue
+from job_queue import JobQueue, JobContext, JobRetryableError
+from precomputed_answers import (
+    precomputed_answers, build_precomputed_answers, next_nightly_run, SAFE_INTENTS,
+    PrecomputedAnswerReloader
+)
+
+# Rolling per-user conversation summaries for compact LLM prompts
+from conversation_summarizer import ConversationSummarizer
+from memory_store import create_memory_store
+from medicine_reminders import reminder_repository, ReminderTablePoller
+from recent_turns import RecentTurns, assistant_text, conversation_turn_loader
+from listing_queries import patient_appointments, doctor_day_appointments, pharmacy_dashboard
+
+# Upstream LLM budget for one /v1/predict turn; slower queue waits fall back locally
+PREDICT_LLM_DEADLINE_SECONDS = float(os.environ.get('PREDICT_LLM_DEADLINE_SECONDS', 20))
 
 # Configure comprehensive logging with multiple handlers
 logger = logging.getLogger()
@@ -167,7 +200,7 @@ state_lock = threading.Lock()
 def initialize_ai_components():
     """Initialize all AI components with Ollama integration and proper error handling"""
     global nlu_processor, response_generator, conversation_memory, sehat_sahara_assistant
-    global system_status
+    global conversation_summarizer, system_status
 
     logger.info("🚀 Initializing Sehat Sahara Health Assistant...")
 
@@ -196,7 +229,16 @@ def initialize_ai_components():
 
         # Initialize Sehat Sahara Assistant (new primary component)
         logger.info("🤖 Initializing Sehat Sahara Assistant...")
-        sehat_sahara_assistant = SehatSaharaAssistant()
+        # Symptom-check dialog state expires after DIALOG_STATE_TTL_MINUTES without a message;
+        # with MEMORY_STORE_URL it is shared by every worker and survives restarts
+        sehat_sahara_assistant = SehatSaharaAssistant(
+            lock_stripes=int(os.environ.get('USER_LOCK_STRIPES', 64)),
+            state_store=DialogStateStore(
+                ttl_seconds=float(os.environ.get('DIALOG_STATE_TTL_MINUTES', 30)) * 60,
+                max_users=int(os.environ.get('DIALOG_STATE_MAX_USERS', 200000)),
+                store=create_memory_store(os.environ.get('MEMORY_STORE_URL', ''))
+            )
+        )
         system_status['sehat_sahara_assistant'] = True
         logger.info("✅ Sehat Sahara Assistant initialized successfully")
 
@@ -216,10 +258,58 @@ def initialize_ai_components():
         logger.info("Initializing Progressive Conversation Memory...")
         from conversation_memory import ProgressiveConversationMemory  # keep memory
         global conversation_memory
-        conversation_memory = ProgressiveConversationMemory()
+        conversation_memory = ProgressiveConversationMemory(
+            lock_stripes=int(os.environ.get('USER_LOCK_STRIPES', 64)))
+        # Shared store so all gunicorn workers see the same reminders and task state;
+        # single-process deployments keep the local snapshot + journal
+        memory_store = create_memory_store(os.environ.get('MEMORY_STORE_URL', ''))
+        if memory_store:
+            conversation_memory.attach_store(
+                memory_store,
+                cache_entries=int(os.environ.get('MEMORY_CACHE_ENTRIES', 1000)),
+                revalidate_seconds=float(os.environ.get('MEMORY_CACHE_REVALIDATE_MS', 0)) / 1000
+            )
+        else:
+            max_profiles = int(os.environ.get('MEMORY_MAX_PROFILES', 0))
+            max_bytes = int(float(os.environ.get('MEMORY_MAX_MB', 0)) * 1024 * 1024)
+            if max_profiles or max_bytes:
+                conversation_memory.enable_profile_budget(
+                    max_profiles=max_profiles, max_bytes=max_bytes,
+                    spill_path=os.path.join(models_path, 'memory_spill.db')
+                )
+            journal_options = dict(
+                flush_interval=float(os.environ.get('MEMORY_JOURNAL_FLUSH_MS', 50)) / 1000,
+                compact_every=int(os.environ.get('MEMORY_JOURNAL_COMPACT_EVERY', 50000)),
+                compact_bytes_ratio=float(os.environ.get('MEMORY_JOURNAL_COMPACT_RATIO', 2.0)),
+                compact_min_bytes=int(float(os.environ.get('MEMORY_JOURNAL_COMPACT_MIN_MB', 16)) * 1024 * 1024),
+                sync_appends=os.environ.get('MEMORY_JOURNAL_SYNC', 'false').lower() == 'true'
+            )
+            json_snapshot_path = os.path.join(models_path, 'conversation_memory.json')
+            if os.environ.get('MEMORY_SNAPSHOT_FORMAT', 'json').lower() == 'binary':
+                # Sharded snapshot directory; the existing JSON snapshot is imported on first start
+                replayed = conversation_memory.enable_journal(
+                    os.path.join(models_path, 'conversation_memory.snap'),
+                    snapshot_format='binary',
+                    journal_path=json_snapshot_path + '.journal',
+                    snapshot_shards=int(os.environ.get('MEMORY_SNAPSHOT_SHARDS', 64)),
+                    fallback_json_path=json_snapshot_path,
+                    **journal_options
+                )
+            else:
+                replayed = conversation_memory.enable_journal(json_snapshot_path, **journal_options)
+            logger.info(f"Replayed {replayed} conversation memory journal records")
+        if os.environ.get('MEMORY_WRITE_BEHIND', 'true').lower() == 'true':
+            # Store/journal writes leave the request thread; flushed within the window and on exit
+            conversation_memory.enable_write_behind(
+                max_pending=int(os.environ.get('MEMORY_WRITE_BEHIND_MAX_PENDING', 10000)),
+                flush_interval=float(os.environ.get('MEMORY_WRITE_BEHIND_WINDOW_MS', 50)) / 1000
+            )
         system_status['conversation_memory'] = True
         logger.info("Conversation Memory initialized successfully")
 
+        # Summaries are refreshed in the background every few turns
+        conversation_summarizer = ConversationSummarizer(conversation_memory, llm_client=sehat_sahara_client.client)
+
         logger.info("✅ All AI components initialized for Sehat Sahara.")
         return True
 
@@ -235,6 +325,7 @@ def initialize_ai_components():
             response_generator = ProgressiveResponseGenerator()
             from conversation_memory import ProgressiveConversationMemory
             conversation_memory = ProgressiveConversationMemory()
+            conversation_summarizer = ConversationSummarizer(conversation_memory)
             logger.info("⚠️ Fallback components initialized (limited functionality)")
             return False
         except Exception as fallback_error:
@@ -243,11 +334,25 @@ def initialize_ai_components():
             nlu_processor = None
             response_generator = None
             conversation_memory = None
+            conversation_summarizer = None
             return False
 
 # Initialize system
 ai_initialized = initialize_ai_components()
 
+def _warm_emoji_cache():
+    """Load saved emoji interpretations and precompute common sequences at low priority"""
+    emoji_cache_path = os.path.join(models_path, 'emoji_interpretations.json')
+    loaded = groq_scout.emoji_cache.load_from_file(emoji_cache_path)
+    logger.info(f"Loaded {loaded} saved emoji interpretations")
+    if os.environ.get('EMOJI_PRECOMPUTE', 'true').lower() == 'true':
+        with llm_priority(PRIORITY_LOW, deadline_seconds=600):
+            if groq_scout.precompute_emoji_interpretations():
+                groq_scout.emoji_cache.save_to_file(emoji_cache_path)
+
+if groq_scout:
+    threading.Thread(target=_warm_emoji_cache, name="emoji-cache-warmup", daemon=True).start()
+
 # Database initialization with app context
 with app.app_context():
     try:
@@ -258,6 +363,45 @@ with app.app_context():
         logger.error(f"❌ Database initialization failed: {e}")
         system_status['database'] = False
 
+# Per-request SQL counts, DB time, slow queries and N+1 flags; nothing is attached when off
+if os.environ.get('SQL_INSTRUMENTATION', 'false').lower() == 'true':
+    with app.app_context():
+        sql_instrumentation.install(app, db.engine)
+
+# Durable background jobs (prescription OCR etc.) so HTTP workers are not held by slow model calls
+job_queue = JobQueue(app, num_workers=int(os.environ.get('JOB_WORKERS', 2)))
+
+# Last few plain-text turns per user for LLM context, written on every predict commit and
+# shared across workers through the memory store when one is configured
+recent_turns = RecentTurns(
+    max_turns=int(os.environ.get('RECENT_TURNS_WINDOW', 6)),
+    store=create_memory_store(os.environ.get('MEMORY_STORE_URL', ''))
+)
+
+# Medicine reminders live in their own tables once the database is up; the in-memory
+# scheduler over profile reminders is the fallback when it is not
+reminder_poller = None
+if conversation_memory and os.environ.get('REMINDER_SCHEDULER', 'true').lower() == 'true':
+    if system_status.get('database'):
+        conversation_memory.attach_reminder_repository(reminder_repository)
+        logger.info("Medicine reminders served from tables (reminders kept in memory profiles are "
+                    "imported once with migrate_reminders.py)")
+        reminder_poller = ReminderTablePoller(
+            app, reminder_repository,
+            tick_seconds=float(os.environ.get('REMINDER_SCHEDULER_TICK_SECONDS', 5))
+        )
+        reminder_poller.start()
+    elif not conversation_memory.store:
+        conversation_memory.enable_reminder_scheduler(
+            tick_seconds=float(os.environ.get('REMINDER_SCHEDULER_TICK_SECONDS', 1))
+        )
+
+# Nightly precomputed answers for the most frequent messages
+PRECOMPUTE_HOUR = int(os.environ.get('PRECOMPUTE_HOUR', 2))
+PRECOMPUTE_TOP_N = int(os.environ.get('PRECOMPUTE_TOP_N', 200))
+PRECOMPUTE_USE_LLM = os.environ.get('PRECOMPUTE_USE_LLM', 'false').lower() == 'true'
+PRECOMPUTE_RELOAD_SECONDS = float(os.environ.get('PRECOMPUTE_RELOAD_SECONDS', 60))
+
 # Utility functions for system management
 def update_system_state(operation: str, success: bool = True, **kwargs):
     """Thread-safe system state updates"""
@@ -281,9 +425,15 @@ def save_all_models():
             logger.info("NLU model saved")
 
         if conversation_memory and system_status['conversation_memory']:
-            conversation_memory.save_to_file(os.path.join(models_path, 'conversation_memory.json'))
+            if conversation_memory.journal:
+                conversation_memory.journal.compact()
+            elif not conversation_memory.store:
+                conversation_memory.save_to_file(os.path.join(models_path, 'conversation_memory.json'))
             logger.info("Conversation memory saved")
 
+        if groq_scout:
+            groq_scout.emoji_cache.save_to_file(os.path.join(models_path, 'emoji_interpretations.json'))
+
         # Crisis detector model saving removed as it's no longer used
 
         logger.info("All models saved successfully")
@@ -911,8 +1061,21 @@ def manage_medicine_reminders():
                 "message": f"Medicine {medicine_name} marked as taken"
             })
 
+        elif action == "set_enabled":
+            # Turn reminders for one medicine on or off
+            medicine_name = data.get('medicine_name') or ''
+            enabled = bool(data.get('enabled', True))
+
+            if not conversation_memory.set_reminder_enabled(user_id, medicine_name, enabled):
+                return jsonify({"error": f"No reminder found for {medicine_name}"}), 404
+
+            return jsonify({
+                "success": True,
+                "message": f"Reminders for {medicine_name} {'enabled' if enabled else 'disabled'}"
+            })
+
         else:
-            return jsonify({"error": "Invalid action. Use 'get', 'add', or 'update_adherence'"}), 400
+            return jsonify({"error": "Invalid action. Use 'get', 'add', 'update_adherence' or 'set_enabled'"}), 400
 
     except Exception as e:
         logger.error(f"Medicine reminders error: {e}")
@@ -1123,6 +1286,13 @@ def predict():
 
                 db.session.commit()
 
+                _remember_turn(
+                    user_id_str, user_message, assistant_response,
+                    {'primary_intent': assistant_response.get('action') or 'sehat_sahara_assistant',
+                     'language_detected': assistant_response.get('language', 'en')},
+                    db_user_id=current_user.id
+                )
+
                 # Return Sehat Sahara response directly (exact JSON format)
                 return jsonify(assistant_response)
 
@@ -1135,33 +1305,43 @@ def predict():
 
         # Detect language from message with improved reliability
         detected_language_code = _detect_language_reliably(user_message, current_user.preferred_language or "en")
+        contains_emoji = bool(re.search(r"[\U0001F300-\U0001FAFF\U00002600-\U000026FF]", user_message))
 
-        # Build short NLU history using the correct method
-        history_turns = conversation_memory.get_conversation_context(current_user.patient_id, turns=4) if conversation_memory else []
-        nlu_history = []
-        for turn in history_turns:
-            nlu_history.append({'role': 'user', 'content': turn.get('user_message', '')})
-            try:
-                bot_response_json = json.loads(turn.get('bot_response', '{}'))
-                bot_content = bot_response_json.get('response', '')
-            except (json.JSONDecodeError, AttributeError):
-                bot_content = turn.get('bot_response', '')
-            nlu_history.append({'role': 'assistant', 'content': bot_content})
+        # Frequent context-free questions are answered from the nightly table before any NLU/LLM work
+        if not image_b64 and not contains_emoji and len(precomputed_answers) and \
+                _llm_priority_for_turn(user_message, detected_language_code, False, False) != PRIORITY_EMERGENCY:
+            precomputed = precomputed_answers.lookup(user_message, detected_language_code)
+            if precomputed:
+                return _serve_precomputed_answer(current_user, user_message, detected_language_code,
+                                                 precomputed[0], precomputed[1], start_time)
+
+        # Build compact NLU history: rolling summary plus the last 2 turns from the recent-turns window
+        recent_messages = recent_turns.messages(current_user.patient_id, loader=conversation_turn_loader(current_user.id))
+        nlu_history = conversation_summarizer.build_context_history(
+            current_user.patient_id, recent_messages=recent_messages) if conversation_summarizer else recent_messages
 
         # Optional Scout for emojis/images
         effective_message = user_message
         scout_text = None
-        contains_emoji = bool(re.search(r"[\U0001F300-\U0001FAFF\U00002600-\U000026FF]", user_message))
         multimodal_triggered = bool(image_b64) or contains_emoji
+
+        # Shared upstream limiter: emergencies and triage first, emoji chit-chat last
+        llm_deadline = time.monotonic() + PREDICT_LLM_DEADLINE_SECONDS
+        turn_priority = _llm_priority_for_turn(user_message, detected_language_code, bool(image_b64), contains_emoji)
+
         if multimodal_triggered and groq_scout and groq_scout.is_available:
-            if image_b64:
-                scout_text = groq_scout.interpret_image(user_message=user_message, image_b64=image_b64, language=detected_language_code, context_history=nlu_history)
-            else:
-                scout_text = groq_scout.interpret_emojis(user_message=user_message, language=detected_language_code, context_history=nlu_history)
+            with llm_priority(turn_priority, deadline=llm_deadline):
+                if image_b64:
+                    scout_text = groq_scout.interpret_image(user_message=user_message, image_b64=image_b64, language=detected_language_code, context_history=nlu_history)
+                else:
+                    scout_text = groq_scout.interpret_emojis(user_message=user_message, language=detected_language_code, context_history=nlu_history)
             effective_message = f"Interpreted content: {scout_text}\n\nOriginal: {user_message}" if scout_text else user_message
 
         # NLU: Sehat Sahara intents
-        nlu_understanding = nlu_processor.understand_user_intent(effective_message, conversation_history=nlu_history, sehat_sahara_mode=True) if nlu_processor else {}
+        with llm_priority(turn_priority, deadline=llm_deadline):
+            nlu_understanding = nlu_processor.understand_user_intent(effective_message, conversation_history=nlu_history, sehat_sahara_mode=True) if nlu_processor else {}
+        turn_priority = _llm_priority_for_turn(user_message, detected_language_code, bool(image_b64), contains_emoji,
+                                               intent=nlu_understanding.get('primary_intent'))
 
         # Emergency handling protocol
         is_emergency = (nlu_understanding.get('primary_intent') == 'emergency_assistance') or (nlu_understanding.get('urgency_level') == 'emergency')
@@ -1176,17 +1356,20 @@ def predict():
             action_payload_str = None
             action_payload = None
             if sehat_sahara_client and sehat_sahara_client.is_available:
-                action_payload_str = sehat_sahara_client.generate_sehatsahara_response(
-                    user_message=effective_message,
-                    user_intent=nlu_understanding.get('primary_intent'),
-                    conversation_stage=nlu_understanding.get('conversation_stage'),
-                    severity_score=0.5,
-                    context_history=nlu_history,
-                    language=detected_language_code
-                )
+                with llm_priority(turn_priority, deadline=llm_deadline):
+                    action_payload_str = sehat_sahara_client.generate_sehatsahara_response(
+                        user_message=effective_message,
+                        user_intent=nlu_understanding.get('primary_intent'),
+                        conversation_stage=nlu_understanding.get('conversation_stage'),
+                        severity_score=0.5,
+                        context_history=nlu_history,
+                        language=detected_language_code
+                    )
                 if action_payload_str:
                     try:
                         action_payload = json.loads(action_payload_str)
+                        with state_lock:
+                            system_state['llama_responses'] += 1
                     except json.JSONDecodeError:
                         logger.warning("API returned invalid JSON. Falling back to local generator.")
                         action_payload = None
@@ -1235,6 +1418,12 @@ def predict():
 
         db.session.commit()
 
+        _remember_turn(
+            current_user.patient_id, effective_message, action_payload,
+            {**nlu_understanding, 'language_detected': detected_language_code},
+            db_user_id=current_user.id
+        )
+
         # Final envelope including analysis metadata
         enriched = {
             **action_payload,
@@ -1267,6 +1456,89 @@ def predict():
         }
         return jsonify(error_response), 500
 
+def _serve_precomputed_answer(current_user, user_message: str, language: str, action_payload: Dict[str, Any],
+                              intent: str, start_time: float):
+    """Persist and return a turn answered from the precomputed table"""
+    turn = ConversationTurn(
+        user_id=current_user.id,
+        user_message=user_message,
+        bot_response=json.dumps(action_payload),
+        detected_intent=intent,
+        intent_confidence=1.0,
+        language_detected=language,
+        urgency_level='low',
+        response_time_ms=int((time.time() - start_time) * 1000),
+        action_triggered=action_payload.get("action"),
+    )
+    turn.set_action_parameters(action_payload.get("parameters", {}))
+    turn.set_context_entities({})
+    db.session.add(turn)
+
+    try:
+        session_record_id = session.get('session_record_id')
+        if session_record_id:
+            user_session = UserSession.query.get(session_record_id)
+            if user_session:
+                user_session.conversations_in_session += 1
+                user_session.actions_triggered_in_session += 1
+    except Exception:
+        pass
+
+    db.session.commit()
+    _remember_turn(current_user.patient_id, user_message, action_payload,
+                   {'primary_intent': intent, 'language_detected': language}, db_user_id=current_user.id)
+
+    return jsonify({
+        **action_payload,
+        "analysis": {
+            "intent": intent,
+            "confidence": 1.0,
+            "language": language,
+            "urgency": "low",
+            "in_scope": intent != 'out_of_scope',
+            "source": "precomputed"
+        },
+        "system_info": {
+            "response_time_ms": int((time.time() - start_time) * 1000),
+            "api_available": bool(sehat_sahara_client and sehat_sahara_client.is_available)
+        }
+    })
+
+def _llm_priority_for_turn(user_message: str, language: str, has_image: bool, contains_emoji: bool,
+                           intent: str = None) -> int:
+    """Upstream LLM priority for a predict turn (keyword emergency check needs no LLM call)"""
+    if intent == 'emergency_assistance' or (
+            sehat_sahara_assistant and sehat_sahara_assistant.is_emergency_detected(user_message, language)):
+        return PRIORITY_EMERGENCY
+    if intent == 'symptom_triage':
+        return PRIORITY_TRIAGE
+    if (contains_emoji and not has_image) or intent in ('general_inquiry', 'out_of_scope'):
+        return PRIORITY_LOW
+    return PRIORITY_NORMAL
+
+def _remember_turn(user_id: str, user_message: str, action_payload: Dict[str, Any], nlu_result: Dict[str, Any],
+                   db_user_id: int = None):
+    """Record a committed turn in the recent-turns window and conversation memory, and schedule a summary refresh"""
+    try:
+        recent_turns.record(user_id, user_message, assistant_text(action_payload),
+                            loader=conversation_turn_loader(db_user_id) if db_user_id else None)
+    except Exception as e:
+        logger.error(f"Error recording recent turn for {user_id}: {e}")
+    if not conversation_memory:
+        return
+    try:
+        conversation_memory.add_conversation_turn(
+            user_id=user_id,
+            user_message=user_message,
+            bot_response=json.dumps({'response': action_payload.get('response', '')}),
+            nlu_result=nlu_result,
+            action_taken=action_payload.get('action')
+        )
+        if conversation_summarizer:
+            conversation_summarizer.record_turn(user_id)
+    except Exception as e:
+        logger.error(f"Error recording conversation turn for {user_id}: {e}")
+
 # (deleted)
 
 @app.route("/v1/book-doctor", methods=["POST"])
@@ -1622,6 +1894,38 @@ def get_system_metrics():
         logger.error(f"❌ Metrics retrieval error: {e}", exc_info=True)
         return jsonify({"error": "Failed to retrieve system metrics"}), 500
 
+@app.route("/v1/admin/llm-telemetry", methods=["GET"])
+@admin_required
+def get_llm_telemetry():
+    """Upstream LLM latency, token, status and cost breakdown by caller and model."""
+    try:
+        recent_limit = min(request.args.get('recent', 20, type=int), 200)
+        return jsonify({
+            "success": True,
+            "telemetry": get_llm_telemetry_stats(recent_limit),
+            "rateLimits": get_rate_limiter_stats(),
+            "singleFlight": get_single_flight_stats(),
+            "routing": llm_router.get_stats() if llm_router else {},
+            "routeConfig": llm_router.describe() if llm_router else {}
+        })
+    except Exception as e:
+        logger.error(f"❌ LLM telemetry retrieval error: {e}", exc_info=True)
+        return jsonify({"error": "Failed to retrieve LLM telemetry"}), 500
+
+@app.route("/v1/admin/sql-telemetry", methods=["GET"])
+@admin_required
+def get_sql_telemetry():
+    """Per-route query counts, DB time, likely N+1 patterns and the slow-query log."""
+    try:
+        recent_limit = min(request.args.get('recent', 20, type=int), 200)
+        return jsonify({
+            "success": True,
+            "sql": get_sql_stats(recent_limit)
+        })
+    except Exception as e:
+        logger.error(f"❌ SQL telemetry retrieval error: {e}", exc_info=True)
+        return jsonify({"error": "Failed to retrieve SQL telemetry"}), 500
+
 @app.route("/v1/save-models", methods=["POST"])
 def save_models_endpoint():
     """Manually trigger comprehensive model saving"""
@@ -1808,6 +2112,18 @@ def get_system_stats():
         return jsonify({
             "system_stats": {
                 "memory": memory_stats,
+                "summarizer": conversation_summarizer.get_stats() if conversation_summarizer else {},
+                "recent_turns": recent_turns.get_stats(),
+                "dialog_states": sehat_sahara_assistant.get_dialog_stats() if sehat_sahara_assistant else {},
+                "llm_json_parsing": get_parse_stats(),
+                "vision": groq_scout.vision_cache.get_stats() if groq_scout else {},
+                "emoji_interpretations": groq_scout.emoji_cache.get_stats() if groq_scout else {},
+                "background_jobs": job_queue.get_stats(),
+                "llm_rate_limits": get_rate_limiter_stats(),
+                "llm_single_flight": get_single_flight_stats(),
+                "llm_routing": llm_router.get_stats() if llm_router else {},
+                "precomputed_answers": precomputed_answers.get_stats(),
+                "medicine_reminders": reminder_poller.get_stats() if reminder_poller else {},
                 "database": db_stats,
                 "api_status": "available" if sehat_sahara_client.is_available else "unavailable",
                 "service_name": "Sehat Sahara Health Assistant",
@@ -1955,27 +2271,10 @@ def get_appointments():
         if not current_user:
             return jsonify({"success": False, "message": "Authentication required"}), 401
         
-        appointments = Appointment.query.filter_by(user_id=current_user.id)\
-            .order_by(Appointment.appointment_datetime.desc()).all()
-
-        appointments_data = []
-        for appt in appointments:
-            doctor = Doctor.query.get(appt.doctor_id)
-            appointments_data.append({
-                "id": appt.appointment_id,
-                "doctorName": doctor.full_name if doctor else "Unknown Doctor",
-                "specialization": doctor.specialization if doctor else "",
-                # --- CORRECTED LINE ---
-                "dateTime": appt.appointment_datetime.isoformat() + "Z", # Append 'Z' for UTC
-                # --- END OF CORRECTION ---
-                "type": appt.appointment_type,
-                "status": appt.status,
-                "chiefComplaint": appt.chief_complaint
-            })
-
+        # One query: appointments joined to the doctor's name and specialization
         return jsonify({
             "success": True,
-            "appointments": appointments_data
+            "appointments": patient_appointments(current_user.id)
         })
     except Exception as e:
         logger.error(f"Get appointments error: {e}")
@@ -2160,94 +2459,63 @@ def upload_prescription():
         if not user:
             return jsonify({"error": "User not found"}), 401
 
-        # Use AI to analyze the prescription image
-        extracted_data = None
-        if groq_scout and groq_scout.is_available:
-            # Strip the data URL prefix if present
-            if image_data.startswith("data:image/jpeg;base64,"):
-                image_data_clean = image_data.split(",", 1)[1]
-            else:
-                image_data_clean = image_data
-            extracted_data = groq_scout.interpret_prescription_image(image_data_clean, language="en")
-            logger.info(f"AI extracted prescription data: {extracted_data}")
-
-        # Prepare prescription data
-        doctor_name = extracted_data.get('doctor_name', provider_name) if extracted_data else provider_name
-        medications = extracted_data.get('medications', []) if extracted_data else []
-        tests = extracted_data.get('tests', []) if extracted_data else []
-        diagnosis = extracted_data.get('diagnosis', '') if extracted_data else ''
+        # Decode image and detect its real type (phones send PNG/WebP/HEIC too)
+        image_bytes = decode_base64_image(image_data)
+        if not image_bytes:
+            return jsonify({"error": "Invalid image data"}), 400
+        file_type = detect_mime_type(image_bytes)
+        if file_type not in IMAGE_EXTENSIONS:
+            file_type = 'image/jpeg'
+        file_extension = IMAGE_EXTENSIONS[file_type]
 
         # Save image file instead of storing base64 in database
-        
-        # Create uploads directory if it doesn't exist
         uploads_dir = os.path.join(basedir, 'uploads', 'prescriptions')
         os.makedirs(uploads_dir, exist_ok=True)
-
-        # Generate unique filename
-        file_extension = 'jpg'  # assuming jpeg
         unique_filename = f"prescription_{user.patient_id}_{int(time.time())}_{uuid.uuid4().hex[:8]}.{file_extension}"
         file_path = os.path.join(uploads_dir, unique_filename)
 
-        # Decode and save image
         try:
-            image_data_clean = image_data.split(",", 1)[1] if "," in image_data else image_data
-            image_bytes = base64.b64decode(image_data_clean)
             with open(file_path, 'wb') as f:
                 f.write(image_bytes)
-        except Exception as decode_error:
-            logger.error(f"Failed to decode/save image: {decode_error}")
-            return jsonify({"error": "Invalid image data"}), 400
-        # Create HealthRecord for the prescription
+        except Exception as save_error:
+            logger.error(f"Failed to save image: {save_error}")
+            return jsonify({"error": "Failed to save image"}), 500
+
+        # Create HealthRecord now; the OCR job fills in doctor and diagnosis
         record = HealthRecord(
             user_id=user.id,
             record_type='prescription',
-            title=f'Prescription from {doctor_name}',
-            description=f'Uploaded prescription. Diagnosis: {diagnosis}' if diagnosis else 'Uploaded prescription image',
-            file_type='image/jpeg',
+            title=f'Prescription from {provider_name}',
+            description='Uploaded prescription image',
+            file_type=file_type,
             file_url=f'/uploads/prescriptions/{unique_filename}',  # Store relative path
+            file_size=len(image_bytes),
             test_date=datetime.now().date()
         )
-
         db.session.add(record)
         try:
+            db.session.flush()
+            job = job_queue.enqueue('prescription_ocr', {
+                'record_id': record.record_id,
+                'provider_name': provider_name,
+                'file_path': file_path
+            }, user_id=user.id, commit=False)
             db.session.commit()
-            logger.info(f"✅ Prescription uploaded for user {user.patient_id}, record_id: {record.record_id}")
-
-            # Auto-generate medicine reminders from prescription
-            prescription_data = {
-                'prescription_id': record.record_id,
-                'doctor_name': doctor_name,
-                'medications': extracted_data.get('medications', []) if extracted_data else [],
-                'diagnosis': diagnosis,
-                'instructions': extracted_data.get('instructions', '') if extracted_data else '',
-                'source': 'patient_upload',  # Mark as patient-uploaded prescription
-                'upload_method': 'camera_scan',
-                'ai_extracted': extracted_data is not None
-            }
-
-            # Add to conversation memory for reminder generation
-            conversation_memory.add_prescription_summary(user.patient_id, prescription_data)
-
-            logger.info(f"✅ Auto-generated medicine reminders for user {user.patient_id}")
-
         except Exception as commit_error:
             logger.error(f"❌ Failed to commit prescription upload for user {user.patient_id}: {commit_error}")
             db.session.rollback()
             return jsonify({"error": "Failed to save prescription to database"}), 500
 
+        logger.info(f"✅ Prescription uploaded for user {user.patient_id}, record_id: {record.record_id}, job: {job.job_id}")
 
-    
+        # OCR, reminder generation and record update run in the background workers
         return jsonify({
             "success": True,
-            "message": "Prescription uploaded and analyzed successfully",
+            "message": "Prescription uploaded. Analysis is in progress.",
             "recordId": record.record_id,
-            "extractedData": {
-                "doctor_name": doctor_name,
-                "medications": medications,
-                "tests": tests,
-                "diagnosis": diagnosis
-            }
-        })
+            "jobId": job.job_id,
+            "statusUrl": f"/v1/jobs/{job.job_id}"
+        }), 202
 
     except Exception as e:
         logger.error(f"❌ Upload prescription error: {e}")
@@ -2256,6 +2524,181 @@ def upload_prescription():
         db.session.rollback()
         return jsonify({"error": "Failed to upload prescription"}), 500
 
+def process_prescription_ocr(payload: Dict[str, Any], ctx: JobContext) -> Dict[str, Any]:
+    """Background job: analyze an uploaded prescription, update its HealthRecord and generate reminders"""
+    record = HealthRecord.query.filter_by(record_id=payload['record_id']).first()
+    if not record:
+        raise ValueError(f"Health record {payload['record_id']} not found")
+    user = User.query.get(record.user_id)
+    provider_name = payload.get('provider_name', '')
+
+    # Use AI to analyze the prescription image
+    extracted_data = None
+    if groq_scout and groq_scout.is_available:
+        ctx.report_progress(10, "Reading prescription")
+        with open(payload['file_path'], 'rb') as f:
+            image_b64 = base64.b64encode(f.read()).decode('ascii')
+        with llm_priority(PRIORITY_BACKGROUND, deadline_seconds=120):
+            extracted_data = groq_scout.interpret_prescription_image(image_b64, language="en")
+        if extracted_data is None and not ctx.is_last_attempt:
+            raise JobRetryableError("Prescription analysis unavailable")
+        logger.info(f"AI extracted prescription data: {extracted_data}")
+
+    # Prepare prescription data
+    doctor_name = extracted_data.get('doctor_name') or provider_name if extracted_data else provider_name
+    medications = extracted_data.get('medications', []) if extracted_data else []
+    tests = extracted_data.get('tests', []) if extracted_data else []
+    diagnosis = extracted_data.get('diagnosis', '') if extracted_data else ''
+
+    ctx.report_progress(60, "Updating health record")
+    record.title = f'Prescription from {doctor_name}'
+    record.doctor_name = doctor_name
+    record.description = f'Uploaded prescription. Diagnosis: {diagnosis}' if diagnosis else 'Uploaded prescription image'
+    db.session.commit()
+
+    # Auto-generate medicine reminders from prescription
+    ctx.report_progress(80, "Generating medicine reminders")
+    prescription_data = {
+        'prescription_id': record.record_id,
+        'doctor_name': doctor_name,
+        'medications': medications,
+        'diagnosis': diagnosis,
+        'instructions': extracted_data.get('instructions', '') if extracted_data else '',
+        'source': 'patient_upload',  # Mark as patient-uploaded prescription
+        'upload_method': 'camera_scan',
+        'ai_extracted': extracted_data is not None
+    }
+    if conversation_memory and user:
+        conversation_memory.add_prescription_summary(user.patient_id, prescription_data)
+        logger.info(f"✅ Auto-generated medicine reminders for user {user.patient_id}")
+
+    return {
+        "recordId": record.record_id,
+        "extractedData": {
+            "doctor_name": doctor_name,
+            "medications": medications,
+            "tests": tests,
+            "diagnosis": diagnosis
+        }
+    }
+
+def _precompute_answer(sample: str, language: str, intent_hint: Optional[str]):
+    """Intent + action JSON for one frequent message, as the live predict path would produce it"""
+    with llm_priority(PRIORITY_LOW, deadline_seconds=60):
+        nlu_result = nlu_processor.understand_user_intent(sample, conversation_history=[], sehat_sahara_mode=True) if nlu_processor else {}
+        intent = nlu_result.get('primary_intent') or intent_hint
+        if intent not in SAFE_INTENTS:
+            return None
+
+        if PRECOMPUTE_USE_LLM and sehat_sahara_client and sehat_sahara_client.is_available:
+            payload_str = sehat_sahara_client.generate_sehatsahara_response(
+                user_message=sample, user_intent=intent, conversation_stage=nlu_result.get('conversation_stage'),
+                severity_score=0.5, context_history=[], language=language
+            )
+            if payload_str:
+                try:
+                    return intent, json.loads(payload_str), 'llm'
+                except json.JSONDecodeError:
+                    pass
+
+    if not response_generator:
+        return None
+    payload = response_generator.generate_response(
+        user_message=sample,
+        nlu_result={**nlu_result, "language_detected": language},
+        user_context={},
+        conversation_history=[],
+        sehat_sahara_mode=True
+    )
+    return intent, payload, 'local'
+
+def schedule_nightly_precompute():
+    """Enqueue the next nightly rebuild; keyed by run time so every worker schedules the same job"""
+    run_at = next_nightly_run(PRECOMPUTE_HOUR)
+    return job_queue.enqueue('precompute_answers', {'recurring': True}, run_after=run_at,
+                             job_key=f"precompute_answers@{run_at:%Y%m%d%H}")
+
+def precompute_answers_job(payload: Dict[str, Any], ctx: JobContext) -> Dict[str, Any]:
+    """
+    Nightly job: rebuild the precomputed answer table and reload it here (other workers reload
+    on their next version check). The next run is scheduled unless this one is being retried.
+    """
+    will_retry = False
+    try:
+        try:
+            stats = build_precomputed_answers(
+                _precompute_answer,
+                days=payload.get('days', 30),
+                top_n=payload.get('top_n', PRECOMPUTE_TOP_N),
+                min_count=payload.get('min_count', 3),
+                progress_fn=ctx.report_progress
+            )
+        except Exception as e:
+            db.session.rollback()
+            will_retry = not ctx.is_last_attempt
+            raise JobRetryableError(f"Precompute build failed: {e}") from e
+        precomputed_answers.last_build = stats
+        precomputed_answers.load_from_db()
+        logger.info(f"Precomputed {stats['answers_stored']} answers from {stats['mined_queries']} frequent queries")
+        return stats
+    finally:
+        if payload.get('recurring', True) and not will_retry:
+            try:
+                schedule_nightly_precompute()
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Could not schedule next precompute run: {e}")
+
+job_queue.register('prescription_ocr', process_prescription_ocr)
+job_queue.register('precompute_answers', precompute_answers_job)
+if system_status.get('database'):
+    with app.app_context():
+        precomputed_answers.load_from_db()
+        try:
+            schedule_nightly_precompute()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Could not schedule nightly precompute: {e}")
+    job_queue.start()
+    precompute_reloader = PrecomputedAnswerReloader(app, precomputed_answers,
+                                                    interval_seconds=PRECOMPUTE_RELOAD_SECONDS)
+    precompute_reloader.start()
+
+@app.route("/v1/admin/precomputed-answers/rebuild", methods=["POST"])
+@admin_required
+def rebuild_precomputed_answers():
+    """Rebuild the precomputed answer table now (the nightly schedule is unaffected)."""
+    try:
+        job = job_queue.enqueue('precompute_answers', {'recurring': False}, max_attempts=1)
+        return jsonify({"success": True, "jobId": job.job_id, "statusUrl": f"/v1/jobs/{job.job_id}"}), 202
+    except Exception as e:
+        logger.error(f"❌ Precompute rebuild error: {e}")
+        db.session.rollback()
+        return jsonify({"error": "Failed to schedule rebuild"}), 500
+
+@app.route("/v1/jobs/<job_id>", methods=["GET"])
+def get_job_status(job_id):
+    """Report status and progress of a background job (e.g. prescription OCR)"""
+    try:
+        job = job_queue.get_job(job_id)
+        if not job:
+            return jsonify({"error": "Job not found"}), 404
+
+        # Only the owner (or an admin session) may see a user's job
+        current_user = get_current_user()
+        user_id_param = request.args.get('userId')
+        if job.user_id and getattr(current_user, 'role', None) != 'admin':
+            owner = User.query.get(job.user_id)
+            requester_id = getattr(current_user, 'patient_id', None) or user_id_param
+            if not owner or owner.patient_id != requester_id:
+                return jsonify({"error": "Job not found"}), 404
+
+        return jsonify({"success": True, "job": job.to_dict()})
+
+    except Exception as e:
+        logger.error(f"Error getting job status {job_id}: {e}")
+        return jsonify({"error": "Failed to get job status"}), 500
+
 @app.route("/v1/admin/users", methods=["GET"])
 @admin_required
 def get_all_users():
@@ -2318,30 +2761,11 @@ def get_doctor_dashboard():
         if not doctor:
             return jsonify({"error": "Doctor not found"}), 404
 
-        today_start = datetime.now().date()
-        today_end = today_start + timedelta(days=1)
-
-        appointments = Appointment.query.filter(
-            Appointment.doctor_id == doctor.id,
-            Appointment.appointment_datetime >= today_start,
-            Appointment.appointment_datetime < today_end
-        ).order_by(Appointment.appointment_datetime.asc()).all()
-
-        appointments_data = []
-        for appt in appointments:
-            patient = User.query.get(appt.user_id)
-            appointments_data.append({
-                "id": appt.appointment_id,
-                "patient": patient.full_name if patient else "Unknown",
-                "time": appt.appointment_datetime.strftime('%I:%M %p'),
-                "type": appt.appointment_type,
-                "status": appt.status
-            })
-
+        # One query: today's appointments joined to the patient's name
         return jsonify({
             "success": True,
             "doctorName": doctor.full_name,
-            "appointments": appointments_data
+            "appointments": doctor_day_appointments(doctor.id, datetime.now().date())
         })
     except Exception as e:
         logger.error(f"Error fetching doctor dashboard: {e}", exc_info=True)
@@ -2388,30 +2812,21 @@ def get_pharmacy_dashboard():
         # Mock pharmacy ID
         pharmacy_id = 1
 
-        pharmacy = Pharmacy.query.get(pharmacy_id)
-        if not pharmacy:
+        # Two queries: the pharmacy with its delivery count, then new orders joined to customer names
+        dashboard = pharmacy_dashboard(pharmacy_id)
+        if not dashboard:
             return jsonify({"error": "Pharmacy not found"}), 404
 
-        new_orders = MedicineOrder.query.filter_by(
-            pharmacy_id=pharmacy.id,
-            status='Placed'
-        ).order_by(MedicineOrder.created_at.desc()).all()
-
-        orders_data = [
-            {"id": order.order_id, "customer": User.query.get(order.user_id).full_name, "status": order.status}
-            for order in new_orders
-        ]
-
         # This would query an inventory table in a real app
         low_stock_alerts = 3
 
         return jsonify({
             "success": True,
-            "pharmacyName": pharmacy.name,
-            "newOrdersCount": len(orders_data),
-            "pendingDeliveriesCount": MedicineOrder.query.filter_by(pharmacy_id=pharmacy.id, status='Out for Delivery').count(),
+            "pharmacyName": dashboard["pharmacyName"],
+            "newOrdersCount": len(dashboard["orders"]),
+            "pendingDeliveriesCount": dashboard["pendingDeliveriesCount"],
             "lowStockAlerts": low_stock_alerts,
-            "orders": orders_data
+            "orders": dashboard["orders"]
         })
     except Exception as e:
         logger.error(f"Error fetching pharmacy dashboard: {e}", exc_info=True)
@@ -2470,6 +2885,13 @@ def cleanup_on_exit():
     logger.info("🔄 Application shutdown - performing cleanup...")
     try:
         with app.app_context():
+            # Let background workers finish their current job
+            job_queue.stop()
+            if reminder_poller:
+                reminder_poller.stop()
+            if conversation_memory:
+                conversation_memory.stop_write_behind()
+
             # Save all models
             save_all_models()
 
@@ -2531,7 +2953,8 @@ def not_found(error):
             "/v1/pharmacies", "/v1/medicines", "/v1/orders", "/v1/upload-prescription",
             "/v1/prescription-summary", "/v1/medicine-reminders", "/v1/enhanced-sos",
             "/v1/button-action", "/v1/user-progress", "/v1/post-appointment-feedback",
-            "/v1/admin/users", "/v1/admin/grievances",
+            "/v1/admin/users", "/v1/admin/grievances", "/v1/admin/llm-telemetry", "/v1/admin/sql-telemetry",
+            "/v1/admin/precomputed-answers/rebuild", "/v1/jobs/<job_id>",
             "/v1/doctor/dashboard", "/v1/pharmacy/dashboard",
             "/v1/test-prescription"  # Test endpoint
         ]
@@ -2609,8 +3032,13 @@ def display_startup_info():
     print(" * GET  /v1/pharmacies")
     print(" * GET  /v1/medicines")
     print(" * POST /v1/orders")
+    print(" * POST /v1/upload-prescription  (202 + jobId)")
+    print(" * GET  /v1/jobs/<job_id>")
     print(" * GET  /v1/admin/users")
     print(" * GET  /v1/admin/grievances")
+    print(" * GET  /v1/admin/llm-telemetry")
+    print(" * GET  /v1/admin/sql-telemetry")
+    print(" * POST /v1/admin/precomputed-answers/rebuild")
     print(" * GET  /v1/doctor/dashboard")
     print(" * GET  /v1/pharmacy/dashboard")
     print()
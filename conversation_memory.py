@@ -3,14 +3,30 @@ Sehat Sahara Health Assistant Conversation Memory
 Simplified conversation tracking and user context management for health app navigation
 """
 
+import heapq
 import json
 import logging
+import os
+import sys
+import threading
+import time
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Set, Tuple
 from dataclasses import dataclass, field
 from collections import defaultdict, deque
 
-@dataclass
+from turn_history import TurnHistory, TurnRecord, DEFAULT_HISTORY_CAPACITY
+from memory_journal import MemoryJournal, OP_UPSERT, OP_DELETE, DEFAULT_COMPACT_BYTES_RATIO, DEFAULT_COMPACT_MIN_BYTES
+from reminder_scheduler import ReminderScheduler, LocalNotificationFeed
+from memory_snapshot import ShardedSnapshot, DEFAULT_SHARDS, paused_gc
+from write_behind import WriteBehindQueue
+from striped_lock import StripedLock, striped, DEFAULT_STRIPES
+from memory_store import (
+    MemoryStore, SharedRecordMap, BoundedRecordMap, SQLiteMemoryStore,
+    NAMESPACE_PROFILES, NAMESPACE_SESSIONS, NAMESPACE_TASKS, encode_datetimes, decode_datetimes, merge_changes
+)
+
+@dataclass(slots=True)
 class UserProfile:
     """Enhanced user profile for Sehat Sahara Health Assistant with progress tracking"""
     user_id: str
@@ -20,10 +36,12 @@ class UserProfile:
     location: str = ""
 
     # Conversation tracking
-    conversation_history: List[Dict[str, Any]] = field(default_factory=list)
+    conversation_history: TurnHistory = field(default_factory=TurnHistory)  # ring buffer of compact turns
     current_session_id: str = ""
     last_interaction: datetime = field(default_factory=datetime.now)
     message_count: int = 0  # Track messages for analytics
+    conversation_summary: str = ""  # Rolling summary of turns older than the recent window
+    summary_turn_count: int = 0  # message_count covered by conversation_summary
 
     # App navigation state
     current_task: str = ""  # appointment_booking, medicine_search, etc.
@@ -50,8 +68,17 @@ class UserProfile:
     total_appointments_booked: int = 0
     total_health_records_accessed: int = 0
     appointments_completed: int = 0
+
+    # Medicine reminders, adherence and doctor-provided prescriptions
+    user_data: Dict[str, Any] = field(default_factory=dict)
+
+    def __post_init__(self):
+        if not isinstance(self.conversation_history, TurnHistory):
+            turns = self.conversation_history or []
+            self.conversation_history = TurnHistory(max(DEFAULT_HISTORY_CAPACITY, len(turns)), turns)
+        self.preferred_language = sys.intern(self.preferred_language or 'hi')
     
-    def to_dict(self) -> Dict[str, Any]:
+    def to_dict(self, history_limit: int = 10) -> Dict[str, Any]:
         """Convert profile to dictionary"""
         return {
             'user_id': self.user_id,
@@ -59,10 +86,12 @@ class UserProfile:
             'full_name': self.full_name,
             'preferred_language': self.preferred_language,
             'location': self.location,
-            'conversation_history': self.conversation_history[-10:],  # Keep last 10 turns
+            'conversation_history': self.conversation_history[-history_limit:] if history_limit > 0 else [],  # Keep last 10 turns by default
             'current_session_id': self.current_session_id,
             'last_interaction': self.last_interaction.isoformat(),
             'message_count': self.message_count,
+            'conversation_summary': self.conversation_summary,
+            'summary_turn_count': self.summary_turn_count,
             'current_task': self.current_task,
             'task_context': self.task_context,
             'appointment_status': self.appointment_status,
@@ -78,7 +107,8 @@ class UserProfile:
             'total_conversations': self.total_conversations,
             'total_appointments_booked': self.total_appointments_booked,
             'total_health_records_accessed': self.total_health_records_accessed,
-            'appointments_completed': self.appointments_completed
+            'appointments_completed': self.appointments_completed,
+            'user_data': self.user_data
         }
     
     @classmethod
@@ -93,6 +123,8 @@ class UserProfile:
             conversation_history=data.get('conversation_history', []),
             current_session_id=data.get('current_session_id', ''),
             message_count=data.get('message_count', 0),
+            conversation_summary=data.get('conversation_summary', ''),
+            summary_turn_count=data.get('summary_turn_count', 0),
             current_task=data.get('current_task', ''),
             task_context=data.get('task_context', {}),
             appointment_status=data.get('appointment_status', {}),
@@ -106,7 +138,8 @@ class UserProfile:
             total_conversations=data.get('total_conversations', 0),
             total_appointments_booked=data.get('total_appointments_booked', 0),
             total_health_records_accessed=data.get('total_health_records_accessed', 0),
-            appointments_completed=data.get('appointments_completed', 0)
+            appointments_completed=data.get('appointments_completed', 0),
+            user_data=data.get('user_data', {})
         )
 
         # Parse last_interaction
@@ -130,15 +163,67 @@ class UserProfile:
 
         return profile
 
+    def to_snapshot_record(self, history_limit: int = 10) -> Dict[str, Any]:
+        """to_dict with turns as positional rows, which encode and load several times faster"""
+        data = self.to_dict(history_limit=0)
+        data['turn_rows'] = [record.to_row() for record in self.conversation_history.records()[-history_limit:]]
+        return data
+
+    @classmethod
+    def from_snapshot_record(cls, data: Dict[str, Any]) -> 'UserProfile':
+        rows = data.pop('turn_rows', None)
+        if rows is not None:
+            data['conversation_history'] = [TurnRecord.from_row(row) for row in rows]
+        return cls.from_dict(data)
+
+def _epoch(value: Any) -> Optional[float]:
+    """Epoch seconds for a datetime or ISO string (session contexts loaded from JSON hold strings)"""
+    if isinstance(value, datetime):
+        return value.timestamp()
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value).timestamp()
+        except ValueError:
+            return None
+    return None
+
+def _hour(moment: datetime) -> int:
+    return int(moment.timestamp() // 3600)
+
+def _estimate_nested_bytes(value: Any) -> int:
+    if isinstance(value, dict):
+        return 100 + sum(60 + _estimate_nested_bytes(v) for v in value.values())
+    if isinstance(value, list):
+        return 60 + sum(8 + _estimate_nested_bytes(v) for v in value)
+    if isinstance(value, str):
+        return 50 + len(value) * 2
+    return 32
+
+def estimate_profile_bytes(profile: UserProfile) -> int:
+    """Rough resident size of a profile: fixed overhead plus its text and nested dicts"""
+    size = 1500 + len(profile.conversation_summary) * 2
+    for record in profile.conversation_history.records():
+        size += 200 + len(record.user_message) * 2 + len(record.bot_response) * 2
+    for nested in (profile.user_data, profile.prescription_summary, profile.appointment_status, profile.task_context):
+        if nested:
+            size += _estimate_nested_bytes(nested)
+    return size
+
 class ProgressiveConversationMemory:
     """
     Simplified conversation memory system for Sehat Sahara Health Assistant.
     Focuses on task context and user preferences rather than complex mental health tracking.
     """
     
-    def __init__(self, max_history_per_user: int = 50):
+    def __init__(self, max_history_per_user: int = 50, lock_stripes: int = DEFAULT_STRIPES):
         self.logger = logging.getLogger(__name__)
         self.max_history_per_user = max_history_per_user
+
+        # Per-user methods run under the user's stripe, so requests for one user serialize and
+        # requests for different users don't wait on each other. Cross-user indexes, aggregates
+        # and the dirty set are updated under _index_lock, which is never held while taking a stripe.
+        self.user_locks = StripedLock(lock_stripes)
+        self._index_lock = threading.Lock()
         
         # In-memory storage (in production, this would be backed by database)
         self.user_profiles: Dict[str, UserProfile] = {}
@@ -149,9 +234,44 @@ class ProgressiveConversationMemory:
         
         # Simple analytics
         self.conversation_stats = defaultdict(int)
+
+        # Append-only persistence, attached by enable_journal()
+        self.journal: Optional[MemoryJournal] = None
+
+        # Shared cross-worker storage, attached by attach_store()
+        self.store: Optional[MemoryStore] = None
+
+        # Resident profile budget with spill to disk, set by enable_profile_budget()
+        self.profile_budget = False
+
+        # Secondary indexes and aggregates kept up to date by the mutators, so deletes, session
+        # cleanup and system stats touch only the affected items. Not used with a shared store,
+        # where other workers change the data behind this process's back.
+        self.user_sessions: Dict[str, Set[str]] = defaultdict(set)
+        self._session_expiry: List[Tuple[float, str]] = []  # min-heap of (start epoch, session_id)
+        self._active_hours: Dict[int, int] = defaultdict(int)  # last-interaction epoch hour -> users
+        self._user_count = 0
+        self._tasks_completed = 0
+
+        # Cross-user medicine reminder scheduler, set by enable_reminder_scheduler()
+        self.reminder_scheduler: Optional[ReminderScheduler] = None
+        # medicine_reminders / adherence_events tables, set by attach_reminder_repository();
+        # once attached they replace the profile user_data lists
+        self.reminder_repository = None
+
+        # Sharded binary snapshot, set by enable_journal(snapshot_format='binary'); profiles
+        # changed since the last save are tracked so only their shards are rewritten
+        self.snapshot: Optional[ShardedSnapshot] = None
+        self._snapshot_lock = threading.Lock()  # one save at a time (compaction vs explicit saves)
+        self._dirty_users: Set[str] = set()
+        self._snapshot_full = False
+
+        # Background flusher for store/journal writes, set by enable_write_behind()
+        self.write_behind: Optional[WriteBehindQueue] = None
         
         self.logger.info("✅ Sehat Sahara Conversation Memory initialized")
     
+    @striped('user_locks')
     def create_or_get_user(self, user_id: str, **kwargs) -> UserProfile:
         """Create or retrieve user profile"""
         if user_id not in self.user_profiles:
@@ -162,16 +282,25 @@ class ProgressiveConversationMemory:
                 preferred_language=kwargs.get('preferred_language', 'hi'),
                 location=kwargs.get('location', '')
             )
+            if not self.store:
+                with self._index_lock:
+                    self._user_count += 1
+                    self._active_hours[_hour(self.user_profiles[user_id].last_interaction)] += 1
             self.logger.info(f"Created new user profile for: {user_id}")
         else:
             # Update existing profile with new information
             profile = self.user_profiles[user_id]
+            changed = False
             for key, value in kwargs.items():
-                if hasattr(profile, key) and value:
+                if hasattr(profile, key) and value and getattr(profile, key) != value:
                     setattr(profile, key, value)
+                    changed = True
+            if changed:
+                self._persist_user(profile)
         
         return self.user_profiles[user_id]
     
+    @striped('user_locks')
     def add_conversation_turn(self,
                              user_id: str,
                              user_message: str,
@@ -183,53 +312,61 @@ class ProgressiveConversationMemory:
         
         profile = self.create_or_get_user(user_id)
         
-        # Create conversation turn
-        turn = {
-            'timestamp': datetime.now().isoformat(),
-            'user_message': user_message,
-            'bot_response': bot_response,
-            'intent': nlu_result.get('primary_intent', 'unknown'),
-            'language': nlu_result.get('language_detected', 'hi'),
-            'urgency_level': nlu_result.get('urgency_level', 'low'),
-            'action_taken': action_taken,
-            'session_id': session_id or profile.current_session_id
-        }
-        
-        # Add to conversation history
-        profile.conversation_history.append(turn)
-        
-        # Keep only recent history
-        if len(profile.conversation_history) > self.max_history_per_user:
-            profile.conversation_history = profile.conversation_history[-self.max_history_per_user:]
+        # Add to conversation history; the ring buffer drops the oldest turn once full
+        history = profile.conversation_history
+        if history.capacity != self.max_history_per_user:
+            history.resize(self.max_history_per_user)
+        history.append(TurnRecord.build(
+            user_message, bot_response,
+            intent=nlu_result.get('primary_intent', 'unknown'),
+            language=nlu_result.get('language_detected', 'hi'),
+            urgency=nlu_result.get('urgency_level', 'low'),
+            action=action_taken,
+            session_id=session_id or profile.current_session_id
+        ))
         
         # Update profile statistics
         profile.total_conversations += 1
+        previous_hour = _hour(profile.last_interaction)
         profile.last_interaction = datetime.now()
         profile.message_count += 1
+        if not self.store:
+            self._move_active_hour(previous_hour, _hour(profile.last_interaction))
 
         
         # Update session context
         if session_id:
             profile.current_session_id = session_id
             if session_id not in self.session_contexts:
-                self.session_contexts[session_id] = {
+                self._put_record(self.session_contexts, session_id, {
                     'user_id': user_id,
                     'start_time': datetime.now(),
                     'turns_count': 0,
                     'actions_taken': []
-                }
+                })
+                if not self.store:
+                    self._index_session(session_id, self.session_contexts[session_id])
             
             self.session_contexts[session_id]['turns_count'] += 1
             if action_taken:
                 self.session_contexts[session_id]['actions_taken'].append(action_taken)
+            self._persist_session(session_id)
+
+        self._persist_user(profile)
         
         # Update conversation statistics
         intent = nlu_result.get('primary_intent', 'unknown')
-        self.conversation_stats[f'intent_{intent}'] += 1
-        self.conversation_stats['total_conversations'] += 1
+        with self._index_lock:
+            self.conversation_stats[f'intent_{intent}'] += 1
+            self.conversation_stats['total_conversations'] += 1
         
         self.logger.debug(f"Added conversation turn for user {user_id}: {intent}")
     
+    def get_user_profile(self, user_id: str) -> Optional[UserProfile]:
+        """Get a user profile without creating one"""
+        return self.user_profiles.get(user_id)
+
+    @striped('user_locks')
     def get_conversation_context(self, user_id: str, turns: int = 5) -> List[Dict[str, Any]]:
         """Get recent conversation context for a user"""
         if user_id not in self.user_profiles:
@@ -237,7 +374,26 @@ class ProgressiveConversationMemory:
         
         profile = self.user_profiles[user_id]
         return profile.conversation_history[-turns:] if profile.conversation_history else []
+
+    def get_conversation_summary(self, user_id: str) -> str:
+        """Get the rolling conversation summary for a user"""
+        if user_id not in self.user_profiles:
+            return ""
+        return self.user_profiles[user_id].conversation_summary
+
+    @striped('user_locks')
+    def update_conversation_summary(self, user_id: str, summary: str, covered_turns: int) -> None:
+        """Store a new rolling summary covering the first `covered_turns` messages"""
+        if user_id not in self.user_profiles:
+            return
+
+        profile = self.user_profiles[user_id]
+        profile.conversation_summary = summary
+        profile.summary_turn_count = covered_turns
+        self._persist_user(profile)
+        self.logger.debug(f"Updated conversation summary for user {user_id} ({covered_turns} turns)")
     
+    @striped('user_locks')
     def set_current_task(self, user_id: str, task: str, context: Dict[str, Any] = None) -> None:
         """Set current task for user (e.g., appointment booking flow)"""
         profile = self.create_or_get_user(user_id)
@@ -245,15 +401,17 @@ class ProgressiveConversationMemory:
         profile.task_context = context or {}
         
         # Track active task
-        self.active_tasks[user_id] = {
+        self._put_record(self.active_tasks, user_id, {
             'task': task,
             'context': context or {},
             'started_at': datetime.now(),
             'status': 'active'
-        }
+        })
+        self._persist_user(profile)
         
         self.logger.info(f"Set current task for user {user_id}: {task}")
     
+    @striped('user_locks')
     def get_current_task(self, user_id: str) -> Dict[str, Any]:
         """Get current task and context for user"""
         if user_id in self.user_profiles:
@@ -264,6 +422,7 @@ class ProgressiveConversationMemory:
             }
         return {'task': '', 'context': {}}
     
+    @striped('user_locks')
     def complete_task(self, user_id: str, task_result: Dict[str, Any] = None) -> None:
         """Mark current task as completed"""
         if user_id in self.user_profiles:
@@ -275,6 +434,9 @@ class ProgressiveConversationMemory:
                 profile.total_appointments_booked += 1
             elif completed_task == 'health_record_request':
                 profile.total_health_records_accessed += 1
+            if completed_task in ('appointment_booking', 'health_record_request'):
+                with self._index_lock:
+                    self._tasks_completed += 1
             
             # Clear current task
             profile.current_task = ""
@@ -285,9 +447,12 @@ class ProgressiveConversationMemory:
                 self.active_tasks[user_id]['status'] = 'completed'
                 self.active_tasks[user_id]['completed_at'] = datetime.now()
                 self.active_tasks[user_id]['result'] = task_result or {}
+                self._persist_task(user_id)
+            self._persist_user(profile)
             
             self.logger.info(f"Completed task for user {user_id}: {completed_task}")
     
+    @striped('user_locks')
     def update_user_preferences(self, user_id: str, preferences: Dict[str, Any]) -> None:
         """Update user preferences"""
         profile = self.create_or_get_user(user_id)
@@ -307,9 +472,11 @@ class ProgressiveConversationMemory:
         # Update location
         if 'location' in preferences:
             profile.location = preferences['location']
+        self._persist_user(profile)
         
         self.logger.info(f"Updated preferences for user {user_id}")
     
+    @striped('user_locks')
     def get_user_summary(self, user_id: str) -> Dict[str, Any]:
         """Get comprehensive user summary"""
         if user_id not in self.user_profiles:
@@ -319,9 +486,9 @@ class ProgressiveConversationMemory:
         recent_intents = []
         
         # Get recent intents from conversation history
-        for turn in profile.conversation_history[-5:]:
-            if turn.get('intent'):
-                recent_intents.append(turn['intent'])
+        for record in profile.conversation_history.records()[-5:]:
+            if record.intent_name:
+                recent_intents.append(record.intent_name)
         
         return {
             'user_info': {
@@ -373,65 +540,120 @@ class ProgressiveConversationMemory:
         cutoff_time = datetime.now() - timedelta(hours=hours)
         old_sessions = []
         
-        for session_id, context in self.session_contexts.items():
-            if context.get('start_time', datetime.now()) < cutoff_time:
-                old_sessions.append(session_id)
+        if self.store:
+            for session_id, context in self.session_contexts.items():
+                if context.get('start_time', datetime.now()) < cutoff_time:
+                    old_sessions.append(session_id)
+        else:
+            # Pop the expiry heap up to the cutoff; entries for sessions already deleted
+            # (or restarted under the same id) are stale and skipped
+            cutoff = cutoff_time.timestamp()
+            with self._index_lock:
+                while self._session_expiry and self._session_expiry[0][0] < cutoff:
+                    started, session_id = heapq.heappop(self._session_expiry)
+                    context = self.session_contexts.get(session_id)
+                    if context is not None and _epoch(context.get('start_time')) == started:
+                        old_sessions.append(session_id)
         
         for session_id in old_sessions:
-            del self.session_contexts[session_id]
+            # Under the owner's stripe: a request for that user may be appending to the session
+            context = self.session_contexts.get(session_id)
+            if context is not None:
+                with self.user_locks.hold(context.get('user_id')):
+                    self._drop_session(session_id)
         
         self.logger.info(f"Cleaned up {len(old_sessions)} old sessions")
         return len(old_sessions)
     
     def get_system_stats(self) -> Dict[str, Any]:
         """Get system-wide conversation statistics"""
-        active_users = len([p for p in self.user_profiles.values() 
-                           if (datetime.now() - p.last_interaction).days < 7])
-        
-        total_tasks_completed = sum([
-            p.total_appointments_booked + p.total_health_records_accessed 
-            for p in self.user_profiles.values()
-        ])
+        if self.store:
+            # Profiles belong to every worker, so local counters would only see this worker's
+            # writes, and walking them is one store read per user that also flushes the
+            # read-through cache. The user count is a single store count; the per-profile
+            # aggregates are not tracked in shared-store mode.
+            active_users = None
+            total_tasks_completed = None
+            total_users = len(self.user_profiles)
+        else:
+            # Maintained incrementally; active users are counted at hour granularity
+            current_hour = _hour(datetime.now())
+            with self._index_lock:
+                active_users = sum(self._active_hours.get(hour, 0)
+                                   for hour in range(current_hour - 7 * 24 + 1, current_hour + 1))
+                total_tasks_completed = self._tasks_completed
+                total_users = self._user_count
+        with self._index_lock:
+            conversation_stats = dict(self.conversation_stats)
         
         return {
-            'total_users': len(self.user_profiles),
+            'total_users': total_users,
             'active_users_week': active_users,
-            'total_conversations': self.conversation_stats.get('total_conversations', 0),
+            'total_conversations': conversation_stats.get('total_conversations', 0),
             'total_tasks_completed': total_tasks_completed,
             'active_sessions': len(self.session_contexts),
-            'conversation_stats': dict(self.conversation_stats),
-            'supported_languages': ['hi', 'pa', 'en']
+            'conversation_stats': conversation_stats,
+            'supported_languages': ['hi', 'pa', 'en'],
+            'storage': self.get_storage_stats()
         }
     
+    @striped('user_locks')
     def export_user_data(self, user_id: str) -> Dict[str, Any]:
         """Export all user data (for privacy compliance)"""
-        if user_id not in self.user_profiles:
+        export: Dict[str, Any] = {}
+        if user_id in self.user_profiles:
+            profile = self.user_profiles[user_id]
+            export = {
+                'profile': profile.to_dict(),
+                'active_task': self.active_tasks.get(user_id, {})
+            }
+        if self.reminder_repository is not None:
+            # Reminders and adherence live only in the tables once the repository is attached
+            reminders = self.reminder_repository.export_user(user_id)
+            if export or reminders['medicine_reminders'] or reminders['adherence_events']:
+                export.update(reminders)
+        if not export:
             return {}
-        
-        profile = self.user_profiles[user_id]
-        return {
-            'profile': profile.to_dict(),
-            'active_task': self.active_tasks.get(user_id, {}),
-            'export_timestamp': datetime.now().isoformat()
-        }
+        export['export_timestamp'] = datetime.now().isoformat()
+        return export
     
     def delete_user_data(self, user_id: str) -> bool:
         """Delete all user data (for privacy compliance)"""
         try:
-            if user_id in self.user_profiles:
-                del self.user_profiles[user_id]
-            
-            if user_id in self.active_tasks:
-                del self.active_tasks[user_id]
-            
-            # Remove from session contexts
-            sessions_to_remove = [
-                session_id for session_id, context in self.session_contexts.items()
-                if context.get('user_id') == user_id
-            ]
-            
-            for session_id in sessions_to_remove:
-                del self.session_contexts[session_id]
+            if self.write_behind is not None:
+                # Deletes go straight to the backend; don't let a queued upsert land after them.
+                # Flushed before taking the user's stripe, which the flusher needs for profile writes
+                self.write_behind.flush()
+            if self.reminder_repository is not None:
+                self.reminder_repository.delete_user(user_id)
+            with self.user_locks.hold(user_id):
+                if user_id in self.user_profiles:
+                    if not self.store:
+                        self._unindex_user(self.user_profiles[user_id])
+                    del self.user_profiles[user_id]
+                if self.journal:
+                    seq = self.journal.append(OP_DELETE, user_id, wait=False)
+                    if self.journal.sync_appends:
+                        self.user_locks.defer(lambda: self.journal.wait_durable(seq))
+                self._mark_dirty(user_id)
+
+                if user_id in self.active_tasks:
+                    del self.active_tasks[user_id]
+                if self.reminder_scheduler is not None:
+                    self.reminder_scheduler.remove_user(user_id)
+
+                # Remove from session contexts
+                if self.store:
+                    sessions_to_remove = [
+                        session_id for session_id, context in self.session_contexts.items()
+                        if context.get('user_id') == user_id
+                    ]
+                else:
+                    with self._index_lock:
+                        sessions_to_remove = list(self.user_sessions.get(user_id, ()))
+
+                for session_id in sessions_to_remove:
+                    self._drop_session(session_id)
             
             self.logger.info(f"Deleted all data for user {user_id}")
             return True
@@ -443,13 +665,7 @@ class ProgressiveConversationMemory:
     def save_to_file(self, filepath: str) -> bool:
         """Save conversation memory to file"""
         try:
-            data = {
-                'user_profiles': {uid: profile.to_dict() for uid, profile in self.user_profiles.items()},
-                'session_contexts': self.session_contexts,
-                'active_tasks': self.active_tasks,
-                'conversation_stats': dict(self.conversation_stats),
-                'export_timestamp': datetime.now().isoformat()
-            }
+            data = self._snapshot_data()
             
             with open(filepath, 'w', encoding='utf-8') as f:
                 json.dump(data, f, indent=2, ensure_ascii=False)
@@ -467,15 +683,7 @@ class ProgressiveConversationMemory:
             with open(filepath, 'r', encoding='utf-8') as f:
                 data = json.load(f)
 
-            # Load user profiles
-            self.user_profiles = {}
-            for uid, profile_data in data.get('user_profiles', {}).items():
-                self.user_profiles[uid] = UserProfile.from_dict(profile_data)
-
-            # Load other data
-            self.session_contexts = data.get('session_contexts', {})
-            self.active_tasks = data.get('active_tasks', {})
-            self.conversation_stats = defaultdict(int, data.get('conversation_stats', {}))
+            self._apply_snapshot(data)
 
             self.logger.info(f"Conversation memory loaded from {filepath}")
             return True
@@ -484,30 +692,458 @@ class ProgressiveConversationMemory:
             self.logger.error(f"Error loading conversation memory: {e}")
             return False
 
+    def _snapshot_data(self) -> Dict[str, Any]:
+        """Serializable view of the whole memory (snapshot / save_to_file format)"""
+        user_profiles = {}
+        for uid, profile in list(self.user_profiles.items()):
+            with self.user_locks.hold(uid):
+                user_profiles[uid] = profile.to_dict()
+        with self._index_lock:
+            conversation_stats = dict(self.conversation_stats)
+        return {
+            'user_profiles': user_profiles,
+            'session_contexts': {sid: encode_datetimes(ctx) for sid, ctx in list(self.session_contexts.items())},
+            'active_tasks': {uid: encode_datetimes(task) for uid, task in list(self.active_tasks.items())},
+            'conversation_stats': conversation_stats,
+            'export_timestamp': datetime.now().isoformat()
+        }
+
+    def _clear_profiles(self) -> None:
+        # Keep the budgeted map if one is attached, so loading spills cold profiles
+        if isinstance(self.user_profiles, dict):
+            self.user_profiles = {}
+        else:
+            self.user_profiles.clear()
+
+    def _apply_snapshot(self, data: Dict[str, Any]) -> None:
+        self._clear_profiles()
+        for uid, profile_data in data.get('user_profiles', {}).items():
+            self.user_profiles[uid] = UserProfile.from_dict(profile_data)
+        self._apply_snapshot_meta(data)
+        self._snapshot_full = True
+
+    def _apply_snapshot_meta(self, data: Dict[str, Any]) -> None:
+        decode_session = decode_datetimes(('start_time',))
+        decode_task = decode_datetimes(('started_at', 'completed_at'))
+        self.session_contexts = {sid: decode_session(ctx) for sid, ctx in data.get('session_contexts', {}).items()}
+        self.active_tasks = {uid: decode_task(task) for uid, task in data.get('active_tasks', {}).items()}
+        self.conversation_stats = defaultdict(int, data.get('conversation_stats', {}))
+        self._rebuild_indexes()
+
+    def save_snapshot(self, directory: str = None, journal_seq: int = 0) -> Dict[str, Any]:
+        """
+        Write the sharded binary snapshot. Only profiles changed (or deleted) since the last
+        save are encoded, and only their shards rewritten; the first save, one after a bulk
+        load, or one to another directory writes everything.
+        """
+        with self._snapshot_lock:
+            with self._index_lock:
+                meta = {'conversation_stats': dict(self.conversation_stats)}
+            if directory is not None and (self.snapshot is None or directory != self.snapshot.directory):
+                export = ShardedSnapshot(directory)
+                return export.write(self._shard_updates(export, None), meta, journal_seq=journal_seq, replace=True)
+            snapshot = self.snapshot
+            start = time.perf_counter()
+            with self._index_lock:
+                dirty, self._dirty_users = self._dirty_users, set()
+            full = self._snapshot_full or not snapshot.is_complete()
+            self._snapshot_full = False
+
+            try:
+                shard_updates = self._shard_updates(snapshot, None if full else dirty)
+                stats = snapshot.write(shard_updates, meta, journal_seq=journal_seq, replace=full)
+            except Exception:
+                with self._index_lock:
+                    self._dirty_users |= dirty
+                self._snapshot_full = self._snapshot_full or full
+                raise
+            stats['duration_ms'] = round((time.perf_counter() - start) * 1000, 1)
+            self.logger.info(f"Memory snapshot saved: {stats}")
+            return stats
+
+    def _shard_updates(self, snapshot: ShardedSnapshot,
+                       user_ids: Optional[Set[str]]) -> Dict[int, Dict[str, Optional[Dict[str, Any]]]]:
+        """{shard: {user: record, or None if deleted}} for the given users, or every profile"""
+        shard_updates: Dict[int, Dict[str, Optional[Dict[str, Any]]]] = defaultdict(dict)
+        with paused_gc():
+            if user_ids is None:
+                for uid, profile in list(self.user_profiles.items()):
+                    with self.user_locks.hold(uid):
+                        shard_updates[snapshot.shard_of(uid)][uid] = self._shard_record(uid, profile)
+            else:
+                for uid in user_ids:
+                    with self.user_locks.hold(uid):
+                        profile = self.user_profiles.get(uid)
+                        shard_updates[snapshot.shard_of(uid)][uid] = (
+                            self._shard_record(uid, profile) if profile is not None else None)
+        return shard_updates
+
+    def _shard_record(self, user_id: str, profile: UserProfile) -> Dict[str, Any]:
+        """A profile plus its sessions and task, so a user's whole state lives in one shard"""
+        record = profile.to_snapshot_record(self.max_history_per_user)
+        with self._index_lock:
+            session_ids = list(self.user_sessions.get(user_id, ()))
+        record['session_contexts'] = {sid: encode_datetimes(self.session_contexts[sid])
+                                      for sid in session_ids if sid in self.session_contexts}
+        task = self.active_tasks.get(user_id)
+        record['active_task'] = encode_datetimes(task) if task is not None else None
+        return record
+
+    def load_snapshot(self, directory: str = None) -> Optional[int]:
+        """Load a sharded binary snapshot, decoding shards in parallel; returns its journal sequence"""
+        snapshot = self.snapshot if directory is None else ShardedSnapshot(directory)
+        manifest = snapshot.read_manifest()
+        if manifest is None:
+            return None
+        if manifest.get('shards') != snapshot.shards:
+            snapshot = ShardedSnapshot(snapshot.directory, manifest['shards'], snapshot.workers)
+            self._snapshot_full = True  # re-shard on the next save
+        self._clear_profiles()
+        self._dirty_users = set()
+        sessions: Dict[str, Any] = {}
+        tasks: Dict[str, Any] = {}
+        with paused_gc():
+            for _, records in snapshot.iter_shards():
+                for profile_data in records:
+                    user_id = profile_data['user_id']
+                    sessions.update(profile_data.pop('session_contexts', None) or {})
+                    task = profile_data.pop('active_task', None)
+                    if task is not None:
+                        tasks[user_id] = task
+                    self.user_profiles[user_id] = UserProfile.from_snapshot_record(profile_data)
+            self._apply_snapshot_meta({**snapshot.read_meta(), 'session_contexts': sessions, 'active_tasks': tasks})
+        self.logger.info(f"Memory snapshot loaded: {manifest.get('profiles', 0)} profiles, "
+                         f"journal seq {manifest.get('journal_seq', 0)}")
+        return manifest.get('journal_seq', 0)
+
+    def _load_binary_snapshot(self, fallback_json_path: str = None) -> Optional[int]:
+        seq = self.load_snapshot()
+        if seq is None and fallback_json_path and os.path.exists(fallback_json_path):
+            # One-time upgrade from the JSON snapshot; the first compaction writes every shard
+            with open(fallback_json_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self._apply_snapshot(data)
+            seq = int(data.get('journal_seq', 0))
+        return seq
+
+    def _apply_journal_record(self, record: Dict[str, Any]) -> None:
+        user_id = record['user_id']
+        self._mark_dirty(user_id)
+        if record['op'] == OP_UPSERT:
+            self.user_profiles[user_id] = UserProfile.from_dict(record['data'])
+        elif record['op'] == OP_DELETE:
+            self.user_profiles.pop(user_id, None)
+            self.active_tasks.pop(user_id, None)
+
+    def enable_journal(self, snapshot_path: str, flush_interval: float = 0.05,
+                       compact_every: int = 50000, sync_appends: bool = False,
+                       snapshot_format: str = 'json', journal_path: str = None,
+                       snapshot_shards: int = DEFAULT_SHARDS, load_workers: int = 4,
+                       fallback_json_path: str = None, read_only: bool = False,
+                       compact_bytes_ratio: float = DEFAULT_COMPACT_BYTES_RATIO,
+                       compact_min_bytes: int = DEFAULT_COMPACT_MIN_BYTES) -> int:
+        """
+        Restore memory from snapshot + journal and persist further profile mutations by
+        appending to the journal instead of rewriting the whole file. Returns records replayed.
+        With snapshot_format='binary', snapshot_path is a directory of sharded binary files and
+        compaction rewrites only changed shards; fallback_json_path is read once if it is empty.
+        read_only restores without writing anything (no torn-tail truncation, flusher or
+        compaction) for tools reading the files of a running app; later mutations are not persisted.
+        Compaction runs every compact_every records, or once the journal exceeds compact_bytes_ratio
+        times the snapshot size (and compact_min_bytes), since each record is a whole profile.
+        """
+        if snapshot_format == 'binary':
+            self.snapshot = ShardedSnapshot(snapshot_path, shards=snapshot_shards, workers=load_workers)
+            journal = MemoryJournal(snapshot_path, journal_path=journal_path,
+                                    flush_interval=flush_interval, compact_every=compact_every,
+                                    sync_appends=sync_appends, read_only=read_only,
+                                    compact_bytes_ratio=compact_bytes_ratio, compact_min_bytes=compact_min_bytes,
+                                    snapshot_loader=lambda: self._load_binary_snapshot(fallback_json_path),
+                                    snapshot_writer=lambda seq: self.save_snapshot(journal_seq=seq)['profiles'])
+        else:
+            journal = MemoryJournal(snapshot_path, journal_path=journal_path, snapshot_fn=self._snapshot_data,
+                                    flush_interval=flush_interval, compact_every=compact_every,
+                                    sync_appends=sync_appends, read_only=read_only,
+                                    compact_bytes_ratio=compact_bytes_ratio, compact_min_bytes=compact_min_bytes)
+        replayed = journal.load(self._apply_snapshot, self._apply_journal_record)
+        if replayed:
+            self._rebuild_indexes()
+        if read_only:
+            return replayed
+        journal.start()
+        self.journal = journal
+        return replayed
+
+    def attach_store(self, store: MemoryStore, cache_entries: int = 1000,
+                     revalidate_seconds: float = 0.0) -> None:
+        """
+        Keep profiles, sessions and tasks in a store shared by all workers. Each worker holds
+        a bounded local cache that is revalidated against record versions after
+        revalidate_seconds (0 = check on every read). Writes are compare-and-set; when another
+        worker wrote the same record first, this worker's changes are merged into it.
+        """
+        self.store = store
+        self.user_profiles = SharedRecordMap(
+            store, NAMESPACE_PROFILES,
+            encode=lambda profile: profile.to_dict(history_limit=self.max_history_per_user),
+            decode=UserProfile.from_dict, merge=merge_changes,
+            max_entries=cache_entries, revalidate_seconds=revalidate_seconds)
+        self.session_contexts = SharedRecordMap(
+            store, NAMESPACE_SESSIONS, encode=encode_datetimes, decode=decode_datetimes(('start_time',)),
+            merge=merge_changes, max_entries=cache_entries, revalidate_seconds=revalidate_seconds)
+        self.active_tasks = SharedRecordMap(
+            store, NAMESPACE_TASKS, encode=encode_datetimes, decode=decode_datetimes(('started_at', 'completed_at')),
+            merge=merge_changes, max_entries=cache_entries, revalidate_seconds=revalidate_seconds)
+        self.logger.info(f"Conversation memory using shared store {type(store).__name__}")
+
+    def enable_profile_budget(self, max_profiles: int = 0, max_bytes: int = 0,
+                              spill_path: str = None, spill_store: MemoryStore = None) -> None:
+        """
+        Keep at most max_profiles profiles (and/or max_bytes of estimated size) resident.
+        Least-recently-used profiles are written to the spill store and rehydrated on the next
+        create_or_get_user / get_conversation_context. Call before enable_journal().
+        """
+        if self.store:
+            self.logger.warning("Profile budget ignored: the shared store cache is already bounded")
+            return
+        store = spill_store or SQLiteMemoryStore(spill_path or 'memory_spill.db')
+        profiles = BoundedRecordMap(
+            store, NAMESPACE_PROFILES,
+            encode=lambda profile: profile.to_dict(history_limit=self.max_history_per_user),
+            decode=UserProfile.from_dict, sizer=estimate_profile_bytes,
+            max_entries=max_profiles, max_bytes=max_bytes)
+        profiles.clear()  # the spill area only ever holds profiles evicted by this process
+        for uid, profile in self.user_profiles.items():
+            profiles[uid] = profile
+        self.user_profiles = profiles
+        self.profile_budget = True
+        self.logger.info(f"Profile budget enabled: max_profiles={max_profiles} max_bytes={max_bytes}")
+
+    def enable_write_behind(self, max_pending: int = 10000, flush_interval: float = 0.05,
+                            batch_size: int = 500, block_timeout: float = 1.0) -> WriteBehindQueue:
+        """
+        Move shared-store and journal writes off the request thread: mutators update memory
+        and enqueue the changed object; a background thread writes coalesced batches at most
+        flush_interval later. Call stop_write_behind() on shutdown to flush what is queued.
+        """
+        self.write_behind = WriteBehindQueue(self._write_record, max_pending=max_pending,
+                                             flush_interval=flush_interval, batch_size=batch_size,
+                                             block_timeout=block_timeout, name='memory-write-behind')
+        self.write_behind.start()
+        self.logger.info(f"Write-behind enabled: window={flush_interval * 1000:.0f}ms max_pending={max_pending}")
+        return self.write_behind
+
+    def stop_write_behind(self, timeout: float = 10.0) -> bool:
+        """Flush queued writes and stop the flusher; later mutations persist synchronously"""
+        if self.write_behind is None:
+            return True
+        flushed = self.write_behind.stop(timeout=timeout)
+        if not flushed:
+            self.logger.error(f"Write-behind stopped with {self.write_behind.pending_count()} unwritten records")
+        return flushed
+
+    def enable_reminder_scheduler(self, feed: LocalNotificationFeed = None, tick_seconds: float = 1.0,
+                                  start: bool = True) -> Optional[ReminderScheduler]:
+        """
+        Index every enabled medicine reminder by its next due time so due slots are pushed to
+        the notification feed and get_reminder_alerts() is a per-user lookup. Call after
+        enable_journal() so restored profiles are indexed.
+        """
+        if self.store:
+            self.logger.warning("Reminder scheduler ignored: reminders live in the shared store")
+            return None
+        self.reminder_scheduler = ReminderScheduler(feed, tick_seconds=tick_seconds)
+        for profile in self.user_profiles.values():
+            if profile.user_data.get('medicine_reminders'):
+                self.reminder_scheduler.sync_user(profile.user_id, profile.user_data)
+        if start:
+            self.reminder_scheduler.start()
+        self.logger.info(f"Reminder scheduler indexing {self.reminder_scheduler.reminder_count()} reminders")
+        return self.reminder_scheduler
+
+    def attach_reminder_repository(self, repository) -> None:
+        """
+        Serve reminders and adherence from the medicine_reminders / adherence_events tables
+        (see medicine_reminders.ReminderRepository); replaces the in-memory reminder scheduler.
+        Reminders already kept in profiles are not copied here: that is a one-off run of
+        migrate_reminders.py, so booting workers neither race on the import nor scan every profile.
+        """
+        if self.reminder_scheduler is not None:
+            self.reminder_scheduler.stop()
+            self.reminder_scheduler = None
+        self.reminder_repository = repository
+
+    def get_storage_stats(self) -> Dict[str, Any]:
+        stats: Dict[str, Any] = {'backend': type(self.store).__name__ if self.store else 'local'}
+        if self.profile_budget:
+            stats['profiles'] = self.user_profiles.get_stats()
+        if self.store:
+            stats['profiles'] = self.user_profiles.get_stats()
+            stats['sessions'] = self.session_contexts.get_stats()
+            stats['tasks'] = self.active_tasks.get_stats()
+        if self.journal:
+            stats['journal'] = self.journal.get_stats()
+        if self.write_behind is not None:
+            stats['write_behind'] = self.write_behind.get_stats()
+        stats['user_locks'] = self.user_locks.get_stats()
+        if self.reminder_scheduler is not None:
+            stats['reminders'] = self.reminder_scheduler.get_stats()
+        return stats
+
+    def _index_session(self, session_id: str, context: Dict[str, Any]) -> None:
+        started = _epoch(context.get('start_time'))
+        with self._index_lock:
+            self.user_sessions[context.get('user_id')].add(session_id)
+            if started is not None:
+                heapq.heappush(self._session_expiry, (started, session_id))
+
+    def _drop_session(self, session_id: str) -> None:
+        context = self.session_contexts.pop(session_id, None)
+        if context is None or self.store:
+            return
+        user_id = context.get('user_id')
+        self._mark_dirty(user_id)
+        with self._index_lock:
+            sessions = self.user_sessions.get(user_id)
+            if sessions is not None:
+                sessions.discard(session_id)
+                if not sessions:
+                    del self.user_sessions[user_id]
+
+    def _move_active_hour(self, old_hour: int, new_hour: int) -> None:
+        if old_hour == new_hour:
+            return
+        with self._index_lock:
+            self._active_hours[new_hour] += 1
+            self._active_hours[old_hour] -= 1
+            if self._active_hours[old_hour] <= 0:
+                del self._active_hours[old_hour]
+
+    def _unindex_user(self, profile: UserProfile) -> None:
+        hour = _hour(profile.last_interaction)
+        with self._index_lock:
+            self._user_count -= 1
+            self._tasks_completed -= profile.total_appointments_booked + profile.total_health_records_accessed
+            self._active_hours[hour] -= 1
+            if self._active_hours[hour] <= 0:
+                del self._active_hours[hour]
+
+    def _mark_dirty(self, user_id: str) -> None:
+        """Queue the user's shard for the next incremental snapshot"""
+        if self.snapshot is not None:
+            with self._index_lock:
+                self._dirty_users.add(user_id)
+
+    def _rebuild_indexes(self) -> None:
+        """Recompute indexes and aggregates after bulk loads (snapshot, journal replay)"""
+        self.user_sessions = defaultdict(set)
+        self._session_expiry = []
+        self._active_hours = defaultdict(int)
+        self._user_count = 0
+        self._tasks_completed = 0
+        if self.store:
+            return
+        for session_id, context in self.session_contexts.items():
+            self.user_sessions[context.get('user_id')].add(session_id)
+            started = _epoch(context.get('start_time'))
+            if started is not None:
+                self._session_expiry.append((started, session_id))
+        heapq.heapify(self._session_expiry)
+        if self.reminder_scheduler is not None:
+            self.reminder_scheduler.clear()
+        for profile in self.user_profiles.values():
+            self._user_count += 1
+            self._tasks_completed += profile.total_appointments_booked + profile.total_health_records_accessed
+            self._active_hours[_hour(profile.last_interaction)] += 1
+            if self.reminder_scheduler is not None and profile.user_data.get('medicine_reminders'):
+                self.reminder_scheduler.sync_user(profile.user_id, profile.user_data)
+
+    def _persist_user(self, profile: UserProfile) -> None:
+        """Write one profile (or queue it, with write-behind) to the shared store and/or journal; O(profile)"""
+        self._mark_dirty(profile.user_id)
+        if self.profile_budget:
+            self.user_profiles.mark_dirty(profile.user_id, profile)
+        if self.write_behind is not None:
+            self.write_behind.enqueue((NAMESPACE_PROFILES, profile.user_id), profile)
+        else:
+            self._write_record((NAMESPACE_PROFILES, profile.user_id), profile)
+
+    def _persist_session(self, session_id: str) -> None:
+        if self.store:
+            if self.write_behind is not None:
+                self.write_behind.enqueue((NAMESPACE_SESSIONS, session_id), self.session_contexts.get(session_id))
+            else:
+                self.session_contexts.save(session_id)
+
+    def _persist_task(self, user_id: str) -> None:
+        if self.store:
+            if self.write_behind is not None:
+                self.write_behind.enqueue((NAMESPACE_TASKS, user_id), self.active_tasks.get(user_id))
+            else:
+                self.active_tasks.save(user_id)
+
+    def _put_record(self, records: Dict[str, Any], key: str, obj: Dict[str, Any]) -> None:
+        """Assign a session or task; with a shared store and write-behind the store write is queued"""
+        if self.store and self.write_behind is not None:
+            records.stage(key, obj)
+            self.write_behind.enqueue((records.namespace, key), obj)
+        else:
+            records[key] = obj
+
+    def _write_record(self, key: Tuple[str, str], obj: Any) -> None:
+        """
+        Write one changed object to the shared store and/or journal (write-behind flusher target).
+        Encoded under its user's stripe; a synchronous journal append waits for fsync only
+        after the caller has released every stripe.
+        """
+        namespace, record_key = key
+        if obj is None:
+            return
+        with self.user_locks.hold(obj.get('user_id') if namespace == NAMESPACE_SESSIONS else record_key):
+            if namespace == NAMESPACE_PROFILES:
+                if self.store:
+                    self.user_profiles.save(record_key, obj)
+                if self.journal:
+                    seq = self.journal.append(OP_UPSERT, record_key,
+                                              obj.to_dict(history_limit=self.max_history_per_user), wait=False)
+                    if self.journal.sync_appends:
+                        self.user_locks.defer(lambda: self.journal.wait_durable(seq))
+            elif namespace == NAMESPACE_SESSIONS:
+                self.session_contexts.save(record_key, obj)
+            elif namespace == NAMESPACE_TASKS:
+                self.active_tasks.save(record_key, obj)
+
     # ===== NEW ENHANCED FEATURES =====
 
 
+    @striped('user_locks')
     def show_appointment_button(self, user_id: str, show: bool = True) -> None:
         """Show/hide appointment booking button"""
         profile = self.create_or_get_user(user_id)
         profile.show_appointment_button = show
         if show:
             profile.pending_actions.append('book_appointment')
+        self._persist_user(profile)
 
+    @striped('user_locks')
     def show_medicine_scan_button(self, user_id: str, show: bool = True) -> None:
         """Show/hide medicine scan button"""
         profile = self.create_or_get_user(user_id)
         profile.show_medicine_scan_button = show
         if show:
             profile.pending_actions.append('scan_medicine')
+        self._persist_user(profile)
 
+    @striped('user_locks')
     def show_prescription_button(self, user_id: str, show: bool = True) -> None:
         """Show/hide prescription button"""
         profile = self.create_or_get_user(user_id)
         profile.show_prescription_button = show
         if show:
             profile.pending_actions.append('view_prescription')
+        self._persist_user(profile)
 
+    @striped('user_locks')
     def update_appointment_status(self, user_id: str, appointment_id: str, status: str, appointment_date: datetime = None) -> None:
         """Update appointment status and track progress"""
         profile = self.create_or_get_user(user_id)
@@ -522,9 +1158,11 @@ class ProgressiveConversationMemory:
             profile.last_appointment_date = appointment_date
             profile.appointments_completed += 1
             profile.post_appointment_feedback_pending = True
+        self._persist_user(profile)
 
         self.logger.info(f"Updated appointment {appointment_id} status for user {user_id}: {status}")
 
+    @striped('user_locks')
     def add_prescription_summary(self, user_id: str, prescription_data: Dict[str, Any]) -> None:
         """Add prescription summary for user and auto-generate medicine reminders"""
         profile = self.create_or_get_user(user_id)
@@ -543,10 +1181,17 @@ class ProgressiveConversationMemory:
         if prescription_data.get('medications'):
             self._auto_generate_medicine_reminders(user_id, prescription_data)
 
+        self._persist_user(profile)
         self.logger.info(f"Added prescription summary for user {user_id}")
 
     def _auto_generate_medicine_reminders(self, user_id: str, prescription_data: Dict[str, Any]) -> None:
         """Auto-generate medicine reminders from prescription data"""
+        if self.reminder_repository is not None:
+            self.reminder_repository.upsert_prescription(
+                user_id, prescription_data.get('medications', []),
+                prescription_data.get('doctor_name', 'Doctor'), self._infer_medicine_timing)
+            return
+
         profile = self.create_or_get_user(user_id)
 
         if 'medicine_reminders' not in profile.user_data:
@@ -594,6 +1239,9 @@ class ProgressiveConversationMemory:
 
                 profile.user_data['medicine_reminders'].append(reminder)
 
+        if self.reminder_scheduler is not None:
+            self.reminder_scheduler.sync_user(user_id, profile.user_data)
+
     def _infer_medicine_timing(self, dosage_text: str) -> List[str]:
         """Infer medicine timing from dosage instructions"""
         dosage_lower = dosage_text.lower()
@@ -641,6 +1289,7 @@ class ProgressiveConversationMemory:
 
         return result
 
+    @striped('user_locks')
     def get_prescription_summary(self, user_id: str, prescription_id: str = None) -> Dict[str, Any]:
         """Get prescription summary for user"""
         if user_id not in self.user_profiles:
@@ -659,6 +1308,7 @@ class ProgressiveConversationMemory:
 
         return {}
 
+    @striped('user_locks')
     def check_post_appointment_followup(self, user_id: str) -> Dict[str, Any]:
         """Check if post-appointment follow-up is needed"""
         if user_id not in self.user_profiles:
@@ -681,14 +1331,22 @@ class ProgressiveConversationMemory:
 
         return {'needed': False}
 
+    @striped('user_locks')
     def complete_post_appointment_feedback(self, user_id: str) -> None:
         """Mark post-appointment feedback as completed"""
         if user_id in self.user_profiles:
-            self.user_profiles[user_id].post_appointment_feedback_pending = False
+            profile = self.user_profiles[user_id]
+            profile.post_appointment_feedback_pending = False
+            self._persist_user(profile)
             self.logger.info(f"Completed post-appointment feedback for user {user_id}")
 
+    @striped('user_locks')
     def schedule_medicine_reminder(self, user_id: str, medicine_data: Dict[str, Any]) -> None:
         """Schedule medicine reminders for user"""
+        if self.reminder_repository is not None:
+            self.reminder_repository.add(user_id, medicine_data)
+            return
+
         profile = self.create_or_get_user(user_id)
 
         if 'medicine_reminders' not in profile.user_data:
@@ -708,10 +1366,35 @@ class ProgressiveConversationMemory:
         }
 
         profile.user_data['medicine_reminders'].append(reminder)
-        self.save_to_file('conversation_memory.json')
+        if self.reminder_scheduler is not None:
+            self.reminder_scheduler.add_reminder(user_id, len(profile.user_data['medicine_reminders']) - 1, reminder)
+        self._persist_user(profile)
+
+    @striped('user_locks')
+    def set_reminder_enabled(self, user_id: str, medicine_name: str, enabled: bool) -> bool:
+        """Turn a user's reminders for one medicine on or off"""
+        if self.reminder_repository is not None:
+            return self.reminder_repository.set_active(user_id, medicine_name, enabled)
+        if user_id not in self.user_profiles:
+            return False
 
+        profile = self.user_profiles[user_id]
+        changed = False
+        for index, reminder in enumerate(profile.user_data.get('medicine_reminders', [])):
+            if reminder['medicine_name'].lower() == medicine_name.lower():
+                reminder['reminder_enabled'] = enabled
+                changed = True
+                if self.reminder_scheduler is not None:
+                    self.reminder_scheduler.add_reminder(user_id, index, reminder)
+        if changed:
+            self._persist_user(profile)
+        return changed
+
+    @striped('user_locks')
     def get_medicine_reminders(self, user_id: str) -> List[Dict[str, Any]]:
         """Get active medicine reminders for user"""
+        if self.reminder_repository is not None:
+            return self.reminder_repository.list_active(user_id)
         if user_id not in self.user_profiles:
             return []
 
@@ -727,6 +1410,7 @@ class ProgressiveConversationMemory:
 
         return active_reminders
 
+    @striped('user_locks')
     def add_doctor_prescription_summary(self, user_id: str, appointment_data: Dict[str, Any]) -> None:
         """Add prescription summary from doctor's appointment and auto-generate reminders"""
         if not appointment_data.get('prescription'):
@@ -757,11 +1441,15 @@ class ProgressiveConversationMemory:
         if prescription_data.get('medications'):
             self._auto_generate_medicine_reminders(user_id, prescription_data)
 
-        self.save_to_file('conversation_memory.json')
+        self._persist_user(profile)
         self.logger.info(f"Added doctor prescription summary for user {user_id} from appointment {appointment_data.get('appointment_id')}")
 
+    @striped('user_locks')
     def update_reminder_adherence(self, user_id: str, medicine_name: str, taken_time: str) -> None:
         """Update medicine adherence tracking"""
+        if self.reminder_repository is not None:
+            self.reminder_repository.record_adherence(user_id, medicine_name, taken_time)
+            return
         if user_id not in self.user_profiles:
             return
 
@@ -778,11 +1466,19 @@ class ProgressiveConversationMemory:
             'taken_time': taken_time,
             'status': 'taken'
         }
+        if self.reminder_scheduler is not None:
+            self.reminder_scheduler.mark_taken(user_id, medicine_name)
 
-        self.save_to_file('conversation_memory.json')
+        self._persist_user(profile)
 
+    @striped('user_locks')
     def get_reminder_alerts(self, user_id: str) -> List[Dict[str, Any]]:
         """Get pending medicine reminders for today"""
+        if self.reminder_repository is not None:
+            return self.reminder_repository.pending_alerts(user_id)
+        if self.reminder_scheduler is not None:
+            return self.reminder_scheduler.pending_alerts(user_id)
+
         reminders = self.get_medicine_reminders(user_id)
         alerts = []
 
@@ -809,6 +1505,7 @@ class ProgressiveConversationMemory:
 
         return alerts
 
+    @striped('user_locks')
     def get_user_progress_summary(self, user_id: str) -> Dict[str, Any]:
         """Get comprehensive progress summary for user"""
         if user_id not in self.user_profiles:
@@ -840,7 +1537,8 @@ class ProgressiveConversationMemory:
                 'prescription': profile.show_prescription_button
             },
             'pending_actions': profile.pending_actions,
-            'medicine_reminders_count': len(profile.user_data.get('medicine_reminders', [])),
+            'medicine_reminders_count': (self.reminder_repository.count(user_id) if self.reminder_repository is not None
+                                         else len(profile.user_data.get('medicine_reminders', []))),
             'prescription_summary_available': total_prescriptions > 0
         }
 
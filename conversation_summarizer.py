@@ -0,0 +1,231 @@
+"""
+Sehat Sahara Rolling Conversation Summarizer
+Keeps a compact running summary per user so LLM prompts stay bounded in long conversations
+"""
+
+import json
+import logging
+import queue
+import threading
+from collections import Counter
+from typing import Dict, List, Any, Optional
+
+from llm_rate_limiter import llm_priority, PRIORITY_BACKGROUND
+from llm_telemetry import llm_caller
+
+
+class ConversationSummarizer:
+    """
+    Background summarizer for ProgressiveConversationMemory.
+    Every `summarize_every` turns the user's older turns are folded into a short
+    running summary (stored on the UserProfile) by a worker thread, so the request
+    path only reads the summary plus the last few turns.
+    """
+
+    def __init__(self, memory, llm_client=None, summarize_every: int = 6,
+                 recent_turns: int = 2, max_summary_chars: int = 400):
+        self.logger = logging.getLogger(__name__)
+        self.memory = memory
+        self.llm_client = llm_client  # ApiClient-compatible (generate_response), optional
+        self.summarize_every = max(1, summarize_every)
+        self.recent_turns = max(0, recent_turns)
+        self.max_summary_chars = max_summary_chars
+
+        self._queue: "queue.Queue[str]" = queue.Queue()
+        self._pending = set()
+        self._pending_lock = threading.Lock()
+        self._worker: Optional[threading.Thread] = None
+
+        # Simple analytics
+        self.stats = {
+            'summaries_generated': 0,
+            'llm_summaries': 0,
+            'local_summaries': 0,
+            'summary_errors': 0,
+            'context_requests': 0,
+            'full_history_chars': 0,
+            'context_chars': 0
+        }
+
+    # ===== REQUEST PATH =====
+
+    def record_turn(self, user_id: str) -> None:
+        """Schedule a summary refresh once enough new turns have accumulated"""
+        profile = self.memory.user_profiles.get(user_id)
+        if not profile:
+            return
+
+        if profile.message_count - profile.summary_turn_count < self.summarize_every:
+            return
+
+        with self._pending_lock:
+            if user_id in self._pending:
+                return
+            self._pending.add(user_id)
+
+        self._ensure_worker()
+        self._queue.put(user_id)
+
+    def build_context_history(self, user_id: str,
+                              recent_messages: List[Dict[str, str]] = None) -> List[Dict[str, str]]:
+        """
+        Build chat-style context: running summary plus the last few turns. recent_messages
+        (plain-text chat messages, e.g. from RecentTurns) replace the profile's stored turns.
+        """
+        profile = self.memory.user_profiles.get(user_id)
+        if not profile and recent_messages is None:
+            return []
+
+        history: List[Dict[str, str]] = []
+        if profile and profile.conversation_summary:
+            history.append({
+                'role': 'system',
+                'content': f"Summary of earlier conversation: {profile.conversation_summary}"
+            })
+
+        if recent_messages is not None:
+            history.extend(recent_messages[-2 * self.recent_turns:] if self.recent_turns else [])
+            # Compare against everything that was on hand; nothing to re-decode here
+            full_chars = _messages_chars(recent_messages)
+        else:
+            recent = profile.conversation_history[-self.recent_turns:] if self.recent_turns else []
+            history.extend(turns_to_messages(recent))
+            full_chars = _messages_chars(turns_to_messages(profile.conversation_history))
+
+        # Track how much prompt we avoided sending versus the full stored history
+        self.stats['context_requests'] += 1
+        self.stats['full_history_chars'] += full_chars
+        self.stats['context_chars'] += _messages_chars(history)
+
+        return history
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get summarizer statistics including prompt-size reduction"""
+        full_chars = self.stats['full_history_chars']
+        sent_chars = self.stats['context_chars']
+        return {
+            **self.stats,
+            'queue_depth': self._queue.qsize(),
+            'summarize_every': self.summarize_every,
+            'recent_turns': self.recent_turns,
+            'prompt_reduction': round(1 - sent_chars / full_chars, 3) if full_chars else 0.0
+        }
+
+    # ===== BACKGROUND WORKER =====
+
+    def _ensure_worker(self) -> None:
+        if self._worker and self._worker.is_alive():
+            return
+        self._worker = threading.Thread(target=self._run, name="conversation-summarizer", daemon=True)
+        self._worker.start()
+
+    def _run(self) -> None:
+        while True:
+            user_id = self._queue.get()
+            try:
+                self.summarize_user(user_id)
+            except Exception as e:
+                self.stats['summary_errors'] += 1
+                self.logger.error(f"Error summarizing conversation for {user_id}: {e}")
+            finally:
+                with self._pending_lock:
+                    self._pending.discard(user_id)
+                self._queue.task_done()
+
+    def wait_until_idle(self) -> None:
+        """Block until all queued summaries are processed (used by tests and shutdown)"""
+        self._queue.join()
+
+    def summarize_user(self, user_id: str) -> Optional[str]:
+        """Fold turns added since the last summary into the user's running summary"""
+        profile = self.memory.user_profiles.get(user_id)
+        if not profile:
+            return None
+
+        covered_turns = profile.message_count
+        new_turn_count = covered_turns - profile.summary_turn_count
+        if new_turn_count <= 0:
+            return profile.conversation_summary
+
+        # Keep the last `recent_turns` out of the summary, they are sent verbatim
+        new_turns = profile.conversation_history[-new_turn_count:]
+        if self.recent_turns:
+            new_turns = new_turns[:-self.recent_turns] if len(new_turns) > self.recent_turns else []
+            covered_turns -= min(self.recent_turns, new_turn_count)
+        if not new_turns:
+            return profile.conversation_summary
+
+        summary = None
+        if self.llm_client and getattr(self.llm_client, 'is_available', False):
+            summary = self._llm_summary(profile.conversation_summary, new_turns, profile.preferred_language)
+            if summary:
+                self.stats['llm_summaries'] += 1
+
+        if not summary:
+            older_turns = profile.conversation_history[:-self.recent_turns] if self.recent_turns else profile.conversation_history
+            summary = self._local_summary(older_turns)
+            self.stats['local_summaries'] += 1
+
+        summary = summary[:self.max_summary_chars]
+        self.memory.update_conversation_summary(user_id, summary, covered_turns)
+        self.stats['summaries_generated'] += 1
+        return summary
+
+    def _llm_summary(self, previous_summary: str, turns: List[Dict[str, Any]], language: str) -> Optional[str]:
+        transcript = "\n".join(
+            f"{m['role'].title()}: {m['content']}" for m in turns_to_messages(turns)
+        )
+        prompt = f"""Update the running summary of a Sehat Sahara health app conversation.
+Keep only facts useful for the next replies: symptoms and their duration, appointments, medicines,
+prescriptions, the user's open request and preferred language ({language}).
+Write at most 3 short sentences in English. Return ONLY the summary text.
+
+PREVIOUS SUMMARY:
+{previous_summary or "None"}
+
+NEW TURNS:
+{transcript}
+"""
+        try:
+            # Summaries yield to live user turns at the shared upstream limiter
+            with llm_priority(PRIORITY_BACKGROUND, deadline_seconds=120), llm_caller("summary"):
+                return self.llm_client.generate_response(prompt, max_tokens=150, temperature=0.2)
+        except Exception as e:
+            self.logger.warning(f"LLM summary failed, using local summary: {e}")
+            return None
+
+    def _local_summary(self, turns: List[Dict[str, Any]]) -> str:
+        """Extractive summary of the stored older turns: intents, last action and latest concerns"""
+        intents = Counter(t.get('intent') for t in turns if t.get('intent') and t.get('intent') != 'unknown')
+        actions = [t.get('action_taken') for t in turns if t.get('action_taken')]
+        concerns = [t.get('user_message', '')[:60] for t in turns if t.get('user_message')][-2:]
+        language = next((t.get('language') for t in reversed(turns) if t.get('language')), None)
+
+        parts = []
+        if intents:
+            parts.append("Topics: " + ", ".join(f"{intent} ({count})" for intent, count in intents.most_common(3)) + ".")
+        if actions:
+            parts.append("Last action: " + actions[-1] + ".")
+        if concerns:
+            parts.append("User said: " + " | ".join(concerns) + ".")
+        if language:
+            parts.append(f"Language: {language}.")
+        return " ".join(parts)
+
+
+def turns_to_messages(turns: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+    """Convert stored conversation turns into chat messages with plain assistant text"""
+    messages = []
+    for turn in turns:
+        messages.append({'role': 'user', 'content': turn.get('user_message', '')})
+        bot_response = turn.get('bot_response', '')
+        try:
+            bot_content = json.loads(bot_response).get('response', '')
+        except (json.JSONDecodeError, AttributeError, TypeError):
+            bot_content = bot_response or ''
+        messages.append({'role': 'assistant', 'content': bot_content})
+    return messages
+
+
+def _messages_chars(messages: List[Dict[str, str]]) -> int:
+    return sum(len(m.get('content', '')) for m in messages)
@@ -0,0 +1,525 @@
+"""
+Sehat Sahara Dialog Engine
+The assistant's symptom-check conversation as a declarative finite-state machine: states,
+transitions, keyword tables and per-language prompts are data, compiled once into lookup
+tables and one regex per keyword table. Each user's dialog state is a single integer
+(stage, language, answers so far, symptoms seen, expiry), kept with a TTL in a local map
+or in a shared memory store.
+"""
+
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from typing import Dict, Any, List, Optional, Tuple
+
+from memory_store import MemoryStore, SharedRecordMap
+
+logger = logging.getLogger(__name__)
+
+NAMESPACE_DIALOG_STATES = 'dialog_state'
+
+# ===== Flow specification =====
+
+LANGUAGE_PATTERNS = {
+    'hi': [
+        r'\b(hai|kya|kaise|kab|kahan|kahan|meri|mera|teri|tera|chahiye|leni|karna|karne|nahi|bhi|par|aur|bukhar|dard|khansi|tabiyat|kharaab|bimari|doctor|appointment|madad|help|namaste|kaun|kaisa|kitna|kabhi|kabhi|bas|aur|ek|do|teen|char|paanch|cheh|saat|aath|nau|das)\b',
+    ],
+    'pa': [
+        r'\b(hai|ki|kive|kado|kithe|meri|mera|teri|tera|chahidi|leni|karna|karne|nahin|bhi|par|aur|bukhar|dukh|khansi|tabiyat|kharaab|bimari|doctor|appointment|madad|help|sat|sri|akal|ki|kinne|kithon|kithe|kivein|bas|ate|ik|do|tin|char|panj|chhe|satt|atth|nau|das)\b',
+    ],
+    'en': [
+        r'\b(the|is|are|do|have|my|i|you|this|that|what|how|when|where|why|fever|headache|pain|cough|cold|doctor|appointment|help|medicine|hello|hi|yes|no|please|thank|thanks|need|want|have|has|had|will|would|can|could|should|take|get|give|make|go|come|see|look|find|book|schedule|appointment|doctor|medicine|health|pain|fever|cough|cold|sick|hurt|ache|problem|issue|help|emergency|urgent)\b'
+    ]
+}
+
+SYMPTOM_KEYWORDS = {
+    'hi': ['bukhar', 'sir dard', 'dard', 'khansi', 'thakan', 'kamzori', 'ulti', 'dast'],
+    'pa': ['bukhar', 'sir dukh', 'dukh', 'khansi', 'thakan', 'kamzori', 'ulti', 'dast'],
+    'en': ['fever', 'headache', 'pain', 'cough', 'tired', 'weak', 'vomiting', 'diarrhea']
+}
+
+EMERGENCY_KEYWORDS = {
+    'hi': ['emergency', 'accident', 'ambulance', 'turant', 'jaldi', 'madad', 'seene mein dard', 'saans nahi aa rahi', 'bahut tez dard', 'dil ka dora', 'heart attack', 'behosh', 'unconscious', 'khoon', 'bleeding', 'mar raha', 'dying'],
+    'pa': ['emergency', 'accident', 'ambulance', 'turant', 'jaldi', 'madad', 'seene vich dard', 'saans nahi aa rahi', 'bahut tez dard', 'dil da dora', 'heart attack', 'behosh', 'unconscious', 'khoon', 'bleeding', 'mar raha', 'dying'],
+    'en': ['emergency', 'accident', 'ambulance', 'urgent', 'help', 'chest pain', 'cannot breathe', 'severe pain', 'heart attack', 'unconscious', 'bleeding', 'dying']
+}
+
+MEDICAL_ADVICE_KEYWORDS = {
+    'hi': ['kya dawai', 'kaun si dawai', 'ilaj kya', 'kaise theek', 'diagnosis', 'medicine', 'tablet', 'dawai', 'capsule', 'injection', 'dose', 'kitni dawai', 'kab dawai', 'kaise khana', 'side effect', 'allergy'],
+    'pa': ['ki dawai', 'kihri dawai', 'ilaj ki', 'kivein theek', 'diagnosis', 'medicine', 'tablet', 'dawai', 'capsule', 'injection', 'dose', 'kinni dawai', 'kad dawai', 'kivein khana', 'side effect', 'allergy'],
+    'en': ['what medicine', 'which tablet', 'how to cure', 'what treatment', 'diagnosis', 'medicine', 'tablet', 'capsule', 'injection', 'dose', 'how much', 'when to take', 'side effect', 'allergy']
+}
+
+# Symptom keyword -> precautionary advice category
+SYMPTOM_CATEGORIES = {
+    'bukhar': 'fever',
+    'fever': 'fever',
+    'khansi': 'cough',
+    'cough': 'cough',
+    'dast': 'stomach',
+    'stomach': 'stomach',
+    'ulti': 'stomach',
+    'vomiting': 'stomach'
+}
+
+SYMPTOM_QUESTIONS = {
+    'hi': [
+        "मैं आपकी मदद करने के लिए हूं। कृपया अपने लक्षणों के बारे में बताएं।",
+        "आपको क्या परेशानी हो रही है?",
+        "कितने समय से आपको ये समस्या है?",
+        "दर्द की तीव्रता 1 से 10 के बीच कितनी है?",
+        "क्या आपको बुखार, खांसी या कोई अन्य समस्या भी है?",
+        "क्या आपका पेट खराब है या उल्टी हो रही है?",
+        "क्या आपको सांस लेने में कोई दिक्कत है?",
+        "क्या आपको सीने में दर्द है?"
+    ],
+    'pa': [
+        "ਮੈਂ ਤੁਹਾਡੀ ਮਦਦ ਕਰਨ ਲਈ ਹਾਂ। ਕਿਰਪਾ ਕਰਕੇ ਆਪਣੇ ਲੱਛਣਾਂ ਬਾਰੇ ਦੱਸੋ।",
+        "ਤੁਹਾਨੂੰ ਕੀ ਪਰੇਸ਼ਾਨੀ ਹੋ ਰਹੀ ਹੈ?",
+        "ਕਿੰਨੇ ਸਮੇਂ ਤੋਂ ਤੁਹਾਨੂੰ ਇਹ ਸਮੱਸਿਆ ਹੈ?",
+        "ਦਰਦ ਦੀ ਤੀਬਰਤਾ 1 ਤੋਂ 10 ਵਿੱਚੋਂ ਕਿੰਨੀ ਹੈ?",
+        "ਕੀ ਤੁਹਾਨੂੰ ਬੁਖ਼ਾਰ, ਖੰਘ ਜਾਂ ਕੋਈ ਹੋਰ ਸਮੱਸਿਆ ਵੀ ਹੈ?",
+        "ਕੀ ਤੁਹਾਡਾ ਪੇਟ ਖ਼ਰਾਬ ਹੈ ਜਾਂ ਉਲਟੀ ਹੋ ਰਹੀ ਹੈ?",
+        "ਕੀ ਤੁਹਾਨੂੰ ਸਾਹ ਲੈਣ ਵਿੱਚ ਕੋਈ ਦਿੱਕਤ ਹੈ?",
+        "ਕੀ ਤੁਹਾਨੂੰ ਸੀਨੇ ਵਿੱਚ ਦਰਦ ਹੈ?"
+    ],
+    'en': [
+        "I am here to help. Please tell me about your symptoms.",
+        "What is troubling you?",
+        "How long have you been feeling this way?",
+        "On a scale of 1 to 10, how severe is the pain?",
+        "Are you experiencing any fever, cough or any other issues?",
+        "Are you having stomach problems or vomiting?",
+        "Are you having any difficulty breathing?",
+        "Are you experiencing chest pain?"
+    ]
+}
+
+# Precautionary advice by language (general only, no medical advice)
+PRECAUTIONARY_ADVICE = {
+    'hi': {
+        'fever': "आराम करें और खूब पानी पीएं। मच्छरदानी का इस्तेमाल करें।",
+        'cough': "गर्म पानी के साथ नमक से गरारे करें। अदरक वाली चाय पीएं।",
+        'stomach': "सादा खाना जैसे खिचड़ी खाएं। ORS घोल पीएं।",
+        'general': "आराम करें और खूब तरल पदार्थ पीएं।"
+    },
+    'pa': {
+        'fever': "ਆਰਾਮ ਕਰੋ ਅਤੇ ਖੂਬ ਪਾਣੀ ਪੀਓ। ਮੱਛਰਦਾਨੀ ਦਾ ਇਸਤੇਮਾਲ ਕਰੋ।",
+        'cough': "ਗਰਮ ਪਾਣੀ ਨਾਲ ਨਮਕ ਨਾਲ ਗਰਾਰੇ ਕਰੋ। ਅਦਰਕ ਵਾਲੀ ਚਾਹ ਪੀਓ।",
+        'stomach': "ਸਾਦਾ ਖਾਣਾ ਜਿਵੇਂ ਖਿਚੜੀ ਖਾਓ। ORS ਘੋਲ ਪੀਓ।",
+        'general': "ਆਰਾਮ ਕਰੋ ਅਤੇ ਖੂਬ ਤਰਲ ਪਦਾਰਥ ਪੀਓ।"
+    },
+    'en': {
+        'fever': "Get plenty of rest and stay hydrated by drinking water or fluids.",
+        'cough': "Gargle with warm salt water or drink warm fluids like ginger tea.",
+        'stomach': "Eat simple, light foods like khichdi and drink plenty of fluids like ORS.",
+        'general': "Get plenty of rest and stay hydrated."
+    }
+}
+
+MESSAGES = {
+    'emergency': {
+        'hi': "यह आपातकालीन स्थिति है। मैं आपको तुरंत आपातकालीन सेवाओं से जोड़ रही हूं। एंबुलेंस के लिए 108 कॉल करें।",
+        'pa': "ਇਹ ਐਮਰਜੈਂਸੀ ਸਥਿਤੀ ਹੈ। ਮੈਂ ਤੁਹਾਨੂੰ ਤੁਰੰਤ ਐਮਰਜੈਂਸੀ ਸੇਵਾਵਾਂ ਨਾਲ ਜੋੜ੍ਹ ਰਹੀ ਹਾਂ। ਐਂਬੂਲੈਂਸ ਲਈ 108 ਕਾਲ ਕਰੋ।",
+        'en': "This is an emergency situation. I'm connecting you to emergency services immediately. For ambulance, call 108."
+    },
+    'no_medical_advice': {
+        'hi': "मैं डॉक्टर नहीं हूं और निदान नहीं दे सकती। हालांकि, मैं आपको अभी एक qualified डॉक्टर के साथ appointment बुक करने में मदद कर सकती हूं जो आपको सही सलाह दे सके। क्या आप आगे बढ़ना चाहेंगे?",
+        'pa': "ਮੈਂ ਡਾਕਟਰ ਨਹੀਂ ਹਾਂ ਅਤੇ ਨਿਦਾਨ ਨਹੀਂ ਦੇ ਸਕਦੀ। ਹਾਲਾਂਕਿ, ਮੈਂ ਤੁਹਾਨੂੰ ਹੁਣੇ ਇੱਕ qualified ਡਾਕਟਰ ਨਾਲ appointment ਬੁਕ ਕਰਨ ਵਿੱਚ ਮਦਦ ਕਰ ਸਕਦੀ ਹਾਂ ਜੋ ਤੁਹਾਨੂੰ ਸਹੀ ਸਲਾਹ ਦੇ ਸਕੇ। ਕੀ ਤੁਸੀਂ ਅੱਗੇ ਵਧਣਾ ਚਾਹੋਗੇ?",
+        'en': "I am not a doctor and cannot provide a diagnosis. However, I can help you book an appointment with a qualified doctor right now who can give you the correct advice. Would you like to proceed?"
+    },
+    'general_help': {
+        'hi': "मैं Sehat Sahara ऐप में आपकी मदद करने के लिए हूं। मैं आपकी मदद कर सकती हूं appointment बुक करने, दवाइयों की जानकारी ढूंढने, health records चेक करने और भी बहुत कुछ में। आप क्या मदद चाहते हैं?",
+        'pa': "ਮੈਂ Sehat Sahara ਐਪ ਵਿੱਚ ਤੁਹਾਡੀ ਮਦਦ ਕਰਨ ਲਈ ਹਾਂ। ਮੈਂ ਤੁਹਾਡੀ ਮਦਦ ਕਰ ਸਕਦੀ ਹਾਂ appointment ਬੁਕ ਕਰਨ, ਦਵਾਈਆਂ ਦੀ ਜਾਣਕਾਰੀ ਲੱਭਣ, health records ਚੈਕ ਕਰਨ ਅਤੇ ਵੀ ਬਹੁਤ ਕੁਝ ਵਿੱਚ। ਤੁਸੀਂ ਕੀ ਮਦਦ ਚਾਹੁੰਦੇ ਹੋ?",
+        'en': "I'm here to help you navigate the Sehat Sahara app. I can help you book appointments, find medicine information, check health records, and more. What would you like help with?"
+    },
+    'disclaimer': {
+        'hi': "कृपया याद रखें, यह चिकित्सा सलाह या निदान नहीं है। उचित इलाज के लिए डॉक्टर से परामर्श करना बहुत जरूरी है। क्या आप अभी appointment बुक करना चाहेंगे?",
+        'pa': "ਕਿਰਪਾ ਕਰਕੇ ਯਾਦ ਰੱਖੋ, ਇਹ ਦਵਾਈ ਸਲਾਹ ਜਾਂ ਨਿਦਾਨ ਨਹੀਂ ਹੈ। ਉਚਿਤ ਇਲਾਜ ਲਈ ਡਾਕਟਰ ਨਾਲ ਸਲਾਹ ਕਰਨਾ ਬਹੁਤ ਜ਼ਰੂਰੀ ਹੈ। ਕੀ ਤੁਸੀਂ ਹੁਣੇ appointment ਬੁਕ ਕਰਨਾ ਚਾਹੋਗੇ?",
+        'en': "Please remember, this is not medical advice or a diagnosis. For proper treatment, it is very important to consult with a doctor. Would you like me to help you book an appointment now?"
+    }
+}
+
+SOS_PARAMETERS = {"emergency_number": "108", "type": "medical_emergency"}
+
+SYMPTOM_FLOW = {
+    'languages': ['hi', 'pa', 'en'],
+    'default_language': 'en',
+    # A conversation in 'initial' has its language detected from the next message
+    'initial': 'initial',
+    'after_initial': 'understanding',
+    'states': ['initial', 'understanding', 'symptom_check'],
+    'answers_before_advice': 3,
+    # Events are checked in this order; the first whose guard holds fires
+    'events': {
+        'understanding': ['emergency', 'advice_request', 'symptoms', 'other'],
+        'symptom_check': ['emergency', 'advice_request', 'enough_answers', 'answer']
+    },
+    # (state, event) -> next state (None = stay), effect on the answer count and symptoms,
+    # response, action and action parameters
+    'transitions': [
+        ('understanding', 'emergency', None, None, 'emergency', 'TRIGGER_SOS', SOS_PARAMETERS),
+        ('understanding', 'advice_request', None, None, 'no_medical_advice', 'Maps_TO_APPOINTMENT_BOOKING', {}),
+        ('understanding', 'symptoms', 'symptom_check', 'start', 'next_question', 'CONTINUE_SYMPTOM_CHECK', {}),
+        ('understanding', 'other', None, None, 'general_help', 'SHOW_APP_FEATURES', {}),
+        ('symptom_check', 'emergency', None, None, 'emergency', 'TRIGGER_SOS', SOS_PARAMETERS),
+        ('symptom_check', 'advice_request', None, None, 'no_medical_advice', 'Maps_TO_APPOINTMENT_BOOKING', {}),
+        ('symptom_check', 'enough_answers', 'initial', 'finish', 'precautions', 'Maps_TO_APPOINTMENT_BOOKING', {}),
+        ('symptom_check', 'answer', None, 'answer', 'next_question', 'CONTINUE_SYMPTOM_CHECK', {})
+    ]
+}
+
+# ===== Compiled flow =====
+
+Transition = namedtuple('Transition', 'next_stage effect response action parameters')
+
+STAGE_BITS = 2
+LANGUAGE_BITS = 2
+COUNT_BITS = 4
+SYMPTOMS_SHIFT = STAGE_BITS + LANGUAGE_BITS + COUNT_BITS
+
+
+def _keyword_regex(keywords: List[str]) -> Optional['re.Pattern']:
+    """One alternation matching any keyword as a substring, longest first"""
+    if not keywords:
+        return None
+    ordered = sorted(set(keywords), key=len, reverse=True)
+    return re.compile('|'.join(re.escape(keyword) for keyword in ordered))
+
+
+class CompiledFlow:
+    """
+    SYMPTOM_FLOW turned into integer ids and lookup tables. A dialog state packs into
+    one int: stage | language | answer count | symptom bitmask; the bitmask indexes
+    `vocabulary`, the symptom keywords of every language.
+    """
+
+    def __init__(self, spec: Dict[str, Any] = None):
+        spec = spec or SYMPTOM_FLOW
+        self.languages: List[str] = list(spec['languages'])
+        self.language_ids = {code: i for i, code in enumerate(self.languages)}
+        self.default_language = self.language_ids[spec['default_language']]
+        self.stages: List[str] = list(spec['states'])
+        self.stage_ids = {name: i for i, name in enumerate(self.stages)}
+        self.initial = self.stage_ids[spec['initial']]
+        self.first_stage = self.stage_ids[spec['after_initial']]
+        self.answers_before_advice = spec['answers_before_advice']
+        if len(self.languages) > 1 << LANGUAGE_BITS or len(self.stages) > 1 << STAGE_BITS:
+            raise ValueError("Dialog flow has more languages or states than the state encoding holds")
+
+        self.events = {self.stage_ids[stage]: tuple(events) for stage, events in spec['events'].items()}
+        self.transitions: Dict[Tuple[int, str], Transition] = {}
+        for stage, event, next_stage, effect, response, action, parameters in spec['transitions']:
+            self.transitions[(self.stage_ids[stage], event)] = Transition(
+                self.stage_ids[next_stage] if next_stage is not None else None,
+                effect, response, action, parameters)
+
+        # Symptom vocabulary across languages; each language gets one regex and a
+        # keyword -> bitmask table (a match also sets keywords it starts with, so overlapping
+        # keywords such as 'sir dard' / 'dard' are all found, as with substring tests)
+        self.vocabulary: List[str] = []
+        for language in self.languages:
+            for keyword in SYMPTOM_KEYWORDS.get(language, []):
+                if keyword not in self.vocabulary:
+                    self.vocabulary.append(keyword)
+        bit = {keyword: 1 << i for i, keyword in enumerate(self.vocabulary)}
+        self.symptom_regex = []
+        self.symptom_masks = []
+        for language in self.languages:
+            keywords = SYMPTOM_KEYWORDS.get(language, [])
+            self.symptom_regex.append(re.compile('(?=(' + '|'.join(
+                re.escape(k) for k in sorted(keywords, key=len, reverse=True)) + '))') if keywords else None)
+            masks = {}
+            for keyword in keywords:
+                masks[keyword] = 0
+                for other in keywords:
+                    if keyword.startswith(other):
+                        masks[keyword] |= bit[other]
+            self.symptom_masks.append(masks)
+        self.symptom_category = [SYMPTOM_CATEGORIES.get(keyword) for keyword in self.vocabulary]
+
+        default = spec['default_language']
+        self.emergency_regex = [_keyword_regex(EMERGENCY_KEYWORDS.get(code, EMERGENCY_KEYWORDS[default]))
+                                for code in self.languages]
+        self.advice_regex = [_keyword_regex(MEDICAL_ADVICE_KEYWORDS.get(code, MEDICAL_ADVICE_KEYWORDS[default]))
+                             for code in self.languages]
+        self.language_regex = [(self.language_ids[code], [re.compile(p, re.IGNORECASE) for p in patterns])
+                               for code, patterns in LANGUAGE_PATTERNS.items()]
+        self.questions = [SYMPTOM_QUESTIONS.get(code, SYMPTOM_QUESTIONS[default]) for code in self.languages]
+        self.advice = [PRECAUTIONARY_ADVICE.get(code, PRECAUTIONARY_ADVICE[default]) for code in self.languages]
+        self.messages = {name: [texts.get(code, texts[default]) for code in self.languages]
+                         for name, texts in MESSAGES.items()}
+
+    # ---- state encoding ----
+
+    def pack(self, stage: int, language: int, count: int, symptoms: int) -> int:
+        count = min(count, (1 << COUNT_BITS) - 1)
+        return stage | language << STAGE_BITS | count << (STAGE_BITS + LANGUAGE_BITS) | symptoms << SYMPTOMS_SHIFT
+
+    def unpack(self, state: int) -> Tuple[int, int, int, int]:
+        return (state & ((1 << STAGE_BITS) - 1),
+                (state >> STAGE_BITS) & ((1 << LANGUAGE_BITS) - 1),
+                (state >> (STAGE_BITS + LANGUAGE_BITS)) & ((1 << COUNT_BITS) - 1),
+                state >> SYMPTOMS_SHIFT)
+
+    def symptom_names(self, symptoms: int) -> List[str]:
+        return [keyword for i, keyword in enumerate(self.vocabulary) if symptoms >> i & 1]
+
+    # ---- matchers (message already lower-cased) ----
+
+    def detect_language(self, message: str) -> int:
+        """Script first (Devanagari, Gurmukhi), then the language with most keyword patterns matching"""
+        if not message or not message.strip():
+            return self.default_language
+        if re.search(r'[\u0900-\u097F]', message):  # Devanagari
+            return self.language_ids['hi']
+        if re.search(r'[\u0A00-\u0A7F]', message):  # Gurmukhi
+            return self.language_ids['pa']
+        message_lower = message.lower().strip()
+        scores = {language: 0 for language, _ in self.language_regex}
+        for language, patterns in self.language_regex:
+            for pattern in patterns:
+                if pattern.search(message_lower):
+                    scores[language] += 1
+        if max(scores.values()) > 0:
+            return max(scores, key=scores.get)
+        return self.default_language
+
+    def detect_symptoms(self, text: str, language: int) -> int:
+        regex = self.symptom_regex[language]
+        if regex is None:
+            return 0
+        masks = self.symptom_masks[language]
+        symptoms = 0
+        for match in regex.finditer(text):
+            symptoms |= masks[match.group(1)]
+        return symptoms
+
+    def is_emergency(self, text: str, language: int) -> bool:
+        regex = self.emergency_regex[language]
+        return regex is not None and regex.search(text) is not None
+
+    def is_advice_request(self, text: str, language: int) -> bool:
+        regex = self.advice_regex[language]
+        return regex is not None and regex.search(text) is not None
+
+    # ---- prompts ----
+
+    def question(self, language: int, count: int) -> str:
+        questions = self.questions[language]
+        return questions[min(count, len(questions) - 1)]
+
+    def precautions(self, language: int, symptoms: int) -> str:
+        advice = self.advice[language]
+        for i, category in enumerate(self.symptom_category):
+            if symptoms >> i & 1 and category and category in advice:
+                return advice[category]
+        return advice['general']
+
+
+# ===== Per-user state with TTL =====
+
+class DialogStateStore:
+    """
+    user_id -> packed dialog state, forgotten ttl_seconds after the user's last message.
+    The expiry (epoch seconds) rides in the high bits of the same int. Locally, entries are
+    kept in write order, so expiry pops from the front; with a shared store every worker
+    sees the same state and expired records are dropped when read or by purge_expired().
+    """
+
+    def __init__(self, ttl_seconds: float = 1800, max_users: int = 200000, store: MemoryStore = None,
+                 revalidate_seconds: float = 0.0, state_bits: int = 40):
+        self.ttl_seconds = ttl_seconds
+        self.max_users = max_users
+        self.state_bits = state_bits
+        self.store = store
+        if store is not None:
+            self._states = SharedRecordMap(
+                store, NAMESPACE_DIALOG_STATES,
+                encode=lambda value: {'state': value}, decode=lambda data: data.get('state', 0),
+                max_entries=max_users, revalidate_seconds=revalidate_seconds)
+        else:
+            self._states: 'OrderedDict[str, int]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'reads': 0, 'writes': 0, 'expired': 0, 'evicted': 0}
+
+    def _expires_at(self, value: int) -> int:
+        return value >> self.state_bits
+
+    def get(self, user_id: str) -> Optional[int]:
+        """The user's packed state, or None if they have none or it expired"""
+        now = time.time()
+        self.stats['reads'] += 1
+        if self.store is not None:
+            value = self._states.get(user_id)
+            if value is not None and self._expires_at(value) <= now:
+                self._states.pop(user_id, None)
+                self.stats['expired'] += 1
+                value = None
+        else:
+            with self._lock:
+                self._expire(now)
+                value = self._states.get(user_id)
+        return value & ((1 << self.state_bits) - 1) if value is not None else None
+
+    def put(self, user_id: str, state: int) -> None:
+        if state >> self.state_bits:
+            raise ValueError("Dialog state does not fit in state_bits")
+        value = int(time.time() + self.ttl_seconds) << self.state_bits | state
+        self.stats['writes'] += 1
+        if self.store is not None:
+            self._states.save(user_id, value)
+            return
+        with self._lock:
+            self._states[user_id] = value
+            self._states.move_to_end(user_id)
+            while len(self._states) > self.max_users:
+                self._states.popitem(last=False)
+                self.stats['evicted'] += 1
+
+    def delete(self, user_id: str) -> None:
+        if self.store is not None:
+            self._states.pop(user_id, None)
+            return
+        with self._lock:
+            self._states.pop(user_id, None)
+
+    def _expire(self, now: float) -> int:
+        expired = 0
+        while self._states:
+            user_id, value = next(iter(self._states.items()))
+            if self._expires_at(value) > now:
+                break
+            del self._states[user_id]
+            expired += 1
+        self.stats['expired'] += expired
+        return expired
+
+    def purge_expired(self) -> int:
+        """Drop every expired state; with a shared store this scans the namespace"""
+        now = time.time()
+        if self.store is None:
+            with self._lock:
+                return self._expire(now)
+        expired = 0
+        for user_id in self.store.keys(NAMESPACE_DIALOG_STATES):
+            value = self._states.get(user_id)
+            if value is not None and self._expires_at(value) <= now:
+                self._states.pop(user_id, None)
+                expired += 1
+        self.stats['expired'] += expired
+        return expired
+
+    def __len__(self) -> int:
+        if self.store is not None:
+            return self.store.count(NAMESPACE_DIALOG_STATES)
+        return len(self._states)
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = dict(self.stats)
+        stats['ttl_seconds'] = self.ttl_seconds
+        stats['shared'] = self.store is not None
+        if self.store is None:
+            stats['users'] = len(self._states)
+        return stats
+
+
+# ===== Engine =====
+
+class DialogEngine:
+    """Runs one message through the compiled flow for a user and stores the new state"""
+
+    def __init__(self, flow: CompiledFlow = None, states: DialogStateStore = None):
+        self.flow = flow or CompiledFlow()
+        self.states = states if states is not None else DialogStateStore()
+        if SYMPTOMS_SHIFT + len(self.flow.vocabulary) > self.states.state_bits:
+            raise ValueError("Symptom vocabulary too large for the dialog state encoding")
+
+    def step(self, user_id: str, message: str) -> Dict[str, Any]:
+        flow = self.flow
+        state = self.states.get(user_id)
+        if state is None:
+            stage, language, count, symptoms = flow.initial, flow.default_language, 0, 0
+        else:
+            stage, language, count, symptoms = flow.unpack(state)
+        if stage == flow.initial:
+            language = flow.detect_language(message)
+            stage = flow.first_stage
+
+        text = message.lower()
+        detected = None
+        for event in flow.events[stage]:
+            if event == 'emergency':
+                fired = flow.is_emergency(text, language)
+            elif event == 'advice_request':
+                fired = flow.is_advice_request(text, language)
+            elif event == 'symptoms':
+                detected = flow.detect_symptoms(text, language)
+                fired = detected != 0
+            elif event == 'enough_answers':
+                fired = count + 1 >= flow.answers_before_advice
+            else:
+                fired = True
+            if fired:
+                break
+        transition = flow.transitions[(stage, event)]
+
+        if transition.effect == 'start':
+            count, symptoms = 1, detected
+        elif transition.effect in ('answer', 'finish'):
+            count += 1
+            symptoms |= flow.detect_symptoms(text, language)
+
+        if transition.response == 'next_question':
+            response = flow.question(language, count)
+        elif transition.response == 'precautions':
+            response = f"{flow.precautions(language, symptoms)}\n\n{flow.messages['disclaimer'][language]}"
+        else:
+            response = flow.messages[transition.response][language]
+
+        if transition.effect == 'finish':
+            count, symptoms = 0, 0
+        if transition.next_stage is not None:
+            stage = transition.next_stage
+        self.states.put(user_id, flow.pack(stage, language, count, symptoms))
+
+        return {
+            "language": flow.languages[language],
+            "response": response,
+            "action": transition.action,
+            "parameters": dict(transition.parameters)
+        }
+
+    def get_state(self, user_id: str) -> Dict[str, Any]:
+        """Readable view of a user's dialog state"""
+        flow = self.flow
+        state = self.states.get(user_id)
+        if state is None:
+            stage, language, count, symptoms = flow.initial, flow.default_language, 0, 0
+        else:
+            stage, language, count, symptoms = flow.unpack(state)
+        return {
+            'language': flow.languages[language],
+            'stage': flow.stages[stage],
+            'symptom_count': count,
+            'symptoms_gathered': flow.symptom_names(symptoms),
+            'last_question': flow.question(language, count) if flow.stages[stage] == 'symptom_check' else None
+        }
+
+    def set_state(self, user_id: str, **updates) -> None:
+        """Overwrite fields of a user's dialog state (same keys as get_state)"""
+        flow = self.flow
+        current = self.get_state(user_id)
+        current.update(updates)
+        symptoms = 0
+        for keyword in current.get('symptoms_gathered') or []:
+            if keyword in flow.vocabulary:
+                symptoms |= 1 << flow.vocabulary.index(keyword)
+        self.states.put(user_id, flow.pack(
+            flow.stage_ids[current['stage']], flow.language_ids.get(current['language'], flow.default_language),
+            current.get('symptom_count', 0), symptoms))
+
+    def reset(self, user_id: str) -> None:
+        self.states.delete(user_id)
@@ -0,0 +1,179 @@
+"""
+Sehat Sahara Emoji Interpretation Cache
+Caches Scout interpretations of emoji-only and emoji-heavy messages by canonical emoji
+sequence, language, message shape and the words beside the emojis; common sequences are
+precomputed at startup. Messages mentioning crisis or symptom words are never cached.
+"""
+
+import json
+import logging
+import os
+import re
+import threading
+import unicodedata
+from typing import Dict, Any, Callable, List, Optional, Tuple
+
+from bounded_cache import BoundedTTLCache
+from dialog_engine import SYMPTOM_KEYWORDS, EMERGENCY_KEYWORDS
+
+logger = logging.getLogger(__name__)
+
+# Emoji code points: flags, pictographs, misc symbols and dingbats
+EMOJI_PATTERN = re.compile(
+    "[\U0001F1E6-\U0001F1FF\U0001F300-\U0001FAFF\U00002600-\U000027BF\U00002B00-\U00002BFF]"
+)
+SKIN_TONES = re.compile("[\U0001F3FB-\U0001F3FF]")
+VARIATION_SELECTORS = re.compile("[\uFE0E\uFE0F]")
+
+# Messages with more words than this beside the emojis are interpreted fresh every time
+MAX_SHORT_TEXT_WORDS = 3
+
+# Frequent in clinic chat traffic; interpreted once at startup per language
+COMMON_EMOJI_SEQUENCES = [
+    "🙏", "👍", "😊", "🙂", "😂", "🤣", "❤", "😢", "😭", "😔", "😷", "🤒", "🤕", "😷🤒",
+    "🤒😢", "💊", "🏥", "👋", "🙏😊", "😡", "😴", "🥺", "🤔", "👌", "💯", "🔥", "😍", "🤗",
+]
+DEFAULT_PRECOMPUTE_LANGUAGES = ["en", "hi", "pa"]
+
+# Self-harm phrasing; with the symptom and emergency keywords these always get a fresh interpretation
+CRISIS_KEYWORDS = [
+    'die', 'dying', 'suicide', 'kill', 'end it', 'end my life', 'hurt myself', 'self harm', 'no reason to live',
+    'marna', 'mar jana', 'mar jaana', 'khudkushi', 'aatmahatya', 'jeena nahi', 'zindagi khatam'
+]
+UNCACHEABLE_WORDS = sorted({keyword for keywords in (*SYMPTOM_KEYWORDS.values(), *EMERGENCY_KEYWORDS.values())
+                            for keyword in keywords} | set(CRISIS_KEYWORDS))
+_UNCACHEABLE_PATTERN = re.compile(r"\b(?:" + "|".join(re.escape(word) for word in UNCACHEABLE_WORDS) + r")\b")
+
+
+def canonical_emoji_sequence(message: str) -> str:
+    """Emojis in order with skin tones/variation selectors removed and immediate repeats collapsed"""
+    text = VARIATION_SELECTORS.sub("", SKIN_TONES.sub("", unicodedata.normalize("NFC", message or "")))
+    sequence: List[str] = []
+    for emoji in EMOJI_PATTERN.findall(text):
+        if not sequence or sequence[-1] != emoji:
+            sequence.append(emoji)
+    return "".join(sequence)
+
+
+def _text_words(message: str) -> List[str]:
+    """Lower-cased words beside the emojis, punctuation dropped"""
+    text = EMOJI_PATTERN.sub(" ", SKIN_TONES.sub("", VARIATION_SELECTORS.sub("", message or "")))
+    return re.findall(r"\w+", unicodedata.normalize("NFC", text.replace("\u200d", " ")).lower())
+
+
+def message_shape(message: str) -> str:
+    """Coarse shape: 'only' (emojis alone), 'short' (a few words around emojis) or 'long'"""
+    words = _text_words(message)
+    if not words:
+        return "only"
+    return "short" if len(words) <= MAX_SHORT_TEXT_WORDS else "long"
+
+
+def mentions_crisis_or_symptom(message: str) -> bool:
+    """True when the text names a symptom, an emergency or self-harm in any supported language"""
+    return bool(_UNCACHEABLE_PATTERN.search(" ".join(_text_words(message))))
+
+
+def emoji_cache_key(message: str, language: str) -> Optional[Tuple[str, str, str]]:
+    """
+    Cache key for an emoji message, or None when the text carries too much meaning to reuse.
+    Short messages are keyed by their words too ('short:miss you'), so different texts around
+    the same emojis never share an interpretation.
+    """
+    sequence = canonical_emoji_sequence(message)
+    words = _text_words(message)
+    if not sequence or len(words) > MAX_SHORT_TEXT_WORDS or mentions_crisis_or_symptom(message):
+        return None
+    return sequence, language or "en", f"short:{' '.join(words)}" if words else "only"
+
+
+class EmojiInterpretationCache:
+    """Bounded, TTL'd interpretation cache with skip-rate accounting"""
+
+    def __init__(self, max_entries: int = 2000, ttl_seconds: float = 7 * 24 * 3600):
+        self.cache = BoundedTTLCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+        self._lock = threading.Lock()
+        self.stats = {
+            'requests': 0,
+            'scout_calls_skipped': 0,
+            'scout_calls_made': 0,
+            'uncacheable': 0,
+            'precomputed': 0
+        }
+
+    def _record(self, stat: str, amount: int = 1) -> None:
+        with self._lock:
+            self.stats[stat] += amount
+
+    def get(self, message: str, language: str) -> Optional[str]:
+        """Cached interpretation for this message shape, counting the request either way"""
+        self._record('requests')
+        key = emoji_cache_key(message, language)
+        if key is None:
+            self._record('uncacheable')
+            return None
+        interpretation = self.cache.get(key)
+        if interpretation is not None:
+            self._record('scout_calls_skipped')
+        return interpretation
+
+    def set(self, message: str, language: str, interpretation: Optional[str]) -> None:
+        self._record('scout_calls_made')
+        key = emoji_cache_key(message, language)
+        if key is not None and interpretation:
+            self.cache.set(key, interpretation)
+
+    def precompute(self, interpret_fn: Callable[[str, str], Optional[str]],
+                   sequences: List[str] = None, languages: List[str] = None) -> int:
+        """Interpret common emoji-only sequences not already cached; returns how many were added"""
+        added = 0
+        for language in languages or DEFAULT_PRECOMPUTE_LANGUAGES:
+            for sequence in sequences or COMMON_EMOJI_SEQUENCES:
+                key = emoji_cache_key(sequence, language)
+                if key is None or self.cache.get(key) is not None:
+                    continue
+                interpretation = interpret_fn(sequence, language)
+                if interpretation:
+                    self.cache.set(key, interpretation)
+                    added += 1
+        self._record('precomputed', added)
+        logger.info(f"Precomputed {added} emoji interpretations")
+        return added
+
+    def save_to_file(self, path: str) -> bool:
+        try:
+            entries = [{'sequence': k[0], 'language': k[1], 'shape': k[2], 'interpretation': v}
+                       for k, v in self.cache.items()]
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(entries, f, ensure_ascii=False)
+            return True
+        except Exception as e:
+            logger.error(f"Failed to save emoji interpretations: {e}")
+            return False
+
+    def load_from_file(self, path: str) -> int:
+        if not os.path.exists(path):
+            return 0
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+            loaded = 0
+            for entry in entries:
+                # Entries saved before short keys carried their words cannot be matched safely
+                if entry['shape'] == 'short':
+                    continue
+                self.cache.set((entry['sequence'], entry['language'], entry['shape']), entry['interpretation'])
+                loaded += 1
+            return loaded
+        except Exception as e:
+            logger.error(f"Failed to load emoji interpretations: {e}")
+            return 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.stats)
+        cacheable = stats['requests'] - stats['uncacheable']
+        stats['skip_rate'] = round(stats['scout_calls_skipped'] / stats['requests'], 3) if stats['requests'] else 0.0
+        stats['cacheable_hit_rate'] = round(stats['scout_calls_skipped'] / cacheable, 3) if cacheable else 0.0
+        stats['cache'] = self.cache.get_stats()
+        return stats
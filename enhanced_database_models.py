@@ -554,6 +554,11 @@ class ConversationTurn(db.Model):
     # Enhanced fields
     turn_id = db.Column(db.String(36), default=lambda: str(uuid.uuid4()), unique=True)
     session_id = db.Column(db.String(36), nullable=True)
+
+    # Newest turns of one user (recent-turns rehydration, chat history pages)
+    __table_args__ = (
+        db.Index('ix_conversation_turns_user_timestamp', 'user_id', 'timestamp'),
+    )
     
     def get_context_entities(self):
         """Get context entities as dict"""
@@ -679,6 +684,205 @@ class SystemMetrics(db.Model):
     def __repr__(self):
         return f'<SystemMetrics for {self.metrics_date}>'
 
+class BackgroundJob(db.Model):
+    """Durable background job (OCR, reminder generation, etc.) processed by job_queue workers"""
+    __tablename__ = 'background_jobs'
+
+    id = db.Column(db.Integer, primary_key=True)
+    job_id = db.Column(db.String(36), default=lambda: str(uuid.uuid4()), unique=True)
+    job_type = db.Column(db.String(50), nullable=False, index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=True, index=True)
+
+    # Execution state
+    status = db.Column(db.String(20), default='queued', index=True)  # queued, running, succeeded, failed
+    progress = db.Column(db.Integer, default=0)  # 0-100
+    progress_message = db.Column(db.String(200), nullable=True)
+    attempts = db.Column(db.Integer, default=0)
+    max_attempts = db.Column(db.Integer, default=3)
+    last_error = db.Column(db.Text, nullable=True)
+    run_after = db.Column(db.DateTime, default=datetime.now, index=True)  # retry backoff
+    locked_by = db.Column(db.String(100), nullable=True)
+    locked_at = db.Column(db.DateTime, nullable=True)
+
+    # Data
+    payload = db.Column(db.Text, nullable=True)  # JSON
+    result = db.Column(db.Text, nullable=True)  # JSON
+
+    # Timestamps
+    created_at = db.Column(db.DateTime, default=datetime.now)
+    started_at = db.Column(db.DateTime, nullable=True)
+    completed_at = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_background_jobs_status_run_after', 'status', 'run_after'),
+    )
+
+    def get_payload(self):
+        """Get payload as dict"""
+        if self.payload:
+            try:
+                return json.loads(self.payload)
+            except json.JSONDecodeError:
+                return {}
+        return {}
+
+    def set_payload(self, payload_dict):
+        """Set payload from dict"""
+        self.payload = json.dumps(payload_dict)
+
+    def get_result(self):
+        """Get result as dict"""
+        if self.result:
+            try:
+                return json.loads(self.result)
+            except json.JSONDecodeError:
+                return {}
+        return {}
+
+    def set_result(self, result_dict):
+        """Set result from dict"""
+        self.result = json.dumps(result_dict)
+
+    def to_dict(self):
+        """Convert job to dictionary for the status endpoint"""
+        return {
+            'jobId': self.job_id,
+            'type': self.job_type,
+            'status': self.status,
+            'progress': self.progress,
+            'message': self.progress_message,
+            'attempts': self.attempts,
+            'maxAttempts': self.max_attempts,
+            'error': self.last_error if self.status == 'failed' else None,
+            'result': self.get_result() if self.status == 'succeeded' else None,
+            'createdAt': self.created_at.isoformat() if self.created_at else None,
+            'completedAt': self.completed_at.isoformat() if self.completed_at else None
+        }
+
+    def __repr__(self):
+        return f'<BackgroundJob {self.job_id}: {self.job_type} {self.status}>'
+
+class PrecomputedAnswer(db.Model):
+    """Nightly precomputed action-JSON answer for a frequent normalized message"""
+    __tablename__ = 'precomputed_answers'
+
+    id = db.Column(db.Integer, primary_key=True)
+    language = db.Column(db.String(10), nullable=False)
+    normalized_message = db.Column(db.String(300), nullable=False)
+    sample_message = db.Column(db.Text, nullable=False)
+    intent = db.Column(db.String(50), nullable=False)
+    action_payload = db.Column(db.Text, nullable=False)  # validated action JSON
+
+    # Mining statistics
+    occurrence_count = db.Column(db.Integer, default=0)
+    generated_by = db.Column(db.String(20), default='local')  # local, llm
+    generated_at = db.Column(db.DateTime, default=datetime.now)
+
+    __table_args__ = (
+        db.UniqueConstraint('language', 'normalized_message', name='uq_precomputed_answers_language_message'),
+    )
+
+    def get_action_payload(self):
+        """Get action payload as dict"""
+        try:
+            return json.loads(self.action_payload)
+        except (TypeError, json.JSONDecodeError):
+            return {}
+
+    def set_action_payload(self, payload_dict):
+        """Set action payload from dict"""
+        self.action_payload = json.dumps(payload_dict, ensure_ascii=False)
+
+    def __repr__(self):
+        return f'<PrecomputedAnswer {self.language}: {self.normalized_message[:30]}>'
+
+class MedicineReminder(db.Model):
+    """Medicine reminder with its next due slot, queried by the reminder poller and /v1/medicine-reminders"""
+    __tablename__ = 'medicine_reminders'
+
+    id = db.Column(db.Integer, primary_key=True)
+    reminder_id = db.Column(db.String(36), default=lambda: str(uuid.uuid4()), unique=True)
+    user_id = db.Column(db.String(100), nullable=False)  # patient_id, same key as conversation memory
+
+    # Medicine details
+    medicine_name = db.Column(db.String(200), nullable=False)
+    dosage = db.Column(db.String(200), default='')
+    frequency = db.Column(db.String(100), default='')
+    times = db.Column(db.Text, nullable=False)  # JSON array of 'HH:MM'
+    duration_days = db.Column(db.Integer, default=30)
+    start_date = db.Column(db.Date, nullable=True)
+    instructions = db.Column(db.Text, default='')
+
+    # Origin
+    source = db.Column(db.String(50), default='manual')  # manual, prescription, memory_import
+    doctor_name = db.Column(db.String(200), nullable=True)
+    auto_generated = db.Column(db.Boolean, default=False)
+
+    # Scheduling
+    active = db.Column(db.Boolean, default=True)
+    next_due_at = db.Column(db.DateTime, nullable=True, index=True)
+
+    # Timestamps
+    created_at = db.Column(db.DateTime, default=datetime.now)
+    updated_at = db.Column(db.DateTime, default=datetime.now, onupdate=datetime.now)
+
+    __table_args__ = (
+        db.Index('ix_medicine_reminders_user_active', 'user_id', 'active'),
+    )
+
+    def get_times(self):
+        """Get reminder times as list"""
+        try:
+            return json.loads(self.times) if self.times else []
+        except json.JSONDecodeError:
+            return []
+
+    def set_times(self, times_list):
+        """Set reminder times from list"""
+        self.times = json.dumps(list(times_list or []))
+
+    def to_dict(self):
+        """Convert to the reminder dict shape conversation memory has always returned"""
+        return {
+            'medicine_name': self.medicine_name,
+            'dosage': self.dosage or '',
+            'frequency': self.frequency or '',
+            'times': self.get_times(),
+            'duration_days': self.duration_days,
+            'start_date': self.start_date.isoformat() if self.start_date else None,
+            'instructions': self.instructions or '',
+            'source': self.source,
+            'doctor_name': self.doctor_name,
+            'auto_generated': bool(self.auto_generated),
+            'reminder_enabled': bool(self.active),
+            'next_due_at': self.next_due_at.isoformat() if self.next_due_at else None,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
+    def __repr__(self):
+        return f'<MedicineReminder {self.user_id}: {self.medicine_name}>'
+
+class AdherenceEvent(db.Model):
+    """One medicine marked as taken by a user on a given day"""
+    __tablename__ = 'adherence_events'
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.String(100), nullable=False)
+    reminder_id = db.Column(db.Integer, db.ForeignKey('medicine_reminders.id'), nullable=True, index=True)
+    medicine_name = db.Column(db.String(200), nullable=False)
+    date = db.Column(db.Date, nullable=False)
+    taken_time = db.Column(db.String(10), nullable=True)  # 'HH:MM' as reported by the app
+    status = db.Column(db.String(20), default='taken')
+    created_at = db.Column(db.DateTime, default=datetime.now)
+
+    __table_args__ = (
+        db.Index('ix_adherence_events_user_date', 'user_id', 'date'),
+        db.UniqueConstraint('user_id', 'medicine_name', 'date', name='uq_adherence_events_user_medicine_date'),
+    )
+
+    def __repr__(self):
+        return f'<AdherenceEvent {self.user_id}: {self.medicine_name} {self.date} {self.status}>'
+
 class SystemConfiguration(db.Model):
     """Store system configuration settings"""
     __tablename__ = 'system_configuration'
@@ -751,6 +955,9 @@ def init_database(app):
     """Initialize database with app context"""
     with app.app_context():
         db.create_all()
+        # create_all skips tables that already exist; add indexes introduced since
+        for index in ConversationTurn.__table__.indexes:
+            index.create(bind=db.engine, checkfirst=True)
         
         # Create default system configurations for Sehat Sahara
         default_configs = [
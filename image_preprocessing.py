@@ -0,0 +1,231 @@
+"""
+Sehat Sahara Image Preprocessing
+Downsizes and re-encodes phone photos before vision calls, and caches vision results
+by content hash so re-sending the same photo skips the upstream call
+"""
+
+import base64
+import binascii
+import hashlib
+import io
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Dict, Any, Optional
+
+from bounded_cache import BoundedTTLCache
+
+# Try to import Pillow with fallback to pass-through
+try:
+    from PIL import Image, ImageOps
+    HAS_PIL = True
+except ImportError:
+    HAS_PIL = False
+
+logger = logging.getLogger(__name__)
+
+if not HAS_PIL:
+    logger.warning("Pillow is not installed: vision uploads are sent as-is, without downscaling "
+                   "or EXIF stripping (photo GPS metadata is forwarded)")
+
+# Longest side sent to the vision model; labels and handwriting stay legible at these sizes
+MEDICINE_MAX_DIMENSION = 1024
+PRESCRIPTION_MAX_DIMENSION = 1600
+JPEG_QUALITY = 80
+
+# Max Hamming distance between dHashes treated as the same photo when a caller opts in.
+# Different medicine strips on a similar background can hash this close, so medicine and
+# prescription scans never use it.
+PERCEPTUAL_MATCH_DISTANCE = 4
+
+_MAGIC_NUMBERS = [
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'GIF87a', 'image/gif'),
+    (b'GIF89a', 'image/gif'),
+    (b'BM', 'image/bmp'),
+]
+
+
+@dataclass
+class PreparedImage:
+    """Image ready to send to a vision model"""
+    b64: str
+    mime_type: str
+    original_bytes: int
+    bytes: int
+    width: int = 0
+    height: int = 0
+    content_hash: str = ""
+    perceptual_hash: Optional[int] = None
+    resized: bool = False
+
+    @property
+    def data_url(self) -> str:
+        return f"data:{self.mime_type};base64,{self.b64}"
+
+
+def detect_mime_type(data: bytes) -> str:
+    """Detect the real image type from its magic number"""
+    for magic, mime_type in _MAGIC_NUMBERS:
+        if data.startswith(magic):
+            return mime_type
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return 'image/webp'
+    if data[4:12] in (b'ftypheic', b'ftypheix', b'ftypmif1'):
+        return 'image/heic'
+    return 'application/octet-stream'
+
+
+def decode_base64_image(image_b64: str) -> Optional[bytes]:
+    """Decode base64 image data, accepting data URLs with any image type"""
+    if not image_b64:
+        return None
+    payload = image_b64.split(",", 1)[1] if image_b64.startswith("data:") else image_b64
+    try:
+        return base64.b64decode(payload.strip())
+    except (binascii.Error, ValueError) as e:
+        logger.warning(f"Invalid base64 image data: {e}")
+        return None
+
+
+def _dhash(image, hash_size: int = 8) -> int:
+    """Difference hash: robust to re-encoding, small crops and lighting changes"""
+    resample = getattr(Image, 'Resampling', Image).LANCZOS
+    pixels = list(image.convert('L').resize((hash_size + 1, hash_size), resample).getdata())
+    value = 0
+    for row in range(hash_size):
+        for col in range(hash_size):
+            left = pixels[row * (hash_size + 1) + col]
+            right = pixels[row * (hash_size + 1) + col + 1]
+            value = (value << 1) | (left > right)
+    return value
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return bin(a ^ b).count('1')
+
+
+def prepare_image(image_b64: str, max_dimension: int = MEDICINE_MAX_DIMENSION,
+                  quality: int = JPEG_QUALITY) -> Optional[PreparedImage]:
+    """
+    Decode, auto-rotate, downsize and re-encode an image as compact JPEG without EXIF.
+    Without Pillow the original bytes are passed through with their detected mime type.
+    """
+    raw = decode_base64_image(image_b64)
+    if not raw:
+        return None
+
+    content_hash = hashlib.sha256(raw).hexdigest()
+    mime_type = detect_mime_type(raw)
+
+    if not HAS_PIL:
+        return PreparedImage(
+            b64=base64.b64encode(raw).decode('ascii'),
+            mime_type=mime_type if mime_type != 'application/octet-stream' else 'image/jpeg',
+            original_bytes=len(raw),
+            bytes=len(raw),
+            content_hash=content_hash
+        )
+
+    try:
+        with Image.open(io.BytesIO(raw)) as img:
+            img = ImageOps.exif_transpose(img)  # apply camera rotation before EXIF is dropped
+            if img.mode not in ('RGB', 'L'):
+                img = img.convert('RGB')
+            perceptual_hash = _dhash(img)
+
+            resized = max(img.size) > max_dimension
+            if resized:
+                img.thumbnail((max_dimension, max_dimension))
+
+            buffer = io.BytesIO()
+            img.save(buffer, format='JPEG', quality=quality, optimize=True)  # no exif= so metadata is stripped
+            encoded = buffer.getvalue()
+
+            # Keep the original when it is already a smaller JPEG (nothing to gain)
+            if not resized and mime_type == 'image/jpeg' and len(raw) <= len(encoded):
+                encoded = raw
+
+            return PreparedImage(
+                b64=base64.b64encode(encoded).decode('ascii'),
+                mime_type='image/jpeg',
+                original_bytes=len(raw),
+                bytes=len(encoded),
+                width=img.size[0],
+                height=img.size[1],
+                content_hash=content_hash,
+                perceptual_hash=perceptual_hash,
+                resized=resized
+            )
+    except Exception as e:
+        logger.warning(f"Image preprocessing failed, sending original: {e}")
+        return PreparedImage(
+            b64=base64.b64encode(raw).decode('ascii'),
+            mime_type=mime_type if mime_type != 'application/octet-stream' else 'image/jpeg',
+            original_bytes=len(raw),
+            bytes=len(raw),
+            content_hash=content_hash
+        )
+
+
+class VisionResultCache:
+    """
+    Caches vision results by exact content hash. A perceptual (dHash) fallback exists for
+    callers that opt in; it is off by default because near-identical photos of different
+    medicines would otherwise share an interpretation.
+    """
+
+    def __init__(self, max_entries: int = 512, ttl_seconds: float = 7 * 24 * 3600):
+        self._cache = BoundedTTLCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+        self._lock = threading.Lock()
+        self.stats = {
+            'vision_calls': 0,
+            'cache_hits': 0,
+            'perceptual_hits': 0,
+            'original_bytes_total': 0,
+            'uploaded_bytes_total': 0,
+            'upstream_latency_ms_total': 0.0,
+            'upstream_calls': 0
+        }
+
+    def get(self, kind: str, variant: str, image: PreparedImage, allow_perceptual: bool = False) -> Any:
+        """Look up a cached result; perceptual matching is opt-in and unsafe for medicines and prescriptions"""
+        with self._lock:
+            self.stats['vision_calls'] += 1
+
+        result = self._cache.get((kind, variant, image.content_hash, image.perceptual_hash))
+        if result is None and allow_perceptual and image.perceptual_hash is not None:
+            result = self._cache.find(
+                lambda key: key[0] == kind and key[1] == variant and key[3] is not None
+                and hamming_distance(key[3], image.perceptual_hash) <= PERCEPTUAL_MATCH_DISTANCE
+            )
+            if result is not None:
+                with self._lock:
+                    self.stats['perceptual_hits'] += 1
+
+        if result is not None:
+            with self._lock:
+                self.stats['cache_hits'] += 1
+        return result
+
+    def record_upstream(self, image: PreparedImage, latency_ms: float) -> None:
+        with self._lock:
+            self.stats['upstream_calls'] += 1
+            self.stats['original_bytes_total'] += image.original_bytes
+            self.stats['uploaded_bytes_total'] += image.bytes
+            self.stats['upstream_latency_ms_total'] += latency_ms
+
+    def set(self, kind: str, variant: str, image: PreparedImage, result: Any) -> None:
+        if result is not None:
+            self._cache.set((kind, variant, image.content_hash, image.perceptual_hash), result)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.stats)
+        upstream = stats['upstream_calls']
+        stats['avg_uploaded_bytes'] = int(stats['uploaded_bytes_total'] / upstream) if upstream else 0
+        stats['avg_upstream_latency_ms'] = round(stats['upstream_latency_ms_total'] / upstream, 1) if upstream else 0.0
+        stats['pillow_available'] = HAS_PIL
+        stats['cache'] = self._cache.get_stats()
+        return stats
@@ -0,0 +1,277 @@
+"""
+Sehat Sahara Background Job Queue
+Durable, database-backed job queue with a worker pool; handlers raising JobRetryableError
+are retried with exponential backoff, any other error fails the job.
+Jobs survive restarts: they live in the background_jobs table and are claimed atomically,
+so several app processes can share one queue.
+"""
+
+import logging
+import random
+import socket
+import os
+import threading
+import time
+import traceback
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy.exc import IntegrityError
+
+from enhanced_database_models import db, BackgroundJob
+
+
+class JobRetryableError(Exception):
+    """
+    Raised by a handler to request a retry (e.g. upstream model unavailable).
+    Any other exception fails the job on the spot.
+    """
+
+
+class JobContext:
+    """Passed to job handlers so they can report progress"""
+
+    def __init__(self, queue: 'JobQueue', job: BackgroundJob):
+        self._queue = queue
+        self.job_id = job.job_id
+        self.attempt = job.attempts + 1
+        self.max_attempts = job.max_attempts
+        self.is_last_attempt = self.attempt >= job.max_attempts
+
+    def report_progress(self, progress: int, message: str = "") -> None:
+        self._queue._update_progress(self.job_id, progress, message)
+
+
+class JobQueue:
+    """
+    Worker pool polling the background_jobs table.
+    Handlers are registered per job type: handler(payload: dict, ctx: JobContext) -> dict result.
+    """
+
+    def __init__(self, app, num_workers: int = 2, poll_interval: float = 2.0,
+                 base_backoff_seconds: float = 5.0, max_backoff_seconds: float = 300.0,
+                 stale_after_seconds: float = 600.0):
+        self.logger = logging.getLogger(__name__)
+        self.app = app
+        self.num_workers = num_workers
+        self.poll_interval = poll_interval
+        self.base_backoff_seconds = base_backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.stale_after_seconds = stale_after_seconds
+
+        self.handlers: Dict[str, Callable[[Dict[str, Any], JobContext], Optional[Dict[str, Any]]]] = {}
+        self.worker_id_prefix = f"{socket.gethostname()}:{os.getpid()}"
+        self._workers = []
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._stats_lock = threading.Lock()
+
+        # Simple analytics
+        self.stats = {
+            'jobs_enqueued': 0,
+            'jobs_succeeded': 0,
+            'jobs_failed': 0,
+            'jobs_retried': 0,
+            'jobs_recovered': 0,
+            'workers_busy': 0,
+            'total_run_time_ms': 0.0
+        }
+
+    def _record(self, stat: str, amount=1) -> None:
+        with self._stats_lock:
+            self.stats[stat] += amount
+
+    # ===== PRODUCER API =====
+
+    def register(self, job_type: str, handler: Callable[[Dict[str, Any], JobContext], Optional[Dict[str, Any]]]) -> None:
+        """Register the handler for a job type"""
+        self.handlers[job_type] = handler
+
+    def enqueue(self, job_type: str, payload: Dict[str, Any], user_id: int = None,
+                max_attempts: int = 3, commit: bool = True, run_after: datetime = None,
+                job_key: str = None) -> BackgroundJob:
+        """
+        Add a job to the queue (optionally not before run_after); must be called inside an app context.
+        A job_key (at most 36 chars) becomes the job_id, so enqueueing the same key from several
+        processes creates one job: the losers get the existing row back. Keyed jobs always commit.
+        """
+        if job_key is not None:
+            existing = self.get_job(job_key)
+            if existing:
+                return existing
+        job = BackgroundJob(job_type=job_type, user_id=user_id, max_attempts=max_attempts,
+                            run_after=run_after or datetime.now())
+        job.set_payload(payload)
+        db.session.add(job)
+        if job_key is not None:
+            job.job_id = job_key
+            try:
+                db.session.commit()
+            except IntegrityError:
+                db.session.rollback()
+                return self.get_job(job_key)
+        elif commit:
+            db.session.commit()
+        self._record('jobs_enqueued')
+        self._wakeup.set()
+        return job
+
+    def get_job(self, job_id: str) -> Optional[BackgroundJob]:
+        return BackgroundJob.query.filter_by(job_id=job_id).first()
+
+    def has_pending(self, job_type: str) -> bool:
+        """Whether a queued or running job of this type exists (used for recurring jobs)"""
+        return BackgroundJob.query.filter(BackgroundJob.job_type == job_type,
+                                          BackgroundJob.status.in_(['queued', 'running'])).first() is not None
+
+    # ===== WORKER POOL =====
+
+    def start(self) -> None:
+        """Recover jobs abandoned by a crashed worker and start the worker threads"""
+        with self.app.app_context():
+            self._recover_stale_jobs()
+
+        for i in range(self.num_workers):
+            worker = threading.Thread(target=self._worker_loop, args=(f"{self.worker_id_prefix}:{i}",),
+                                      name=f"job-worker-{i}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+        self.logger.info(f"Background job queue started with {self.num_workers} workers")
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop workers after their current job"""
+        self._stopping.set()
+        self._wakeup.set()
+        for worker in self._workers:
+            worker.join(timeout=timeout)
+        self._workers = []
+
+    def _worker_loop(self, worker_id: str) -> None:
+        while not self._stopping.is_set():
+            try:
+                with self.app.app_context():
+                    job = self._claim_next_job(worker_id)
+                    if job:
+                        self._run_job(job)
+                        continue
+            except Exception as e:
+                self.logger.error(f"Job worker {worker_id} error: {e}")
+                try:
+                    with self.app.app_context():
+                        db.session.rollback()
+                except Exception:
+                    pass
+
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+
+    def _claim_next_job(self, worker_id: str) -> Optional[BackgroundJob]:
+        """Atomically claim the oldest runnable job (compare-and-set on status)"""
+        now = datetime.now()
+        candidates = (BackgroundJob.query
+                      .filter(BackgroundJob.status == 'queued',
+                              BackgroundJob.run_after <= now,
+                              BackgroundJob.job_type.in_(list(self.handlers.keys())))
+                      .order_by(BackgroundJob.run_after)
+                      .limit(5)
+                      .all())
+        for candidate in candidates:
+            claimed = (BackgroundJob.query
+                       .filter_by(id=candidate.id, status='queued')
+                       .update({'status': 'running', 'locked_by': worker_id, 'locked_at': now,
+                                'started_at': candidate.started_at or now},
+                               synchronize_session=False))
+            db.session.commit()
+            if claimed:
+                return BackgroundJob.query.get(candidate.id)
+        return None
+
+    def _run_job(self, job: BackgroundJob) -> None:
+        handler = self.handlers.get(job.job_type)
+        ctx = JobContext(self, job)
+        start_time = time.time()
+        self._record('workers_busy')
+        try:
+            result = handler(job.get_payload(), ctx) or {}
+            job.set_result(result)
+            job.status = 'succeeded'
+            job.progress = 100
+            job.attempts += 1
+            job.completed_at = datetime.now()
+            job.last_error = None
+            db.session.commit()
+            self._record('jobs_succeeded')
+            self.logger.info(f"Job {job.job_id} ({job.job_type}) succeeded")
+        except JobRetryableError as e:
+            self._record_failure(job, e, retryable=True)
+        except Exception as e:
+            # Anything else (bad payload, missing record, bug) would fail the same way again
+            self._record_failure(job, e, retryable=False)
+        finally:
+            self._record('workers_busy', -1)
+            self._record('total_run_time_ms', (time.time() - start_time) * 1000)
+
+    def _record_failure(self, job: BackgroundJob, error: Exception, retryable: bool) -> None:
+        """Requeue with exponential backoff if retryable and attempts remain, else mark failed"""
+        db.session.rollback()
+        job = BackgroundJob.query.get(job.id)
+        job.attempts += 1
+        job.last_error = f"{type(error).__name__}: {error}"[:1000]
+        job.locked_by = None
+        if retryable and job.attempts < job.max_attempts:
+            delay = min(self.max_backoff_seconds, self.base_backoff_seconds * (2 ** (job.attempts - 1)))
+            delay *= random.uniform(0.8, 1.2)  # jitter so retries from a burst spread out
+            job.status = 'queued'
+            job.run_after = datetime.now() + timedelta(seconds=delay)
+            job.progress_message = f"Retrying in {int(delay)}s"
+            self._record('jobs_retried')
+            self.logger.warning(f"Job {job.job_id} attempt {job.attempts} failed, retrying in {delay:.1f}s: {error}")
+        else:
+            job.status = 'failed'
+            job.completed_at = datetime.now()
+            self._record('jobs_failed')
+            self.logger.error(f"Job {job.job_id} failed permanently: {error}")
+            self.logger.debug(traceback.format_exc())
+        db.session.commit()
+
+    def _update_progress(self, job_id: str, progress: int, message: str) -> None:
+        try:
+            BackgroundJob.query.filter_by(job_id=job_id).update(
+                {'progress': max(0, min(99, progress)), 'progress_message': message},
+                synchronize_session=False
+            )
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            self.logger.warning(f"Could not update progress for job {job_id}: {e}")
+
+    def _recover_stale_jobs(self) -> int:
+        """Requeue jobs left 'running' by a worker that died mid-job"""
+        cutoff = datetime.now() - timedelta(seconds=self.stale_after_seconds)
+        try:
+            recovered = (BackgroundJob.query
+                         .filter(BackgroundJob.status == 'running', BackgroundJob.locked_at < cutoff)
+                         .update({'status': 'queued', 'locked_by': None, 'run_after': datetime.now()},
+                                 synchronize_session=False))
+            db.session.commit()
+            if recovered:
+                self._record('jobs_recovered', recovered)
+                self.logger.info(f"Recovered {recovered} stale background jobs")
+            return recovered
+        except Exception as e:
+            db.session.rollback()
+            self.logger.error(f"Error recovering stale jobs: {e}")
+            return 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get queue statistics, including current depth from the database"""
+        with self._stats_lock:
+            stats = dict(self.stats)
+        try:
+            stats['queue_depth'] = BackgroundJob.query.filter_by(status='queued').count()
+            stats['running'] = BackgroundJob.query.filter_by(status='running').count()
+        except Exception:
+            stats['queue_depth'] = None
+            stats['running'] = None
+        stats['num_workers'] = self.num_workers
+        return stats
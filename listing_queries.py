@@ -0,0 +1,85 @@
+"""
+Sehat Sahara Listing Queries
+Row lists behind the appointment, doctor and pharmacy dashboards. Each one is a single
+query joining the names it shows and selecting only the columns it returns, so a page
+costs the same number of queries whether it lists one row or hundreds.
+"""
+
+from datetime import date, timedelta
+from typing import Dict, Any, List, Optional
+
+
+def patient_appointments(user_id: int) -> List[Dict[str, Any]]:
+    """A patient's appointments, newest first, with the doctor's name and specialization"""
+    from enhanced_database_models import db, Appointment, Doctor
+
+    rows = db.session.query(
+        Appointment.appointment_id, Appointment.appointment_datetime, Appointment.appointment_type,
+        Appointment.status, Appointment.chief_complaint, Doctor.full_name, Doctor.specialization
+    ).outerjoin(Doctor, Appointment.doctor_id == Doctor.id)\
+        .filter(Appointment.user_id == user_id)\
+        .order_by(Appointment.appointment_datetime.desc())\
+        .all()
+
+    return [{
+        "id": appointment_id,
+        "doctorName": doctor_name or "Unknown Doctor",
+        "specialization": specialization or "",
+        "dateTime": appointment_datetime.isoformat() + "Z",  # Append 'Z' for UTC
+        "type": appointment_type,
+        "status": status,
+        "chiefComplaint": chief_complaint
+    } for (appointment_id, appointment_datetime, appointment_type, status, chief_complaint,
+           doctor_name, specialization) in rows]
+
+
+def doctor_day_appointments(doctor_id: int, day: date) -> List[Dict[str, Any]]:
+    """A doctor's appointments on one day in time order, with the patient's name"""
+    from enhanced_database_models import db, Appointment, User
+
+    rows = db.session.query(
+        Appointment.appointment_id, Appointment.appointment_datetime, Appointment.appointment_type,
+        Appointment.status, User.full_name
+    ).outerjoin(User, Appointment.user_id == User.id)\
+        .filter(
+            Appointment.doctor_id == doctor_id,
+            Appointment.appointment_datetime >= day,
+            Appointment.appointment_datetime < day + timedelta(days=1)
+        ).order_by(Appointment.appointment_datetime.asc())\
+        .all()
+
+    return [{
+        "id": appointment_id,
+        "patient": patient_name or "Unknown",
+        "time": appointment_datetime.strftime('%I:%M %p'),
+        "type": appointment_type,
+        "status": status
+    } for appointment_id, appointment_datetime, appointment_type, status, patient_name in rows]
+
+
+def pharmacy_dashboard(pharmacy_id: int) -> Optional[Dict[str, Any]]:
+    """Pharmacy name, out-for-delivery count and newly placed orders; None if no such pharmacy"""
+    from enhanced_database_models import db, Pharmacy, MedicineOrder, User
+
+    pending_deliveries = db.session.query(db.func.count(MedicineOrder.id))\
+        .filter(MedicineOrder.pharmacy_id == Pharmacy.id, MedicineOrder.status == 'Out for Delivery')\
+        .correlate(Pharmacy)\
+        .scalar_subquery()
+    pharmacy = db.session.query(Pharmacy.id, Pharmacy.name, pending_deliveries)\
+        .filter(Pharmacy.id == pharmacy_id)\
+        .first()
+    if not pharmacy:
+        return None
+
+    rows = db.session.query(MedicineOrder.order_id, MedicineOrder.status, User.full_name)\
+        .outerjoin(User, MedicineOrder.user_id == User.id)\
+        .filter(MedicineOrder.pharmacy_id == pharmacy.id, MedicineOrder.status == 'Placed')\
+        .order_by(MedicineOrder.created_at.desc())\
+        .all()
+
+    return {
+        "pharmacyName": pharmacy.name,
+        "pendingDeliveriesCount": pharmacy[2],
+        "orders": [{"id": order_id, "customer": customer or "Unknown", "status": status}
+                   for order_id, status, customer in rows]
+    }
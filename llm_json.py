@@ -0,0 +1,225 @@
+"""
+Sehat Sahara LLM JSON Parsing
+Tolerant extraction and repair of JSON objects from LLM completions
+"""
+
+import json
+import logging
+import re
+import threading
+from typing import Dict, Any, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Actions the app understands (kept in sync with SehatSaharaApiClient.base_system_prompt)
+SUPPORTED_ACTIONS = {
+    "NAVIGATE_TO_APPOINTMENT_BOOKING",
+    "FETCH_APPOINTMENTS",
+    "INITIATE_APPOINTMENT_CANCELLATION",
+    "FETCH_HEALTH_RECORD",
+    "START_SYMPTOM_CHECKER",
+    "NAVIGATE_TO_PHARMACY_SEARCH",
+    "FETCH_PRESCRIPTION_DETAILS",
+    "START_MEDICINE_SCANNER",
+    "TRIGGER_SOS",
+    "NAVIGATE_TO_REPORT_ISSUE",
+    "SHOW_APP_FEATURES",
+    "CONNECT_TO_SUPPORT_AGENT",
+    "CONTINUE_FOLLOWUP",
+    "SHOW_PRESCRIPTION_SUMMARY",
+    "Maps_TO_APPOINTMENT_BOOKING",
+    "CONTINUE_CONVERSATION",
+}
+
+_SMART_QUOTES = str.maketrans({
+    '\u201c': '"', '\u201d': '"', '\u201e': '"', '\u2033': '"',
+    '\u2018': "'", '\u2019': "'",
+})
+_TRAILING_COMMA = re.compile(r',(\s*[}\]])')
+_PY_LITERALS = re.compile(r'(?<=[:\[,\s])(True|False|None)(?=\s*[,}\]])')
+_PY_LITERAL_MAP = {'True': 'true', 'False': 'false', 'None': 'null'}
+
+# Parser statistics (shared across clients)
+_stats_lock = threading.Lock()
+parse_stats = {
+    'parsed_clean': 0,         # first balanced object parsed as-is
+    'parsed_repaired': 0,      # needed one or more repairs
+    'parse_failures': 0,
+    'schema_rejections': 0,
+    'recovered_from_legacy_failure': 0,  # find/rfind + json.loads would have failed
+    'upstream_calls_avoided': 0,
+}
+
+
+def _record(stat: str, amount: int = 1) -> None:
+    with _stats_lock:
+        parse_stats[stat] += amount
+
+
+def get_parse_stats() -> Dict[str, int]:
+    """Get a snapshot of JSON parsing statistics"""
+    with _stats_lock:
+        return dict(parse_stats)
+
+
+def _scan_object(text: str, start: int) -> Tuple[int, List[str], bool, bool]:
+    """
+    Scan from the '{' at `start` tracking strings and nesting.
+    Returns (end_index, open_brackets, in_string, complete). end_index is exclusive.
+    """
+    stack: List[str] = []
+    in_string = False
+    escaped = False
+    for i in range(start, len(text)):
+        ch = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == '\\':
+                escaped = True
+            elif ch == '"':
+                in_string = False
+            continue
+        if ch == '"':
+            in_string = True
+        elif ch in '{[':
+            stack.append('}' if ch == '{' else ']')
+        elif ch in '}]':
+            if stack and stack[-1] == ch:
+                stack.pop()
+                if not stack:
+                    return i + 1, [], False, True
+            else:
+                # Mismatched closer: treat as end of this candidate
+                return i, stack, False, False
+    return len(text), stack, in_string, False
+
+
+def _close_truncated(fragment: str, open_brackets: List[str], in_string: bool) -> str:
+    """Close a truncated object, dropping a dangling key or partial value"""
+    if in_string:
+        fragment += '"'
+    fragment = fragment.rstrip()
+    # Drop a dangling key (`"key"` or `"key":`) with no value, then any trailing separator
+    fragment = re.sub(r'([{,])\s*"[^"\\]*"\s*:?\s*$', r'\1', fragment)
+    fragment = re.sub(r'[,:]\s*$', '', fragment)
+    return fragment + ''.join(reversed(open_brackets))
+
+
+def _repair(fragment: str) -> Tuple[str, List[str]]:
+    repairs = []
+    fixed = fragment.translate(_SMART_QUOTES)
+    if fixed != fragment:
+        repairs.append('smart_quotes')
+    without_commas = _TRAILING_COMMA.sub(r'\1', fixed)
+    if without_commas != fixed:
+        repairs.append('trailing_commas')
+    literals = _PY_LITERALS.sub(lambda m: _PY_LITERAL_MAP[m.group(1)], without_commas)
+    if literals != without_commas:
+        repairs.append('python_literals')
+    return literals, repairs
+
+
+def extract_json_object(text: str) -> Tuple[Optional[Dict[str, Any]], List[str]]:
+    """
+    Locate the first balanced JSON object in `text` and parse it, repairing common
+    LLM defects (code fences, smart quotes, trailing commas, truncated tail).
+    Returns (object or None, list of repairs applied).
+    """
+    if not text:
+        return None, []
+
+    pos = text.find('{')
+    while pos >= 0:
+        end, open_brackets, in_string, complete = _scan_object(text, pos)
+        fragment = text[pos:end]
+        repairs: List[str] = []
+
+        if not complete:
+            if end < len(text):
+                # Mismatched bracket inside this candidate; try the next '{'
+                pos = text.find('{', pos + 1)
+                continue
+            fragment = _close_truncated(fragment, open_brackets, in_string)
+            repairs.append('truncated_tail')
+
+        try:
+            obj = json.loads(fragment)
+            if isinstance(obj, dict):
+                return obj, repairs
+        except json.JSONDecodeError:
+            pass
+
+        repaired, extra = _repair(fragment)
+        if extra:
+            try:
+                obj = json.loads(repaired)
+                if isinstance(obj, dict):
+                    return obj, repairs + extra
+            except json.JSONDecodeError:
+                pass
+
+        pos = text.find('{', pos + 1)
+
+    return None, []
+
+
+def _legacy_parse_ok(text: str) -> bool:
+    """Whether the previous find('{')/rfind('}') + json.loads approach would have succeeded"""
+    start = text.find("{")
+    end = text.rfind("}") + 1
+    if start < 0 or end <= start:
+        return False
+    try:
+        return isinstance(json.loads(text[start:end]), dict)
+    except json.JSONDecodeError:
+        return False
+
+
+def parse_llm_json(text: str, fallback_cost: int = 0, source: str = "llm") -> Optional[Dict[str, Any]]:
+    """
+    Parse an LLM completion into a dict, recording statistics.
+    `fallback_cost` is the number of extra upstream calls the caller makes when parsing fails,
+    counted as avoided whenever the tolerant parser recovers an object the legacy parser lost.
+    """
+    obj, repairs = extract_json_object(text or "")
+    if obj is None:
+        _record('parse_failures')
+        logger.warning(f"Could not extract JSON from {source} output ({len(text or '')} chars)")
+        return None
+
+    _record('parsed_repaired' if repairs else 'parsed_clean')
+    if repairs:
+        logger.debug(f"Repaired {source} JSON: {', '.join(repairs)}")
+    if not _legacy_parse_ok(text):
+        _record('recovered_from_legacy_failure')
+        if fallback_cost:
+            _record('upstream_calls_avoided', fallback_cost)
+    return obj
+
+
+def validate_action_payload(payload: Optional[Dict[str, Any]],
+                            supported_actions=SUPPORTED_ACTIONS) -> Optional[Dict[str, Any]]:
+    """
+    Validate a Sehat Sahara action payload against the response schema.
+    Returns a normalized payload or None when required fields are missing or invalid.
+    """
+    if not isinstance(payload, dict):
+        return None
+
+    response_text = payload.get("response")
+    action = payload.get("action")
+    if not isinstance(response_text, str) or not response_text.strip():
+        _record('schema_rejections')
+        return None
+    if not isinstance(action, str) or action.strip().upper() not in {a.upper() for a in supported_actions}:
+        _record('schema_rejections')
+        return None
+
+    normalized = dict(payload)
+    normalized["action"] = next(a for a in supported_actions if a.upper() == action.strip().upper())
+    if not isinstance(normalized.get("parameters"), dict):
+        normalized["parameters"] = {}
+    if "interactive_buttons" in normalized and not isinstance(normalized["interactive_buttons"], list):
+        normalized.pop("interactive_buttons")
+    return normalized
@@ -0,0 +1,241 @@
+"""
+Sehat Sahara LLM Rate Limiter
+Client-side token bucket with a bounded priority queue for upstream LLM traffic.
+Emergency and triage turns are served first, emoji and chit-chat last; requests whose
+queue wait would exceed their deadline are shed immediately so callers fall back locally.
+"""
+
+import heapq
+import itertools
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Any, Optional, Tuple
+from urllib.parse import urlparse
+
+from performance_metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+# Request priorities (lower is served first)
+PRIORITY_EMERGENCY = 0
+PRIORITY_TRIAGE = 1
+PRIORITY_NORMAL = 2
+PRIORITY_BACKGROUND = 3
+PRIORITY_LOW = 4  # emoji interpretation, chit-chat
+
+PRIORITY_NAMES = {
+    PRIORITY_EMERGENCY: 'emergency',
+    PRIORITY_TRIAGE: 'triage',
+    PRIORITY_NORMAL: 'normal',
+    PRIORITY_BACKGROUND: 'background',
+    PRIORITY_LOW: 'low',
+}
+
+DEFAULT_DEADLINE_SECONDS = 30.0
+
+# Free-tier request limits per provider host (requests per minute)
+PROVIDER_REQUESTS_PER_MINUTE = {
+    'api.groq.com': 30,
+    'openrouter.ai': 20,
+}
+
+_context = threading.local()
+
+
+@contextmanager
+def llm_priority(priority: int, deadline_seconds: Optional[float] = None, deadline: Optional[float] = None):
+    """
+    Set the priority (and optionally a deadline) for LLM calls made by this thread,
+    so call sites deep inside NLU/response generation inherit the request's urgency.
+    `deadline` is an absolute time.monotonic() value shared by several calls of one request.
+    """
+    previous = getattr(_context, 'request', None)
+    if deadline_seconds is not None:
+        deadline = time.monotonic() + deadline_seconds
+    elif deadline is None:
+        deadline = previous[1] if previous else None
+    _context.request = (priority, deadline)
+    try:
+        yield
+    finally:
+        _context.request = previous
+
+
+def current_request_priority() -> Tuple[int, Optional[float]]:
+    """Priority and absolute (monotonic) deadline for the calling thread"""
+    return getattr(_context, 'request', None) or (PRIORITY_NORMAL, None)
+
+
+def record_shed() -> None:
+    """Count a shed LLM request against the calling thread"""
+    _context.sheds = getattr(_context, 'sheds', 0) + 1
+
+
+def shed_count() -> int:
+    """Requests shed on the calling thread so far; the router compares counts to tell sheds from provider failures"""
+    return getattr(_context, 'sheds', 0)
+
+
+def parse_retry_after(value: Optional[str], default: float = 2.0) -> float:
+    """Parse a Retry-After header (delta seconds or HTTP date) into seconds"""
+    if not value:
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+        if retry_at.tzinfo is None:
+            retry_at = retry_at.replace(tzinfo=timezone.utc)
+        return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return default
+
+
+class LLMRateLimiter:
+    """Token bucket with a bounded priority wait queue and Retry-After backoff"""
+
+    def __init__(self, name: str, requests_per_minute: float = 30, burst: int = None, max_queue: int = 64):
+        self.name = name
+        self.rate = requests_per_minute / 60.0
+        self.capacity = burst or max(1, int(requests_per_minute // 6))
+        self.max_queue = max_queue
+        self.tokens = float(self.capacity)
+        self.updated_at = time.monotonic()
+        self.blocked_until = 0.0  # set from Retry-After
+
+        self._cond = threading.Condition()
+        self._waiters = []  # heap of (priority, seq)
+        self._seq = itertools.count()
+
+        self.stats = {
+            'granted': 0,
+            'shed_deadline': 0,
+            'shed_queue_full': 0,
+            'rate_limited_responses': 0,
+            'max_queue_depth': 0
+        }
+        self.wait_ms = {name: Histogram() for name in PRIORITY_NAMES.values()}
+        self.queue_depth = Histogram(buckets=[0, 1, 2, 4, 8, 16, 32, 64, 128])
+
+    def _refill(self, now: float) -> None:
+        if now <= self.updated_at:
+            return  # still inside a Retry-After pause
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def _estimated_wait(self, now: float, ahead: int) -> float:
+        """Seconds until a caller with `ahead` higher-or-equal priority waiters could get a token"""
+        blocked = max(0.0, self.blocked_until - now)
+        tokens = 0.0 if blocked else self.tokens
+        needed = ahead + 1 - tokens
+        return blocked + (needed / self.rate if needed > 0 else 0.0)
+
+    def acquire(self, priority: int = None, deadline: float = None) -> bool:
+        """
+        Wait for a token in priority order. Returns False (shed) when the queue is full or the
+        estimated wait would pass the deadline, so the caller can use its local fallback at once.
+        """
+        context_priority, context_deadline = current_request_priority()
+        priority = context_priority if priority is None else priority
+        start = time.monotonic()
+        deadline = deadline or context_deadline or start + DEFAULT_DEADLINE_SECONDS
+        priority_name = PRIORITY_NAMES.get(priority, 'normal')
+
+        with self._cond:
+            self._refill(start)
+            if len(self._waiters) >= self.max_queue:
+                self.stats['shed_queue_full'] += 1
+                record_shed()
+                return False
+
+            ahead = sum(1 for waiter_priority, _ in self._waiters if waiter_priority <= priority)
+            if start + self._estimated_wait(start, ahead) > deadline:
+                self.stats['shed_deadline'] += 1
+                logger.info(f"[{self.name}] shed {priority_name} LLM request: queue wait exceeds deadline")
+                record_shed()
+                return False
+
+            entry = (priority, next(self._seq))
+            heapq.heappush(self._waiters, entry)
+            self.queue_depth.observe(len(self._waiters))
+            self.stats['max_queue_depth'] = max(self.stats['max_queue_depth'], len(self._waiters))
+
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    if self._waiters[0] == entry and now >= self.blocked_until and self.tokens >= 1:
+                        self.tokens -= 1
+                        heapq.heappop(self._waiters)
+                        self.stats['granted'] += 1
+                        self.wait_ms[priority_name].observe((now - start) * 1000)
+                        return True
+                    if now >= deadline:
+                        self.stats['shed_deadline'] += 1
+                        self._waiters.remove(entry)
+                        heapq.heapify(self._waiters)
+                        record_shed()
+                        return False
+
+                    if now < self.blocked_until:
+                        wait = self.blocked_until - now
+                    elif self.tokens < 1:
+                        wait = (1 - self.tokens) / self.rate
+                    else:
+                        wait = 0.05  # token available but someone ahead of us
+                    self._cond.wait(timeout=max(0.005, min(wait, deadline - now)))
+            finally:
+                self._cond.notify_all()
+
+    def penalize(self, retry_after_seconds: float) -> None:
+        """Stop issuing tokens until the provider's Retry-After has elapsed"""
+        with self._cond:
+            now = time.monotonic()
+            self.blocked_until = max(self.blocked_until, now + retry_after_seconds)
+            self.tokens = 0.0
+            self.updated_at = self.blocked_until
+            self.stats['rate_limited_responses'] += 1
+            self._cond.notify_all()
+        logger.warning(f"[{self.name}] upstream rate limited, pausing for {retry_after_seconds:.1f}s")
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._cond:
+            stats = dict(self.stats)
+            stats['queue_depth'] = len(self._waiters)
+            stats['tokens_available'] = round(self.tokens, 2)
+            stats['blocked_for_seconds'] = round(max(0.0, self.blocked_until - time.monotonic()), 2)
+        stats['requests_per_minute'] = round(self.rate * 60, 1)
+        stats['burst'] = self.capacity
+        stats['queue_depth_histogram'] = self.queue_depth.snapshot()
+        stats['wait_ms'] = {name: hist.snapshot() for name, hist in self.wait_ms.items() if hist.count}
+        return stats
+
+
+_limiters: Dict[str, LLMRateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(base_url: str) -> LLMRateLimiter:
+    """Shared limiter per provider host, so every client hitting the same API shares one budget"""
+    host = urlparse(base_url).netloc or base_url
+    with _limiters_lock:
+        limiter = _limiters.get(host)
+        if limiter is None:
+            env_key = 'LLM_RPM_' + host.upper().replace('.', '_').replace(':', '_').replace('-', '_')
+            rpm = float(os.getenv(env_key) or os.getenv('LLM_REQUESTS_PER_MINUTE') or PROVIDER_REQUESTS_PER_MINUTE.get(host, 30))
+            limiter = LLMRateLimiter(host, requests_per_minute=rpm)
+            _limiters[host] = limiter
+        return limiter
+
+
+def get_rate_limiter_stats() -> Dict[str, Any]:
+    with _limiters_lock:
+        limiters = list(_limiters.values())
+    return {limiter.name: limiter.get_stats() for limiter in limiters}
@@ -0,0 +1,249 @@
+"""
+Sehat Sahara LLM Router
+Picks a provider/model per task type from configured candidates using live EWMA latency
+and error rates, prefers small fast models for classification, and fails over on errors.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, asdict
+from typing import Dict, Any, List, Callable
+
+from llm_rate_limiter import current_request_priority, shed_count
+
+logger = logging.getLogger(__name__)
+
+# Task types
+TASK_INTENT = "intent_classification"
+TASK_ACTION = "action_generation"
+TASK_EMOJI = "emoji_interpretation"
+TASK_MEDICINE_SCAN = "medicine_scan"
+TASK_PRESCRIPTION_OCR = "prescription_ocr"
+
+CLASSIFICATION_TASKS = {TASK_INTENT}
+
+EWMA_ALPHA = 0.2
+ERROR_PENALTY = 4.0          # an always-failing candidate scores 5x its latency
+LARGE_MODEL_PENALTY = 2.0    # for classification tasks
+CIRCUIT_FAILURES = 3         # consecutive failures before a candidate is benched
+CIRCUIT_COOLDOWN_SECONDS = 30
+
+
+@dataclass
+class RouteCandidate:
+    """One provider/model a task can be routed to"""
+    name: str
+    base_url: str
+    model: str
+    kind: str = "text"            # "text" (ApiClient) or "vision" (GroqScoutClient)
+    tier: str = "small"           # "small" or "large"
+    api_key_env: str = ""
+    expected_latency_ms: float = 1000.0  # prior used until live samples exist
+
+
+class _CandidateStats:
+    """Live EWMA latency/error and circuit state for one (task, candidate)"""
+
+    def __init__(self, prior_latency_ms: float):
+        self.ewma_latency_ms = prior_latency_ms
+        self.ewma_error = 0.0
+        self.samples = 0
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+        self.chosen = 0
+        self.failures = 0
+
+    def observe(self, latency_ms: float, ok: bool) -> None:
+        if ok:
+            # Failed calls often return fast; only successes move the latency estimate
+            self.ewma_latency_ms = latency_ms if self.samples == 0 else (
+                EWMA_ALPHA * latency_ms + (1 - EWMA_ALPHA) * self.ewma_latency_ms)
+            self.samples += 1
+            self.consecutive_failures = 0
+        else:
+            self.failures += 1
+            self.consecutive_failures += 1
+            if self.consecutive_failures >= CIRCUIT_FAILURES:
+                self.open_until = time.monotonic() + CIRCUIT_COOLDOWN_SECONDS
+        self.ewma_error = EWMA_ALPHA * (0.0 if ok else 1.0) + (1 - EWMA_ALPHA) * self.ewma_error
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            'ewma_latency_ms': round(self.ewma_latency_ms, 1),
+            'ewma_error_rate': round(self.ewma_error, 3),
+            'samples': self.samples,
+            'chosen': self.chosen,
+            'failures': self.failures,
+            'circuit_open': self.open_until > time.monotonic()
+        }
+
+
+def default_route_config() -> Dict[str, Any]:
+    """Current behaviour: Groq 8B for text tasks, OpenRouter Qwen-VL for vision tasks"""
+    return {
+        "candidates": {
+            "groq-llama-8b": {
+                "base_url": os.getenv('LLM_BASE_URL') or "https://api.groq.com/openai/v1",
+                "model": "llama-3.1-8b-instant", "kind": "text", "tier": "small",
+                "api_key_env": "GROQ_API_KEY", "expected_latency_ms": 600
+            },
+            "openrouter-qwen-vl": {
+                "base_url": os.getenv('SCOUT_BASE_URL') or "https://openrouter.ai/api/v1",
+                "model": "qwen/qwen2.5-vl-72b-instruct:free", "kind": "vision", "tier": "large",
+                "api_key_env": "GROQ_SCOUT_API_KEY", "expected_latency_ms": 4000
+            }
+        },
+        "routes": {
+            TASK_INTENT: ["groq-llama-8b"],
+            TASK_ACTION: ["groq-llama-8b"],
+            TASK_EMOJI: ["openrouter-qwen-vl"],
+            TASK_MEDICINE_SCAN: ["openrouter-qwen-vl"],
+            TASK_PRESCRIPTION_OCR: ["openrouter-qwen-vl"]
+        }
+    }
+
+
+def load_route_config() -> Dict[str, Any]:
+    """Route config from LLM_ROUTES_FILE or LLM_ROUTES_JSON, falling back to the defaults"""
+    try:
+        path = os.getenv('LLM_ROUTES_FILE')
+        if path and os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        raw = os.getenv('LLM_ROUTES_JSON')
+        if raw:
+            return json.loads(raw)
+    except (OSError, ValueError) as e:
+        logger.error(f"Invalid LLM route config, using defaults: {e}")
+    return default_route_config()
+
+
+class LLMRouter:
+    """Ranks candidates per task and calls them in order until one returns a result"""
+
+    def __init__(self, config: Dict[str, Any], client_factory: Callable[[RouteCandidate], Any]):
+        self.client_factory = client_factory
+        self.candidates: Dict[str, RouteCandidate] = {
+            name: RouteCandidate(name=name, **spec) for name, spec in config.get("candidates", {}).items()
+        }
+        self.routes: Dict[str, List[str]] = {
+            task: [name for name in names if name in self.candidates]
+            for task, names in config.get("routes", {}).items()
+        }
+        self._clients: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict[str, _CandidateStats]] = {
+            task: {name: _CandidateStats(self.candidates[name].expected_latency_ms) for name in names}
+            for task, names in self.routes.items()
+        }
+        self.task_stats: Dict[str, Dict[str, Any]] = {
+            task: {'calls': 0, 'failovers': 0, 'exhausted': 0, 'shed': 0, 'last_decision': None} for task in self.routes
+        }
+
+    def _client(self, name: str):
+        with self._lock:
+            if name in self._clients:
+                return self._clients[name]
+        # Created outside the lock: client construction may probe the provider over the network
+        try:
+            client = self.client_factory(self.candidates[name])
+        except Exception as e:
+            logger.error(f"Could not create LLM client for route candidate {name}: {e}")
+            client = None
+        with self._lock:
+            return self._clients.setdefault(name, client)
+
+    def is_available(self, task: str) -> bool:
+        return any(getattr(self._client(name), 'is_available', False) for name in self.routes.get(task, []))
+
+    def rank(self, task: str) -> List[str]:
+        """Candidates for task, best first; benched candidates go last as a final resort"""
+        now = time.monotonic()
+        scored = []
+        with self._lock:
+            for name in self.routes.get(task, []):
+                stats = self._stats[task][name]
+                score = stats.ewma_latency_ms * (1 + ERROR_PENALTY * stats.ewma_error)
+                if task in CLASSIFICATION_TASKS and self.candidates[name].tier != "small":
+                    score *= LARGE_MODEL_PENALTY
+                benched = stats.open_until > now
+                scored.append((benched, score, name))
+        return [name for _, _, name in sorted(scored)]
+
+    def call(self, task: str, fn: Callable[[Any], Any]) -> Any:
+        """
+        Call fn(client) on each ranked candidate until it returns a non-empty result.
+        Returns None when every candidate fails or the request deadline has passed.
+        A call shed by the local rate limiter never reached the provider, so it moves on
+        to the next candidate without touching the candidate's latency, error or circuit state.
+        """
+        ranked = self.rank(task)
+        tried = []
+        with self._lock:
+            if task in self.task_stats:
+                self.task_stats[task]['calls'] += 1
+        for name in ranked:
+            _, deadline = current_request_priority()
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            client = self._client(name)
+            if client is None or not getattr(client, 'is_available', False):
+                continue
+
+            tried.append(name)
+            sheds = shed_count()
+            start_time = time.time()
+            try:
+                result = fn(client)
+            except Exception as e:
+                logger.error(f"Route {task} via {name} raised: {e}")
+                result = None
+            ok = bool(result)
+            shed = not ok and shed_count() > sheds
+            with self._lock:
+                stats = self._stats[task][name]
+                task_stats = self.task_stats[task]
+                if shed:
+                    task_stats['shed'] += 1
+                else:
+                    stats.observe((time.time() - start_time) * 1000, ok)
+                if len(tried) > 1:
+                    task_stats['failovers'] += 1
+                if ok:
+                    stats.chosen += 1
+                    task_stats['last_decision'] = {'candidate': name, 'ranked': ranked, 'tried': tried,
+                                                   'at': time.strftime('%Y-%m-%dT%H:%M:%S')}
+            if ok:
+                return result
+            logger.warning(f"Route {task} via {name} {'was shed' if shed else 'failed'}, trying next candidate")
+
+        with self._lock:
+            if task in self.task_stats:
+                self.task_stats[task]['exhausted'] += 1
+                self.task_stats[task]['last_decision'] = {'candidate': None, 'ranked': ranked, 'tried': tried,
+                                                          'at': time.strftime('%Y-%m-%dT%H:%M:%S')}
+        return None
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                task: {
+                    **{k: v for k, v in self.task_stats[task].items()},
+                    'candidates': {
+                        name: {**stats.snapshot(), 'model': self.candidates[name].model,
+                               'tier': self.candidates[name].tier}
+                        for name, stats in self._stats[task].items()
+                    }
+                }
+                for task in self.routes
+            }
+
+    def describe(self) -> Dict[str, Any]:
+        """Configured candidates and routes (without API keys)"""
+        return {
+            'candidates': {name: asdict(candidate) for name, candidate in self.candidates.items()},
+            'routes': dict(self.routes)
+        }
@@ -0,0 +1,368 @@
+#!/usr/bin/env python3
+"""
+Sehat Sahara Local LLM Stand-in Server
+OpenAI-compatible /chat/completions stub for load tests, benchmarks and CI.
+Supports streaming, image content parts, configurable latency distributions,
+error/429 injection, token-proportional delay, canned responses and record/replay.
+
+Usage:
+    python llm_stub_server.py --port 8001 --latency lognormal:5.5,0.4 --rate-limit-rate 0.05
+    LLM_BASE_URL=http://127.0.0.1:8001/v1 SCOUT_BASE_URL=http://127.0.0.1:8001/v1 GROQ_API_KEY=stub python chatbot.py
+    (raise the client-side budget for load tests with e.g. LLM_RPM_127_0_0_1_8001=6000)
+
+Record once against the real provider, then replay offline:
+    python llm_stub_server.py --mode record --upstream https://api.groq.com/openai/v1 --cassette llm_cassette.jsonl
+    python llm_stub_server.py --mode replay --cassette llm_cassette.jsonl
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import math
+import os
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class LatencyDistribution:
+    """
+    Latency spec in milliseconds:
+    fixed:200 | uniform:100,800 | normal:300,80 | lognormal:mu,sigma | exp:250
+    """
+
+    def __init__(self, spec: str = "fixed:0", rng: random.Random = None):
+        self.spec = spec
+        self.rng = rng or random.Random()
+        kind, _, args = spec.partition(":")
+        self.kind = kind.strip().lower()
+        self.args = [float(a) for a in args.split(",") if a.strip()] if args else []
+        if self.kind not in ("fixed", "uniform", "normal", "lognormal", "exp"):
+            raise ValueError(f"Unknown latency distribution: {spec}")
+
+    def sample_ms(self) -> float:
+        if self.kind == "fixed":
+            return self.args[0] if self.args else 0.0
+        if self.kind == "uniform":
+            return self.rng.uniform(self.args[0], self.args[1])
+        if self.kind == "normal":
+            return max(0.0, self.rng.gauss(self.args[0], self.args[1]))
+        if self.kind == "lognormal":
+            return self.rng.lognormvariate(self.args[0], self.args[1])
+        return self.rng.expovariate(1.0 / self.args[0])
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate (~4 chars per token), good enough for usage accounting"""
+    return max(1, math.ceil(len(text) / 4)) if text else 0
+
+
+def _message_text(message: Dict[str, Any]) -> str:
+    content = message.get("content", "")
+    if isinstance(content, list):
+        return " ".join(part.get("text", "") for part in content if part.get("type") == "text")
+    return content or ""
+
+
+def _has_image(messages: List[Dict[str, Any]]) -> bool:
+    return any(
+        isinstance(m.get("content"), list) and any(p.get("type") == "image_url" for p in m["content"])
+        for m in messages
+    )
+
+
+def request_fingerprint(body: Dict[str, Any]) -> str:
+    """Stable key for record/replay: model + messages (image data hashed) + JSON mode"""
+    messages = []
+    for message in body.get("messages", []):
+        content = message.get("content", "")
+        if isinstance(content, list):
+            content = [
+                {"type": "image_url", "sha256": hashlib.sha256(p.get("image_url", {}).get("url", "").encode()).hexdigest()}
+                if p.get("type") == "image_url" else p
+                for p in content
+            ]
+        messages.append({"role": message.get("role"), "content": content})
+    key = {"model": body.get("model"), "messages": messages, "json": bool(body.get("response_format"))}
+    return hashlib.sha256(json.dumps(key, sort_keys=True, ensure_ascii=False).encode()).hexdigest()
+
+
+class StubLLMBackend:
+    """Response selection, fault injection, and record/replay state shared by handler threads"""
+
+    def __init__(self, latency: str = "fixed:0", per_token_ms: float = 0.0, error_rate: float = 0.0,
+                 rate_limit_rate: float = 0.0, retry_after: float = 1.0, mode: str = "canned",
+                 canned_path: str = None, cassette_path: str = None, upstream: str = None,
+                 upstream_api_key: str = None, seed: int = None):
+        self.rng = random.Random(seed)
+        self.latency = LatencyDistribution(latency, self.rng)
+        self.per_token_ms = per_token_ms
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.mode = mode
+        self.upstream = upstream.rstrip("/") if upstream else None
+        self.upstream_api_key = upstream_api_key or os.getenv("UPSTREAM_API_KEY") or os.getenv("GROQ_API_KEY")
+        self.cassette_path = cassette_path
+        self.canned: List[Dict[str, str]] = []
+        self.cassette: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "streamed": 0, "errors_injected": 0, "rate_limited": 0,
+                      "replayed": 0, "recorded": 0, "canned": 0, "images": 0}
+
+        if canned_path:
+            with open(canned_path, "r", encoding="utf-8") as f:
+                self.canned = json.load(f)  # [{"match": "appointment", "response": "..."}]
+        if cassette_path and os.path.exists(cassette_path):
+            with open(cassette_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self.cassette[entry["fingerprint"]] = entry["response"]
+
+    def _record_stat(self, key: str) -> None:
+        with self._lock:
+            self.stats[key] += 1
+
+    def inject_fault(self) -> Optional[int]:
+        """Return an HTTP status to fail with, or None"""
+        roll = self.rng.random()
+        if roll < self.rate_limit_rate:
+            self._record_stat("rate_limited")
+            return 429
+        if roll < self.rate_limit_rate + self.error_rate:
+            self._record_stat("errors_injected")
+            return 500
+        return None
+
+    def canned_content(self, body: Dict[str, Any]) -> str:
+        messages = body.get("messages", [])
+        last_user = next((_message_text(m) for m in reversed(messages) if m.get("role") == "user"), "")
+        system = " ".join(_message_text(m) for m in messages if m.get("role") == "system")
+
+        for entry in self.canned:
+            if entry.get("match", "").lower() in last_user.lower():
+                return entry["response"]
+
+        if _has_image(messages):
+            self._record_stat("images")
+            if "prescription" in system.lower():
+                return json.dumps({"doctor_name": "Dr. Stub", "medications": [
+                    {"name": "Paracetamol 500mg", "dosage": "1 tablet twice daily", "time": "morning, night"}
+                ], "tests": [], "diagnosis": "Viral fever"})
+            return "This looks like a strip of Paracetamol 500mg tablets. Please confirm with a pharmacist."
+
+        wants_json = bool(body.get("response_format")) or "json" in system.lower() or "json" in last_user.lower()
+        if wants_json:
+            if "primary_intent" in system + last_user:
+                return json.dumps({"primary_intent": "general_inquiry", "confidence": 0.8, "urgency_level": "low",
+                                   "language_detected": "en", "context_entities": {}, "user_needs": ["information"],
+                                   "in_scope": True})
+            return json.dumps({"response": "I can help you with that in the app.", "action": "SHOW_APP_FEATURES",
+                               "parameters": {}})
+        return f"Stub reply to: {last_user[:120]}"
+
+    def _forward(self, body: Dict[str, Any], auth_header: Optional[str]) -> Dict[str, Any]:
+        request = urllib.request.Request(
+            f"{self.upstream}/chat/completions",
+            data=json.dumps({**body, "stream": False}).encode("utf-8"),
+            headers={"Content-Type": "application/json",
+                     "Authorization": auth_header or f"Bearer {self.upstream_api_key}"},
+            method="POST"
+        )
+        with urllib.request.urlopen(request, timeout=120) as response:
+            return json.loads(response.read())
+
+    def completion(self, body: Dict[str, Any], auth_header: Optional[str] = None) -> Dict[str, Any]:
+        """Build a full (non-streamed) completion response"""
+        self._record_stat("requests")
+        fingerprint = request_fingerprint(body)
+
+        if self.mode == "replay" and fingerprint in self.cassette:
+            self._record_stat("replayed")
+            return self.cassette[fingerprint]
+
+        if self.mode == "record" and self.upstream:
+            result = self._forward(body, auth_header)
+            with self._lock:
+                self.cassette[fingerprint] = result
+                if self.cassette_path:
+                    with open(self.cassette_path, "a", encoding="utf-8") as f:
+                        f.write(json.dumps({"fingerprint": fingerprint, "response": result}, ensure_ascii=False) + "\n")
+            self._record_stat("recorded")
+            return result
+
+        self._record_stat("canned")
+        content = self.canned_content(body)
+        max_tokens = body.get("max_tokens")
+        if max_tokens:
+            content = content[:max_tokens * 4]
+        prompt_tokens = sum(estimate_tokens(_message_text(m)) for m in body.get("messages", []))
+        completion_tokens = estimate_tokens(content)
+        return {
+            "id": f"chatcmpl-stub-{uuid.uuid4().hex[:12]}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "stub-model"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                      "total_tokens": prompt_tokens + completion_tokens}
+        }
+
+    def delay_seconds(self, completion_tokens: int) -> float:
+        return (self.latency.sample_ms() + self.per_token_ms * completion_tokens) / 1000.0
+
+
+class StubLLMRequestHandler(BaseHTTPRequestHandler):
+    """HTTP handler; the backend is attached to the server instance"""
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s" % (self.address_string(), format % args))
+
+    def _send_json(self, status: int, payload: Dict[str, Any], headers: Dict[str, str] = None) -> None:
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        backend: StubLLMBackend = self.server.backend
+        if self.path.rstrip("/").endswith("/models"):
+            self._send_json(200, {"object": "list", "data": [{"id": "stub-model", "object": "model"}]})
+        elif self.path.rstrip("/").endswith("/stats"):
+            with backend._lock:
+                self._send_json(200, dict(backend.stats))
+        else:
+            self._send_json(404, {"error": {"message": "Not found"}})
+
+    def do_POST(self):
+        backend: StubLLMBackend = self.server.backend
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": "Not found"}})
+            return
+
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError:
+            self._send_json(400, {"error": {"message": "Invalid JSON body"}})
+            return
+
+        fault = backend.inject_fault()
+        if fault == 429:
+            time.sleep(backend.latency.sample_ms() / 1000.0 / 4)
+            self._send_json(429, {"error": {"message": "Rate limit reached", "type": "rate_limit_exceeded"}},
+                            headers={"Retry-After": f"{backend.retry_after:g}"})
+            return
+        if fault:
+            time.sleep(backend.latency.sample_ms() / 1000.0)
+            self._send_json(fault, {"error": {"message": "Injected upstream error", "type": "server_error"}})
+            return
+
+        try:
+            result = backend.completion(body, self.headers.get("Authorization"))
+        except urllib.error.HTTPError as e:
+            self._send_json(e.code, {"error": {"message": f"Upstream error: {e.reason}"}})
+            return
+        except Exception as e:
+            self._send_json(502, {"error": {"message": f"Stub failure: {e}"}})
+            return
+
+        content = result.get("choices", [{}])[0].get("message", {}).get("content", "")
+        completion_tokens = result.get("usage", {}).get("completion_tokens", estimate_tokens(content))
+
+        if body.get("stream"):
+            backend._record_stat("streamed")
+            self._stream(result, content, completion_tokens, backend)
+            return
+
+        time.sleep(backend.delay_seconds(completion_tokens))
+        self._send_json(200, result)
+
+    def _stream(self, result: Dict[str, Any], content: str, completion_tokens: int, backend: StubLLMBackend) -> None:
+        """Server-sent events in the OpenAI chunk format, spreading delay across chunks"""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        # Time to first token from the latency distribution, then per-token delay
+        time.sleep(backend.latency.sample_ms() / 1000.0)
+        words = content.split(" ")
+        base = {"id": result.get("id"), "object": "chat.completion.chunk", "created": result.get("created"),
+                "model": result.get("model")}
+        for i, word in enumerate(words):
+            piece = word if i == 0 else " " + word
+            chunk = {**base, "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]}
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+            time.sleep(backend.per_token_ms * estimate_tokens(piece) / 1000.0)
+        final = {**base, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}], "usage": result.get("usage")}
+        self.wfile.write(f"data: {json.dumps(final)}\n\ndata: [DONE]\n\n".encode("utf-8"))
+        self.wfile.flush()
+
+
+def create_stub_server(host: str = "127.0.0.1", port: int = 8001, **backend_options) -> ThreadingHTTPServer:
+    """Create (but do not start) a stub server; port 0 picks a free port"""
+    server = ThreadingHTTPServer((host, port), StubLLMRequestHandler)
+    server.daemon_threads = True
+    server.backend = StubLLMBackend(**backend_options)
+    return server
+
+
+def start_stub_server_in_thread(host: str = "127.0.0.1", port: int = 0, **backend_options):
+    """Start a stub server on a background thread; returns (server, base_url) for tests and benchmarks"""
+    server = create_stub_server(host, port, **backend_options)
+    thread = threading.Thread(target=server.serve_forever, name="llm-stub-server", daemon=True)
+    thread.start()
+    return server, f"http://{server.server_address[0]}:{server.server_address[1]}/v1"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="OpenAI-compatible local LLM stand-in server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=int(os.getenv("LLM_STUB_PORT", 8001)))
+    parser.add_argument("--latency", default="fixed:50", help="fixed:MS | uniform:LO,HI | normal:MEAN,SD | lognormal:MU,SIGMA | exp:MEAN")
+    parser.add_argument("--per-token-ms", type=float, default=0.0, help="extra delay per completion token")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests failing with 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="fraction of requests failing with 429")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After seconds sent with 429s")
+    parser.add_argument("--mode", choices=["canned", "record", "replay"], default="canned")
+    parser.add_argument("--canned", help='JSON file: [{"match": "...", "response": "..."}]')
+    parser.add_argument("--cassette", default="llm_cassette.jsonl", help="record/replay file")
+    parser.add_argument("--upstream", help="real provider base URL for record mode")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    server = create_stub_server(
+        args.host, args.port, latency=args.latency, per_token_ms=args.per_token_ms, error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate, retry_after=args.retry_after, mode=args.mode,
+        canned_path=args.canned, cassette_path=args.cassette, upstream=args.upstream, seed=args.seed
+    )
+    logger.info(f"LLM stub server ({args.mode}) listening on http://{args.host}:{server.server_address[1]}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""
+Sehat Sahara LLM Telemetry
+Per-call metadata for upstream LLM requests (model, endpoint, caller, tokens, latency,
+status, retries, cache hits), aggregated in-process into histograms and rolling counters.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict, field
+from typing import Dict, Any, Optional
+
+from performance_metrics import Histogram, RollingCounter
+
+logger = logging.getLogger(__name__)
+
+# USD per 1M tokens (prompt, completion); override with LLM_PRICING_JSON='{"model": [in, out]}'
+DEFAULT_MODEL_PRICING = {
+    'llama-3.1-8b-instant': (0.05, 0.08),
+    'llama-3.3-70b-versatile': (0.59, 0.79),
+    'meta-llama/llama-4-scout-17b-16e-instruct': (0.11, 0.34),
+    'qwen/qwen2.5-vl-72b-instruct:free': (0.0, 0.0),
+}
+
+TOKEN_BUCKETS = [10, 25, 50, 100, 250, 500, 1000, 2000, 4000, 8000]
+COST_MICRO_USD_BUCKETS = [1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000]
+
+_context = threading.local()
+
+
+@contextmanager
+def llm_caller(name: str):
+    """Label LLM calls made by this thread (nlu, generation, summary, scout_*) for telemetry"""
+    previous = getattr(_context, 'caller', None)
+    _context.caller = name
+    try:
+        yield
+    finally:
+        _context.caller = previous
+
+
+def current_caller() -> str:
+    return getattr(_context, 'caller', None) or 'unknown'
+
+
+def _load_pricing() -> Dict[str, tuple]:
+    pricing = dict(DEFAULT_MODEL_PRICING)
+    raw = os.getenv('LLM_PRICING_JSON')
+    if raw:
+        try:
+            pricing.update({model: tuple(prices) for model, prices in json.loads(raw).items()})
+        except (ValueError, TypeError) as e:
+            logger.error(f"Invalid LLM_PRICING_JSON, using defaults: {e}")
+    return pricing
+
+
+@dataclass
+class LLMCallRecord:
+    """Metadata for one upstream call (or cache hit standing in for one)"""
+    model: str
+    endpoint: str
+    caller: str
+    status: str  # HTTP status code, or "shed" / "timeout" / "error" / "cache"
+    latency_ms: float = 0.0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    retries: int = 0
+    cache_hit: bool = False
+    cost_usd: float = 0.0
+    timestamp: float = field(default_factory=time.time)
+
+
+class _Aggregate:
+    """Histograms and counters for one dimension value (a caller or a model)"""
+
+    def __init__(self):
+        self.calls = 0
+        self.cache_hits = 0
+        self.errors = 0
+        self.retries = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cost_usd = 0.0
+        self.statuses: Dict[str, int] = {}
+        self.latency_ms = Histogram()
+        self.total_tokens = Histogram(buckets=TOKEN_BUCKETS)
+        self.cost_micro_usd = Histogram(buckets=COST_MICRO_USD_BUCKETS)
+
+    def add(self, record: LLMCallRecord) -> None:
+        self.calls += 1
+        self.statuses[record.status] = self.statuses.get(record.status, 0) + 1
+        self.retries += record.retries
+        if record.cache_hit:
+            self.cache_hits += 1
+            return
+        if record.status != '200':
+            self.errors += 1
+        self.latency_ms.observe(record.latency_ms)
+        self.prompt_tokens += record.prompt_tokens
+        self.completion_tokens += record.completion_tokens
+        self.cost_usd += record.cost_usd
+        if record.status == '200':
+            self.total_tokens.observe(record.prompt_tokens + record.completion_tokens)
+            self.cost_micro_usd.observe(record.cost_usd * 1_000_000)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            'calls': self.calls,
+            'cache_hits': self.cache_hits,
+            'errors': self.errors,
+            'retries': self.retries,
+            'statuses': dict(self.statuses),
+            'prompt_tokens': self.prompt_tokens,
+            'completion_tokens': self.completion_tokens,
+            'cost_usd': round(self.cost_usd, 6),
+            'latency_ms': self.latency_ms.snapshot(),
+            'tokens_per_call': self.total_tokens.snapshot(),
+            'cost_micro_usd_per_call': self.cost_micro_usd.snapshot()
+        }
+
+
+class LLMTelemetry:
+    """In-process aggregation of upstream LLM calls by caller and by model"""
+
+    def __init__(self, recent_calls: int = 200):
+        self.pricing = _load_pricing()
+        self._lock = threading.Lock()
+        self.by_caller: Dict[str, _Aggregate] = {}
+        self.by_model: Dict[str, _Aggregate] = {}
+        self.by_endpoint: Dict[str, int] = {}
+        self.rolling = RollingCounter(window_seconds=3600, bucket_seconds=60)
+        self.recent: deque = deque(maxlen=recent_calls)
+
+    def estimate_cost(self, model: str, prompt_tokens: int, completion_tokens: int) -> float:
+        prompt_price, completion_price = self.pricing.get(model, (0.0, 0.0))
+        return (prompt_tokens * prompt_price + completion_tokens * completion_price) / 1_000_000
+
+    def record(self, model: str, endpoint: str, status: Any, latency_ms: float = 0.0,
+               usage: Optional[Dict[str, Any]] = None, retries: int = 0, cache_hit: bool = False,
+               caller: Optional[str] = None) -> LLMCallRecord:
+        usage = usage or {}
+        prompt_tokens = int(usage.get('prompt_tokens') or 0)
+        completion_tokens = int(usage.get('completion_tokens') or 0)
+        record = LLMCallRecord(
+            model=model,
+            endpoint=endpoint,
+            caller=caller or current_caller(),
+            status=str(status),
+            latency_ms=round(latency_ms, 1),
+            prompt_tokens=prompt_tokens,
+            completion_tokens=completion_tokens,
+            retries=retries,
+            cache_hit=cache_hit,
+            cost_usd=0.0 if cache_hit else self.estimate_cost(model, prompt_tokens, completion_tokens)
+        )
+
+        with self._lock:
+            self.by_caller.setdefault(record.caller, _Aggregate()).add(record)
+            self.by_model.setdefault(record.model, _Aggregate()).add(record)
+            self.by_endpoint[endpoint] = self.by_endpoint.get(endpoint, 0) + 1
+            self.recent.append(record)
+
+        self.rolling.add('calls', now=record.timestamp)
+        if cache_hit:
+            self.rolling.add('cache_hits', now=record.timestamp)
+        else:
+            self.rolling.add('prompt_tokens', prompt_tokens, now=record.timestamp)
+            self.rolling.add('completion_tokens', completion_tokens, now=record.timestamp)
+            self.rolling.add('cost_usd', record.cost_usd, now=record.timestamp)
+            if record.status != '200':
+                self.rolling.add('errors', now=record.timestamp)
+            if record.status == '429':
+                self.rolling.add('rate_limited', now=record.timestamp)
+        return record
+
+    def get_stats(self, recent_limit: int = 20) -> Dict[str, Any]:
+        with self._lock:
+            by_caller = {name: agg.snapshot() for name, agg in self.by_caller.items()}
+            by_model = {name: agg.snapshot() for name, agg in self.by_model.items()}
+            by_endpoint = dict(self.by_endpoint)
+            recent = [asdict(r) for r in list(self.recent)[-recent_limit:]] if recent_limit else []
+        return {
+            'by_caller': by_caller,
+            'by_model': by_model,
+            'by_endpoint': by_endpoint,
+            'last_5_minutes': self.rolling.totals(300),
+            'last_hour': self.rolling.totals(),
+            'recent_calls': recent
+        }
+
+    def reset(self) -> None:
+        with self._lock:
+            self.by_caller.clear()
+            self.by_model.clear()
+            self.by_endpoint.clear()
+            self.recent.clear()
+        self.rolling = RollingCounter(window_seconds=3600, bucket_seconds=60)
+
+
+# Global telemetry instance shared by all LLM clients
+llm_telemetry = LLMTelemetry()
+
+
+def get_llm_telemetry_stats(recent_limit: int = 20) -> Dict[str, Any]:
+    return llm_telemetry.get_stats(recent_limit)
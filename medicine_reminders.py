@@ -0,0 +1,472 @@
+"""
+Sehat Sahara Medicine Reminders
+Table-backed medicine reminders and adherence events: per-user reads hit the (user_id, active)
+and (user_id, date) indexes, the reminder poller fires rows whose next_due_at has passed, and
+a one-off migration imports reminders kept in conversation memory profiles.
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime, date, timedelta
+from typing import Dict, Any, Callable, Iterable, Iterator, List, Optional, Tuple
+
+from reminder_scheduler import LocalNotificationFeed
+
+logger = logging.getLogger(__name__)
+
+
+def parse_times(times: Iterable[str]) -> List[Tuple[int, str]]:
+    """(minute of day, 'HH:MM') for each valid slot, sorted by time"""
+    slots = []
+    for time_slot in times or []:
+        try:
+            hour, minute = time_slot.split(':')
+            slots.append((int(hour) * 60 + int(minute), time_slot))
+        except (AttributeError, ValueError):
+            continue
+    return sorted(slots)
+
+
+def next_due_at(times: Iterable[str], after: datetime) -> Optional[datetime]:
+    """First slot strictly after the given moment, today or tomorrow"""
+    slots = parse_times(times)
+    if not slots:
+        return None
+    minute_now = after.hour * 60 + after.minute
+    midnight = datetime.combine(after.date(), datetime.min.time())
+    for slot_minute, _ in slots:
+        if slot_minute > minute_now:
+            return midnight + timedelta(minutes=slot_minute)
+    return midnight + timedelta(days=1, minutes=slots[0][0])
+
+
+def compute_pending_alerts(reminders: Iterable[Dict[str, Any]], taken_today: Iterable[str],
+                           now: datetime) -> List[Dict[str, Any]]:
+    """Slots that have passed today for medicines not yet marked taken today"""
+    taken = set(taken_today)
+    current_time = now.strftime('%H:%M')
+    alerts = []
+    for reminder in reminders:
+        if reminder['medicine_name'] in taken:
+            continue
+        for time_slot in reminder['times']:
+            if time_slot <= current_time:
+                alerts.append({
+                    'medicine_name': reminder['medicine_name'],
+                    'dosage': reminder['dosage'],
+                    'time': time_slot,
+                    'instructions': reminder['instructions']
+                })
+    return alerts
+
+
+def expected_doses(start_date: Optional[date], duration_days: Optional[int], since: date, until: date) -> int:
+    """Reminder-days inside [since, until]; adherence is tracked once per medicine per day"""
+    first = max(start_date or since, since)
+    last = until
+    if start_date and duration_days:
+        last = min(last, start_date + timedelta(days=duration_days - 1))
+    return max((last - first).days + 1, 0)
+
+
+def memory_reminder_rows(profiles: Iterable[Any]) -> Iterator[Tuple[str, List[Dict[str, Any]], Dict[str, Dict[str, Any]]]]:
+    """(user_id, reminders, adherence by day) for every profile that has reminders or adherence"""
+    for profile in profiles:
+        user_data = getattr(profile, 'user_data', None) or {}
+        reminders = user_data.get('medicine_reminders') or []
+        adherence = user_data.get('medicine_adherence') or {}
+        if reminders or adherence:
+            yield profile.user_id, reminders, adherence
+
+
+def _parse_date(value: Any) -> Optional[date]:
+    if isinstance(value, date):
+        return value
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        return None
+
+
+def _parse_datetime(value: Any) -> Optional[datetime]:
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class ReminderRepository:
+    """Reads and writes medicine_reminders / adherence_events; every method needs an app context"""
+
+    def add(self, user_id: str, medicine_data: Dict[str, Any], source: str = 'manual',
+            doctor_name: str = None, auto_generated: bool = False, now: datetime = None):
+        from enhanced_database_models import db, MedicineReminder
+
+        now = now or datetime.now()
+        reminder = MedicineReminder(
+            user_id=user_id,
+            medicine_name=medicine_data['name'],
+            dosage=medicine_data.get('dosage') or '',
+            frequency=medicine_data.get('frequency') or '',
+            duration_days=medicine_data.get('duration_days', 30),
+            start_date=_parse_date(medicine_data.get('start_date')) or now.date(),
+            instructions=medicine_data.get('instructions') or '',
+            source=source,
+            doctor_name=doctor_name,
+            auto_generated=auto_generated,
+            active=True
+        )
+        reminder.set_times(medicine_data.get('times', []))
+        reminder.next_due_at = next_due_at(reminder.get_times(), now)
+        db.session.add(reminder)
+        db.session.commit()
+        return reminder
+
+    def upsert_prescription(self, user_id: str, medications: List[Dict[str, Any]], doctor_name: str,
+                            infer_timing: Callable[[str], List[str]]) -> int:
+        """Create reminders for new medicines and refresh existing ones; returns reminders created"""
+        from enhanced_database_models import db, MedicineReminder
+
+        existing = {row.medicine_name.lower(): row
+                    for row in MedicineReminder.query.filter_by(user_id=user_id).all()}
+        now = datetime.now()
+        created = 0
+        for medication in medications:
+            row = existing.get(medication['name'].lower())
+            if row:
+                row.dosage = medication.get('dosage', row.dosage)
+                row.instructions = medication.get('instructions', row.instructions)
+                row.source = 'prescription'
+                row.doctor_name = doctor_name
+                continue
+            row = MedicineReminder(
+                user_id=user_id,
+                medicine_name=medication['name'],
+                dosage=medication.get('dosage', ''),
+                frequency=medication.get('frequency', 'As prescribed'),
+                duration_days=medication.get('duration_days', 30),
+                start_date=now.date(),
+                instructions=medication.get('instructions', ''),
+                source='prescription',
+                doctor_name=doctor_name,
+                auto_generated=True,
+                active=True
+            )
+            row.set_times(infer_timing(medication.get('dosage', '')))
+            row.next_due_at = next_due_at(row.get_times(), now)
+            db.session.add(row)
+            existing[row.medicine_name.lower()] = row
+            created += 1
+        db.session.commit()
+        return created
+
+    def list_active(self, user_id: str) -> List[Dict[str, Any]]:
+        from enhanced_database_models import MedicineReminder
+
+        rows = (MedicineReminder.query
+                .filter_by(user_id=user_id, active=True)
+                .order_by(MedicineReminder.id)
+                .all())
+        return [row.to_dict() for row in rows]
+
+    def count(self, user_id: str) -> int:
+        from enhanced_database_models import MedicineReminder
+
+        return MedicineReminder.query.filter_by(user_id=user_id).count()
+
+    def set_active(self, user_id: str, medicine_name: str, active: bool) -> bool:
+        from enhanced_database_models import db, MedicineReminder
+
+        rows = (MedicineReminder.query
+                .filter(MedicineReminder.user_id == user_id,
+                        db.func.lower(MedicineReminder.medicine_name) == medicine_name.lower())
+                .all())
+        now = datetime.now()
+        for row in rows:
+            row.active = active
+            row.next_due_at = next_due_at(row.get_times(), now) if active else None
+        db.session.commit()
+        return bool(rows)
+
+    def record_adherence(self, user_id: str, medicine_name: str, taken_time: str, day: date = None) -> None:
+        """Mark a medicine taken for the day, matching its reminder case-insensitively like set_active"""
+        from enhanced_database_models import db, AdherenceEvent, MedicineReminder
+
+        day = day or datetime.now().date()
+        reminder = (MedicineReminder.query
+                    .filter(MedicineReminder.user_id == user_id,
+                            db.func.lower(MedicineReminder.medicine_name) == medicine_name.lower())
+                    .order_by(MedicineReminder.active.desc(), MedicineReminder.id)
+                    .first())
+        # Events carry the reminder's spelling so taken-today checks match the reminder rows
+        medicine_name = reminder.medicine_name if reminder else medicine_name
+        event = (AdherenceEvent.query
+                 .filter(AdherenceEvent.user_id == user_id, AdherenceEvent.date == day,
+                         db.func.lower(AdherenceEvent.medicine_name) == medicine_name.lower())
+                 .order_by((AdherenceEvent.medicine_name == medicine_name).desc())
+                 .first())
+        if event is None:
+            event = AdherenceEvent(user_id=user_id, medicine_name=medicine_name, date=day)
+            db.session.add(event)
+        if reminder is not None:
+            event.medicine_name = reminder.medicine_name
+            event.reminder_id = reminder.id
+        event.taken_time = taken_time
+        event.status = 'taken'
+        db.session.commit()
+
+    def export_user(self, user_id: str) -> Dict[str, List[Dict[str, Any]]]:
+        """Every reminder (active or paused) and adherence event of a user, for privacy exports"""
+        from enhanced_database_models import AdherenceEvent, MedicineReminder
+
+        reminders = MedicineReminder.query.filter_by(user_id=user_id).order_by(MedicineReminder.id).all()
+        events = (AdherenceEvent.query
+                  .filter_by(user_id=user_id)
+                  .order_by(AdherenceEvent.date, AdherenceEvent.id)
+                  .all())
+        return {
+            'medicine_reminders': [row.to_dict() for row in reminders],
+            'adherence_events': [{'medicine_name': event.medicine_name, 'date': event.date.isoformat(),
+                                  'taken_time': event.taken_time, 'status': event.status}
+                                 for event in events]
+        }
+
+    def delete_user(self, user_id: str) -> int:
+        """Delete a user's reminders and adherence events, so the poller stops firing for them; returns rows deleted"""
+        from enhanced_database_models import db, AdherenceEvent, MedicineReminder
+
+        deleted = AdherenceEvent.query.filter_by(user_id=user_id).delete(synchronize_session=False)
+        deleted += MedicineReminder.query.filter_by(user_id=user_id).delete(synchronize_session=False)
+        db.session.commit()
+        return deleted
+
+    def pending_alerts(self, user_id: str, now: datetime = None) -> List[Dict[str, Any]]:
+        """Today's passed, untaken slots: two indexed queries instead of a profile walk"""
+        from enhanced_database_models import AdherenceEvent
+
+        now = now or datetime.now()
+        taken = (AdherenceEvent.query
+                 .with_entities(AdherenceEvent.medicine_name)
+                 .filter_by(user_id=user_id, date=now.date(), status='taken')
+                 .all())
+        return compute_pending_alerts(self.list_active(user_id), (name for (name,) in taken), now)
+
+    def due_within(self, minutes: float, now: datetime = None, limit: int = 1000) -> List[Any]:
+        """Active reminders whose next slot falls before now + minutes, earliest first"""
+        from enhanced_database_models import MedicineReminder
+
+        horizon = (now or datetime.now()) + timedelta(minutes=minutes)
+        return (MedicineReminder.query
+                .filter(MedicineReminder.next_due_at <= horizon, MedicineReminder.active.is_(True))
+                .order_by(MedicineReminder.next_due_at)
+                .limit(limit)
+                .all())
+
+    def fire_due(self, feed: LocalNotificationFeed, now: datetime = None, limit: int = 5000,
+                 publish_grace_seconds: float = 900.0) -> int:
+        """
+        Publish every due slot (unless taken today) and advance next_due_at; returns slots fired.
+        Each row is claimed with a compare-and-set on next_due_at, so several app processes can
+        poll the same table without publishing a slot twice.
+        """
+        from enhanced_database_models import db, AdherenceEvent, MedicineReminder
+
+        now = now or datetime.now()
+        rows = self.due_within(0, now=now, limit=limit)
+        if not rows:
+            return 0
+
+        days = {row.next_due_at.date() for row in rows}
+        taken = {tuple(event) for event in AdherenceEvent.query
+                 .with_entities(AdherenceEvent.user_id, AdherenceEvent.medicine_name, AdherenceEvent.date)
+                 .filter(AdherenceEvent.user_id.in_({row.user_id for row in rows}),
+                         AdherenceEvent.date.in_(days), AdherenceEvent.status == 'taken')
+                 .all()}
+        events = []
+        fired = 0
+        for row in rows:
+            due = row.next_due_at
+            claimed = (MedicineReminder.query
+                       .filter_by(id=row.id, next_due_at=due)
+                       .update({'next_due_at': next_due_at(row.get_times(), max(due, now))},
+                               synchronize_session=False))
+            if not claimed:
+                continue
+            fired += 1
+            if (row.user_id, row.medicine_name, due.date()) not in taken and \
+                    (now - due).total_seconds() <= publish_grace_seconds:
+                events.append({
+                    'user_id': row.user_id,
+                    'due_at': due.isoformat(),
+                    'medicine_name': row.medicine_name,
+                    'dosage': row.dosage,
+                    'time': due.strftime('%H:%M'),
+                    'instructions': row.instructions
+                })
+        db.session.commit()
+        for event in events:
+            feed.publish(event)
+        return fired
+
+    def adherence_rates(self, user_ids: Iterable[str] = None, days: int = 7,
+                        now: datetime = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Taken medicine-days over expected reminder-days per user for the last `days` days.
+        Only events for a medicine with an active reminder count as taken.
+        """
+        from enhanced_database_models import db, AdherenceEvent, MedicineReminder
+
+        until = (now or datetime.now()).date()
+        since = until - timedelta(days=days - 1)
+
+        reminders = MedicineReminder.query.with_entities(
+            MedicineReminder.user_id, MedicineReminder.start_date, MedicineReminder.duration_days
+        ).filter(MedicineReminder.active.is_(True))
+        taken = (AdherenceEvent.query
+                 .with_entities(AdherenceEvent.user_id, db.func.count(db.distinct(AdherenceEvent.id)))
+                 .join(MedicineReminder, db.and_(
+                     MedicineReminder.user_id == AdherenceEvent.user_id,
+                     db.func.lower(MedicineReminder.medicine_name) == db.func.lower(AdherenceEvent.medicine_name),
+                     MedicineReminder.active.is_(True)))
+                 .filter(AdherenceEvent.date >= since, AdherenceEvent.date <= until,
+                         AdherenceEvent.status == 'taken'))
+        if user_ids is not None:
+            user_ids = list(user_ids)
+            reminders = reminders.filter(MedicineReminder.user_id.in_(user_ids))
+            taken = taken.filter(AdherenceEvent.user_id.in_(user_ids))
+
+        rates: Dict[str, Dict[str, Any]] = {}
+        for user_id, start_date, duration_days in reminders.all():
+            entry = rates.setdefault(user_id, {'taken': 0, 'expected': 0})
+            entry['expected'] += expected_doses(start_date, duration_days, since, until)
+        for user_id, count in taken.group_by(AdherenceEvent.user_id).all():
+            rates.setdefault(user_id, {'taken': 0, 'expected': 0})['taken'] = count
+        for entry in rates.values():
+            entry['rate'] = round(min(entry['taken'] / entry['expected'], 1.0), 3) if entry['expected'] else None
+        return rates
+
+
+def import_memory_reminders(profiles: Iterable[Any], batch_size: int = 1000) -> Dict[str, int]:
+    """
+    Copy reminders and adherence kept in conversation memory profiles into the tables.
+    Idempotent: reminders already imported (same user, medicine and created_at) and
+    adherence days already recorded are skipped. Needs an app context.
+    """
+    from enhanced_database_models import db, MedicineReminder, AdherenceEvent
+
+    stats = {'users': 0, 'reminders': 0, 'adherence_events': 0, 'skipped': 0}
+    now = datetime.now()
+    pending = 0
+    for user_id, reminders, adherence in memory_reminder_rows(profiles):
+        stats['users'] += 1
+        existing = {(row.medicine_name, row.created_at) for row in
+                    MedicineReminder.query.with_entities(MedicineReminder.medicine_name, MedicineReminder.created_at)
+                    .filter_by(user_id=user_id).all()}
+        for reminder in reminders:
+            created_at = _parse_datetime(reminder.get('created_at')) or now
+            if (reminder['medicine_name'], created_at) in existing:
+                stats['skipped'] += 1
+                continue
+            row = MedicineReminder(
+                user_id=user_id,
+                medicine_name=reminder['medicine_name'],
+                dosage=reminder.get('dosage') or '',
+                frequency=reminder.get('frequency') or '',
+                duration_days=reminder.get('duration_days', 30),
+                start_date=_parse_date(reminder.get('start_date')),
+                instructions=reminder.get('instructions') or '',
+                source=reminder.get('source', 'memory_import'),
+                doctor_name=reminder.get('doctor_name'),
+                auto_generated=bool(reminder.get('auto_generated')),
+                active=bool(reminder.get('reminder_enabled', True)),
+                created_at=created_at
+            )
+            row.set_times(reminder.get('times', []))
+            row.next_due_at = next_due_at(row.get_times(), now) if row.active else None
+            db.session.add(row)
+            stats['reminders'] += 1
+            pending += 1
+
+        recorded = {(name, day) for name, day in
+                    AdherenceEvent.query.with_entities(AdherenceEvent.medicine_name, AdherenceEvent.date)
+                    .filter_by(user_id=user_id).all()}
+        for day_text, medicines in adherence.items():
+            day = _parse_date(day_text)
+            if day is None:
+                continue
+            for medicine_name, record in medicines.items():
+                if (medicine_name, day) in recorded:
+                    stats['skipped'] += 1
+                    continue
+                db.session.add(AdherenceEvent(user_id=user_id, medicine_name=medicine_name, date=day,
+                                              taken_time=record.get('taken_time'),
+                                              status=record.get('status', 'taken')))
+                stats['adherence_events'] += 1
+                pending += 1
+
+        if pending >= batch_size:
+            db.session.commit()
+            pending = 0
+    db.session.commit()
+    logger.info(f"Imported memory reminders: {stats}")
+    return stats
+
+
+class ReminderTablePoller:
+    """Background ticker firing due medicine_reminders rows into a notification feed"""
+
+    def __init__(self, app, repository: ReminderRepository, feed: LocalNotificationFeed = None,
+                 tick_seconds: float = 5.0, batch_size: int = 5000):
+        self.app = app
+        self.repository = repository
+        self.feed = feed if feed is not None else LocalNotificationFeed()
+        self.tick_seconds = tick_seconds
+        self.batch_size = batch_size
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.stats = {'ticks': 0, 'fired': 0, 'errors': 0, 'last_tick_ms': 0.0}
+
+    def poll(self) -> int:
+        start = time.perf_counter()
+        fired = 0
+        with self.app.app_context():
+            try:
+                # Keep going while full batches come back so a backlog drains within one tick
+                while True:
+                    count = self.repository.fire_due(self.feed, limit=self.batch_size)
+                    fired += count
+                    if count < self.batch_size:
+                        break
+            except Exception as e:
+                from enhanced_database_models import db
+                db.session.rollback()
+                self.stats['errors'] += 1
+                logger.error(f"Reminder poll failed: {e}")
+        self.stats['ticks'] += 1
+        self.stats['fired'] += fired
+        self.stats['last_tick_ms'] = round((time.perf_counter() - start) * 1000, 2)
+        return fired
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='reminder-table-poller', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.tick_seconds):
+            self.poll()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self.stats, 'feed_published': self.feed.published}
+
+
+# Global instance
+reminder_repository = ReminderRepository()
@@ -0,0 +1,352 @@
+"""
+Sehat Sahara Memory Journal
+Append-only mutation journal for conversation memory: per-user records are buffered and
+fsynced in batches by a background flusher, compacted into a snapshot once enough records
+or bytes have accumulated, and replayed on top of that snapshot at startup.
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Any, Callable, List, Optional
+
+from performance_metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+OP_UPSERT = 'upsert'
+OP_DELETE = 'delete'
+
+# Compact once the journal outgrows this multiple of the snapshot (and at least the minimum size):
+# every record is a whole profile, so record counts alone let busy users grow it to gigabytes
+DEFAULT_COMPACT_BYTES_RATIO = 2.0
+DEFAULT_COMPACT_MIN_BYTES = 16 * 1024 * 1024
+
+APPEND_US_BUCKETS = [5, 10, 25, 50, 100, 250, 500, 1000, 5000]
+FSYNC_MS_BUCKETS = [0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 1000]
+
+
+class MemoryJournal:
+    """
+    Group-commit journal next to a JSON snapshot.
+
+    Every record carries a monotonically increasing sequence number; the snapshot stores the
+    last sequence it covers so records already folded into it are skipped on replay, even if
+    the process died between writing the snapshot and truncating the journal.
+    """
+
+    def __init__(self, snapshot_path: str, journal_path: str = None,
+                 snapshot_fn: Callable[[], Dict[str, Any]] = None,
+                 flush_interval: float = 0.05, compact_every: int = 50000,
+                 sync_appends: bool = False,
+                 snapshot_loader: Callable[[], Optional[int]] = None,
+                 snapshot_writer: Callable[[int], int] = None, read_only: bool = False,
+                 compact_bytes_ratio: float = DEFAULT_COMPACT_BYTES_RATIO,
+                 compact_min_bytes: int = DEFAULT_COMPACT_MIN_BYTES):
+        self.snapshot_path = snapshot_path
+        self.journal_path = journal_path or snapshot_path + '.journal'
+        self.snapshot_fn = snapshot_fn
+        self.flush_interval = flush_interval
+        self.compact_every = compact_every
+        self.compact_bytes_ratio = compact_bytes_ratio
+        self.compact_min_bytes = compact_min_bytes
+        self.sync_appends = sync_appends
+        # Custom snapshot format (e.g. sharded binary): loader applies it and returns the journal
+        # sequence it covers (None if there is none), writer saves one covering a sequence and
+        # returns the number of users written. Without them the snapshot is one JSON file.
+        self.snapshot_loader = snapshot_loader
+        self.snapshot_writer = snapshot_writer
+        # Readers beside a live process (e.g. migrate_reminders.py) load without touching the files
+        self.read_only = read_only
+
+        self._buffer: List[str] = []
+        self._cond = threading.Condition()
+        self._io_lock = threading.Lock()  # journal file writes and compaction
+        self._file = None
+        self._thread: Optional[threading.Thread] = None
+        self._running = False
+
+        self._seq = 0
+        self._durable_seq = 0
+        self._snapshot_seq = 0
+        self._records_since_compact = 0
+        self._journal_bytes = 0
+        self._snapshot_bytes = 0
+
+        self.append_us = Histogram(buckets=APPEND_US_BUCKETS)
+        self.fsync_ms = Histogram(buckets=FSYNC_MS_BUCKETS)
+        self.stats = {
+            'appended': 0,
+            'batches': 0,
+            'bytes_written': 0,
+            'compactions': 0,
+            'replayed': 0,
+            'skipped_on_replay': 0,
+            'torn_records': 0,
+            'write_errors': 0
+        }
+        self.last_compaction: Dict[str, Any] = {}
+
+    # ---- startup ----
+
+    def load(self, apply_snapshot: Callable[[Dict[str, Any]], None],
+             apply_record: Callable[[Dict[str, Any]], None]) -> int:
+        """Apply the snapshot then every newer journal record; returns the number of records replayed"""
+        if self.snapshot_loader:
+            try:
+                self._snapshot_seq = self.snapshot_loader() or 0
+            except Exception as e:
+                logger.error(f"Failed to load memory snapshot {self.snapshot_path}: {e}")
+        elif os.path.exists(self.snapshot_path):
+            try:
+                with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                apply_snapshot(data)
+                self._snapshot_seq = int(data.get('journal_seq', 0))
+            except Exception as e:
+                logger.error(f"Failed to load memory snapshot {self.snapshot_path}: {e}")
+
+        self._seq = self._durable_seq = self._snapshot_seq
+        replayed = 0
+        if os.path.exists(self.journal_path):
+            if not self.read_only:
+                self._truncate_torn_tail()
+            with open(self.journal_path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        self.stats['torn_records'] += 1
+                        continue
+                    seq = int(record.get('seq', 0))
+                    self._seq = max(self._seq, seq)
+                    if seq <= self._snapshot_seq:
+                        self.stats['skipped_on_replay'] += 1
+                        continue
+                    try:
+                        apply_record(record)
+                        replayed += 1
+                    except Exception as e:
+                        logger.error(f"Failed to replay journal record {seq}: {e}")
+            self._durable_seq = self._seq
+            self._journal_bytes = os.path.getsize(self.journal_path)
+        self._records_since_compact = replayed
+        self._snapshot_bytes = self._measure_snapshot()
+        self.stats['replayed'] = replayed
+        logger.info(f"Memory journal replayed {replayed} records on top of snapshot seq {self._snapshot_seq}")
+        return replayed
+
+    def _truncate_torn_tail(self) -> None:
+        """Drop a partially written last line so new appends start on a clean record boundary"""
+        with open(self.journal_path, 'rb+') as f:
+            f.seek(0, os.SEEK_END)
+            size = f.tell()
+            if size == 0:
+                return
+            f.seek(size - 1)
+            if f.read(1) == b'\n':
+                return
+            chunk = 64 * 1024
+            position = size
+            while position > 0:
+                start = max(0, position - chunk)
+                f.seek(start)
+                newline = f.read(position - start).rfind(b'\n')
+                if newline >= 0:
+                    f.truncate(start + newline + 1)
+                    break
+                position = start
+            else:
+                f.truncate(0)
+            self.stats['torn_records'] += 1
+
+    def start(self) -> None:
+        """Open the journal for appending and start the background flusher"""
+        if self._running:
+            return
+        if self.read_only:
+            logger.error(f"Memory journal {self.journal_path} was opened read-only; not starting")
+            return
+        directory = os.path.dirname(os.path.abspath(self.journal_path))
+        os.makedirs(directory, exist_ok=True)
+        self._file = open(self.journal_path, 'a', encoding='utf-8')
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name='memory-journal', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Flush outstanding records and stop the flusher"""
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join(timeout=5)
+        self._flush_once()
+        with self._io_lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+
+    # ---- writes ----
+
+    def append(self, op: str, user_id: str, data: Dict[str, Any] = None, wait: bool = None) -> int:
+        """
+        Buffer one mutation record and return its sequence number. With wait (or sync_appends)
+        the call blocks until the batch containing it has been fsynced.
+        """
+        start = time.perf_counter()
+        with self._cond:
+            self._seq += 1
+            seq = self._seq
+            record = {'seq': seq, 'ts': datetime.now().isoformat(), 'op': op, 'user_id': user_id}
+            if data is not None:
+                record['data'] = data
+            self._buffer.append(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n')
+            self.stats['appended'] += 1
+        self.append_us.observe((time.perf_counter() - start) * 1e6)
+
+        if wait if wait is not None else self.sync_appends:
+            self.wait_durable(seq)
+        return seq
+
+    def wait_durable(self, seq: int, timeout: float = 5.0) -> bool:
+        """Block until the record with this sequence number has been fsynced"""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            self._cond.notify_all()
+            while self._durable_seq < seq:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._running:
+                    break
+                self._cond.wait(remaining)
+            return self._durable_seq >= seq
+
+    def flush(self) -> None:
+        """Write and fsync everything buffered so far"""
+        self._flush_once()
+
+    def _flush_once(self) -> int:
+        with self._io_lock:
+            with self._cond:
+                lines, self._buffer = self._buffer, []
+                upto = self._seq
+            if lines and self._file:
+                start = time.perf_counter()
+                try:
+                    payload = ''.join(lines)
+                    self._file.write(payload)
+                    self._file.flush()
+                    os.fsync(self._file.fileno())
+                    written = len(payload.encode('utf-8'))
+                    self.stats['batches'] += 1
+                    self.stats['bytes_written'] += written
+                    self._journal_bytes += written
+                except Exception as e:
+                    self.stats['write_errors'] += 1
+                    logger.error(f"Memory journal write failed: {e}")
+                    with self._cond:
+                        self._buffer = lines + self._buffer  # retry on the next tick
+                    return 0
+                self.fsync_ms.observe((time.perf_counter() - start) * 1000)
+            with self._cond:
+                self._durable_seq = max(self._durable_seq, upto)
+                self._records_since_compact += len(lines)
+                self._cond.notify_all()
+            return len(lines)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                if not self._running:
+                    break
+                self._cond.wait(self.flush_interval)
+            self._flush_once()
+            if (self.snapshot_fn or self.snapshot_writer) and self.should_compact():
+                self.compact()
+
+    def should_compact(self) -> bool:
+        """Enough records, or enough journal bytes relative to the snapshot, to fold into a new snapshot"""
+        if self.compact_every and self._records_since_compact >= self.compact_every:
+            return True
+        return bool(self.compact_bytes_ratio) and self._journal_bytes >= max(
+            self.compact_min_bytes, self.compact_bytes_ratio * self._snapshot_bytes)
+
+    def _measure_snapshot(self) -> int:
+        """Size on disk of the snapshot file, or of every file in a sharded snapshot directory"""
+        try:
+            if os.path.isdir(self.snapshot_path):
+                return sum(entry.stat().st_size for entry in os.scandir(self.snapshot_path) if entry.is_file())
+            return os.path.getsize(self.snapshot_path) if os.path.exists(self.snapshot_path) else 0
+        except OSError:
+            return 0
+
+    # ---- compaction ----
+
+    def compact(self) -> bool:
+        """Fold the journal into a fresh snapshot and truncate it"""
+        if self.read_only or (not self.snapshot_fn and not self.snapshot_writer):
+            return False
+        start = time.perf_counter()
+        with self._io_lock:
+            # Records appended while the snapshot is built stay buffered and land in the new journal
+            with self._cond:
+                lines, self._buffer = self._buffer, []
+                covered_seq = self._seq
+            try:
+                if lines and self._file:
+                    self._file.write(''.join(lines))
+                    self._file.flush()
+                if self.snapshot_writer:
+                    users = self.snapshot_writer(covered_seq)
+                else:
+                    data = self.snapshot_fn()
+                    data['journal_seq'] = covered_seq
+                    users = len(data.get('user_profiles', {}))
+                    tmp_path = self.snapshot_path + '.tmp'
+                    with open(tmp_path, 'w', encoding='utf-8') as f:
+                        json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+                        f.flush()
+                        os.fsync(f.fileno())
+                    os.replace(tmp_path, self.snapshot_path)
+                if self._file:
+                    self._file.truncate(0)
+                    self._file.seek(0)
+                    os.fsync(self._file.fileno())
+            except Exception as e:
+                logger.error(f"Memory journal compaction failed: {e}")
+                return False
+            with self._cond:
+                self._snapshot_seq = covered_seq
+                self._durable_seq = max(self._durable_seq, covered_seq)
+                self._records_since_compact = 0
+                self._journal_bytes = 0
+                self._cond.notify_all()
+            self._snapshot_bytes = self._measure_snapshot()
+
+        self.stats['compactions'] += 1
+        self.last_compaction = {
+            'at': datetime.now().isoformat(),
+            'journal_seq': covered_seq,
+            'users': users,
+            'duration_ms': round((time.perf_counter() - start) * 1000, 1)
+        }
+        logger.info(f"Memory journal compacted at seq {covered_seq} in {self.last_compaction['duration_ms']}ms")
+        return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._cond:
+            stats = dict(self.stats)
+            stats['seq'] = self._seq
+            stats['durable_seq'] = self._durable_seq
+            stats['snapshot_seq'] = self._snapshot_seq
+            stats['buffered'] = len(self._buffer)
+            stats['records_since_compact'] = self._records_since_compact
+            stats['journal_bytes'] = self._journal_bytes
+            stats['snapshot_bytes'] = self._snapshot_bytes
+        stats['append_us'] = self.append_us.snapshot()
+        stats['fsync_ms'] = self.fsync_ms.snapshot()
+        stats['last_compaction'] = self.last_compaction
+        return stats
@@ -0,0 +1,284 @@
+"""
+Sehat Sahara Memory Snapshot
+Sharded binary snapshot of conversation memory: profiles are spread over a fixed number of
+shard files by a stable hash of the user id, each one a compressed run of length-prefixed
+records. Saves rewrite only the shards holding changed profiles; loads decode shards in parallel.
+"""
+
+import gc
+import json
+import logging
+import os
+import struct
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    import msgpack
+    MSGPACK_AVAILABLE = True
+except ImportError:
+    MSGPACK_AVAILABLE = False
+
+try:
+    import zstandard
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'SSMS'
+FORMAT_VERSION = 1
+CODEC_JSON = 0
+CODEC_MSGPACK = 1
+COMPRESSION_ZLIB = 0
+COMPRESSION_ZSTD = 1
+HEADER = struct.Struct('>4sBBB')  # magic, version, codec, compression
+KEY_LENGTH = struct.Struct('>H')
+LENGTH = struct.Struct('>I')
+
+MANIFEST_FILE = 'manifest.json'
+META_FILE = 'meta.bin'
+DEFAULT_SHARDS = 64
+
+
+def shard_of(user_id: str, shards: int) -> int:
+    """Stable across processes and restarts, unlike hash()"""
+    return zlib.crc32(user_id.encode('utf-8')) % shards
+
+
+def default_codec() -> int:
+    return CODEC_MSGPACK if MSGPACK_AVAILABLE else CODEC_JSON
+
+
+def default_compression() -> int:
+    return COMPRESSION_ZSTD if ZSTD_AVAILABLE else COMPRESSION_ZLIB
+
+
+def pack_record(record: Dict[str, Any], codec: int = None) -> bytes:
+    codec = default_codec() if codec is None else codec
+    if codec == CODEC_MSGPACK:
+        return msgpack.packb(record, use_bin_type=True)
+    return json.dumps(record, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def unpack_record(payload: bytes, codec: int) -> Dict[str, Any]:
+    if codec == CODEC_MSGPACK:
+        return msgpack.unpackb(payload, raw=False)
+    return json.loads(payload)
+
+
+def encode_shard(frames: Iterable[Tuple[str, bytes]], codec: int = None, compression: int = None) -> bytes:
+    """Header followed by compressed (key, payload) frames; payloads must already be packed with codec"""
+    codec = default_codec() if codec is None else codec
+    compression = default_compression() if compression is None else compression
+    parts = []
+    for key, payload in frames:
+        key_bytes = key.encode('utf-8')
+        parts.append(KEY_LENGTH.pack(len(key_bytes)))
+        parts.append(key_bytes)
+        parts.append(LENGTH.pack(len(payload)))
+        parts.append(payload)
+    body = b''.join(parts)
+    if compression == COMPRESSION_ZSTD:
+        body = zstandard.ZstdCompressor(level=3).compress(body)
+    else:
+        body = zlib.compress(body, 1)
+    return HEADER.pack(MAGIC, FORMAT_VERSION, codec, compression) + body
+
+
+def read_frames(data: bytes) -> Tuple[int, List[Tuple[str, bytes]]]:
+    """(codec, [(key, packed payload)]) of one shard file without decoding the payloads"""
+    magic, version, codec, compression = HEADER.unpack_from(data)
+    if magic != MAGIC or version != FORMAT_VERSION:
+        raise ValueError(f"Not a memory snapshot shard (magic={magic!r} version={version})")
+    if codec == CODEC_MSGPACK and not MSGPACK_AVAILABLE:
+        raise ValueError("Shard was written with msgpack, which is not installed")
+    if compression == COMPRESSION_ZSTD and not ZSTD_AVAILABLE:
+        raise ValueError("Shard was written with zstandard, which is not installed")
+    body = data[HEADER.size:]
+    body = zstandard.ZstdDecompressor().decompress(body) if compression == COMPRESSION_ZSTD else zlib.decompress(body)
+    frames = []
+    offset = 0
+    while offset < len(body):
+        (key_length,) = KEY_LENGTH.unpack_from(body, offset)
+        offset += KEY_LENGTH.size
+        key = body[offset:offset + key_length].decode('utf-8')
+        offset += key_length
+        (length,) = LENGTH.unpack_from(body, offset)
+        offset += LENGTH.size
+        frames.append((key, body[offset:offset + length]))
+        offset += length
+    return codec, frames
+
+
+def decode_shard(data: bytes) -> Iterator[Dict[str, Any]]:
+    """Records of one shard file, in the order they were written"""
+    codec, frames = read_frames(data)
+    if codec == CODEC_JSON and frames:
+        # One parse per shard instead of one per record
+        yield from json.loads(b'[' + b','.join(payload for _, payload in frames) + b']')
+        return
+    for _, payload in frames:
+        yield unpack_record(payload, codec)
+
+
+@contextmanager
+def paused_gc():
+    """
+    Suspend the cyclic collector around bulk encode/decode: building 100k profiles otherwise
+    triggers repeated full collections over objects that are all still live
+    """
+    was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if was_enabled:
+            gc.enable()
+
+
+class ShardedSnapshot:
+    """
+    Directory of shard files plus a manifest. Every record is framed with its key, so a shard
+    can be updated by splicing: unchanged records are copied as packed bytes and only changed
+    ones are encoded. Shards and the manifest are each replaced atomically; the manifest is
+    written last and records the journal sequence covered.
+    """
+
+    def __init__(self, directory: str, shards: int = DEFAULT_SHARDS, workers: int = 4):
+        self.directory = directory
+        self.shards = shards
+        self.workers = workers
+
+    def shard_path(self, index: int) -> str:
+        return os.path.join(self.directory, f'profiles-{index:04d}.bin')
+
+    def shard_of(self, user_id: str) -> int:
+        return shard_of(user_id, self.shards)
+
+    def _write_atomic(self, path: str, data: bytes) -> None:
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    # ---- manifest ----
+
+    def read_manifest(self) -> Optional[Dict[str, Any]]:
+        try:
+            with open(os.path.join(self.directory, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.error(f"Unreadable memory snapshot manifest in {self.directory}: {e}")
+            return None
+
+    def is_complete(self) -> bool:
+        """A manifest exists and was written with the current shard count"""
+        manifest = self.read_manifest()
+        return bool(manifest) and manifest.get('shards') == self.shards
+
+    # ---- writes ----
+
+    def _read_frames(self, index: int) -> Tuple[int, List[Tuple[str, bytes]]]:
+        try:
+            with open(self.shard_path(index), 'rb') as f:
+                return read_frames(f.read())
+        except FileNotFoundError:
+            return default_codec(), []
+
+    def _merge_shard(self, index: int, updates: Dict[str, Optional[Dict[str, Any]]],
+                     replace: bool) -> List[Tuple[str, bytes]]:
+        """Existing frames minus updated keys, plus the updated records (None deletes the key)"""
+        codec = default_codec()
+        frames = []
+        if not replace:
+            old_codec, old_frames = self._read_frames(index)
+            for key, payload in old_frames:
+                if key in updates:
+                    continue
+                if old_codec != codec:  # written before msgpack was installed, or the reverse
+                    payload = pack_record(unpack_record(payload, old_codec), codec)
+                frames.append((key, payload))
+        for key, record in updates.items():
+            if record is not None:
+                frames.append((key, pack_record(record, codec)))
+        return frames
+
+    def write(self, shard_updates: Dict[int, Dict[str, Optional[Dict[str, Any]]]], meta: Dict[str, Any],
+              journal_seq: int = 0, replace: bool = False) -> Dict[str, Any]:
+        """
+        Apply {shard: {key: record or None}} and rewrite just those shards (all of them, from
+        the updates alone, if replace), then meta and the manifest
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        manifest = self.read_manifest() if self.is_complete() and not replace else None
+        shard_info = {int(k): v for k, v in (manifest or {}).get('shard_info', {}).items()}
+        if replace:
+            shard_updates = {index: shard_updates.get(index, {}) for index in range(self.shards)}
+            for name in os.listdir(self.directory):  # left over from a layout with more shards
+                if name.startswith('profiles-') and name.endswith('.bin') and int(name[9:13]) >= self.shards:
+                    os.remove(os.path.join(self.directory, name))
+
+        bytes_written = 0
+        for index, updates in shard_updates.items():
+            frames = self._merge_shard(index, updates, replace)
+            data = encode_shard(frames)
+            self._write_atomic(self.shard_path(index), data)
+            shard_info[index] = {'records': len(frames), 'bytes': len(data)}
+            bytes_written += len(data)
+        meta_data = encode_shard([('meta', pack_record(meta))])
+        self._write_atomic(os.path.join(self.directory, META_FILE), meta_data)
+        bytes_written += len(meta_data)
+
+        manifest = {
+            'format_version': FORMAT_VERSION,
+            'shards': self.shards,
+            'journal_seq': journal_seq,
+            'written_at': datetime.now().isoformat(),
+            'profiles': sum(info['records'] for info in shard_info.values()),
+            'shard_info': {str(k): v for k, v in sorted(shard_info.items())}
+        }
+        self._write_atomic(os.path.join(self.directory, MANIFEST_FILE),
+                           json.dumps(manifest, separators=(',', ':')).encode('utf-8'))
+        return {'shards_written': len(shard_updates), 'bytes_written': bytes_written,
+                'profiles': manifest['profiles']}
+
+    # ---- reads ----
+
+    def read_shard(self, index: int) -> List[Dict[str, Any]]:
+        try:
+            with open(self.shard_path(index), 'rb') as f:
+                return list(decode_shard(f.read()))
+        except FileNotFoundError:
+            return []
+
+    def read_meta(self) -> Dict[str, Any]:
+        try:
+            with open(os.path.join(self.directory, META_FILE), 'rb') as f:
+                return next(decode_shard(f.read()), {})
+        except FileNotFoundError:
+            return {}
+
+    def iter_shards(self, indices: Iterable[int] = None) -> Iterator[Tuple[int, List[Dict[str, Any]]]]:
+        """(index, records) per shard; file reads and decompression overlap across worker threads"""
+        indices = list(range(self.shards) if indices is None else indices)
+        if self.workers <= 1:
+            for index in indices:
+                yield index, self.read_shard(index)
+            return
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='snapshot-load') as pool:
+            yield from zip(indices, pool.map(self.read_shard, indices))
+
+    def size_bytes(self) -> int:
+        if not os.path.isdir(self.directory):
+            return 0
+        return sum(os.path.getsize(os.path.join(self.directory, name)) for name in os.listdir(self.directory)
+                   if not name.endswith('.tmp'))
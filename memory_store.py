@@ -0,0 +1,659 @@
+"""
+Sehat Sahara Memory Store
+Shared storage for conversation memory records (profiles, sessions, tasks) so every
+gunicorn worker sees the same state, a per-worker read-through cache that uses record
+version stamps to detect writes made by other workers (and compare-and-set writes so it
+never overwrites them), and a budgeted map that spills cold records to a store.
+"""
+
+import fnmatch
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from datetime import datetime
+from typing import Dict, Any, Callable, Iterator, List, Optional, Tuple
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+from performance_metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+NAMESPACE_PROFILES = 'profile'
+NAMESPACE_SESSIONS = 'session'
+NAMESPACE_TASKS = 'task'
+
+REHYDRATE_MS_BUCKETS = [0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 100]
+
+# Compare-and-set attempts per save before giving up on a record other workers keep changing
+MAX_WRITE_ATTEMPTS = 5
+
+
+class MemoryStore:
+    """Interface for versioned key/value records grouped by namespace"""
+
+    def get(self, namespace: str, key: str) -> Optional[Tuple[Dict[str, Any], int]]:
+        """(value, version) or None"""
+        raise NotImplementedError
+
+    def get_version(self, namespace: str, key: str) -> Optional[int]:
+        """Current version without fetching the value; None when absent"""
+        raise NotImplementedError
+
+    def put(self, namespace: str, key: str, value: Dict[str, Any],
+            expected_version: int = None) -> Optional[Tuple[int, int]]:
+        """
+        Write a value and bump its version; returns (previous_version, new_version). With
+        expected_version (0 = must not exist yet) the write only lands if the record is still
+        at that version and None is returned otherwise.
+        """
+        raise NotImplementedError
+
+    def delete(self, namespace: str, key: str) -> bool:
+        raise NotImplementedError
+
+    def keys(self, namespace: str) -> List[str]:
+        raise NotImplementedError
+
+    def count(self, namespace: str) -> int:
+        return len(self.keys(namespace))
+
+    def close(self) -> None:
+        pass
+
+
+def _dumps(value: Dict[str, Any]) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':'), default=str)
+
+
+class SQLiteMemoryStore(MemoryStore):
+    """SQLite (WAL) store shared by all workers on one host; one connection per thread"""
+
+    def __init__(self, path: str, busy_timeout_ms: int = 5000):
+        self.path = path
+        self.busy_timeout_ms = busy_timeout_ms
+        self._local = threading.local()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        conn = self._conn()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS memory_records ("
+            " namespace TEXT NOT NULL, key TEXT NOT NULL, version INTEGER NOT NULL,"
+            " data TEXT NOT NULL, updated_at REAL NOT NULL, PRIMARY KEY (namespace, key))"
+        )
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=self.busy_timeout_ms / 1000, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, namespace: str, key: str) -> Optional[Tuple[Dict[str, Any], int]]:
+        row = self._conn().execute(
+            "SELECT data, version FROM memory_records WHERE namespace = ? AND key = ?", (namespace, key)
+        ).fetchone()
+        return (json.loads(row[0]), row[1]) if row else None
+
+    def get_version(self, namespace: str, key: str) -> Optional[int]:
+        row = self._conn().execute(
+            "SELECT version FROM memory_records WHERE namespace = ? AND key = ?", (namespace, key)
+        ).fetchone()
+        return row[0] if row else None
+
+    def put(self, namespace: str, key: str, value: Dict[str, Any],
+            expected_version: int = None) -> Optional[Tuple[int, int]]:
+        conn = self._conn()
+        data = _dumps(value)
+        if expected_version is not None:
+            # Single statements are atomic in autocommit mode; no row changed means a conflict
+            if expected_version == 0:
+                cursor = conn.execute(
+                    "INSERT INTO memory_records (namespace, key, version, data, updated_at) VALUES (?, ?, 1, ?, ?) "
+                    "ON CONFLICT(namespace, key) DO NOTHING",
+                    (namespace, key, data, time.time())
+                )
+            else:
+                cursor = conn.execute(
+                    "UPDATE memory_records SET version = version + 1, data = ?, updated_at = ? "
+                    "WHERE namespace = ? AND key = ? AND version = ?",
+                    (data, time.time(), namespace, key, expected_version)
+                )
+            if cursor.rowcount == 0:
+                return None
+            return expected_version, expected_version + 1
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT version FROM memory_records WHERE namespace = ? AND key = ?", (namespace, key)
+            ).fetchone()
+            previous = row[0] if row else 0
+            conn.execute(
+                "INSERT INTO memory_records (namespace, key, version, data, updated_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(namespace, key) DO UPDATE SET version = excluded.version, "
+                "data = excluded.data, updated_at = excluded.updated_at",
+                (namespace, key, previous + 1, data, time.time())
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return previous, previous + 1
+
+    def delete(self, namespace: str, key: str) -> bool:
+        cursor = self._conn().execute(
+            "DELETE FROM memory_records WHERE namespace = ? AND key = ?", (namespace, key)
+        )
+        return cursor.rowcount > 0
+
+    def keys(self, namespace: str) -> List[str]:
+        rows = self._conn().execute("SELECT key FROM memory_records WHERE namespace = ?", (namespace,))
+        return [row[0] for row in rows]
+
+    def count(self, namespace: str) -> int:
+        return self._conn().execute(
+            "SELECT COUNT(*) FROM memory_records WHERE namespace = ?", (namespace,)
+        ).fetchone()[0]
+
+    def close(self) -> None:
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+class LocalRedisStandIn:
+    """
+    In-process stand-in for the handful of Redis commands RedisMemoryStore uses, so the
+    Redis code path can run in tests and single-process development without a server.
+    """
+
+    def __init__(self):
+        self._data: Dict[str, Dict[str, str]] = {}
+        self._lock = threading.Lock()
+
+    def hmget(self, name: str, *fields: str) -> List[Optional[str]]:
+        with self._lock:
+            record = self._data.get(name, {})
+            return [record.get(field) for field in fields]
+
+    def hget(self, name: str, field: str) -> Optional[str]:
+        return self.hmget(name, field)[0]
+
+    def eval(self, script: str, numkeys: int, *args) -> int:
+        # Only PUT_SCRIPT and CAS_PUT_SCRIPT below are supported: bump version and store data
+        # atomically, the latter only if the version still equals its extra argument (else -1)
+        name, data = args[0], args[1]
+        with self._lock:
+            version = int(self._data.get(name, {}).get('v', 0))
+            if len(args) > 2 and version != int(args[2]):
+                return -1
+            self._data[name] = {'v': str(version + 1), 'd': data}
+            return version + 1
+
+    def delete(self, name: str) -> int:
+        with self._lock:
+            return 1 if self._data.pop(name, None) is not None else 0
+
+    def scan_iter(self, match: str = '*', count: int = 1000) -> Iterator[str]:
+        with self._lock:
+            names = list(self._data)
+        return (name for name in names if fnmatch.fnmatchcase(name, match))
+
+
+class RedisMemoryStore(MemoryStore):
+    """Redis hashes {v: version, d: json}; works with redis-py or LocalRedisStandIn"""
+
+    PUT_SCRIPT = "local v = redis.call('HINCRBY', KEYS[1], 'v', 1) redis.call('HSET', KEYS[1], 'd', ARGV[1]) return v"
+    CAS_PUT_SCRIPT = ("local v = tonumber(redis.call('HGET', KEYS[1], 'v') or '0') "
+                      "if v ~= tonumber(ARGV[2]) then return -1 end "
+                      "redis.call('HSET', KEYS[1], 'v', v + 1, 'd', ARGV[1]) return v + 1")
+
+    def __init__(self, client, prefix: str = 'sehat:memory'):
+        self.client = client
+        self.prefix = prefix
+
+    def _name(self, namespace: str, key: str) -> str:
+        return f"{self.prefix}:{namespace}:{key}"
+
+    def get(self, namespace: str, key: str) -> Optional[Tuple[Dict[str, Any], int]]:
+        version, data = self.client.hmget(self._name(namespace, key), 'v', 'd')
+        if version is None or data is None:
+            return None
+        return json.loads(data), int(version)
+
+    def get_version(self, namespace: str, key: str) -> Optional[int]:
+        version = self.client.hget(self._name(namespace, key), 'v')
+        return int(version) if version is not None else None
+
+    def put(self, namespace: str, key: str, value: Dict[str, Any],
+            expected_version: int = None) -> Optional[Tuple[int, int]]:
+        name = self._name(namespace, key)
+        if expected_version is None:
+            version = int(self.client.eval(self.PUT_SCRIPT, 1, name, _dumps(value)))
+        else:
+            version = int(self.client.eval(self.CAS_PUT_SCRIPT, 1, name, _dumps(value), expected_version))
+            if version < 0:
+                return None
+        return version - 1, version
+
+    def delete(self, namespace: str, key: str) -> bool:
+        return bool(self.client.delete(self._name(namespace, key)))
+
+    def keys(self, namespace: str) -> List[str]:
+        prefix = self._name(namespace, '')
+        return [name[len(prefix):] for name in self.client.scan_iter(match=prefix + '*', count=1000)]
+
+
+def create_memory_store(url: str) -> Optional[MemoryStore]:
+    """sqlite:///path/to/file.db, redis://host:port/db or local:// (in-process Redis stand-in)"""
+    if not url:
+        return None
+    if url.startswith('sqlite:///'):
+        return SQLiteMemoryStore(url[len('sqlite:///'):])
+    if url.startswith(('redis://', 'rediss://')):
+        if not REDIS_AVAILABLE:
+            logger.error("MEMORY_STORE_URL points at Redis but the redis package is not installed")
+            return None
+        return RedisMemoryStore(redis.Redis.from_url(url, decode_responses=True))
+    if url.startswith('local://'):
+        return RedisMemoryStore(LocalRedisStandIn())
+    logger.error(f"Unsupported memory store URL: {url}")
+    return None
+
+
+class SharedRecordMap(MutableMapping):
+    """
+    Dict-like view of one namespace with a bounded local read-through cache.
+
+    Cached objects are handed out by reference so callers can mutate them in place; call
+    save(key) afterwards to write them back. A cached entry older than revalidate_seconds is
+    checked against the store's version stamp (a primary-key lookup) and only refetched when
+    another worker has written it.
+
+    Saves are compare-and-set against the version this worker last saw. With a merge function
+    (see merge_changes) each cached entry also keeps the encoded record it was read or written
+    as, so on a conflict this worker's changes since then are re-applied to the stored record;
+    without one the write is retried over the newer version.
+    """
+
+    def __init__(self, store: MemoryStore, namespace: str,
+                 encode: Callable[[Any], Dict[str, Any]], decode: Callable[[Dict[str, Any]], Any],
+                 max_entries: int = 1000, revalidate_seconds: float = 0.0,
+                 merge: Callable[[Any, Any, Any], Any] = None):
+        self.store = store
+        self.namespace = namespace
+        self.encode = encode
+        self.decode = decode
+        self.max_entries = max_entries
+        self.revalidate_seconds = revalidate_seconds
+        self.merge = merge
+        self._entries: 'OrderedDict[str, list]' = OrderedDict()  # key -> [obj, version, checked_at, base]
+        self._lock = threading.RLock()
+        self.stats = {
+            'fresh_hits': 0,
+            'revalidated_hits': 0,
+            'refetches': 0,
+            'misses': 0,
+            'writes': 0,
+            'write_conflicts': 0,
+            'merged_writes': 0,
+            'failed_writes': 0,
+            'local_evictions': 0
+        }
+
+    def _cache(self, key: str, obj: Any, version: int, base: str = None) -> None:
+        with self._lock:
+            self._entries[key] = [obj, version, time.monotonic(), base]
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats['local_evictions'] += 1
+
+    def __getitem__(self, key: str) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                if time.monotonic() - entry[2] < self.revalidate_seconds:
+                    self.stats['fresh_hits'] += 1
+                    return entry[0]
+
+        if entry is not None:
+            version = self.store.get_version(self.namespace, key)
+            if version == entry[1]:
+                with self._lock:
+                    entry[2] = time.monotonic()
+                    self.stats['revalidated_hits'] += 1
+                return entry[0]
+            with self._lock:
+                self._entries.pop(key, None)
+            if version is None:
+                raise KeyError(key)
+
+        result = self.store.get(self.namespace, key)
+        with self._lock:
+            self.stats['refetches' if entry is not None else 'misses'] += 1
+        if result is None:
+            raise KeyError(key)
+        base = _dumps(result[0]) if self.merge is not None else None  # before decode mutates it
+        obj = self.decode(result[0])
+        self._cache(key, obj, result[1], base)
+        return obj
+
+    def __contains__(self, key: object) -> bool:
+        try:
+            self[key]
+            return True
+        except KeyError:
+            return False
+
+    def __setitem__(self, key: str, obj: Any) -> None:
+        self.save(key, obj)
+
+    def stage(self, key: str, obj: Any) -> None:
+        """
+        Cache obj locally ahead of a deferred save(key, obj): reads in this worker see it
+        without revalidating against the store until the save lands. The save still replaces
+        the version this worker last saw, so it is kept for the compare-and-set.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            version, base = (entry[1], entry[3]) if entry is not None else (None, None)
+        self._cache(key, obj, version, base)
+        with self._lock:
+            self._entries[key][2] = float('inf')
+
+    def save(self, key: str, obj: Any = None) -> bool:
+        """
+        Write the (cached or given) object back to the store; returns False when there is
+        nothing to save, the record was deleted meanwhile or it kept changing underneath
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+        if obj is None:
+            if entry is None:
+                return False
+            obj = entry[0]
+        expected, base = (entry[1], entry[3]) if entry is not None else (None, None)
+        value = self.encode(obj)
+        merged = False
+        for _ in range(MAX_WRITE_ATTEMPTS):
+            result = self.store.put(self.namespace, key, value, expected_version=expected)
+            if result is not None:
+                break
+            # Another worker wrote since we read: re-read and re-apply our changes on top
+            current = self.store.get(self.namespace, key)
+            with self._lock:
+                self.stats['write_conflicts'] += 1
+            if current is None:
+                # Deleted by another worker (e.g. a privacy delete); do not bring it back
+                with self._lock:
+                    self._entries.pop(key, None)
+                return False
+            if self.merge is not None and base is not None:
+                value = self.merge(json.loads(base), json.loads(_dumps(value)), current[0])
+                base = _dumps(current[0])
+                merged = True
+            expected = current[1]
+        else:
+            with self._lock:
+                self.stats['failed_writes'] += 1
+            logger.error(f"Gave up writing {self.namespace} record {key} after {MAX_WRITE_ATTEMPTS} conflicting writes")
+            return False
+
+        base = _dumps(value) if self.merge is not None else None
+        if merged:
+            # The cache holds the merged record, so later saves start from what was written
+            obj = self.decode(value)
+        with self._lock:
+            self.stats['writes'] += 1
+            self.stats['merged_writes'] += int(merged)
+        self._cache(key, obj, result[1], base)
+        return True
+
+    def __delitem__(self, key: str) -> None:
+        with self._lock:
+            cached = self._entries.pop(key, None)
+        if not self.store.delete(self.namespace, key) and cached is None:
+            raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.store.keys(self.namespace))
+
+    def __len__(self) -> int:
+        return self.store.count(self.namespace)
+
+    def resident_count(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.stats)
+            stats['resident'] = len(self._entries)
+        reads = stats['fresh_hits'] + stats['revalidated_hits'] + stats['refetches'] + stats['misses']
+        stats['local_hit_rate'] = round((stats['fresh_hits'] + stats['revalidated_hits']) / reads, 3) if reads else 0.0
+        stats['max_entries'] = self.max_entries
+        stats['revalidate_seconds'] = self.revalidate_seconds
+        return stats
+
+
+_ABSENT = object()
+
+
+def merge_changes(base: Any, local: Any, stored: Any) -> Any:
+    """
+    Three-way merge of JSON-shaped records: the changes local made since base, re-applied on
+    top of stored. Dicts merge key by key, integer counters add local's delta, lists keep
+    stored's items minus those local removed plus those local added; any other value changed
+    on both sides takes local's.
+    """
+    if local == base:
+        return stored
+    if stored == base:
+        return local
+    if isinstance(local, dict) and isinstance(stored, dict):
+        base = base if isinstance(base, dict) else {}
+        merged = dict(stored)
+        for key in set(base) | set(local):
+            value = local.get(key, _ABSENT)
+            if value == base.get(key, _ABSENT):
+                continue
+            if value is _ABSENT:
+                merged.pop(key, None)
+            else:
+                merged[key] = merge_changes(base.get(key), value, stored.get(key))
+        return merged
+    if all(isinstance(v, int) and not isinstance(v, bool) for v in (base, local, stored)):
+        return stored + local - base
+    if isinstance(local, list) and isinstance(stored, list):
+        base = base if isinstance(base, list) else []
+        kept = [item for item in stored if item in local or item not in base]
+        return kept + [item for item in local if item not in base and item not in stored]
+    return local
+
+
+def encode_datetimes(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Shallow copy with datetime values as ISO strings"""
+    return {k: v.isoformat() if isinstance(v, datetime) else v for k, v in record.items()}
+
+
+def decode_datetimes(fields: Tuple[str, ...]) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    """Decoder turning the named ISO string fields back into datetimes"""
+    def decode(record: Dict[str, Any]) -> Dict[str, Any]:
+        for name in fields:
+            if isinstance(record.get(name), str):
+                try:
+                    record[name] = datetime.fromisoformat(record[name])
+                except ValueError:
+                    pass
+        return record
+    return decode
+
+
+class BoundedRecordMap(MutableMapping):
+    """
+    Dict-like map that keeps at most max_entries objects (and/or max_bytes of estimated size)
+    resident, evicting least-recently-used entries to a backing store and rehydrating them
+    transparently on the next access. Objects mutated in place must be reported with
+    mark_dirty(key, obj) so eviction writes them back; clean entries are dropped for free.
+    """
+
+    def __init__(self, store: MemoryStore, namespace: str,
+                 encode: Callable[[Any], Dict[str, Any]], decode: Callable[[Dict[str, Any]], Any],
+                 sizer: Callable[[Any], int] = None, max_entries: int = 0, max_bytes: int = 0):
+        self.store = store
+        self.namespace = namespace
+        self.encode = encode
+        self.decode = decode
+        self.sizer = sizer or (lambda obj: 1024)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._resident: 'OrderedDict[str, list]' = OrderedDict()  # key -> [obj, size, dirty]
+        self._resident_bytes = 0
+        self._lock = threading.RLock()
+        self.rehydrate_ms = Histogram(buckets=REHYDRATE_MS_BUCKETS)
+        self.stats = {
+            'hits': 0,
+            'rehydrations': 0,
+            'misses': 0,
+            'evictions': 0,
+            'eviction_writes': 0
+        }
+
+    def _insert(self, key: str, obj: Any, dirty: bool) -> None:
+        size = self.sizer(obj)
+        entry = self._resident.pop(key, None)
+        if entry is not None:
+            self._resident_bytes -= entry[1]
+            dirty = dirty or entry[2]
+        self._resident[key] = [obj, size, dirty]
+        self._resident_bytes += size
+        self._enforce_budget()
+
+    def _over_budget(self) -> bool:
+        return ((self.max_entries and len(self._resident) > self.max_entries) or
+                (self.max_bytes and self._resident_bytes > self.max_bytes))
+
+    def _enforce_budget(self) -> None:
+        # Never evict the most recently used entry, so one oversized object still fits
+        while len(self._resident) > 1 and self._over_budget():
+            key, (obj, size, dirty) = self._resident.popitem(last=False)
+            self._resident_bytes -= size
+            self.stats['evictions'] += 1
+            if dirty:
+                self.store.put(self.namespace, key, self.encode(obj))
+                self.stats['eviction_writes'] += 1
+
+    def __getitem__(self, key: str) -> Any:
+        with self._lock:
+            entry = self._resident.get(key)
+            if entry is not None:
+                self._resident.move_to_end(key)
+                self.stats['hits'] += 1
+                return entry[0]
+            start = time.perf_counter()
+            result = self.store.get(self.namespace, key)
+            if result is None:
+                self.stats['misses'] += 1
+                raise KeyError(key)
+            obj = self.decode(result[0])
+            self._insert(key, obj, dirty=False)
+            self.stats['rehydrations'] += 1
+        self.rehydrate_ms.observe((time.perf_counter() - start) * 1000)
+        return obj
+
+    def __contains__(self, key: object) -> bool:
+        with self._lock:
+            if key in self._resident:
+                return True
+        return self.store.get_version(self.namespace, key) is not None
+
+    def __setitem__(self, key: str, obj: Any) -> None:
+        with self._lock:
+            self._insert(key, obj, dirty=True)
+
+    def mark_dirty(self, key: str, obj: Any) -> None:
+        """Record an in-place mutation; re-admits the object if it was evicted meanwhile"""
+        with self._lock:
+            self._insert(key, obj, dirty=True)
+
+    def __delitem__(self, key: str) -> None:
+        with self._lock:
+            entry = self._resident.pop(key, None)
+            if entry is not None:
+                self._resident_bytes -= entry[1]
+            stored = self.store.delete(self.namespace, key)
+        if entry is None and not stored:
+            raise KeyError(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._resident.clear()
+            self._resident_bytes = 0
+            for key in self.store.keys(self.namespace):
+                self.store.delete(self.namespace, key)
+
+    def _keys(self) -> List[str]:
+        with self._lock:
+            resident = list(self._resident)
+        stored = [key for key in self.store.keys(self.namespace) if key not in self._resident]
+        return resident + stored
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._keys())
+
+    def __len__(self) -> int:
+        return len(self._keys())
+
+    def items(self) -> Iterator[Tuple[str, Any]]:
+        """Every (key, object) pair; evicted records are decoded without being re-admitted"""
+        with self._lock:
+            resident = [(key, entry[0]) for key, entry in self._resident.items()]
+        for key, obj in resident:
+            yield key, obj
+        resident_keys = {key for key, _ in resident}
+        for key in self.store.keys(self.namespace):
+            if key not in resident_keys:
+                result = self.store.get(self.namespace, key)
+                if result is not None:
+                    yield key, self.decode(result[0])
+
+    def values(self) -> Iterator[Any]:
+        return (obj for _, obj in self.items())
+
+    def flush(self) -> int:
+        """Write every dirty resident entry to the backing store"""
+        written = 0
+        with self._lock:
+            for key, entry in self._resident.items():
+                if entry[2]:
+                    self.store.put(self.namespace, key, self.encode(entry[0]))
+                    entry[2] = False
+                    written += 1
+        return written
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.stats)
+            stats['resident'] = len(self._resident)
+            stats['resident_bytes'] = self._resident_bytes
+            stats['dirty'] = sum(1 for entry in self._resident.values() if entry[2])
+        reads = stats['hits'] + stats['rehydrations'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / reads, 3) if reads else 0.0
+        stats['max_entries'] = self.max_entries
+        stats['max_bytes'] = self.max_bytes
+        stats['rehydrate_ms'] = self.rehydrate_ms.snapshot()
+        return stats
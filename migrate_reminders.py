@@ -0,0 +1,81 @@
+import os
+import argparse
+import tempfile
+from flask import Flask
+from enhanced_database_models import db
+from conversation_memory import ProgressiveConversationMemory
+from memory_store import create_memory_store
+from medicine_reminders import import_memory_reminders
+
+def make_app():
+    app = Flask(__name__)
+    database_url = os.environ.get('DATABASE_URL')
+    if database_url and database_url.startswith('postgres://'):
+        db_uri = database_url.replace('postgres://', 'postgresql://', 1)
+    else:
+        # fallback to same sqlite path as chatbot.py uses
+        basedir = os.path.abspath(os.path.dirname(__file__))
+        instance_path = os.path.join(basedir, 'instance')
+        os.makedirs(instance_path, exist_ok=True)
+        db_uri = f'sqlite:///{os.path.join(instance_path, "enhanced_chatbot.db")}'
+    app.config.update(
+        SQLALCHEMY_DATABASE_URI=db_uri,
+        SQLALCHEMY_TRACK_MODIFICATIONS=False,
+    )
+    db.init_app(app)
+    return app
+
+def load_memory(models_path, spill_dir):
+    """
+    Conversation memory configured from the same environment as chatbot.py, so every deployment
+    layout (shared store, JSON or binary snapshot, profile budget) is read. Files of the running
+    app are opened read-only; profiles over the budget spill to spill_dir, never to the app's
+    memory_spill.db, whose contents the snapshot and journal already cover.
+    """
+    memory = ProgressiveConversationMemory()
+    memory_store = create_memory_store(os.environ.get('MEMORY_STORE_URL', ''))
+    if memory_store:
+        memory.attach_store(memory_store, cache_entries=int(os.environ.get('MEMORY_CACHE_ENTRIES', 1000)))
+        return memory, 0
+
+    max_profiles = int(os.environ.get('MEMORY_MAX_PROFILES', 0))
+    max_bytes = int(float(os.environ.get('MEMORY_MAX_MB', 0)) * 1024 * 1024)
+    if max_profiles or max_bytes:
+        memory.enable_profile_budget(max_profiles=max_profiles, max_bytes=max_bytes,
+                                     spill_path=os.path.join(spill_dir, 'memory_spill.db'))
+    json_snapshot_path = os.path.join(models_path, 'conversation_memory.json')
+    if os.environ.get('MEMORY_SNAPSHOT_FORMAT', 'json').lower() == 'binary':
+        replayed = memory.enable_journal(
+            os.path.join(models_path, 'conversation_memory.snap'),
+            snapshot_format='binary',
+            journal_path=json_snapshot_path + '.journal',
+            snapshot_shards=int(os.environ.get('MEMORY_SNAPSHOT_SHARDS', 64)),
+            fallback_json_path=json_snapshot_path,
+            read_only=True
+        )
+    else:
+        replayed = memory.enable_journal(json_snapshot_path, read_only=True)
+    return memory, replayed
+
+def main():
+    basedir = os.path.abspath(os.path.dirname(__file__))
+    parser = argparse.ArgumentParser(description="Import medicine reminders and adherence from conversation memory into the database. "
+                                                 "Reads MEMORY_STORE_URL, MEMORY_SNAPSHOT_FORMAT and the profile budget settings like chatbot.py.")
+    parser.add_argument("--models-dir", default=os.path.join(basedir, 'models'),
+                        help="Directory holding the conversation memory snapshot and journal")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as spill_dir:
+        memory, replayed = load_memory(args.models_dir, spill_dir)
+        print(f"Loaded {len(memory.user_profiles)} profiles ({replayed} journal records replayed)")
+
+        app = make_app()
+        with app.app_context():
+            # Ensure the reminder tables exist
+            db.create_all()
+            stats = import_memory_reminders(memory.user_profiles.values())
+    print(f"✅ Imported {stats['reminders']} reminders and {stats['adherence_events']} adherence events "
+          f"for {stats['users']} users ({stats['skipped']} already present)")
+
+if __name__ == "__main__":
+    main()
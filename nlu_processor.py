@@ -8,7 +8,6 @@ import os
 import pickle
 import logging
 import re
-import json
 import numpy as np
 from datetime import datetime
 from typing import Dict, Any, List, Optional, Tuple
@@ -23,12 +22,16 @@ except ImportError:
     HAS_SENTENCE_TRANSFORMERS = False
 
 try:
-    from api_ollama_integration import ollama_llama3
+    from api_ollama_integration import ollama_llama3, route_llm_call
     HAS_OLLAMA = ollama_llama3.is_available if ollama_llama3 else False
 except ImportError:
     HAS_OLLAMA = False
     ollama_llama3 = None
 
+from llm_json import parse_llm_json
+from llm_telemetry import llm_caller
+from llm_router import TASK_INTENT
+
 class ProgressiveNLUProcessor:
     """
     NLU processor for Sehat Sahara Health Assistant with multilingual support.
@@ -361,15 +364,14 @@ HISTORY:
 Analyze this message: '{user_message}'
 """
 
-            response_text = ollama_llama3.client.generate_response(prompt, max_tokens=300, temperature=0.3)
+            with llm_caller("nlu"):
+                response_text = route_llm_call(TASK_INTENT, lambda client: client.generate_response(
+                    prompt, max_tokens=300, temperature=0.3, json_mode=True), ollama_llama3.client)
             if not response_text:
                 return None
 
-            json_start = response_text.find("{")
-            json_end = response_text.rfind("}") + 1
-            if json_start >= 0 and json_end > json_start:
-                json_str = response_text[json_start:json_end]
-                analysis = json.loads(json_str)
+            analysis = parse_llm_json(response_text, source="nlu_analysis")
+            if analysis:
                 self.logger.info(f"✅ API NLU analysis successful for: {user_message[:50]}...")
                 return analysis
             else:
@@ -0,0 +1,96 @@
+"""
+Sehat Sahara Performance Metrics
+Lightweight thread-safe histograms and rolling counters for latency and usage reporting
+"""
+
+import bisect
+import threading
+import time
+from typing import Dict, Any, List, Optional
+
+# Millisecond bucket upper bounds, suitable for queue waits and upstream LLM latency
+DEFAULT_MS_BUCKETS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000, 120000]
+
+
+class Histogram:
+    """Fixed-bucket histogram with approximate percentiles"""
+
+    def __init__(self, buckets: Optional[List[float]] = None):
+        self.buckets = sorted(buckets or DEFAULT_MS_BUCKETS)
+        self._counts = [0] * (len(self.buckets) + 1)  # last bucket is +Inf
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self.count += 1
+            self.total += value
+            if value > self.max:
+                self.max = value
+
+    def percentile(self, fraction: float) -> float:
+        """Approximate percentile: upper bound of the bucket containing the rank"""
+        with self._lock:
+            if not self.count:
+                return 0.0
+            rank = fraction * self.count
+            seen = 0
+            for index, bucket_count in enumerate(self._counts):
+                seen += bucket_count
+                if seen >= rank:
+                    return float(self.buckets[index]) if index < len(self.buckets) else self.max
+            return self.max
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            counts = list(self._counts)
+            count, total, maximum = self.count, self.total, self.max
+        labels = [f"le_{b:g}" for b in self.buckets] + ["le_inf"]
+        return {
+            'count': count,
+            'avg': round(total / count, 2) if count else 0.0,
+            'max': round(maximum, 2),
+            'p50': self.percentile(0.50),
+            'p95': self.percentile(0.95),
+            'p99': self.percentile(0.99),
+            'buckets': {label: c for label, c in zip(labels, counts) if c}
+        }
+
+
+class RollingCounter:
+    """Per-key counters over a sliding time window, kept as fixed-width time buckets"""
+
+    def __init__(self, window_seconds: int = 3600, bucket_seconds: int = 60):
+        self.window_seconds = window_seconds
+        self.bucket_seconds = bucket_seconds
+        self._buckets: Dict[int, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def _prune(self, current_bucket: int) -> None:
+        oldest = current_bucket - self.window_seconds // self.bucket_seconds
+        for bucket in [b for b in self._buckets if b <= oldest]:
+            del self._buckets[bucket]
+
+    def add(self, key: str, value: float = 1.0, now: Optional[float] = None) -> None:
+        bucket = int((now if now is not None else time.time()) // self.bucket_seconds)
+        with self._lock:
+            counts = self._buckets.setdefault(bucket, {})
+            counts[key] = counts.get(key, 0.0) + value
+            self._prune(bucket)
+
+    def totals(self, window_seconds: Optional[int] = None, now: Optional[float] = None) -> Dict[str, float]:
+        """Sum of each key over the last window_seconds (default: the whole window)"""
+        window = min(window_seconds or self.window_seconds, self.window_seconds)
+        current = int((now if now is not None else time.time()) // self.bucket_seconds)
+        oldest = current - window // self.bucket_seconds
+        result: Dict[str, float] = {}
+        with self._lock:
+            for bucket, counts in self._buckets.items():
+                if oldest < bucket <= current:
+                    for key, value in counts.items():
+                        result[key] = result.get(key, 0.0) + value
+        return {key: round(value, 6) for key, value in result.items()}
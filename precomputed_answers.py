@@ -0,0 +1,332 @@
+"""
+Sehat Sahara Precomputed Answers
+Nightly table of validated action-JSON answers for the most frequent normalized messages
+per language, served from memory by /v1/predict before any NLU or LLM work. Every worker
+polls the table's version and reloads when another worker has rebuilt it.
+"""
+
+import copy
+import logging
+import re
+import threading
+import time
+import unicodedata
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Any, List, Optional, Tuple, Callable, Iterable
+
+from llm_json import validate_action_payload
+from performance_metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+# Navigation-style intents whose answer does not depend on who is asking or what came before
+SAFE_INTENTS = {
+    'appointment_booking', 'appointment_view', 'appointment_cancel', 'health_record_request',
+    'find_medicine', 'prescription_inquiry', 'medicine_scan', 'report_issue', 'general_inquiry',
+    'prescription_summary_request', 'out_of_scope'
+}
+UNSAFE_ACTIONS = {'TRIGGER_SOS'}
+
+# Replies that only make sense as an answer to the previous bot turn
+CONTEXT_DEPENDENT_MESSAGES = {
+    'yes', 'no', 'ok', 'okay', 'haan', 'han', 'ha', 'nahi', 'nahin', 'na', 'ji', 'hmm',
+    'theek hai', 'thik hai', 'sure', 'done', 'next', 'back', 'cancel', 'stop'
+}
+MAX_QUERY_WORDS = 8
+
+LOOKUP_MS_BUCKETS = [0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5]
+
+
+def normalize_query(text: str) -> str:
+    """Casefold, drop punctuation/symbols (incl. emoji) and collapse whitespace; keeps Indic combining marks"""
+    text = unicodedata.normalize("NFC", text or "").casefold()
+    text = "".join(" " if unicodedata.category(ch)[0] in ("P", "S") else ch for ch in text)
+    return " ".join(text.split())
+
+
+def is_cacheable_query(normalized: str) -> bool:
+    """Short, context-free messages without numbers (dates, phone numbers, doses are personal)"""
+    if not normalized or normalized in CONTEXT_DEPENDENT_MESSAGES:
+        return False
+    if re.search(r"\d", normalized):
+        return False
+    return len(normalized.split()) <= MAX_QUERY_WORDS
+
+
+@dataclass
+class MinedQuery:
+    """A frequent normalized message for one language"""
+    language: str
+    normalized: str
+    count: int
+    sample: str
+    intent_hint: Optional[str] = None
+
+
+def mine_frequent_queries(rows: Iterable[Tuple[str, str, Optional[str]]], top_n: int = 200,
+                          min_count: int = 3) -> Tuple[List[MinedQuery], Dict[str, Dict[str, Any]]]:
+    """
+    Rank normalized (user_message, language, intent) rows by frequency per language.
+    Returns the top cacheable queries plus the share of each language's traffic they cover.
+    """
+    counts: Dict[str, Counter] = defaultdict(Counter)
+    samples: Dict[Tuple[str, str], Counter] = defaultdict(Counter)
+    intents: Dict[Tuple[str, str], Counter] = defaultdict(Counter)
+    totals: Counter = Counter()
+
+    for message, language, intent in rows:
+        language = language or 'en'
+        totals[language] += 1
+        normalized = normalize_query(message)
+        if not is_cacheable_query(normalized):
+            continue
+        counts[language][normalized] += 1
+        samples[(language, normalized)][(message or "").strip()] += 1
+        if intent:
+            intents[(language, normalized)][intent] += 1
+
+    mined: List[MinedQuery] = []
+    coverage: Dict[str, Dict[str, Any]] = {}
+    for language, counter in counts.items():
+        selected = [(n, c) for n, c in counter.most_common(top_n) if c >= min_count]
+        covered = sum(c for _, c in selected)
+        coverage[language] = {
+            'messages': totals[language],
+            'selected_queries': len(selected),
+            'covered_messages': covered,
+            'coverage': round(covered / totals[language], 3) if totals[language] else 0.0
+        }
+        for normalized, count in selected:
+            key = (language, normalized)
+            intent_hint = intents[key].most_common(1)[0][0] if intents[key] else None
+            mined.append(MinedQuery(language, normalized, count, samples[key].most_common(1)[0][0], intent_hint))
+    return mined, coverage
+
+
+def validate_precomputed_answer(intent: Optional[str], payload: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Schema-valid, safe-intent, non-emergency payloads only"""
+    if intent not in SAFE_INTENTS:
+        return None
+    normalized = validate_action_payload(payload)
+    if not normalized or normalized.get('action') in UNSAFE_ACTIONS:
+        return None
+    return normalized
+
+
+class PrecomputedAnswerStore:
+    """In-memory (language, normalized message) -> answer table, swapped atomically on reload"""
+
+    def __init__(self):
+        self._answers: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self.loaded_at: Optional[datetime] = None
+        self.version: Optional[Tuple[int, Optional[str]]] = None
+        self.last_build: Dict[str, Any] = {}
+        self.lookup_ms = Histogram(buckets=LOOKUP_MS_BUCKETS)
+        self.stats = {'lookups': 0, 'exact_hits': 0, 'normalized_hits': 0, 'misses': 0, 'reloads': 0}
+
+    def load(self, entries: Iterable[Dict[str, Any]]) -> int:
+        """Replace the table; entries carry language, normalized_message, sample_message, intent, payload"""
+        answers = {
+            (entry['language'], entry['normalized_message']): {
+                'sample': entry.get('sample_message', ''),
+                'intent': entry['intent'],
+                'payload': entry['payload']
+            }
+            for entry in entries
+        }
+        with self._lock:
+            self._answers = answers
+            self.loaded_at = datetime.now()
+        logger.info(f"Loaded {len(answers)} precomputed answers")
+        return len(answers)
+
+    @staticmethod
+    def table_version() -> Tuple[int, Optional[str]]:
+        """(row count, newest generated_at) of the table; a rebuild always changes it"""
+        from enhanced_database_models import db, PrecomputedAnswer
+        count, newest = db.session.query(db.func.count(PrecomputedAnswer.id),
+                                         db.func.max(PrecomputedAnswer.generated_at)).one()
+        return count, newest.isoformat() if newest else None
+
+    def load_from_db(self) -> int:
+        """Load the precomputed_answers table; must be called inside an app context"""
+        from enhanced_database_models import PrecomputedAnswer
+        try:
+            # Read the version first: a rebuild landing mid-load is picked up by the next check
+            version = self.table_version()
+            rows = PrecomputedAnswer.query.all()
+            self.version = version
+            return self.load({
+                'language': row.language,
+                'normalized_message': row.normalized_message,
+                'sample_message': row.sample_message,
+                'intent': row.intent,
+                'payload': row.get_action_payload()
+            } for row in rows)
+        except Exception as e:
+            logger.error(f"Failed to load precomputed answers: {e}")
+            return 0
+
+    def reload_if_changed(self) -> bool:
+        """Reload when the table was rebuilt since the last load; must be called inside an app context"""
+        if self.table_version() == self.version:
+            return False
+        self.load_from_db()
+        with self._lock:
+            self.stats['reloads'] += 1
+        return True
+
+    def lookup(self, message: str, language: str) -> Optional[Tuple[Dict[str, Any], str]]:
+        """Return (payload copy, intent) for an exact or normalized match, else None"""
+        start = time.perf_counter()
+        normalized = normalize_query(message)
+        with self._lock:
+            entry = self._answers.get((language, normalized)) if normalized else None
+            self.stats['lookups'] += 1
+            if entry is None:
+                self.stats['misses'] += 1
+            elif (message or "").strip() == entry['sample']:
+                self.stats['exact_hits'] += 1
+            else:
+                self.stats['normalized_hits'] += 1
+        self.lookup_ms.observe((time.perf_counter() - start) * 1000)
+        if entry is None:
+            return None
+        return copy.deepcopy(entry['payload']), entry['intent']
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._answers)
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.stats)
+            stats['entries'] = len(self._answers)
+            stats['loaded_at'] = self.loaded_at.isoformat() if self.loaded_at else None
+            stats['version'] = list(self.version) if self.version else None
+        hits = stats['exact_hits'] + stats['normalized_hits']
+        stats['hit_rate'] = round(hits / stats['lookups'], 3) if stats['lookups'] else 0.0
+        stats['lookup_ms'] = self.lookup_ms.snapshot()
+        stats['last_build'] = self.last_build
+        return stats
+
+
+def build_precomputed_answers(answer_fn: Callable[[str, str, Optional[str]], Optional[Tuple[str, Dict[str, Any], str]]],
+                              days: int = 30, top_n: int = 200, min_count: int = 3,
+                              progress_fn: Callable[[int, str], None] = None) -> Dict[str, Any]:
+    """
+    Mine recent conversation turns and rebuild the precomputed_answers table.
+    answer_fn(sample, language, intent_hint) returns (intent, payload, generated_by) or None.
+    Must be called inside an app context.
+    """
+    from enhanced_database_models import db, ConversationTurn, PrecomputedAnswer
+
+    started = time.time()
+    since = datetime.now() - timedelta(days=days)
+    rows = (ConversationTurn.query
+            .with_entities(ConversationTurn.user_message, ConversationTurn.language_detected,
+                           ConversationTurn.detected_intent)
+            .filter(ConversationTurn.timestamp >= since)
+            .yield_per(1000))
+    mined, coverage = mine_frequent_queries(rows, top_n=top_n, min_count=min_count)
+
+    answers = []
+    rejected = 0
+    for index, query in enumerate(mined):
+        if progress_fn and index % 20 == 0:
+            progress_fn(int(100 * index / max(len(mined), 1)), f"Generating answer {index + 1}/{len(mined)}")
+        try:
+            generated = answer_fn(query.sample, query.language, query.intent_hint)
+        except Exception as e:
+            logger.error(f"Precompute failed for '{query.sample}': {e}")
+            generated = None
+        payload = validate_precomputed_answer(generated[0], generated[1]) if generated else None
+        if not payload:
+            rejected += 1
+            continue
+        row = PrecomputedAnswer(language=query.language, normalized_message=query.normalized[:300],
+                                sample_message=query.sample, intent=generated[0],
+                                occurrence_count=query.count, generated_by=generated[2])
+        row.set_action_payload(payload)
+        answers.append(row)
+
+    # Replace the whole table in one transaction so readers never see a half-built set
+    PrecomputedAnswer.query.delete()
+    db.session.add_all(answers)
+    db.session.commit()
+
+    answered = {(row.language, row.normalized_message) for row in answers}
+    for language, lang_coverage in coverage.items():
+        served = sum(q.count for q in mined if q.language == language and (q.language, q.normalized[:300]) in answered)
+        lang_coverage['answered_messages'] = served
+        lang_coverage['answered_coverage'] = round(served / lang_coverage['messages'], 3) if lang_coverage['messages'] else 0.0
+
+    return {
+        'built_at': datetime.now().isoformat(),
+        'window_days': days,
+        'mined_queries': len(mined),
+        'answers_stored': len(answers),
+        'rejected': rejected,
+        'coverage_by_language': coverage,
+        'duration_seconds': round(time.time() - started, 2)
+    }
+
+
+class PrecomputedAnswerReloader:
+    """Background ticker reloading a store whenever the precomputed_answers table changes"""
+
+    def __init__(self, app, store: PrecomputedAnswerStore, interval_seconds: float = 60.0):
+        self.app = app
+        self.store = store
+        self.interval_seconds = interval_seconds
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.stats = {'checks': 0, 'reloads': 0, 'errors': 0}
+
+    def check(self) -> bool:
+        with self.app.app_context():
+            try:
+                reloaded = self.store.reload_if_changed()
+            except Exception as e:
+                from enhanced_database_models import db
+                db.session.rollback()
+                self.stats['errors'] += 1
+                logger.error(f"Precomputed answer version check failed: {e}")
+                reloaded = False
+        self.stats['checks'] += 1
+        if reloaded:
+            self.stats['reloads'] += 1
+        return reloaded
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='precomputed-answer-reloader', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_seconds):
+            self.check()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return dict(self.stats)
+
+
+def next_nightly_run(hour: int = 2, now: datetime = None) -> datetime:
+    """Next occurrence of hour:00 local time (the quiet period for clinic traffic)"""
+    now = now or datetime.now()
+    run_at = now.replace(hour=hour, minute=0, second=0, microsecond=0)
+    return run_at if run_at > now else run_at + timedelta(days=1)
+
+
+# Global store loaded at startup, after each rebuild and whenever its version changes
+precomputed_answers = PrecomputedAnswerStore()
@@ -0,0 +1,46 @@
+"""
+Sehat Sahara Query Counter
+Counts the SQL statements an engine executes inside a block, so tests can pin a route or
+repository call to a fixed number of queries however many rows it returns.
+"""
+
+from typing import List
+
+
+class QueryCounter:
+    """Context manager listening to before_cursor_execute on one engine"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.statements: List[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def __enter__(self) -> 'QueryCounter':
+        from sqlalchemy import event
+
+        self.statements = []
+        event.listen(self.engine, 'before_cursor_execute', self._record)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        from sqlalchemy import event
+
+        event.remove(self.engine, 'before_cursor_execute', self._record)
+
+
+def count_queries(engine) -> QueryCounter:
+    """with count_queries(db.engine) as queries: ...; queries.count"""
+    return QueryCounter(engine)
+
+
+def assert_query_count(queries: QueryCounter, expected: int) -> None:
+    """Fail with the executed statements listed when the count differs"""
+    assert queries.count == expected, (
+        f"expected {expected} queries, got {queries.count}:\n" + "\n".join(queries.statements)
+    )
@@ -0,0 +1,164 @@
+"""
+Sehat Sahara Recent Turns
+Bounded per-user window of the last few conversation turns as plain text (user message and
+assistant reply, no JSON), written through when a turn is committed and read when building
+LLM context. With a shared memory store every worker sees the same windows; a user with no
+window is rehydrated once from conversation_turns.
+"""
+
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Callable, List, Optional
+
+from memory_store import MemoryStore, SharedRecordMap
+
+logger = logging.getLogger(__name__)
+
+NAMESPACE_RECENT_TURNS = 'recent_turns'
+
+# One turn in a window: [epoch seconds, user text, assistant text]
+TurnRow = List[Any]
+Loader = Callable[[int], List[TurnRow]]
+
+
+def assistant_text(bot_response: Any) -> str:
+    """Plain reply text from a stored bot_response (JSON action payload or plain string)"""
+    if isinstance(bot_response, dict):
+        return bot_response.get('response', '') or ''
+    try:
+        parsed = json.loads(bot_response)
+    except (json.JSONDecodeError, TypeError):
+        return bot_response or ''
+    return (parsed.get('response', '') or '') if isinstance(parsed, dict) else (bot_response or '')
+
+
+class RecentTurns:
+    """
+    user_id -> last max_turns turns. Reads are a dict lookup (plus a version check against
+    the shared store once revalidate_seconds have passed); the database is only queried
+    for users whose window is not cached anywhere yet.
+    """
+
+    def __init__(self, max_turns: int = 6, store: MemoryStore = None, max_users: int = 10000,
+                 revalidate_seconds: float = 1.0):
+        self.max_turns = max(1, max_turns)
+        self.max_users = max_users
+        self.store = store
+        if store is not None:
+            self._windows = SharedRecordMap(
+                store, NAMESPACE_RECENT_TURNS,
+                encode=lambda turns: {'turns': turns}, decode=lambda data: data.get('turns', []),
+                max_entries=max_users, revalidate_seconds=revalidate_seconds)
+        else:
+            self._windows: 'OrderedDict[str, List[TurnRow]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'rehydrations': 0, 'rehydrated_turns': 0,
+                      'writes': 0, 'load_errors': 0}
+
+    def _get_window(self, user_id: str) -> Optional[List[TurnRow]]:
+        if self.store is not None:
+            return self._windows.get(user_id)
+        with self._lock:
+            window = self._windows.get(user_id)
+            if window is not None:
+                self._windows.move_to_end(user_id)
+            return window
+
+    def _put_window(self, user_id: str, window: List[TurnRow]) -> None:
+        if self.store is not None:
+            self._windows.save(user_id, window)
+            return
+        with self._lock:
+            self._windows[user_id] = window
+            self._windows.move_to_end(user_id)
+            while len(self._windows) > self.max_users:
+                self._windows.popitem(last=False)
+
+    def _rehydrate(self, user_id: str, loader: Loader) -> List[TurnRow]:
+        try:
+            window = [list(row) for row in loader(self.max_turns)][-self.max_turns:]
+        except Exception as e:
+            self.stats['load_errors'] += 1
+            logger.error(f"Error loading recent turns for {user_id}: {e}")
+            return []
+        self.stats['rehydrations'] += 1
+        self.stats['rehydrated_turns'] += len(window)
+        self._put_window(user_id, window)  # an empty window is cached too: no repeat queries
+        return window
+
+    def get(self, user_id: str, loader: Loader = None) -> List[TurnRow]:
+        """The user's window, oldest first; on a miss loader(max_turns) supplies it from the database"""
+        window = self._get_window(user_id)
+        if window is not None:
+            self.stats['hits'] += 1
+            return list(window)
+        self.stats['misses'] += 1
+        return self._rehydrate(user_id, loader) if loader else []
+
+    def record(self, user_id: str, user_text: str, reply_text: str, timestamp: float = None,
+               loader: Loader = None) -> None:
+        """
+        Write one committed turn through. If the user has no window yet and a loader is
+        given, the window is loaded instead; it already includes the committed turn.
+        """
+        window = self._get_window(user_id)
+        if window is None and loader is not None:
+            self._rehydrate(user_id, loader)
+            return
+        window = list(window or [])
+        window.append([timestamp if timestamp is not None else time.time(), user_text or '', reply_text or ''])
+        self._put_window(user_id, window[-self.max_turns:])
+        self.stats['writes'] += 1
+
+    def messages(self, user_id: str, turns: int = None, loader: Loader = None) -> List[Dict[str, str]]:
+        """The last `turns` turns as chat messages"""
+        window = self.get(user_id, loader)
+        if turns is not None:
+            window = window[-turns:] if turns > 0 else []
+        messages = []
+        for _, user_text, reply_text in window:
+            messages.append({'role': 'user', 'content': user_text})
+            messages.append({'role': 'assistant', 'content': reply_text})
+        return messages
+
+    def forget(self, user_id: str) -> None:
+        if self.store is not None:
+            self._windows.pop(user_id, None)
+            return
+        with self._lock:
+            self._windows.pop(user_id, None)
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.stats['hits'] + self.stats['misses']
+        stats = dict(self.stats)
+        stats['hit_rate'] = round(self.stats['hits'] / lookups, 3) if lookups else 0.0
+        stats['max_turns'] = self.max_turns
+        stats['shared'] = self.store is not None
+        if self.store is not None:
+            stats['cache'] = self._windows.get_stats()
+        else:
+            with self._lock:
+                stats['cached_users'] = len(self._windows)
+        return stats
+
+
+def conversation_turn_loader(db_user_id: int) -> Loader:
+    """
+    Loader reading the user's newest turns from conversation_turns in one query on
+    (user_id, timestamp). Needs an app context.
+    """
+    def load(limit: int) -> List[TurnRow]:
+        from enhanced_database_models import ConversationTurn
+        rows = (ConversationTurn.query
+                .with_entities(ConversationTurn.timestamp, ConversationTurn.user_message,
+                               ConversationTurn.bot_response)
+                .filter(ConversationTurn.user_id == db_user_id)
+                .order_by(ConversationTurn.timestamp.desc(), ConversationTurn.id.desc())
+                .limit(limit)
+                .all())
+        return [[timestamp.timestamp() if timestamp else 0.0, user_message or '', assistant_text(bot_response)]
+                for timestamp, user_message, bot_response in reversed(rows)]
+    return load
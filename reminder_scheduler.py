@@ -0,0 +1,288 @@
+"""
+Sehat Sahara Reminder Scheduler
+Time-indexed medicine reminder scheduling across all users: one heap entry per reminder holds
+its next due slot, a background ticker fires due slots into an outbound notification feed, and
+each user's fired-but-untaken alerts for today are kept ready for the reminders endpoint.
+"""
+
+import heapq
+import itertools
+import logging
+import threading
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Dict, Any, Callable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class LocalNotificationFeed:
+    """In-process stand-in for a push service: keeps recent events and calls subscribers"""
+
+    def __init__(self, maxlen: int = 10000):
+        self._events = deque(maxlen=maxlen)
+        self._subscribers: List[Callable[[Dict[str, Any]], None]] = []
+        self._lock = threading.Lock()
+        self.published = 0
+
+    def subscribe(self, callback: Callable[[Dict[str, Any]], None]) -> None:
+        self._subscribers.append(callback)
+
+    def publish(self, event: Dict[str, Any]) -> None:
+        with self._lock:
+            self._events.append(event)
+            self.published += 1
+        for callback in self._subscribers:
+            try:
+                callback(event)
+            except Exception as e:
+                logger.error(f"Notification subscriber failed: {e}")
+
+    def drain(self, max_items: int = 0) -> List[Dict[str, Any]]:
+        """Remove and return buffered events, oldest first"""
+        with self._lock:
+            count = len(self._events) if not max_items else min(max_items, len(self._events))
+            return [self._events.popleft() for _ in range(count)]
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+
+class _Reminder:
+    """Scheduler view of one profile reminder; generation invalidates its queued heap entries"""
+
+    __slots__ = ('user_id', 'index', 'medicine_name', 'dosage', 'instructions', 'slots', 'generation')
+
+    def __init__(self, user_id: str, index: int, reminder: Dict[str, Any]):
+        self.user_id = user_id
+        self.index = index
+        self.medicine_name = reminder['medicine_name']
+        self.dosage = reminder.get('dosage', '')
+        self.instructions = reminder.get('instructions', '')
+        # (minute of day, original position, 'HH:MM') sorted by time; unparseable slots are skipped
+        slots = []
+        for position, time_slot in enumerate(reminder.get('times') or []):
+            try:
+                hour, minute = time_slot.split(':')
+                slots.append((int(hour) * 60 + int(minute), position, time_slot))
+            except (AttributeError, ValueError):
+                logger.warning(f"Skipping invalid reminder time {time_slot!r} for user {user_id}")
+        self.slots = sorted(slots)
+        self.generation = 0
+
+    def alert(self, time_slot: str) -> Dict[str, Any]:
+        return {
+            'medicine_name': self.medicine_name,
+            'dosage': self.dosage,
+            'time': time_slot,
+            'instructions': self.instructions
+        }
+
+
+class ReminderScheduler:
+    """
+    Min-heap of (next due epoch, seq, reminder, generation) across all users.
+
+    Adding, re-enabling or rescheduling a reminder is one heap push, O(log n); disabling or
+    removing bumps the reminder's generation so its queued entry is dropped lazily when it
+    reaches the top. Firing a slot pops it, records the alert for the user, publishes it to the
+    feed and pushes the reminder's next slot. pending_alerts() is a dict lookup per user.
+    """
+
+    def __init__(self, feed: LocalNotificationFeed = None, tick_seconds: float = 1.0,
+                 publish_grace_seconds: float = 900.0, clock: Callable[[], datetime] = None):
+        self.feed = feed if feed is not None else LocalNotificationFeed()
+        self.tick_seconds = tick_seconds
+        self.publish_grace_seconds = publish_grace_seconds  # slots older than this fire silently
+        self.clock = clock or datetime.now
+
+        self._heap: List[Tuple[float, int, _Reminder, int]] = []
+        self._seq = itertools.count()
+        self._reminders: Dict[str, Dict[int, _Reminder]] = {}
+        # user -> {(reminder index, slot position): (day ordinal, alert)}
+        self._pending: Dict[str, Dict[Tuple[int, int], Tuple[int, Dict[str, Any]]]] = {}
+        # user -> {medicine name: day ordinal it was last taken}
+        self._taken: Dict[str, Dict[str, int]] = {}
+        self._count = 0
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+        self.stats = {'fired': 0, 'published': 0, 'suppressed_taken': 0, 'stale_entries': 0}
+
+    # ---- registration ----
+
+    def add_reminder(self, user_id: str, index: int, reminder: Dict[str, Any]) -> None:
+        """Register (or replace) the reminder at position index of the user's reminder list"""
+        with self._lock:
+            self._drop_reminder(user_id, index)
+            if not reminder.get('reminder_enabled', True):
+                return
+            entry = _Reminder(user_id, index, reminder)
+            if not entry.slots:
+                return
+            self._reminders.setdefault(user_id, {})[index] = entry
+            self._count += 1
+            self._schedule_from(entry, self.clock(), fire_passed_today=True)
+
+    def disable_reminder(self, user_id: str, index: int) -> None:
+        with self._lock:
+            self._drop_reminder(user_id, index)
+
+    def sync_user(self, user_id: str, user_data: Dict[str, Any]) -> None:
+        """Replace everything known about a user from their profile user_data"""
+        self.remove_user(user_id)
+        today = self.clock().strftime('%Y-%m-%d')
+        for medicine_name, record in (user_data.get('medicine_adherence') or {}).get(today, {}).items():
+            if record.get('status') == 'taken':
+                self.mark_taken(user_id, medicine_name)
+        for index, reminder in enumerate(user_data.get('medicine_reminders') or []):
+            self.add_reminder(user_id, index, reminder)
+
+    def clear(self) -> None:
+        with self._lock:
+            for reminders in self._reminders.values():
+                for entry in reminders.values():
+                    entry.generation += 1
+            self._heap = []
+            self._count = 0
+            self._reminders = {}
+            self._pending = {}
+            self._taken = {}
+
+    def remove_user(self, user_id: str) -> None:
+        with self._lock:
+            for entry in self._reminders.pop(user_id, {}).values():
+                entry.generation += 1
+                self._count -= 1
+            self._pending.pop(user_id, None)
+            self._taken.pop(user_id, None)
+
+    def mark_taken(self, user_id: str, medicine_name: str) -> None:
+        """Suppress today's alerts for a medicine, fired or still to come"""
+        with self._lock:
+            today = self.clock().toordinal()
+            self._taken.setdefault(user_id, {})[medicine_name] = today
+            pending = self._pending.get(user_id)
+            reminders = self._reminders.get(user_id, {})
+            if pending:
+                for key in [k for k in pending if reminders.get(k[0]) and reminders[k[0]].medicine_name == medicine_name]:
+                    del pending[key]
+
+    # ---- reads ----
+
+    def pending_alerts(self, user_id: str) -> List[Dict[str, Any]]:
+        """Today's fired, untaken alerts for one user, in reminder and slot order"""
+        self.poll()
+        pending = self._pending.get(user_id)
+        if not pending:
+            return []
+        today = self.clock().toordinal()
+        with self._lock:
+            return [alert for _, (day, alert) in sorted(pending.items()) if day == today]
+
+    def next_due(self) -> Optional[datetime]:
+        with self._lock:
+            return datetime.fromtimestamp(self._heap[0][0]) if self._heap else None
+
+    def reminder_count(self) -> int:
+        return self._count
+
+    # ---- firing ----
+
+    def poll(self, now: datetime = None) -> int:
+        """Fire every slot due by now; returns how many fired"""
+        now = now or self.clock()
+        cutoff = now.timestamp()
+        fired = 0
+        events = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= cutoff:
+                due, _, entry, generation = heapq.heappop(self._heap)
+                if generation != entry.generation:
+                    self.stats['stale_entries'] += 1
+                    continue
+                due_at = datetime.fromtimestamp(due)
+                event = self._fire(entry, due_at)
+                if event and cutoff - due <= self.publish_grace_seconds:
+                    events.append(event)
+                fired += 1
+                self._schedule_from(entry, due_at, fire_passed_today=False)
+            self.stats['fired'] += fired
+            self.stats['published'] += len(events)
+        for event in events:
+            self.feed.publish(event)
+        return fired
+
+    def _fire(self, entry: _Reminder, due_at: datetime) -> Optional[Dict[str, Any]]:
+        minute = due_at.hour * 60 + due_at.minute
+        day = due_at.toordinal()
+        if self._taken.get(entry.user_id, {}).get(entry.medicine_name) == day:
+            self.stats['suppressed_taken'] += 1
+            return None
+        fired = None
+        pending = self._pending.setdefault(entry.user_id, {})
+        for slot_minute, position, time_slot in entry.slots:
+            if slot_minute == minute:
+                alert = entry.alert(time_slot)
+                pending[(entry.index, position)] = (day, alert)
+                fired = {'user_id': entry.user_id, 'due_at': due_at.isoformat(), **alert}
+        return fired
+
+    def _schedule_from(self, entry: _Reminder, moment: datetime, fire_passed_today: bool) -> None:
+        """Queue the entry's first slot after moment; on registration, today's passed slots fire silently"""
+        day = moment.date()
+        minute_now = moment.hour * 60 + moment.minute
+        if fire_passed_today:
+            for slot_minute, _, _ in entry.slots:
+                if slot_minute <= minute_now:
+                    self._fire(entry, datetime.combine(day, datetime.min.time()) + timedelta(minutes=slot_minute))
+        next_minute = next((m for m, _, _ in entry.slots if m > minute_now), None)
+        if next_minute is None:
+            day += timedelta(days=1)
+            next_minute = entry.slots[0][0]
+        due = datetime.combine(day, datetime.min.time()) + timedelta(minutes=next_minute)
+        heapq.heappush(self._heap, (due.timestamp(), next(self._seq), entry, entry.generation))
+
+    def _drop_reminder(self, user_id: str, index: int) -> None:
+        entry = self._reminders.get(user_id, {}).pop(index, None)
+        if entry is None:
+            return
+        entry.generation += 1
+        self._count -= 1
+        pending = self._pending.get(user_id)
+        if pending:
+            for key in [k for k in pending if k[0] == index]:
+                del pending[key]
+
+    # ---- background ticker ----
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='reminder-scheduler', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.tick_seconds):
+            try:
+                self.poll()
+            except Exception as e:
+                logger.error(f"Reminder scheduler tick failed: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        next_due = self.next_due()
+        return {
+            **self.stats,
+            'reminders': self._count,
+            'queued': len(self._heap),
+            'users_with_pending': sum(1 for pending in self._pending.values() if pending),
+            'feed_published': self.feed.published,
+            'next_due': next_due.isoformat() if next_due else None
+        }
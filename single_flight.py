@@ -0,0 +1,121 @@
+"""
+Sehat Sahara Single-Flight
+Collapses identical concurrent upstream LLM requests into one in-flight call whose
+result is shared by every waiter. Nothing is cached after the call completes.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+import unicodedata
+from typing import Dict, Any, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_prompt_text(text: str) -> str:
+    """Unicode-normalize and collapse whitespace so trivially different prompts share a fingerprint"""
+    return " ".join(unicodedata.normalize("NFC", text or "").split())
+
+
+def prompt_fingerprint(**parts: Any) -> str:
+    """Stable fingerprint of a completion request (model, messages, sampling options, ...)"""
+    def normalize(value):
+        if isinstance(value, str):
+            return normalize_prompt_text(value)
+        if isinstance(value, dict):
+            return {k: normalize(v) for k, v in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [normalize(v) for v in value]
+        return value
+
+    encoded = json.dumps(normalize(parts), sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class _Call:
+    __slots__ = ("done", "result", "error", "followers")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.followers = 0
+
+
+class SingleFlight:
+    """Run fn once per key among concurrent callers; followers receive the leader's result"""
+
+    def __init__(self, name: str = "llm"):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: Dict[str, _Call] = {}
+        self.stats = {
+            'leaders': 0,      # calls that actually went upstream
+            'collapsed': 0,    # calls served by someone else's in-flight request
+            'follower_timeouts': 0,
+            'max_followers': 0
+        }
+
+    def do(self, key: str, fn: Callable[[], Any], timeout: Optional[float] = None) -> Any:
+        """
+        Execute fn for key, or wait for an identical in-flight call.
+        Followers that wait longer than timeout get None so the caller can fall back locally;
+        exceptions raised by the leader are re-raised in every follower.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = _Call()
+                self._calls[key] = call
+                self.stats['leaders'] += 1
+                leader = True
+            else:
+                call.followers += 1
+                self.stats['collapsed'] += 1
+                self.stats['max_followers'] = max(self.stats['max_followers'], call.followers)
+                leader = False
+
+        if not leader:
+            if not call.done.wait(timeout):
+                with self._lock:
+                    self.stats['follower_timeouts'] += 1
+                logger.info(f"[{self.name}] single-flight follower timed out waiting for leader")
+                return None
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self.stats)
+            stats['in_flight'] = len(self._calls)
+        requests_seen = stats['leaders'] + stats['collapsed']
+        stats['collapse_rate'] = round(stats['collapsed'] / requests_seen, 3) if requests_seen else 0.0
+        return stats
+
+
+def remaining_seconds(deadline: Optional[float]) -> Optional[float]:
+    """Seconds left until an absolute time.monotonic() deadline (None means no deadline)"""
+    return None if deadline is None else max(0.0, deadline - time.monotonic())
+
+
+# Shared by every ApiClient so NLU, generation and summaries collapse across client instances
+llm_single_flight = SingleFlight("llm")
+
+
+def get_single_flight_stats() -> Dict[str, Any]:
+    return llm_single_flight.get_stats()
@@ -0,0 +1,262 @@
+"""
+Sehat Sahara SQL Instrumentation
+Per-request query count, total DB time and slowest statements, keyed by route. Statements
+repeated with the same shape inside one request are flagged as likely N+1 patterns, and
+statements over a threshold go to a slow-query log. Sampled requests are kept in a ring
+buffer for the admin endpoint and report their DB time in a Server-Timing header.
+When disabled nothing is attached to the engine or the app, so queries pay no overhead.
+"""
+
+import heapq
+import logging
+import os
+import random
+import re
+import threading
+import time
+from collections import Counter, deque
+from dataclasses import dataclass, asdict, field
+from typing import Dict, Any, List, Optional, Tuple
+
+from performance_metrics import Histogram, RollingCounter
+
+logger = logging.getLogger(__name__)
+
+DB_MS_BUCKETS = [0.5, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000]
+QUERY_COUNT_BUCKETS = [1, 2, 3, 5, 10, 20, 50, 100, 250, 500]
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*(?:\?|%\(\w+\)s|:\w+|%s)(?:\s*,\s*(?:\?|%\(\w+\)s|:\w+|%s))*\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+_context = threading.local()
+
+
+def statement_shape(statement: str) -> str:
+    """Statement with literals and IN-lists collapsed, so per-row lookups share one shape"""
+    shape = _STRING_LITERAL.sub('?', statement)
+    shape = _NUMBER_LITERAL.sub('?', shape)
+    shape = _PLACEHOLDER_LIST.sub('(?)', shape)
+    return _WHITESPACE.sub(' ', shape).strip()
+
+
+@dataclass
+class RequestQueries:
+    """SQL activity of one sampled request"""
+    route: str
+    status: int = 0
+    queries: int = 0
+    db_ms: float = 0.0
+    slowest: List[Dict[str, Any]] = field(default_factory=list)
+    repeated: List[Dict[str, Any]] = field(default_factory=list)
+    timestamp: float = field(default_factory=time.time)
+
+
+class _RequestState:
+    """Collected on the request thread; turned into a RequestQueries when the request ends"""
+
+    __slots__ = ('route', 'queries', 'db_ms', 'shapes', 'slowest', 'sequence')
+
+    def __init__(self, route: str):
+        self.route = route
+        self.queries = 0
+        self.db_ms = 0.0
+        self.shapes: Counter = Counter()
+        self.slowest: List[Tuple[float, int, str]] = []  # min-heap of (ms, sequence, statement)
+        self.sequence = 0
+
+
+class _RouteAggregate:
+    """Histograms and counters for one route"""
+
+    def __init__(self):
+        self.requests = 0
+        self.queries = 0
+        self.n_plus_one = 0
+        self.db_ms = Histogram(buckets=DB_MS_BUCKETS)
+        self.queries_per_request = Histogram(buckets=QUERY_COUNT_BUCKETS)
+        self.repeated_shapes: Counter = Counter()
+
+    def add(self, record: RequestQueries) -> None:
+        self.requests += 1
+        self.queries += record.queries
+        self.db_ms.observe(record.db_ms)
+        self.queries_per_request.observe(record.queries)
+        if record.repeated:
+            self.n_plus_one += 1
+            for repeated in record.repeated:
+                self.repeated_shapes[repeated['shape']] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            'requests': self.requests,
+            'queries': self.queries,
+            'n_plus_one_requests': self.n_plus_one,
+            'db_ms': self.db_ms.snapshot(),
+            'queries_per_request': self.queries_per_request.snapshot(),
+            'top_repeated_shapes': [{'shape': shape, 'requests': count}
+                                    for shape, count in self.repeated_shapes.most_common(5)]
+        }
+
+
+class SQLInstrumentation:
+    """Engine event listeners plus Flask request hooks recording SQL activity per route"""
+
+    def __init__(self, sample_rate: float = 1.0, slow_query_ms: float = 100.0,
+                 n_plus_one_threshold: int = 5, slowest_per_request: int = 3,
+                 recent_requests: int = 200, slow_log_size: int = 200):
+        self.enabled = False
+        self.sample_rate = sample_rate
+        self.slow_query_ms = slow_query_ms
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self.slowest_per_request = slowest_per_request
+        self._lock = threading.Lock()
+        self.by_route: Dict[str, _RouteAggregate] = {}
+        self.recent: deque = deque(maxlen=recent_requests)
+        self.slow_log: deque = deque(maxlen=slow_log_size)
+        self.rolling = RollingCounter(window_seconds=3600, bucket_seconds=60)
+        self.stats = {'requests_seen': 0, 'requests_sampled': 0, 'unattributed_queries': 0}
+
+    # Request lifecycle
+
+    def begin_request(self, route: str) -> bool:
+        """Start recording this thread's queries if the request is sampled"""
+        with self._lock:
+            self.stats['requests_seen'] += 1
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            _context.state = None
+            return False
+        _context.state = _RequestState(route)
+        return True
+
+    def record_query(self, statement: str, duration_ms: float) -> None:
+        """Attribute one executed statement to the current request"""
+        state = getattr(_context, 'state', None)
+        if state is None:
+            with self._lock:  # background jobs and startup queries
+                self.stats['unattributed_queries'] += 1
+            return
+        state.queries += 1
+        state.db_ms += duration_ms
+        state.shapes[statement_shape(statement)] += 1
+        state.sequence += 1
+        entry = (duration_ms, state.sequence, statement)
+        if len(state.slowest) < self.slowest_per_request:
+            heapq.heappush(state.slowest, entry)
+        elif duration_ms > state.slowest[0][0]:
+            heapq.heapreplace(state.slowest, entry)
+        if duration_ms >= self.slow_query_ms:
+            self.slow_log.append({'route': state.route, 'statement': statement,
+                                  'ms': round(duration_ms, 2), 'timestamp': time.time()})
+            self.rolling.add('slow_queries')
+            logger.warning(f"Slow query on {state.route} ({duration_ms:.1f}ms): {statement[:200]}")
+
+    def end_request(self, status: int = 0) -> Optional[RequestQueries]:
+        """Finish the current request; returns its record, or None if it was not sampled"""
+        state = getattr(_context, 'state', None)
+        if state is None:
+            return None
+        _context.state = None
+
+        repeated = [{'shape': shape, 'count': count}
+                    for shape, count in state.shapes.most_common()
+                    if count >= self.n_plus_one_threshold]
+        record = RequestQueries(
+            route=state.route,
+            status=status,
+            queries=state.queries,
+            db_ms=round(state.db_ms, 3),
+            slowest=[{'statement': statement, 'ms': round(ms, 3)}
+                     for ms, _, statement in sorted(state.slowest, reverse=True)],
+            repeated=repeated
+        )
+        with self._lock:
+            self.stats['requests_sampled'] += 1
+            self.by_route.setdefault(record.route, _RouteAggregate()).add(record)
+            self.recent.append(record)
+
+        self.rolling.add('requests', now=record.timestamp)
+        self.rolling.add('queries', record.queries, now=record.timestamp)
+        self.rolling.add('db_ms', record.db_ms, now=record.timestamp)
+        if repeated:
+            self.rolling.add('n_plus_one_requests', now=record.timestamp)
+            logger.info(f"Likely N+1 on {record.route}: {repeated[0]['count']}x {repeated[0]['shape'][:200]}")
+        return record
+
+    # SQLAlchemy / Flask wiring
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault('sql_instrumentation_start', []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        starts = conn.info.get('sql_instrumentation_start')
+        if starts:
+            self.record_query(statement, (time.perf_counter() - starts.pop()) * 1000)
+
+    def install(self, app, engine) -> None:
+        """Listen to the engine's cursor events and wrap every request of the app"""
+        from sqlalchemy import event
+        from flask import request
+
+        event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+
+        @app.before_request
+        def _begin_sql_instrumentation():
+            rule = request.url_rule.rule if request.url_rule else 'unmatched'
+            self.begin_request(f"{request.method} {rule}")
+
+        @app.after_request
+        def _end_sql_instrumentation(response):
+            record = self.end_request(response.status_code)
+            if record is not None:
+                response.headers.add('Server-Timing', f"db;dur={record.db_ms:.2f};desc=\"{record.queries} queries\"")
+            return response
+
+        @app.teardown_request
+        def _drop_sql_instrumentation(exc):
+            _context.state = None
+
+        self.enabled = True
+        logger.info(f"SQL instrumentation enabled (sample rate {self.sample_rate}, "
+                    f"slow query {self.slow_query_ms}ms, N+1 threshold {self.n_plus_one_threshold})")
+
+    def get_stats(self, recent_limit: int = 20) -> Dict[str, Any]:
+        with self._lock:
+            by_route = {route: agg.snapshot() for route, agg in self.by_route.items()}
+            recent = [asdict(r) for r in list(self.recent)[-recent_limit:]] if recent_limit else []
+            slow = list(self.slow_log)[-recent_limit:] if recent_limit else []
+            stats = dict(self.stats)
+        return {
+            'enabled': self.enabled,
+            'sample_rate': self.sample_rate,
+            'slow_query_ms': self.slow_query_ms,
+            'n_plus_one_threshold': self.n_plus_one_threshold,
+            **stats,
+            'by_route': by_route,
+            'last_5_minutes': self.rolling.totals(300),
+            'last_hour': self.rolling.totals(),
+            'recent_requests': recent,
+            'slow_queries': slow
+        }
+
+    def reset(self) -> None:
+        with self._lock:
+            self.by_route.clear()
+            self.recent.clear()
+            self.slow_log.clear()
+            self.stats = {'requests_seen': 0, 'requests_sampled': 0, 'unattributed_queries': 0}
+        self.rolling = RollingCounter(window_seconds=3600, bucket_seconds=60)
+
+
+# Global instance; chatbot.py installs it on the app's engine when SQL_INSTRUMENTATION=true
+sql_instrumentation = SQLInstrumentation(
+    sample_rate=float(os.getenv('SQL_SAMPLE_RATE', 1.0)),
+    slow_query_ms=float(os.getenv('SQL_SLOW_QUERY_MS', 100)),
+    n_plus_one_threshold=int(os.getenv('SQL_N_PLUS_ONE_THRESHOLD', 5))
+)
+
+
+def get_sql_stats(recent_limit: int = 20) -> Dict[str, Any]:
+    return sql_instrumentation.get_stats(recent_limit)
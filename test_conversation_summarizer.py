@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Test script for the rolling conversation summarizer
+"""
+
+import sys
+import os
+import json
+import logging
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from conversation_memory import ProgressiveConversationMemory, UserProfile
+from conversation_summarizer import ConversationSummarizer
+
+
+def setup_logging():
+    """Setup logging for tests"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+
+def _add_turns(memory, summarizer, user_id, count):
+    for i in range(count):
+        memory.add_conversation_turn(
+            user_id=user_id,
+            user_message=f"I have a headache, message {i}",
+            bot_response=json.dumps({'response': f"Please rest and drink water ({i})"}),
+            nlu_result={'primary_intent': 'symptom_triage', 'language_detected': 'en'},
+            action_taken='CONTINUE_CONVERSATION'
+        )
+        summarizer.record_turn(user_id)
+    summarizer.wait_until_idle()
+
+
+def test_summary_plus_recent_turns():
+    """Context carries the summary plus only the last 2 turns"""
+    print("=" * 60)
+    print("TESTING SUMMARY CONTEXT")
+    print("=" * 60)
+
+    memory = ProgressiveConversationMemory()
+    summarizer = ConversationSummarizer(memory, summarize_every=4, recent_turns=2)
+    _add_turns(memory, summarizer, "user_1", 10)
+
+    history = summarizer.build_context_history("user_1")
+    assert history[0]['role'] == 'system'
+    assert 'symptom_triage' in history[0]['content']
+    assert len(history) == 5  # summary + 2 turns (user/assistant pairs)
+    assert history[-1]['content'] == "Please rest and drink water (9)"
+    assert memory.user_profiles["user_1"].summary_turn_count <= 8
+    print("PASS: Summary context built")
+
+
+def test_no_summary_for_short_sessions():
+    """Short sessions send recent turns only"""
+    print("=" * 60)
+    print("TESTING SHORT SESSION")
+    print("=" * 60)
+
+    memory = ProgressiveConversationMemory()
+    summarizer = ConversationSummarizer(memory, summarize_every=6)
+    _add_turns(memory, summarizer, "user_2", 3)
+
+    history = summarizer.build_context_history("user_2")
+    assert all(m['role'] != 'system' for m in history)
+    assert len(history) == 4
+    assert summarizer.get_stats()['summaries_generated'] == 0
+    print("PASS: No summary for short session")
+
+
+def test_summary_persisted_with_profile():
+    """Summary round-trips through UserProfile serialization"""
+    print("=" * 60)
+    print("TESTING SUMMARY PERSISTENCE")
+    print("=" * 60)
+
+    memory = ProgressiveConversationMemory()
+    summarizer = ConversationSummarizer(memory, summarize_every=3)
+    _add_turns(memory, summarizer, "user_3", 6)
+
+    profile = memory.user_profiles["user_3"]
+    restored = UserProfile.from_dict(profile.to_dict())
+    assert restored.conversation_summary == profile.conversation_summary
+    assert restored.summary_turn_count == profile.summary_turn_count
+    assert memory.get_conversation_summary("user_3") == profile.conversation_summary
+    print("PASS: Summary persisted with profile")
+
+
+def run_all_tests():
+    """Run all summarizer tests"""
+    setup_logging()
+    tests = [test_summary_plus_recent_turns, test_no_summary_for_short_sessions, test_summary_persisted_with_profile]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"FAIL: {test.__name__}: {e}")
+    print(f"\n{passed}/{len(tests)} tests passed")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
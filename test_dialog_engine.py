@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Test script for the compiled symptom-check dialog engine
+"""
+
+import sys
+import os
+import tempfile
+import logging
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from dialog_engine import CompiledFlow, DialogEngine, DialogStateStore
+from memory_store import SQLiteMemoryStore
+from sehat_sahara_assistant import SehatSaharaAssistant
+
+
+def setup_logging():
+    """Setup logging for tests"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+
+def test_compiled_flow():
+    """Keyword regexes find overlapping symptoms; states round-trip through the packed int"""
+    print("=" * 60)
+    print("TESTING COMPILED DIALOG FLOW")
+    print("=" * 60)
+
+    flow = CompiledFlow()
+    hi = flow.language_ids['hi']
+    found = flow.symptom_names(flow.detect_symptoms("mujhe sir dard aur bukhar hai", hi))
+    assert found == ['bukhar', 'sir dard', 'dard']
+    assert flow.detect_symptoms("mujhe fever hai", hi) == 0  # per-language keyword tables
+    assert flow.is_emergency("seene mein dard ho raha hai", hi)
+    assert flow.is_advice_request("what medicine should i take", flow.language_ids['en'])
+
+    state = flow.pack(flow.stage_ids['symptom_check'], flow.language_ids['pa'], 2,
+                      flow.detect_symptoms("sir dukh", flow.language_ids['pa']))
+    stage, language, count, symptoms = flow.unpack(state)
+    assert (flow.stages[stage], flow.languages[language], count) == ('symptom_check', 'pa', 2)
+    assert flow.symptom_names(symptoms) == ['sir dukh', 'dukh']
+    print("PASS: Compiled dialog flow")
+
+
+def test_symptom_flow_and_ttl():
+    """A symptom flow asks two questions then gives precautions; idle states expire"""
+    print("=" * 60)
+    print("TESTING SYMPTOM FLOW AND STATE TTL")
+    print("=" * 60)
+
+    assistant = SehatSaharaAssistant()
+    actions = [assistant.process_message(message, 'u1')['action']
+               for message in ["Hello, I have fever", "Since yesterday", "Yes, I also have cough"]]
+    assert actions == ['CONTINUE_SYMPTOM_CHECK', 'CONTINUE_SYMPTOM_CHECK', 'Maps_TO_APPOINTMENT_BOOKING']
+    state = assistant.get_conversation_state('u1')
+    assert state['stage'] == 'initial' and state['symptom_count'] == 0 and state['language'] == 'en'
+
+    reply = assistant.process_message("mujhe bukhar hai", 'u2')
+    assert reply['language'] == 'hi' and reply['response'] == assistant.symptom_questions['hi'][1]
+    assistant.update_conversation_state('u2', symptom_count=2)
+    assert 'ORS' not in assistant.process_message("khansi bhi hai", 'u2')['response']
+    assert assistant.process_message("ambulance chahiye", 'u2')['action'] == 'TRIGGER_SOS'
+
+    expiring = SehatSaharaAssistant(state_store=DialogStateStore(ttl_seconds=0))
+    expiring.process_message("I have fever", 'u3')
+    assert expiring.get_conversation_state('u3')['stage'] == 'initial'
+    assert expiring.get_dialog_stats()['expired'] == 1 and expiring.get_dialog_stats()['users'] == 0
+
+    bounded = DialogStateStore(max_users=2)
+    engine = DialogEngine(states=bounded)
+    for user_id in ('a', 'b', 'c'):
+        engine.step(user_id, "I have fever")
+    assert bounded.get('a') is None and bounded.get('c') is not None and bounded.stats['evicted'] == 1
+    print("PASS: Symptom flow and state TTL")
+
+
+def test_shared_state_store():
+    """Two workers on one store continue the same user's flow"""
+    print("=" * 60)
+    print("TESTING SHARED DIALOG STATE")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'memory.db')
+        worker_a = SehatSaharaAssistant(state_store=DialogStateStore(store=SQLiteMemoryStore(path)))
+        worker_b = SehatSaharaAssistant(state_store=DialogStateStore(store=SQLiteMemoryStore(path)))
+
+        assert worker_a.process_message("mujhe bukhar hai", 'p1')['action'] == 'CONTINUE_SYMPTOM_CHECK'
+        assert worker_b.get_conversation_state('p1')['symptoms_gathered'] == ['bukhar']
+        worker_b.process_message("do din se", 'p1')
+        assert worker_a.process_message("khansi bhi hai", 'p1')['action'] == 'Maps_TO_APPOINTMENT_BOOKING'
+
+        worker_a.reset_conversation('p1')
+        assert worker_b.get_conversation_state('p1')['stage'] == 'initial'
+
+        expiring = DialogStateStore(ttl_seconds=0, store=SQLiteMemoryStore(path))
+        DialogEngine(states=expiring).step('p2', "I have fever")
+        assert expiring.purge_expired() == 1 and len(expiring) == 0
+    print("PASS: Shared dialog state")
+
+
+def run_all_tests():
+    """Run all dialog engine tests"""
+    setup_logging()
+    tests = [test_compiled_flow, test_symptom_flow_and_ttl, test_shared_state_store]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"FAIL: {test.__name__}: {e}")
+    print(f"\n{passed}/{len(tests)} tests passed")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
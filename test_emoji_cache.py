@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Test script for the emoji interpretation cache
+"""
+
+import sys
+import os
+import tempfile
+import logging
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from emoji_cache import (
+    EmojiInterpretationCache, canonical_emoji_sequence, message_shape, emoji_cache_key, mentions_crisis_or_symptom
+)
+
+
+def setup_logging():
+    """Setup logging for tests"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+
+def test_canonical_keys():
+    """Skin tones, variation selectors and repeats share a key; long text is not cached"""
+    print("=" * 60)
+    print("TESTING CANONICAL EMOJI KEYS")
+    print("=" * 60)
+
+    assert canonical_emoji_sequence("🙏🏽🙏🙏") == "🙏"
+    assert canonical_emoji_sequence("❤️") == canonical_emoji_sequence("❤")
+    assert canonical_emoji_sequence("😷 🤒") == "😷🤒"
+    assert message_shape("😷🤒") == "only"
+    assert message_shape("thanks doc 🙏") == "short"
+    assert message_shape("my friend sent this after our fight yesterday 😂") == "long"
+
+    assert emoji_cache_key("🙏🙏", "hi") == emoji_cache_key("🙏🏾", "hi")
+    assert emoji_cache_key("🙏", "hi") != emoji_cache_key("🙏", "en")
+    assert emoji_cache_key("my friend sent this after our fight yesterday 😂", "en") is None
+    assert emoji_cache_key("hello", "en") is None
+    print("PASS: Canonical keys")
+
+
+def test_words_and_crisis_text():
+    """Words beside the emojis are part of the key; crisis and symptom text is never cached"""
+    print("=" * 60)
+    print("TESTING WORDS AND CRISIS TEXT")
+    print("=" * 60)
+
+    assert emoji_cache_key("miss you 😭", "en") != emoji_cache_key("😭", "en")
+    assert emoji_cache_key("Miss you! 😭😭", "en") == emoji_cache_key("miss you 😭", "en")
+    assert emoji_cache_key("just kidding 😷🤒", "en") != emoji_cache_key("miss you 😷🤒", "en")
+    for message in ("want to die 😭", "chest pain 😷🤒", "bukhar hai 🤒", "bahut dard 😢"):
+        assert mentions_crisis_or_symptom(message), message
+        assert emoji_cache_key(message, "en") is None, message
+    assert not mentions_crisis_or_symptom("thanks doc 🙏")
+
+    cache = EmojiInterpretationCache()
+    cache.set("miss you 😭", "en", "they miss you")
+    cache.set("😭", "en", "crying")
+    assert cache.get("want to die 😭", "en") is None
+    assert cache.get("just kidding 😭", "en") is None
+    assert cache.get("miss you 😭", "en") == "they miss you"
+    cache.set("chest pain 😷🤒", "en", "unwell")
+    assert cache.get("chest pain 😷🤒", "en") is None
+    print("PASS: Words and crisis text")
+
+
+def test_skip_accounting_and_precompute():
+    """Precomputed and cached sequences skip the Scout call; skip rate is reported"""
+    print("=" * 60)
+    print("TESTING SKIP ACCOUNTING")
+    print("=" * 60)
+
+    cache = EmojiInterpretationCache(max_entries=10, ttl_seconds=60)
+    upstream = []
+
+    def interpret(sequence, language):
+        upstream.append((sequence, language))
+        return f"interpretation of {sequence} in {language}"
+
+    added = cache.precompute(interpret, sequences=["🙏", "😷🤒"], languages=["en"])
+    assert added == 2 and len(upstream) == 2
+    assert cache.precompute(interpret, sequences=["🙏", "😷🤒"], languages=["en"]) == 0  # already cached
+
+    assert cache.get("🙏🙏", "en") == "interpretation of 🙏 in en"
+    assert cache.get("😂", "en") is None
+    cache.set("😂", "en", "laughing")
+    assert cache.get("😂😂😂", "en") == "laughing"
+    assert cache.get("a long message with several words and 😂", "en") is None
+
+    stats = cache.get_stats()
+    assert stats['requests'] == 4 and stats['scout_calls_skipped'] == 2
+    assert stats['uncacheable'] == 1 and stats['skip_rate'] == 0.5
+    print("PASS: Skip accounting and precompute")
+
+
+def test_persistence():
+    """Interpretations survive a save/load round trip"""
+    print("=" * 60)
+    print("TESTING PERSISTENCE")
+    print("=" * 60)
+
+    cache = EmojiInterpretationCache()
+    cache.set("🙏", "pa", "ਧੰਨਵਾਦ")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "emoji.json")
+        assert cache.save_to_file(path)
+        restored = EmojiInterpretationCache()
+        assert restored.load_from_file(path) == 1
+        assert restored.get("🙏", "pa") == "ਧੰਨਵਾਦ"
+    print("PASS: Persistence")
+
+
+def run_all_tests():
+    """Run all emoji cache tests"""
+    setup_logging()
+    tests = [test_canonical_keys, test_words_and_crisis_text, test_skip_accounting_and_precompute, test_persistence]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"FAIL: {test.__name__}: {e}")
+    print(f"\n{passed}/{len(tests)} tests passed")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Test script for vision image preprocessing and result caching
+"""
+
+import sys
+import os
+import base64
+import logging
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from image_preprocessing import (
+    PreparedImage, VisionResultCache, detect_mime_type, decode_base64_image, prepare_image
+)
+
+PNG_HEADER = b'\x89PNG\r\n\x1a\n' + b'\x00' * 32
+
+
+def setup_logging():
+    """Setup logging for tests"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+
+def test_mime_detection_and_decoding():
+    """Real image type is detected instead of assuming JPEG"""
+    print("=" * 60)
+    print("TESTING MIME DETECTION")
+    print("=" * 60)
+
+    assert detect_mime_type(b'\xff\xd8\xff\xe0rest') == 'image/jpeg'
+    assert detect_mime_type(PNG_HEADER) == 'image/png'
+    assert detect_mime_type(b'RIFF\x00\x00\x00\x00WEBPVP8 ') == 'image/webp'
+
+    encoded = base64.b64encode(PNG_HEADER).decode('ascii')
+    assert decode_base64_image(f"data:image/png;base64,{encoded}") == PNG_HEADER
+    assert decode_base64_image(encoded) == PNG_HEADER
+    assert decode_base64_image("not base64!!") is None
+
+    prepared = prepare_image(f"data:image/png;base64,{encoded}")
+    assert prepared is not None and prepared.original_bytes == len(PNG_HEADER)
+    assert prepared.data_url.startswith("data:image/")
+    print("PASS: MIME detection and decoding")
+
+
+def test_vision_cache_hits():
+    """Exact matches skip the upstream call; near-identical photos of other content miss"""
+    print("=" * 60)
+    print("TESTING VISION RESULT CACHE")
+    print("=" * 60)
+
+    cache = VisionResultCache()
+    original = PreparedImage(b64="", mime_type="image/jpeg", original_bytes=4_000_000, bytes=180_000,
+                             content_hash="abc", perceptual_hash=0b1011_0000)
+    # A different strip on the same background: dHash one bit away, different content
+    other_strip = PreparedImage(b64="", mime_type="image/jpeg", original_bytes=3_900_000, bytes=175_000,
+                                content_hash="def", perceptual_hash=0b1011_0001)
+
+    assert cache.get("medicine", "en:", original) is None
+    cache.record_upstream(original, 850.0)
+    cache.set("medicine", "en:", original, "Paracetamol 500mg strip")
+
+    assert cache.get("medicine", "en:", original) == "Paracetamol 500mg strip"
+    assert cache.get("medicine", "hi:", original) is None
+    assert cache.get("medicine", "en:", other_strip) is None
+    cache.set("prescription", "en", original, {"doctor_name": "Dr. Kaur"})
+    assert cache.get("prescription", "en", other_strip) is None
+    # Only an explicit opt-in matches perceptually
+    assert cache.get("medicine", "en:", other_strip, allow_perceptual=True) == "Paracetamol 500mg strip"
+
+    stats = cache.get_stats()
+    assert stats['cache_hits'] == 2 and stats['perceptual_hits'] == 1
+    assert stats['avg_uploaded_bytes'] == 180_000
+    print("PASS: Vision cache hits")
+
+
+def run_all_tests():
+    """Run all image preprocessing tests"""
+    setup_logging()
+    tests = [test_mime_detection_and_decoding, test_vision_cache_hits]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"FAIL: {test.__name__}: {e}")
+    print(f"\n{passed}/{len(tests)} tests passed")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
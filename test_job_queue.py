@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Test script for the database-backed background job queue
+"""
+
+import sys
+import os
+import logging
+from datetime import datetime, timedelta
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from flask import Flask
+
+from enhanced_database_models import db, BackgroundJob
+from job_queue import JobQueue, JobRetryableError
+
+
+def setup_logging():
+    """Setup logging for tests"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+
+def create_app():
+    """Empty in-memory database on the shared models"""
+    app = Flask(__name__)
+    app.config.update({
+        'SQLALCHEMY_DATABASE_URI': 'sqlite://',
+        'SQLALCHEMY_TRACK_MODIFICATIONS': False
+    })
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def test_claim_is_compare_and_set():
+    """A queued job is claimed by exactly one worker; future and unknown-type jobs are skipped"""
+    print("=" * 60)
+    print("TESTING JOB CLAIM")
+    print("=" * 60)
+
+    app = create_app()
+    with app.app_context():
+        worker_a = JobQueue(app)
+        worker_b = JobQueue(app)
+        for queue in (worker_a, worker_b):
+            queue.register('ocr', lambda payload, ctx: {})
+        job = worker_a.enqueue('ocr', {'record_id': 'r1'})
+        worker_a.enqueue('ocr', {'record_id': 'later'}, run_after=datetime.now() + timedelta(hours=1))
+        worker_a.enqueue('unknown', {})
+
+        claimed = worker_a._claim_next_job('host:1:0')
+        assert claimed.job_id == job.job_id and claimed.status == 'running' and claimed.locked_by == 'host:1:0'
+        assert worker_b._claim_next_job('host:2:0') is None
+
+        # The conditional update only succeeds while the row is still queued
+        assert BackgroundJob.query.filter_by(id=job.id, status='queued')\
+            .update({'status': 'running'}, synchronize_session=False) == 0
+        db.session.rollback()
+        db.drop_all()
+    print("PASS: Job claim")
+
+
+def test_retry_backoff_and_last_attempt():
+    """Retryable errors back off exponentially until the last attempt; other errors fail at once"""
+    print("=" * 60)
+    print("TESTING RETRY BACKOFF")
+    print("=" * 60)
+
+    app = create_app()
+    with app.app_context():
+        queue = JobQueue(app, base_backoff_seconds=10, max_backoff_seconds=300)
+        seen = []
+
+        def flaky(payload, ctx):
+            seen.append((ctx.attempt, ctx.is_last_attempt))
+            raise JobRetryableError("model unavailable")
+
+        queue.register('flaky', flaky)
+        queue.register('broken', lambda payload, ctx: payload['missing'])
+        job = queue.enqueue('flaky', {}, max_attempts=3)
+
+        for attempt, base_delay in ((1, 10), (2, 20)):
+            before = datetime.now()
+            queue._run_job(queue._claim_next_job('w'))
+            job = BackgroundJob.query.get(job.id)
+            assert job.status == 'queued' and job.attempts == attempt and job.locked_by is None
+            delay = (job.run_after - before).total_seconds()
+            assert base_delay * 0.8 - 1 <= delay <= base_delay * 1.2 + 1
+            assert job.last_error == "JobRetryableError: model unavailable"
+            job.run_after = datetime.now()  # skip the wait
+            db.session.commit()
+
+        queue._run_job(queue._claim_next_job('w'))
+        job = BackgroundJob.query.get(job.id)
+        assert job.status == 'failed' and job.attempts == 3 and job.completed_at is not None
+        assert seen == [(1, False), (2, False), (3, True)]
+
+        broken = queue.enqueue('broken', {}, max_attempts=3)
+        queue._run_job(queue._claim_next_job('w'))
+        broken = BackgroundJob.query.get(broken.id)
+        assert broken.status == 'failed' and broken.attempts == 1 and broken.last_error.startswith('KeyError')
+
+        stats = queue.stats
+        assert stats['jobs_retried'] == 2 and stats['jobs_failed'] == 2 and stats['workers_busy'] == 0
+        db.drop_all()
+    print("PASS: Retry backoff")
+
+
+def test_keyed_enqueue_is_idempotent():
+    """Workers enqueueing the same run key share one job, even when the lookup misses"""
+    print("=" * 60)
+    print("TESTING KEYED ENQUEUE")
+    print("=" * 60)
+
+    app = create_app()
+    with app.app_context():
+        worker_a = JobQueue(app)
+        worker_b = JobQueue(app)
+        run_at = datetime(2026, 3, 2, 2, 0)
+        first = worker_a.enqueue('precompute_answers', {'recurring': True}, run_after=run_at,
+                                 job_key='precompute_answers@2026030202')
+        again = worker_b.enqueue('precompute_answers', {'recurring': True}, run_after=run_at,
+                                 job_key='precompute_answers@2026030202')
+        assert again.id == first.id
+
+        # Lost race: worker B's existence check ran before worker A inserted the row,
+        # so its insert hits the unique job_id and it returns A's job instead
+        lookups = []
+
+        def stale_first_lookup(job_id):
+            lookups.append(job_id)
+            return None if len(lookups) == 1 else BackgroundJob.query.filter_by(job_id=job_id).first()
+
+        worker_b.get_job = stale_first_lookup
+        raced = worker_b.enqueue('precompute_answers', {'recurring': True}, run_after=run_at,
+                                 job_key='precompute_answers@2026030202')
+        assert raced.id == first.id and len(lookups) == 2
+        assert BackgroundJob.query.filter_by(job_type='precompute_answers').count() == 1
+        db.drop_all()
+    print("PASS: Keyed enqueue")
+
+
+def test_stale_lock_recovery():
+    """Jobs left running by a dead worker are requeued; live ones are left alone"""
+    print("=" * 60)
+    print("TESTING STALE LOCK RECOVERY")
+    print("=" * 60)
+
+    app = create_app()
+    with app.app_context():
+        queue = JobQueue(app, stale_after_seconds=600)
+        queue.register('ocr', lambda payload, ctx: {'ok': True})
+        stale = queue.enqueue('ocr', {})
+        live = queue.enqueue('ocr', {})
+        for job, locked_at in ((stale, datetime.now() - timedelta(hours=1)), (live, datetime.now())):
+            job.status, job.locked_by, job.locked_at = 'running', 'dead:1:0', locked_at
+        db.session.commit()
+
+        assert queue._recover_stale_jobs() == 1
+        assert BackgroundJob.query.get(stale.id).status == 'queued'
+        assert BackgroundJob.query.get(stale.id).locked_by is None
+        assert BackgroundJob.query.get(live.id).status == 'running'
+
+        queue._run_job(queue._claim_next_job('w'))
+        recovered = BackgroundJob.query.get(stale.id)
+        assert recovered.status == 'succeeded' and recovered.get_result() == {'ok': True}
+        assert queue.stats['jobs_recovered'] == 1
+        db.drop_all()
+    print("PASS: Stale lock recovery")
+
+
+def run_all_tests():
+    """Run all job queue tests"""
+    setup_logging()
+    tests = [test_claim_is_compare_and_set, test_retry_backoff_and_last_attempt, test_keyed_enqueue_is_idempotent,
+             test_stale_lock_recovery]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"FAIL: {test.__name__}: {e}")
+    print(f"\n{passed}/{len(tests)} tests passed")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
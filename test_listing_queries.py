@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Test script for the dashboard listing queries: each listing costs a fixed number of
+queries whether it returns one row or many
+"""
+
+import sys
+import os
+import logging
+from datetime import datetime, timedelta
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from flask import Flask
+
+from enhanced_database_models import db, User, Doctor, Appointment, Pharmacy, MedicineOrder
+from listing_queries import patient_appointments, doctor_day_appointments, pharmacy_dashboard
+from query_counter import count_queries, assert_query_count
+
+
+def setup_logging():
+    """Setup logging for tests"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+
+def create_app():
+    """Empty in-memory database on the shared models"""
+    app = Flask(__name__)
+    app.config.update({
+        'SQLALCHEMY_DATABASE_URI': 'sqlite://',
+        'SQLALCHEMY_TRACK_MODIFICATIONS': False
+    })
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def seed(rows: int):
+    """One doctor and one pharmacy; every row is a new patient with an appointment and an order"""
+    doctor = Doctor(doctor_id='DOC001', full_name='Dr. Kaur', specialization='General Physician')
+    pharmacy = Pharmacy(pharmacy_id='PH001', name='Nabha Medicos', address='Main Bazaar, Nabha')
+    db.session.add_all([doctor, pharmacy])
+    db.session.flush()
+    today = datetime.now().replace(hour=9, minute=0, second=0, microsecond=0)
+    for i in range(rows):
+        patient = User(patient_id=f'PAT{i:04d}', email=f'patient{i}@example.com',
+                       full_name=f'Patient {i}', password_hash='x')
+        db.session.add(patient)
+        db.session.flush()
+        db.session.add(Appointment(user_id=patient.id, doctor_id=doctor.id,
+                                   appointment_datetime=today + timedelta(minutes=10 * i)))
+        db.session.add(MedicineOrder(user_id=patient.id, pharmacy_id=pharmacy.id, items='[]',
+                                     status='Out for Delivery' if i % 2 else 'Placed'))
+    db.session.commit()
+    return doctor.id, pharmacy.id, patient.id
+
+
+def listing_query_counts(rows: int):
+    """Queries per listing with the given number of rows seeded"""
+    app = create_app()
+    with app.app_context():
+        doctor_id, pharmacy_id, last_patient_id = seed(rows)
+        db.session.expire_all()
+
+        with count_queries(db.engine) as queries:
+            assert len(doctor_day_appointments(doctor_id, datetime.now().date())) == rows
+        doctor_queries = queries.count
+
+        with count_queries(db.engine) as queries:
+            dashboard = pharmacy_dashboard(pharmacy_id)
+        assert len(dashboard['orders']) == (rows + 1) // 2
+        assert dashboard['pendingDeliveriesCount'] == rows // 2
+        pharmacy_queries = queries.count
+
+        with count_queries(db.engine) as queries:
+            appointments = patient_appointments(last_patient_id)
+        assert appointments[0]['doctorName'] == 'Dr. Kaur'
+        patient_queries = queries.count
+
+        with count_queries(db.engine) as queries:
+            assert pharmacy_dashboard(pharmacy_id + 1) is None
+        assert_query_count(queries, 1)
+
+        db.session.remove()
+        db.drop_all()
+    return doctor_queries, pharmacy_queries, patient_queries
+
+
+def test_constant_query_counts():
+    """Listings issue the same number of queries for 1 and 40 rows"""
+    print("=" * 60)
+    print("TESTING LISTING QUERY COUNTS")
+    print("=" * 60)
+
+    doctor_queries, pharmacy_queries, patient_queries = listing_query_counts(40)
+    assert listing_query_counts(1) == (doctor_queries, pharmacy_queries, patient_queries)
+    assert (doctor_queries, pharmacy_queries, patient_queries) == (1, 2, 1)
+    print("PASS: Listing query counts")
+
+
+def run_all_tests():
+    """Run all listing query tests"""
+    setup_logging()
+    tests = [test_constant_query_counts]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"FAIL: {test.__name__}: {e}")
+    print(f"\n{passed}/{len(tests)} tests passed")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Test script for the upstream LLM rate limiter and priority scheduler
+"""
+
+import sys
+import os
+import time
+import threading
+import logging
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from llm_rate_limiter import (
+    LLMRateLimiter, llm_priority, parse_retry_after,
+    PRIORITY_EMERGENCY, PRIORITY_LOW, PRIORITY_NORMAL
+)
+
+
+def setup_logging():
+    """Setup logging for tests"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+
+def test_priority_order():
+    """Emergency waiters are served before earlier low-priority waiters"""
+    print("=" * 60)
+    print("TESTING PRIORITY ORDER")
+    print("=" * 60)
+
+    limiter = LLMRateLimiter("test", requests_per_minute=600, burst=1)  # 10/s
+    assert limiter.acquire(PRIORITY_NORMAL)  # drain the single token
+
+    served = []
+
+    def worker(priority, label):
+        if limiter.acquire(priority, deadline=time.monotonic() + 5):
+            served.append(label)
+
+    threads = [threading.Thread(target=worker, args=(PRIORITY_LOW, f"low{i}")) for i in range(3)]
+    for t in threads:
+        t.start()
+    time.sleep(0.02)
+    urgent = threading.Thread(target=worker, args=(PRIORITY_EMERGENCY, "emergency"))
+    urgent.start()
+    for t in threads + [urgent]:
+        t.join()
+
+    assert served[0] == "emergency", served
+    assert len(served) == 4
+    print("PASS: Emergency served first")
+
+
+def test_shed_when_deadline_too_short():
+    """Requests are shed immediately when the estimated wait exceeds their deadline"""
+    print("=" * 60)
+    print("TESTING LOAD SHEDDING")
+    print("=" * 60)
+
+    limiter = LLMRateLimiter("test", requests_per_minute=6, burst=1)  # one token per 10s
+    assert limiter.acquire()
+    start = time.monotonic()
+    with llm_priority(PRIORITY_LOW, deadline_seconds=0.5):
+        assert limiter.acquire() is False
+    assert time.monotonic() - start < 0.1
+    assert limiter.get_stats()['shed_deadline'] == 1
+    print("PASS: Load shed without waiting")
+
+
+def test_retry_after():
+    """Retry-After pauses the bucket and parses both header forms"""
+    print("=" * 60)
+    print("TESTING RETRY-AFTER")
+    print("=" * 60)
+
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after(None) == 2.0
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+
+    limiter = LLMRateLimiter("test", requests_per_minute=600, burst=5)
+    limiter.penalize(0.2)
+    start = time.monotonic()
+    assert limiter.acquire(deadline=time.monotonic() + 2)
+    assert time.monotonic() - start >= 0.19
+    stats = limiter.get_stats()
+    assert stats['rate_limited_responses'] == 1
+    assert 'normal' in stats['wait_ms']
+    print("PASS: Retry-After honoured")
+
+
+def run_all_tests():
+    """Run all rate limiter tests"""
+    setup_logging()
+    tests = [test_priority_order, test_shed_when_deadline_too_short, test_retry_after]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"FAIL: {test.__name__}: {e}")
+    print(f"\n{passed}/{len(tests)} tests passed")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
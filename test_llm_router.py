@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Test script for latency-aware multi-provider LLM routing
+"""
+
+import sys
+import os
+import time
+import logging
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from llm_router import LLMRouter, TASK_INTENT, TASK_ACTION, TASK_EMOJI
+from llm_rate_limiter import LLMRateLimiter
+
+
+def setup_logging():
+    """Setup logging for tests"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+
+class FakeClient:
+    """Stand-in client: fixed delay, optional failure, optionally shed by a full rate limiter"""
+
+    def __init__(self, name, delay=0.0, fail=False, shed=False):
+        self.name = name
+        self.delay = delay
+        self.fail = fail
+        self.limiter = LLMRateLimiter(name, max_queue=0) if shed else None
+        self.is_available = True
+        self.calls = 0
+
+    def complete(self):
+        if self.limiter is not None and not self.limiter.acquire():
+            return None
+        self.calls += 1
+        time.sleep(self.delay)
+        return None if self.fail else f"answer from {self.name}"
+
+
+def _router(candidates, routes, clients):
+    config = {
+        "candidates": {name: {"base_url": f"http://{name}", "model": name, **spec} for name, spec in candidates.items()},
+        "routes": routes
+    }
+    return LLMRouter(config, client_factory=lambda candidate: clients[candidate.name])
+
+
+def test_failover_and_circuit():
+    """A failing provider is skipped over, then benched after repeated failures"""
+    print("=" * 60)
+    print("TESTING FAILOVER")
+    print("=" * 60)
+
+    clients = {"primary": FakeClient("primary", fail=True), "backup": FakeClient("backup")}
+    router = _router({"primary": {"expected_latency_ms": 100}, "backup": {"expected_latency_ms": 500}},
+                     {TASK_ACTION: ["primary", "backup"]}, clients)
+
+    assert router.call(TASK_ACTION, lambda c: c.complete()) == "answer from backup"
+    stats = router.get_stats()[TASK_ACTION]
+    assert stats['calls'] == 1 and stats['failovers'] == 1
+    assert stats['last_decision']['tried'] == ["primary", "backup"]
+
+    # The error EWMA and the backup's live latency now rank the backup first
+    assert router.rank(TASK_ACTION) == ["backup", "primary"]
+    router.call(TASK_ACTION, lambda c: c.complete())
+    assert clients["primary"].calls == 1
+
+    # Repeated failures bench a candidate; exhausted routes return None for the local fallback
+    lone = _router({"primary": {}}, {TASK_ACTION: ["primary"]}, {"primary": FakeClient("primary", fail=True)})
+    for _ in range(3):
+        assert lone.call(TASK_ACTION, lambda c: c.complete()) is None
+    stats = lone.get_stats()[TASK_ACTION]
+    assert stats['exhausted'] == 3 and stats['candidates']['primary']['circuit_open']
+    print("PASS: Failover and circuit breaker")
+
+
+def test_shed_calls_skip_circuit():
+    """Calls shed by the local rate limiter fail over but never bench a healthy provider"""
+    print("=" * 60)
+    print("TESTING SHED CALLS")
+    print("=" * 60)
+
+    clients = {"primary": FakeClient("primary", shed=True), "backup": FakeClient("backup")}
+    router = _router({"primary": {"expected_latency_ms": 100}, "backup": {"expected_latency_ms": 500}},
+                     {TASK_ACTION: ["primary", "backup"]}, clients)
+    assert router.call(TASK_ACTION, lambda c: c.complete()) == "answer from backup"
+    stats = router.get_stats()[TASK_ACTION]
+    assert stats['shed'] == 1 and stats['failovers'] == 1
+    assert stats['candidates']['primary']['failures'] == 0 and stats['candidates']['primary']['ewma_error_rate'] == 0.0
+
+    # Shedding as often as the breaker threshold leaves the circuit closed
+    lone = _router({"primary": {}}, {TASK_ACTION: ["primary"]}, {"primary": FakeClient("primary", shed=True)})
+    for _ in range(3):
+        assert lone.call(TASK_ACTION, lambda c: c.complete()) is None
+    stats = lone.get_stats()[TASK_ACTION]
+    assert stats['shed'] == 3 and stats['exhausted'] == 3
+    assert stats['candidates']['primary']['failures'] == 0 and not stats['candidates']['primary']['circuit_open']
+    print("PASS: Shed calls skip the circuit breaker")
+
+
+def test_prefers_lower_latency():
+    """Live EWMA latency moves traffic to the faster provider"""
+    print("=" * 60)
+    print("TESTING LATENCY-AWARE SELECTION")
+    print("=" * 60)
+
+    clients = {"slow": FakeClient("slow", delay=0.2), "fast": FakeClient("fast", delay=0.0)}
+    router = _router({"slow": {"expected_latency_ms": 50}, "fast": {"expected_latency_ms": 100}},
+                     {TASK_ACTION: ["slow", "fast"]}, clients)
+
+    assert router.call(TASK_ACTION, lambda c: c.complete()) == "answer from slow"  # prior favours slow
+    for _ in range(5):
+        assert router.call(TASK_ACTION, lambda c: c.complete()) == "answer from fast"
+    assert router.get_stats()[TASK_ACTION]['candidates']['slow']['ewma_latency_ms'] >= 190
+    print("PASS: Faster provider preferred")
+
+
+def test_classification_prefers_small_models():
+    """Intent classification favours small models; generation goes by latency alone"""
+    print("=" * 60)
+    print("TESTING MODEL TIER PREFERENCE")
+    print("=" * 60)
+
+    clients = {"big": FakeClient("big"), "small": FakeClient("small")}
+    router = _router(
+        {"big": {"tier": "large", "expected_latency_ms": 300}, "small": {"tier": "small", "expected_latency_ms": 500}},
+        {TASK_INTENT: ["big", "small"], TASK_ACTION: ["big", "small"]}, clients)
+    assert router.rank(TASK_INTENT) == ["small", "big"]
+    assert router.rank(TASK_ACTION) == ["big", "small"]
+    print("PASS: Small models preferred for classification")
+
+
+def test_failover_between_stub_endpoints():
+    """Real ApiClients against two local stand-in servers: the erroring one fails over"""
+    print("=" * 60)
+    print("TESTING FAILOVER AGAINST STUB ENDPOINTS")
+    print("=" * 60)
+
+    try:
+        import requests  # noqa: F401
+    except ImportError:
+        print("SKIP: requests not installed")
+        return
+
+    from llm_stub_server import start_stub_server_in_thread
+    from api_ollama_integration import ApiClient
+
+    broken, broken_url = start_stub_server_in_thread(latency="fixed:0")
+    healthy, healthy_url = start_stub_server_in_thread(latency="fixed:0")
+    try:
+        # The availability probe hits the server too, so only start failing once the clients exist
+        clients = {"broken": ApiClient(api_key="stub", base_url=broken_url, model="stub-a"),
+                   "healthy": ApiClient(api_key="stub", base_url=healthy_url, model="stub-b")}
+        broken.backend.error_rate = 1.0
+        router = _router({"broken": {"expected_latency_ms": 10}, "healthy": {"expected_latency_ms": 20}},
+                         {TASK_ACTION: ["broken", "healthy"]}, clients)
+        result = router.call(TASK_ACTION, lambda c: c.generate_response("book appointment"))
+        assert result and router.get_stats()[TASK_ACTION]['last_decision']['candidate'] == "healthy"
+    finally:
+        broken.shutdown()
+        healthy.shutdown()
+    print("PASS: Failover between stub endpoints")
+
+
+def test_route_mixes_client_types():
+    """A text ApiClient candidate can serve a task whose default client is the vision client"""
+    print("=" * 60)
+    print("TESTING MIXED CLIENT TYPES")
+    print("=" * 60)
+
+    try:
+        import requests  # noqa: F401
+    except ImportError:
+        print("SKIP: requests not installed")
+        return
+
+    from llm_stub_server import start_stub_server_in_thread
+    import api_ollama_integration
+    from api_ollama_integration import ApiClient, GroqScoutClient
+
+    server, base_url = start_stub_server_in_thread(latency="fixed:0")
+    default_router = api_ollama_integration.llm_router
+    try:
+        text = ApiClient(api_key="stub", base_url=base_url, model="stub-text")
+        api_ollama_integration.llm_router = _router({"stub-text": {}}, {TASK_EMOJI: ["stub-text"]},
+                                                    {"stub-text": text})
+        scout = GroqScoutClient(api_key="stub", base_url="http://127.0.0.1:9")
+        assert scout.interpret_emojis("\U0001F602\U0001F602")
+        stats = api_ollama_integration.llm_router.get_stats()[TASK_EMOJI]
+        assert stats['last_decision']['candidate'] == "stub-text"
+    finally:
+        api_ollama_integration.llm_router = default_router
+        server.shutdown()
+    print("PASS: Mixed client types")
+
+
+def run_all_tests():
+    """Run all router tests"""
+    setup_logging()
+    tests = [test_failover_and_circuit, test_shed_calls_skip_circuit, test_prefers_lower_latency,
+             test_classification_prefers_small_models, test_failover_between_stub_endpoints,
+             test_route_mixes_client_types]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"FAIL: {test.__name__}: {e}")
+    print(f"\n{passed}/{len(tests)} tests passed")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Test script for the local OpenAI-compatible LLM stand-in server
+"""
+
+import sys
+import os
+import json
+import tempfile
+import logging
+import urllib.error
+import urllib.request
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from llm_stub_server import start_stub_server_in_thread, request_fingerprint
+
+
+def setup_logging():
+    """Setup logging for tests"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+
+def _post(base_url, payload):
+    request = urllib.request.Request(f"{base_url}/chat/completions", data=json.dumps(payload).encode('utf-8'),
+                                     headers={'Content-Type': 'application/json'}, method='POST')
+    with urllib.request.urlopen(request, timeout=10) as response:
+        return response.status, response.headers, response.read().decode('utf-8')
+
+
+def test_canned_json_and_image():
+    """JSON-mode requests get a valid action payload; image parts get a vision-style reply"""
+    print("=" * 60)
+    print("TESTING CANNED RESPONSES")
+    print("=" * 60)
+
+    server, base_url = start_stub_server_in_thread(latency="fixed:0", seed=1)
+    try:
+        status, _, body = _post(base_url, {
+            "model": "stub", "response_format": {"type": "json_object"},
+            "messages": [{"role": "system", "content": "Respond in JSON"}, {"role": "user", "content": "book appointment"}]
+        })
+        result = json.loads(body)
+        payload = json.loads(result["choices"][0]["message"]["content"])
+        assert status == 200 and payload["action"] == "SHOW_APP_FEATURES"
+        assert result["usage"]["completion_tokens"] > 0
+
+        _, _, body = _post(base_url, {"model": "stub", "messages": [{"role": "user", "content": [
+            {"type": "text", "text": "What medicine is this?"},
+            {"type": "image_url", "image_url": {"url": "data:image/jpeg;base64,AAAA"}}
+        ]}]})
+        assert "Paracetamol" in json.loads(body)["choices"][0]["message"]["content"]
+        assert server.backend.stats["images"] == 1
+    finally:
+        server.shutdown()
+    print("PASS: Canned JSON and image responses")
+
+
+def test_streaming_and_rate_limits():
+    """stream=true returns SSE chunks ending in [DONE]; a 429 rate of 1.0 always sends Retry-After"""
+    print("=" * 60)
+    print("TESTING STREAMING AND 429 INJECTION")
+    print("=" * 60)
+
+    server, base_url = start_stub_server_in_thread(latency="fixed:0")
+    try:
+        _, headers, body = _post(base_url, {"model": "stub", "stream": True,
+                                            "messages": [{"role": "user", "content": "hello there"}]})
+        assert headers["Content-Type"] == "text/event-stream"
+        events = [line[6:] for line in body.splitlines() if line.startswith("data: ")]
+        assert events[-1] == "[DONE]"
+        text = "".join(json.loads(e)["choices"][0]["delta"].get("content", "") for e in events[:-1])
+        assert text == "Stub reply to: hello there", text
+    finally:
+        server.shutdown()
+
+    server, base_url = start_stub_server_in_thread(latency="fixed:0", rate_limit_rate=1.0, retry_after=3)
+    try:
+        try:
+            _post(base_url, {"model": "stub", "messages": [{"role": "user", "content": "hi"}]})
+            assert False, "expected 429"
+        except urllib.error.HTTPError as e:
+            assert e.code == 429 and e.headers["Retry-After"] == "3"
+    finally:
+        server.shutdown()
+    print("PASS: Streaming and rate limit injection")
+
+
+def test_replay_cassette():
+    """Replay mode serves recorded responses by request fingerprint"""
+    print("=" * 60)
+    print("TESTING RECORD/REPLAY")
+    print("=" * 60)
+
+    request = {"model": "stub", "messages": [{"role": "user", "content": "recorded question"}]}
+    recorded = {"id": "chatcmpl-real", "choices": [{"index": 0, "message": {"role": "assistant", "content": "recorded answer"}}],
+                "usage": {"prompt_tokens": 3, "completion_tokens": 2, "total_tokens": 5}}
+    with tempfile.NamedTemporaryFile("w", suffix=".jsonl", delete=False) as f:
+        f.write(json.dumps({"fingerprint": request_fingerprint(request), "response": recorded}) + "\n")
+        cassette = f.name
+
+    server, base_url = start_stub_server_in_thread(mode="replay", cassette_path=cassette)
+    try:
+        _, _, body = _post(base_url, request)
+        assert json.loads(body)["choices"][0]["message"]["content"] == "recorded answer"
+        _, _, body = _post(base_url, {"model": "stub", "messages": [{"role": "user", "content": "new question"}]})
+        assert json.loads(body)["choices"][0]["message"]["content"].startswith("Stub reply")
+        assert server.backend.stats["replayed"] == 1 and server.backend.stats["canned"] == 1
+    finally:
+        server.shutdown()
+        os.unlink(cassette)
+    print("PASS: Replay from cassette")
+
+
+def run_all_tests():
+    """Run all stub server tests"""
+    setup_logging()
+    tests = [test_canned_json_and_image, test_streaming_and_rate_limits, test_replay_cassette]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"FAIL: {test.__name__}: {e}")
+    print(f"\n{passed}/{len(tests)} tests passed")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Test script for the table-backed medicine reminder helpers
+"""
+
+import sys
+import os
+import logging
+from datetime import datetime, date
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from medicine_reminders import next_due_at, compute_pending_alerts, expected_doses, memory_reminder_rows
+from conversation_memory import ProgressiveConversationMemory
+
+
+def setup_logging():
+    """Setup logging for tests"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+
+def test_next_due_at():
+    """The next slot is the first one strictly after now, wrapping to tomorrow"""
+    print("=" * 60)
+    print("TESTING NEXT DUE SLOT")
+    print("=" * 60)
+
+    times = ['20:00', '08:00', 'bad']
+    assert next_due_at(times, datetime(2026, 3, 1, 7, 59)) == datetime(2026, 3, 1, 8, 0)
+    assert next_due_at(times, datetime(2026, 3, 1, 8, 0)) == datetime(2026, 3, 1, 20, 0)
+    assert next_due_at(times, datetime(2026, 3, 1, 21, 0)) == datetime(2026, 3, 2, 8, 0)
+    assert next_due_at(['x'], datetime(2026, 3, 1, 8, 0)) is None
+    print("PASS: Next due slot")
+
+
+def test_pending_alerts_match_memory():
+    """Alerts computed from table rows match the profile-based get_reminder_alerts"""
+    print("=" * 60)
+    print("TESTING PENDING ALERTS")
+    print("=" * 60)
+
+    memory = ProgressiveConversationMemory()
+    for name, times in (('Paracetamol', ['00:00', '23:59']), ('Cetirizine', ['00:00']), ('Iron', ['00:00'])):
+        memory.schedule_medicine_reminder('u1', {'name': name, 'dosage': '1 tab', 'frequency': 'daily',
+                                                 'times': times, 'duration_days': 5, 'start_date': '2026-03-01'})
+    memory.update_reminder_adherence('u1', 'Cetirizine', '00:01')
+
+    now = datetime.now()
+    alerts = compute_pending_alerts(memory.get_medicine_reminders('u1'), ['Cetirizine'], now)
+    assert alerts == memory.get_reminder_alerts('u1')
+    assert [a['medicine_name'] for a in alerts][-1] == 'Iron'
+    print("PASS: Pending alerts")
+
+
+def test_adherence_and_migration_helpers():
+    """Expected reminder-days respect start date and duration; migration rows come from user_data"""
+    print("=" * 60)
+    print("TESTING ADHERENCE AND MIGRATION HELPERS")
+    print("=" * 60)
+
+    since, until = date(2026, 3, 1), date(2026, 3, 7)
+    assert expected_doses(None, None, since, until) == 7
+    assert expected_doses(date(2026, 3, 5), 30, since, until) == 3
+    assert expected_doses(date(2026, 2, 20), 5, since, until) == 0
+    assert expected_doses(date(2026, 2, 25), 5, since, until) == 1
+
+    memory = ProgressiveConversationMemory()
+    memory.create_or_get_user('empty')
+    memory.schedule_medicine_reminder('u1', {'name': 'Iron', 'dosage': '1 tab', 'frequency': 'daily',
+                                             'times': ['08:00'], 'duration_days': 5, 'start_date': '2026-03-01'})
+    memory.update_reminder_adherence('u1', 'Iron', '08:05')
+    rows = list(memory_reminder_rows(memory.user_profiles.values()))
+    assert len(rows) == 1 and rows[0][0] == 'u1'
+    assert rows[0][1][0]['medicine_name'] == 'Iron' and len(rows[0][2]) == 1
+    print("PASS: Adherence and migration helpers")
+
+
+class RecordingRepository:
+    """Stand-in for ReminderRepository holding one user's table rows"""
+
+    def __init__(self):
+        self.rows = {'u1': {'medicine_reminders': [{'medicine_name': 'Iron'}],
+                            'adherence_events': [{'medicine_name': 'Iron', 'date': '2026-03-01'}]}}
+
+    def export_user(self, user_id):
+        return self.rows.get(user_id, {'medicine_reminders': [], 'adherence_events': []})
+
+    def delete_user(self, user_id):
+        return len(self.rows.pop(user_id, {}))
+
+
+def test_privacy_export_and_delete_use_tables():
+    """With the tables attached, privacy export includes them and privacy delete clears them"""
+    print("=" * 60)
+    print("TESTING PRIVACY EXPORT AND DELETE")
+    print("=" * 60)
+
+    memory = ProgressiveConversationMemory()
+    repository = RecordingRepository()
+    memory.attach_reminder_repository(repository)
+    memory.create_or_get_user('u1')
+    memory.create_or_get_user('u2')
+
+    export = memory.export_user_data('u1')
+    assert export['medicine_reminders'] == [{'medicine_name': 'Iron'}] and len(export['adherence_events']) == 1
+    assert 'profile' in export and 'export_timestamp' in export
+    assert memory.export_user_data('u2')['medicine_reminders'] == []
+    assert memory.export_user_data('nobody') == {}
+
+    assert memory.delete_user_data('u1')
+    assert 'u1' not in repository.rows and memory.export_user_data('u1') == {}
+    print("PASS: Privacy export and delete")
+
+
+def run_all_tests():
+    """Run all medicine reminder tests"""
+    setup_logging()
+    tests = [test_next_due_at, test_pending_alerts_match_memory, test_adherence_and_migration_helpers,
+             test_privacy_export_and_delete_use_tables]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"FAIL: {test.__name__}: {e}")
+    print(f"\n{passed}/{len(tests)} tests passed")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
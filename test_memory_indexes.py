@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Test script for the conversation memory secondary indexes and incremental aggregates
+"""
+
+import sys
+import os
+import tempfile
+import logging
+from datetime import datetime, timedelta
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from conversation_memory import ProgressiveConversationMemory
+
+
+def setup_logging():
+    """Setup logging for tests"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+
+def test_delete_and_cleanup_use_indexes():
+    """Deletes drop only the user's sessions; cleanup pops expired sessions and skips stale heap entries"""
+    print("=" * 60)
+    print("TESTING SESSION INDEXES")
+    print("=" * 60)
+
+    memory = ProgressiveConversationMemory()
+    memory.add_conversation_turn('u1', 'hello', 'hi', {'primary_intent': 'greeting'}, session_id='s1')
+    memory.add_conversation_turn('u1', 'hello', 'hi', {'primary_intent': 'greeting'}, session_id='s2')
+    memory.add_conversation_turn('u2', 'hello', 'hi', {'primary_intent': 'greeting'}, session_id='s3')
+    assert memory.user_sessions['u1'] == {'s1', 's2'}
+
+    memory.session_contexts['s3']['start_time'] = datetime.now() - timedelta(hours=30)
+    memory._rebuild_indexes()
+    assert memory.cleanup_old_sessions(hours=24) == 1
+    assert 's3' not in memory.session_contexts and 'u2' not in memory.user_sessions
+
+    # s1 is deleted before it expires; its heap entry must not remove a restarted s1
+    assert memory.delete_user_data('u1')
+    assert memory.session_contexts == {} and 'u1' not in memory.user_sessions
+    memory.add_conversation_turn('u3', 'hello', 'hi', {'primary_intent': 'greeting'}, session_id='s1')
+    assert memory.cleanup_old_sessions(hours=0) == 1
+    assert memory.cleanup_old_sessions(hours=0) == 0
+    print("PASS: Session indexes")
+
+
+def test_stats_counters_match_scan():
+    """Incremental counters agree with a full scan, including after delete and reload"""
+    print("=" * 60)
+    print("TESTING INCREMENTAL STATS")
+    print("=" * 60)
+
+    memory = ProgressiveConversationMemory()
+    for i in range(6):
+        memory.set_current_task(f'u{i}', 'appointment_booking' if i % 2 else 'health_record_request')
+        memory.complete_task(f'u{i}')
+    memory.create_or_get_user('old')
+    memory.user_profiles['old'].last_interaction = datetime.now() - timedelta(days=30)
+    memory._rebuild_indexes()
+    memory.delete_user_data('u0')
+
+    stats = memory.get_system_stats()
+    profiles = list(memory.user_profiles.values())
+    assert stats['total_users'] == len(profiles) == 6
+    assert stats['total_tasks_completed'] == 5
+    assert stats['active_users_week'] == 5
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'memory.json')
+        assert memory.save_to_file(path)
+        restored = ProgressiveConversationMemory()
+        assert restored.load_from_file(path)
+        restored_stats = restored.get_system_stats()
+        for key in ('total_users', 'total_tasks_completed', 'active_users_week'):
+            assert restored_stats[key] == stats[key], key
+    print("PASS: Incremental stats")
+
+
+def run_all_tests():
+    """Run all memory index tests"""
+    setup_logging()
+    tests = [test_delete_and_cleanup_use_indexes, test_stats_counters_match_scan]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"FAIL: {test.__name__}: {e}")
+    print(f"\n{passed}/{len(tests)} tests passed")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Test script for the append-only conversation memory journal
+"""
+
+import sys
+import os
+import json
+import time
+import tempfile
+import logging
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from conversation_memory import ProgressiveConversationMemory
+
+REMINDER = {
+    'name': 'Paracetamol', 'dosage': '500mg', 'frequency': 'twice daily',
+    'times': ['08:00', '20:00'], 'duration_days': 5, 'start_date': '2026-03-01'
+}
+
+
+def setup_logging():
+    """Setup logging for tests"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+
+def test_replay_after_restart():
+    """Reminders, adherence and deletions survive a restart through the journal alone"""
+    print("=" * 60)
+    print("TESTING JOURNAL REPLAY")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'conversation_memory.json')
+        memory = ProgressiveConversationMemory()
+        assert memory.enable_journal(path, flush_interval=0.01) == 0
+        memory.schedule_medicine_reminder('u1', REMINDER)
+        memory.update_reminder_adherence('u1', 'Paracetamol', '08:05')
+        memory.schedule_medicine_reminder('u2', REMINDER)
+        memory.delete_user_data('u2')
+        memory.journal.stop()
+
+        assert not os.path.exists(path)  # nothing rewrote the full snapshot
+        with open(path + '.journal', encoding='utf-8') as f:
+            assert len(f.readlines()) == 4
+
+        restored = ProgressiveConversationMemory()
+        assert restored.enable_journal(path) == 4
+        assert [r['medicine_name'] for r in restored.get_medicine_reminders('u1')] == ['Paracetamol']
+        adherence = restored.get_user_profile('u1').user_data['medicine_adherence']
+        assert list(adherence.values())[0]['Paracetamol']['taken_time'] == '08:05'
+        assert restored.get_user_profile('u2') is None
+        restored.journal.stop()
+    print("PASS: Journal replay")
+
+
+def test_compaction():
+    """Compaction folds the journal into a snapshot; later records replay on top of it"""
+    print("=" * 60)
+    print("TESTING COMPACTION")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'conversation_memory.json')
+        memory = ProgressiveConversationMemory()
+        memory.enable_journal(path, flush_interval=0.01)
+        memory.schedule_medicine_reminder('u1', REMINDER)
+        assert memory.journal.compact()
+        assert os.path.getsize(path + '.journal') == 0
+        with open(path, encoding='utf-8') as f:
+            assert json.load(f)['journal_seq'] == 1
+
+        memory.schedule_medicine_reminder('u1', dict(REMINDER, name='Cetirizine'))
+        memory.journal.stop()
+
+        restored = ProgressiveConversationMemory()
+        assert restored.enable_journal(path) == 1
+        names = [r['medicine_name'] for r in restored.get_medicine_reminders('u1')]
+        assert names == ['Paracetamol', 'Cetirizine']
+        assert restored.journal.get_stats()['seq'] == 2
+        restored.journal.stop()
+    print("PASS: Compaction")
+
+
+def test_compaction_by_size():
+    """A journal outgrowing the snapshot compacts even when few records have been written"""
+    print("=" * 60)
+    print("TESTING SIZE-TRIGGERED COMPACTION")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'conversation_memory.json')
+        memory = ProgressiveConversationMemory()
+        memory.enable_journal(path, flush_interval=0.01, compact_every=0, compact_bytes_ratio=0)
+        memory.schedule_medicine_reminder('u1', REMINDER)
+        memory.journal.flush()
+        assert memory.journal.get_stats()['journal_bytes'] > 0
+        assert not memory.journal.should_compact()
+
+        # With the ratio enabled the flusher compacts on its own
+        memory.journal.compact_min_bytes = 1
+        memory.journal.compact_bytes_ratio = 2.0
+        deadline = time.time() + 5
+        while memory.journal.get_stats()['journal_bytes'] and time.time() < deadline:
+            time.sleep(0.01)
+        stats = memory.journal.get_stats()
+        assert stats['journal_bytes'] == 0 and stats['snapshot_seq'] == 1
+        assert stats['snapshot_bytes'] == os.path.getsize(path)
+        assert os.path.getsize(path + '.journal') == 0
+        memory.journal.stop()
+    print("PASS: Size-triggered compaction")
+
+
+def test_torn_tail_and_stale_records():
+    """A half-written last record is dropped and records already in the snapshot are skipped"""
+    print("=" * 60)
+    print("TESTING CRASH RECOVERY")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'conversation_memory.json')
+        memory = ProgressiveConversationMemory()
+        memory.enable_journal(path, flush_interval=0.01)
+        memory.schedule_medicine_reminder('u1', REMINDER)
+        memory.journal.flush()
+        with open(path + '.journal', encoding='utf-8') as f:
+            old_record = f.read()
+        memory.journal.compact()
+        memory.journal.stop()
+
+        # Simulate a crash after the snapshot was replaced but before truncation, plus a torn append
+        with open(path + '.journal', 'w', encoding='utf-8') as f:
+            f.write(old_record + '{"seq": 2, "op": "ups')
+
+        restored = ProgressiveConversationMemory()
+        assert restored.enable_journal(path, flush_interval=0.01) == 0
+        stats = restored.journal.get_stats()
+        assert stats['skipped_on_replay'] == 1 and stats['torn_records'] == 1
+        assert len(restored.get_medicine_reminders('u1')) == 1
+
+        assert restored.journal.append('upsert', 'u3', {'user_id': 'u3'}, wait=True) == 2
+        with open(path + '.journal', encoding='utf-8') as f:
+            assert [json.loads(line)['seq'] for line in f] == [1, 2]
+        restored.journal.stop()
+    print("PASS: Crash recovery")
+
+
+def test_read_only_load():
+    """A read-only reader beside a live journal restores everything and leaves the files untouched"""
+    print("=" * 60)
+    print("TESTING READ-ONLY LOAD")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'conversation_memory.json')
+        live = ProgressiveConversationMemory()
+        live.enable_journal(path, flush_interval=0.01)
+        live.schedule_medicine_reminder('u1', REMINDER)
+        live.schedule_medicine_reminder('u2', REMINDER)
+        live.journal.flush()
+        with open(path + '.journal', 'a', encoding='utf-8') as f:
+            f.write('{"seq": 99, "op": "ups')  # an append the live process is still writing
+        with open(path + '.journal', 'rb') as f:
+            before = f.read()
+
+        reader = ProgressiveConversationMemory()
+        assert reader.enable_journal(path, compact_every=1, read_only=True) == 2
+        assert reader.journal is None and reader.get_medicine_reminders('u2')[0]['medicine_name'] == 'Paracetamol'
+        reader.add_conversation_turn('u1', 'not persisted', 'ok', {'primary_intent': 'greeting'})
+        with open(path + '.journal', 'rb') as f:
+            assert f.read() == before
+        assert not os.path.exists(path)  # nothing was compacted into a snapshot
+        live.journal.stop()
+    print("PASS: Read-only load")
+
+
+def run_all_tests():
+    """Run all memory journal tests"""
+    setup_logging()
+    tests = [test_replay_after_restart, test_compaction, test_compaction_by_size,
+             test_torn_tail_and_stale_records, test_read_only_load]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"FAIL: {test.__name__}: {e}")
+    print(f"\n{passed}/{len(tests)} tests passed")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Test script for the sharded binary conversation memory snapshot
+"""
+
+import sys
+import os
+import json
+import tempfile
+import logging
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from conversation_memory import ProgressiveConversationMemory
+from memory_snapshot import ShardedSnapshot, encode_shard, decode_shard, pack_record, CODEC_JSON, COMPRESSION_ZLIB
+
+
+def setup_logging():
+    """Setup logging for tests"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+
+def populate(memory: ProgressiveConversationMemory, users: int) -> None:
+    for i in range(users):
+        memory.add_conversation_turn(f'u{i}', f'hello {i}', 'hi', {'primary_intent': 'greeting'},
+                                     session_id=f's{i}')
+
+
+def test_shard_round_trip():
+    """Shards decode to the records they were written with, in order"""
+    print("=" * 60)
+    print("TESTING SHARD ENCODING")
+    print("=" * 60)
+
+    records = [{'user_id': 'u1', 'full_name': 'ਪ੍ਰੀਤ'}, {'user_id': 'u2', 'message_count': 3}]
+    frames = [(r['user_id'], pack_record(r)) for r in records]
+    assert list(decode_shard(encode_shard(frames))) == records
+    json_frames = [(r['user_id'], pack_record(r, CODEC_JSON)) for r in records]
+    assert list(decode_shard(encode_shard(json_frames, CODEC_JSON, COMPRESSION_ZLIB))) == records
+    assert list(decode_shard(encode_shard([]))) == []
+    try:
+        list(decode_shard(b'JUNK' + bytes(16)))
+        assert False, "expected a format error"
+    except ValueError:
+        pass
+
+    # Updating a shard keeps untouched records and replaces or drops the updated keys
+    with tempfile.TemporaryDirectory() as tmp:
+        snapshot = ShardedSnapshot(tmp, shards=1)
+        snapshot.write({0: {'u1': records[0], 'u2': records[1]}}, {}, replace=True)
+        stats = snapshot.write({0: {'u2': None, 'u3': {'user_id': 'u3'}}}, {'k': 1}, journal_seq=7)
+        assert stats['profiles'] == 2 and snapshot.read_manifest()['journal_seq'] == 7
+        assert snapshot.read_shard(0) == [records[0], {'user_id': 'u3'}]
+        assert snapshot.read_meta() == {'k': 1}
+    print("PASS: Shard encoding")
+
+
+def test_incremental_save_and_load():
+    """Only shards with changed or deleted profiles are rewritten; a load restores everything"""
+    print("=" * 60)
+    print("TESTING INCREMENTAL SNAPSHOT")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = os.path.join(tmp, 'memory.snap')
+        memory = ProgressiveConversationMemory()
+        memory.snapshot = ShardedSnapshot(directory, shards=16)
+        populate(memory, 200)
+
+        stats = memory.save_snapshot()
+        assert stats['shards_written'] == 16 and stats['profiles'] == 200
+        assert memory.save_snapshot()['shards_written'] == 0
+
+        memory.add_conversation_turn('u7', 'again', 'ok', {'primary_intent': 'greeting'})
+        assert memory.delete_user_data('u9')
+        expected = len({memory.snapshot.shard_of('u7'), memory.snapshot.shard_of('u9')})
+        stats = memory.save_snapshot()
+        assert stats['shards_written'] == expected and stats['profiles'] == 199
+
+        restored = ProgressiveConversationMemory()
+        restored.snapshot = ShardedSnapshot(directory, shards=16, workers=4)
+        assert restored.load_snapshot() == 0
+        assert len(restored.user_profiles) == 199 and 'u9' not in restored.user_profiles
+        assert [t['user_message'] for t in restored.get_conversation_context('u7')] == ['hello 7', 'again']
+        assert restored.get_session_context('s3')['turns_count'] == 1
+        assert restored.get_system_stats()['total_users'] == 199
+
+        # A different shard count reads the old layout and rewrites all shards on the next save
+        resharded = ProgressiveConversationMemory()
+        resharded.snapshot = ShardedSnapshot(directory, shards=8)
+        resharded.load_snapshot()
+        assert len(resharded.user_profiles) == 199
+        assert resharded.save_snapshot()['shards_written'] == 8
+    print("PASS: Incremental snapshot")
+
+
+def test_binary_journal_restart():
+    """Binary snapshot + journal survives a restart, and a JSON snapshot is imported once"""
+    print("=" * 60)
+    print("TESTING BINARY SNAPSHOT WITH JOURNAL")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = os.path.join(tmp, 'conversation_memory.json')
+        legacy = ProgressiveConversationMemory()
+        populate(legacy, 5)
+        assert legacy.save_to_file(json_path)
+
+        snap_dir = os.path.join(tmp, 'conversation_memory.snap')
+        options = dict(snapshot_format='binary', journal_path=json_path + '.journal',
+                       snapshot_shards=4, fallback_json_path=json_path)
+        memory = ProgressiveConversationMemory()
+        memory.enable_journal(snap_dir, flush_interval=0.01, **options)
+        assert len(memory.user_profiles) == 5
+        assert memory.journal.compact()
+        assert memory.snapshot.is_complete()
+
+        memory.add_conversation_turn('u1', 'after compaction', 'ok', {'primary_intent': 'greeting'})
+        memory.add_conversation_turn('new', 'hello', 'hi', {'primary_intent': 'greeting'})
+        memory.journal.stop()
+
+        os.remove(json_path)  # the binary snapshot is now authoritative
+        restored = ProgressiveConversationMemory()
+        assert restored.enable_journal(snap_dir, **options) == 2
+        assert len(restored.user_profiles) == 6
+        assert restored.get_conversation_context('u1')[-1]['user_message'] == 'after compaction'
+        assert restored.journal.compact()
+        with open(os.path.join(snap_dir, 'manifest.json')) as f:
+            manifest = json.load(f)
+        assert manifest['profiles'] == 6 and manifest['journal_seq'] > 0
+
+        # A read-only reader (migrate_reminders.py) sees the binary layout without writing to it
+        restored.add_conversation_turn('late', 'hello', 'hi', {'primary_intent': 'greeting'})
+        restored.journal.flush()
+        with open(json_path + '.journal', 'rb') as f:
+            journal_bytes = f.read()
+        reader = ProgressiveConversationMemory()
+        assert reader.enable_journal(snap_dir, read_only=True, **options) == 1
+        assert len(reader.user_profiles) == 7 and reader.journal is None
+        with open(json_path + '.journal', 'rb') as f:
+            assert f.read() == journal_bytes
+        restored.journal.stop()
+    print("PASS: Binary snapshot with journal")
+
+
+def run_all_tests():
+    """Run all memory snapshot tests"""
+    setup_logging()
+    tests = [test_shard_round_trip, test_incremental_save_and_load, test_binary_journal_restart]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"FAIL: {test.__name__}: {e}")
+    print(f"\n{passed}/{len(tests)} tests passed")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Test script for the shared conversation memory store and per-worker read-through cache
+"""
+
+import sys
+import os
+import tempfile
+import logging
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from conversation_memory import ProgressiveConversationMemory
+from memory_store import SQLiteMemoryStore, RedisMemoryStore, LocalRedisStandIn, create_memory_store, merge_changes
+
+REMINDER = {
+    'name': 'Paracetamol', 'dosage': '500mg', 'frequency': 'twice daily',
+    'times': ['08:00', '20:00'], 'duration_days': 5, 'start_date': '2026-03-01'
+}
+
+
+def setup_logging():
+    """Setup logging for tests"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+
+def test_workers_share_state():
+    """A reminder or task written by one worker is visible to another on its next read"""
+    print("=" * 60)
+    print("TESTING CROSS-WORKER VISIBILITY")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'memory.db')
+        worker_a = ProgressiveConversationMemory()
+        worker_a.attach_store(SQLiteMemoryStore(path))
+        worker_b = ProgressiveConversationMemory()
+        worker_b.attach_store(SQLiteMemoryStore(path))
+
+        worker_a.schedule_medicine_reminder('u1', REMINDER)
+        assert [r['medicine_name'] for r in worker_b.get_medicine_reminders('u1')] == ['Paracetamol']
+
+        worker_b.set_current_task('u1', 'appointment_booking', {'step': 1})
+        assert worker_a.get_current_task('u1') == {'task': 'appointment_booking', 'context': {'step': 1}}
+        worker_a.complete_task('u1')
+        assert worker_b.active_tasks['u1']['status'] == 'completed'
+        assert worker_b.user_profiles['u1'].total_appointments_booked == 1
+
+        worker_a.add_conversation_turn('u1', 'hello', 'hi', {'primary_intent': 'greeting'}, session_id='s1')
+        assert worker_b.get_session_context('s1')['turns_count'] == 1
+        assert len(worker_b.get_conversation_context('u1')) == 1
+
+        stats = worker_a.get_storage_stats()['profiles']
+        assert stats['revalidated_hits'] > 0 and stats['refetches'] > 0
+
+        # System stats come from one store count, not a read of every profile
+        reads_before = dict(worker_b.user_profiles.get_stats())
+        system = worker_b.get_system_stats()
+        assert system['total_users'] == 1 and system['active_users_week'] is None
+        reads_after = worker_b.user_profiles.get_stats()
+        assert all(reads_after[k] == reads_before[k] for k in ('fresh_hits', 'revalidated_hits', 'refetches', 'misses'))
+
+        assert worker_b.delete_user_data('u1')
+        assert 'u1' not in worker_a.user_profiles
+    print("PASS: Workers share state")
+
+
+def test_revalidation_window_and_conflicts():
+    """Within the revalidation window reads are local; a conflicting write merges instead of overwriting"""
+    print("=" * 60)
+    print("TESTING REVALIDATION WINDOW")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'memory.db')
+        worker_a = ProgressiveConversationMemory()
+        worker_a.attach_store(SQLiteMemoryStore(path), revalidate_seconds=60)
+        worker_b = ProgressiveConversationMemory()
+        worker_b.attach_store(SQLiteMemoryStore(path), revalidate_seconds=60)
+
+        worker_a.create_or_get_user('u1', preferred_language='hi')
+        assert worker_b.user_profiles['u1'].preferred_language == 'hi'
+        worker_a.update_user_preferences('u1', {'language': 'pa'})
+        assert worker_b.user_profiles['u1'].preferred_language == 'hi'  # stale by design
+
+        worker_b.update_user_preferences('u1', {'location': 'Nabha'})
+        stats = worker_b.user_profiles.get_stats()
+        assert stats['write_conflicts'] == 1 and stats['merged_writes'] == 1
+
+        worker_b.user_profiles.revalidate_seconds = 0
+        assert worker_b.user_profiles['u1'].location == 'Nabha'
+        assert worker_b.user_profiles['u1'].preferred_language == 'pa'  # worker_a's change survives
+        assert worker_b.user_profiles.get_stats()['fresh_hits'] >= 1
+    print("PASS: Revalidation window and conflicts")
+
+
+def test_compare_and_set_puts():
+    """Writes with an expected version only land on that version, on SQLite and Redis alike"""
+    print("=" * 60)
+    print("TESTING COMPARE-AND-SET PUTS")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for store in (SQLiteMemoryStore(os.path.join(tmp, 'memory.db')), RedisMemoryStore(LocalRedisStandIn())):
+            assert store.put('task', 'u1', {'step': 1}, expected_version=0) == (0, 1)
+            assert store.put('task', 'u1', {'step': 9}, expected_version=0) is None
+            assert store.put('task', 'u1', {'step': 2}, expected_version=1) == (1, 2)
+            assert store.put('task', 'u1', {'step': 9}, expected_version=1) is None
+            assert store.get('task', 'u1') == ({'step': 2}, 2)
+            assert store.put('task', 'u2', {'step': 1}, expected_version=3) is None
+            assert store.get_version('task', 'u2') is None
+            assert store.put('task', 'u1', {'step': 3}) == (2, 3)
+
+    base = {'turns': [1, 2], 'count': 2, 'name': 'a', 'context': {'step': 1}}
+    local = {'turns': [2, 3], 'count': 3, 'name': 'a', 'context': {'step': 2}}
+    stored = {'turns': [1, 2, 4], 'count': 3, 'name': 'b', 'context': {'step': 1, 'doctor': 'x'}}
+    assert merge_changes(base, local, stored) == {
+        'turns': [2, 4, 3], 'count': 4, 'name': 'b', 'context': {'step': 2, 'doctor': 'x'}}
+    print("PASS: Compare-and-set puts")
+
+
+def test_concurrent_turns_merge():
+    """Two workers adding turns for one user keep both; a deleted user is not written back"""
+    print("=" * 60)
+    print("TESTING CONCURRENT TURNS")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'memory.db')
+        worker_a = ProgressiveConversationMemory()
+        worker_a.attach_store(SQLiteMemoryStore(path), revalidate_seconds=60)
+        worker_b = ProgressiveConversationMemory()
+        worker_b.attach_store(SQLiteMemoryStore(path), revalidate_seconds=60)
+
+        worker_a.add_conversation_turn('u1', 'hello', 'hi', {'primary_intent': 'greeting'})
+        worker_b.get_conversation_context('u1')
+        worker_a.add_conversation_turn('u1', 'fever', 'rest', {'primary_intent': 'symptom_triage'})
+        worker_b.add_conversation_turn('u1', 'book', 'booked', {'primary_intent': 'appointment_booking'})
+
+        worker_a.user_profiles.revalidate_seconds = 0
+        profile = worker_a.user_profiles['u1']
+        assert [t['user_message'] for t in profile.conversation_history] == ['hello', 'fever', 'book']
+        assert profile.message_count == 3 and profile.total_conversations == 3
+
+        assert worker_a.delete_user_data('u1')
+        worker_b.update_user_preferences('u1', {'location': 'Nabha'})
+        assert worker_b.user_profiles.get_stats()['write_conflicts'] == 2
+        assert 'u1' not in worker_a.user_profiles
+    print("PASS: Concurrent turns merge")
+
+
+def test_redis_protocol_store():
+    """The Redis-protocol store versions records and works against the local stand-in"""
+    print("=" * 60)
+    print("TESTING REDIS STORE")
+    print("=" * 60)
+
+    store = RedisMemoryStore(LocalRedisStandIn())
+    assert store.get('profile', 'u1') is None and store.get_version('profile', 'u1') is None
+    assert store.put('profile', 'u1', {'a': 1}) == (0, 1)
+    assert store.put('profile', 'u1', {'a': 2}) == (1, 2)
+    assert store.get('profile', 'u1') == ({'a': 2}, 2)
+    assert store.keys('profile') == ['u1'] and store.keys('session') == []
+    assert store.delete('profile', 'u1') and not store.delete('profile', 'u1')
+
+    memory = ProgressiveConversationMemory()
+    memory.attach_store(create_memory_store('local://'))
+    memory.schedule_medicine_reminder('u2', REMINDER)
+    assert len(memory.get_medicine_reminders('u2')) == 1
+    assert create_memory_store('ftp://nope') is None
+    print("PASS: Redis store")
+
+
+def test_profile_budget_eviction():
+    """Cold profiles are evicted LRU-first to the spill store and rehydrated intact"""
+    print("=" * 60)
+    print("TESTING PROFILE BUDGET")
+    print("=" * 60)
+
+    memory = ProgressiveConversationMemory()
+    memory.enable_profile_budget(max_profiles=2, spill_store=RedisMemoryStore(LocalRedisStandIn()))
+    memory.schedule_medicine_reminder('u1', REMINDER)
+    memory.add_conversation_turn('u2', 'hello', 'hi', {'primary_intent': 'greeting'})
+    memory.create_or_get_user('u3')
+    memory.get_conversation_context('u2')  # u2 becomes most recent
+    memory.create_or_get_user('u4')  # evicts u1 (dirty), then u3
+
+    stats = memory.get_storage_stats()['profiles']
+    assert stats['resident'] == 2 and stats['evictions'] == 2 and stats['eviction_writes'] == 2
+    assert len(memory.user_profiles) == 4
+
+    assert memory.get_medicine_reminders('u1')[0]['medicine_name'] == 'Paracetamol'
+    assert memory.get_conversation_context('u2')[0]['user_message'] == 'hello'
+    stats = memory.get_storage_stats()['profiles']
+    assert stats['rehydrations'] == 2 and stats['resident'] == 2  # u1 back in pushed u2 out
+    assert memory.get_system_stats()['total_users'] == 4
+
+    assert memory.delete_user_data('u3')
+    assert 'u3' not in memory.user_profiles and len(memory.user_profiles) == 3
+    print("PASS: Profile budget eviction")
+
+
+def test_byte_budget_with_journal():
+    """A byte budget bounds resident size; journal replay rebuilds evicted profiles after restart"""
+    print("=" * 60)
+    print("TESTING BYTE BUDGET WITH JOURNAL")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'conversation_memory.json')
+        memory = ProgressiveConversationMemory()
+        memory.enable_profile_budget(max_bytes=20000, spill_path=os.path.join(tmp, 'spill.db'))
+        memory.enable_journal(path, flush_interval=0.01)
+        for i in range(20):
+            memory.add_conversation_turn(f'u{i}', 'x' * 500, 'y' * 500, {'primary_intent': 'greeting'})
+        stats = memory.user_profiles.get_stats()
+        assert stats['resident_bytes'] <= 20000 and stats['resident'] < 20 and stats['evictions'] > 0
+        memory.journal.compact()
+        memory.journal.stop()
+
+        restored = ProgressiveConversationMemory()
+        restored.enable_profile_budget(max_profiles=5, spill_path=os.path.join(tmp, 'spill2.db'))
+        restored.enable_journal(path)
+        assert restored.user_profiles.get_stats()['resident'] == 5
+        assert restored.get_conversation_context('u0')[0]['bot_response'] == 'y' * 500
+        restored.journal.stop()
+    print("PASS: Byte budget with journal")
+
+
+def run_all_tests():
+    """Run all memory store tests"""
+    setup_logging()
+    tests = [test_workers_share_state, test_revalidation_window_and_conflicts, test_compare_and_set_puts,
+             test_concurrent_turns_merge, test_redis_protocol_store,
+             test_profile_budget_eviction, test_byte_budget_with_journal]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"FAIL: {test.__name__}: {e}")
+    print(f"\n{passed}/{len(tests)} tests passed")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
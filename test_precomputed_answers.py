@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Test script for the nightly precomputed answer table
+"""
+
+import sys
+import os
+import logging
+from contextlib import nullcontext
+from datetime import datetime
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from precomputed_answers import (
+    PrecomputedAnswerStore, normalize_query, is_cacheable_query, mine_frequent_queries,
+    validate_precomputed_answer, next_nightly_run, PrecomputedAnswerReloader
+)
+
+
+def setup_logging():
+    """Setup logging for tests"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+
+def test_normalization_and_mining():
+    """Frequent messages are grouped after normalization; personal or contextual ones are skipped"""
+    print("=" * 60)
+    print("TESTING QUERY MINING")
+    print("=" * 60)
+
+    assert normalize_query("  Book   Appointment!! ") == "book appointment"
+    assert normalize_query("डॉक्टर से मिलना है।") == "डॉक्टर से मिलना है"
+    assert not is_cacheable_query("yes")
+    assert not is_cacheable_query("appointment on 12 march")
+
+    rows = ([("Book appointment", "en", "appointment_booking")] * 5 +
+            [("book appointment!", "en", "appointment_booking")] * 3 +
+            [("yes", "en", "general_inquiry")] * 10 +
+            [("where is my pharmacy", "en", "find_medicine")] * 2)
+    mined, coverage = mine_frequent_queries(rows, top_n=10, min_count=3)
+
+    assert len(mined) == 1
+    assert mined[0].normalized == "book appointment" and mined[0].count == 8
+    assert mined[0].sample == "Book appointment" and mined[0].intent_hint == "appointment_booking"
+    assert coverage["en"]["messages"] == 20 and coverage["en"]["coverage"] == 0.4
+    print("PASS: Frequent queries mined")
+
+
+def test_store_lookup():
+    """Exact and normalized matches are served per language; misses and latency are counted"""
+    print("=" * 60)
+    print("TESTING STORE LOOKUP")
+    print("=" * 60)
+
+    store = PrecomputedAnswerStore()
+    payload = {"response": "Let me help you book.", "action": "NAVIGATE_TO_APPOINTMENT_BOOKING", "parameters": {}}
+    store.load([{"language": "en", "normalized_message": "book appointment", "sample_message": "Book appointment",
+                 "intent": "appointment_booking", "payload": payload}])
+
+    answer, intent = store.lookup("Book appointment", "en")
+    assert answer == payload and intent == "appointment_booking"
+    answer["response"] = "mutated"
+    assert store.lookup("book   APPOINTMENT?", "en")[0]["response"] == "Let me help you book."
+    assert store.lookup("book appointment", "hi") is None
+
+    stats = store.get_stats()
+    assert stats["exact_hits"] == 1 and stats["normalized_hits"] == 1 and stats["misses"] == 1
+    assert stats["hit_rate"] == round(2 / 3, 3) and stats["lookup_ms"]["count"] == 3
+    print("PASS: Store lookup")
+
+
+class TableBackedStore(PrecomputedAnswerStore):
+    """Store reading a shared in-process list instead of the precomputed_answers table"""
+
+    def __init__(self, table):
+        super().__init__()
+        self.table = table
+
+    def table_version(self):
+        return len(self.table['rows']), self.table['built_at']
+
+    def load_from_db(self):
+        self.version = self.table_version()
+        return self.load(self.table['rows'])
+
+
+class FakeApp:
+    def app_context(self):
+        return nullcontext()
+
+
+def test_workers_reload_on_rebuild():
+    """A rebuild in one worker reaches the others on their next version check"""
+    print("=" * 60)
+    print("TESTING RELOAD ACROSS WORKERS")
+    print("=" * 60)
+
+    row = {"language": "en", "normalized_message": "book appointment", "sample_message": "Book appointment",
+           "intent": "appointment_booking",
+           "payload": {"response": "Booking.", "action": "NAVIGATE_TO_APPOINTMENT_BOOKING", "parameters": {}}}
+    table = {'rows': [], 'built_at': None}
+    workers = [TableBackedStore(table) for _ in range(2)]
+    reloaders = [PrecomputedAnswerReloader(FakeApp(), store) for store in workers]
+    for store in workers:
+        store.load_from_db()
+    assert not any(reloader.check() for reloader in reloaders)
+
+    # Worker 0 runs the nightly job: rebuilds the table and reloads itself
+    table.update(rows=[row], built_at='2026-03-02T02:00:05')
+    workers[0].load_from_db()
+    assert [reloader.check() for reloader in reloaders] == [False, True]
+    assert workers[1].lookup("book appointment", "en")[1] == "appointment_booking"
+
+    # A rebuild that keeps the same row count still changes the version
+    table.update(rows=[dict(row, intent="appointment_view")], built_at='2026-03-03T02:00:04')
+    assert all(reloader.check() for reloader in reloaders)
+    assert workers[1].lookup("book appointment", "en")[1] == "appointment_view"
+    assert workers[1].get_stats()['reloads'] == 2 and reloaders[1].get_stats()['checks'] == 3
+    print("PASS: Reload across workers")
+
+
+def test_validation_and_schedule():
+    """Only safe intents with schema-valid, non-emergency payloads are stored"""
+    print("=" * 60)
+    print("TESTING VALIDATION")
+    print("=" * 60)
+
+    good = {"response": "Opening pharmacy search.", "action": "navigate_to_pharmacy_search"}
+    assert validate_precomputed_answer("find_medicine", good)["action"] == "NAVIGATE_TO_PHARMACY_SEARCH"
+    assert validate_precomputed_answer("symptom_triage", good) is None
+    assert validate_precomputed_answer("general_inquiry", {"response": "Calling 108", "action": "TRIGGER_SOS"}) is None
+    assert validate_precomputed_answer("general_inquiry", {"action": "SHOW_APP_FEATURES"}) is None
+
+    assert next_nightly_run(2, now=datetime(2026, 3, 1, 1, 30)) == datetime(2026, 3, 1, 2, 0)
+    assert next_nightly_run(2, now=datetime(2026, 3, 1, 14, 0)) == datetime(2026, 3, 2, 2, 0)
+    print("PASS: Validation and schedule")
+
+
+def run_all_tests():
+    """Run all precomputed answer tests"""
+    setup_logging()
+    tests = [test_normalization_and_mining, test_store_lookup, test_workers_reload_on_rebuild,
+             test_validation_and_schedule]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"FAIL: {test.__name__}: {e}")
+    print(f"\n{passed}/{len(tests)} tests passed")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Test script for the recent-turns context window
+"""
+
+import sys
+import os
+import json
+import tempfile
+import logging
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from conversation_memory import ProgressiveConversationMemory
+from conversation_summarizer import ConversationSummarizer
+from memory_store import SQLiteMemoryStore
+from recent_turns import RecentTurns, assistant_text
+
+
+def setup_logging():
+    """Setup logging for tests"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+
+def test_window_and_rehydration():
+    """Windows keep the last N plain-text turns; a miss queries the loader once"""
+    print("=" * 60)
+    print("TESTING RECENT TURNS WINDOW")
+    print("=" * 60)
+
+    assert assistant_text(json.dumps({'response': 'Take rest', 'action': 'NONE'})) == 'Take rest'
+    assert assistant_text({'response': 'Hello'}) == 'Hello'
+    assert assistant_text('plain reply') == 'plain reply'
+
+    calls = []
+
+    def loader(limit):
+        calls.append(limit)
+        return [[1.0, 'old question', 'old answer'], [2.0, 'latest question', 'latest answer']]
+
+    recent = RecentTurns(max_turns=3, max_users=2)
+    assert recent.messages('p1', loader=loader)[-1] == {'role': 'assistant', 'content': 'latest answer'}
+    recent.get('p1', loader=loader)
+    assert calls == [3]  # second read is a hit
+
+    recent.record('p1', 'q3', 'a3')
+    recent.record('p1', 'q4', 'a4')
+    assert [row[1] for row in recent.get('p1')] == ['latest question', 'q3', 'q4']
+    assert recent.messages('p1', turns=1) == [{'role': 'user', 'content': 'q4'},
+                                              {'role': 'assistant', 'content': 'a4'}]
+
+    # An empty history is cached too; recording for an unknown user loads instead of appending
+    assert recent.get('p2', loader=lambda limit: []) == []
+    assert recent.get('p2', loader=loader) == [] and calls == [3]
+    recent.record('p3', 'latest question', 'latest answer', loader=loader)
+    assert len(recent.get('p3')) == 2 and calls == [3, 3]
+    assert recent.get('p1') == []  # least recently used, evicted at max_users=2
+
+    stats = recent.get_stats()
+    assert stats['rehydrations'] == 3 and stats['writes'] == 2 and stats['misses'] == 3
+    print("PASS: Recent turns window")
+
+
+def test_shared_across_workers_and_summarizer():
+    """Two workers on one store see each other's writes; the summarizer uses the plain-text window"""
+    print("=" * 60)
+    print("TESTING SHARED RECENT TURNS")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'memory.db')
+        worker_a = RecentTurns(max_turns=4, store=SQLiteMemoryStore(path), revalidate_seconds=0)
+        worker_b = RecentTurns(max_turns=4, store=SQLiteMemoryStore(path), revalidate_seconds=0)
+
+        worker_a.record('p1', 'Mujhe bukhar hai', 'Paani piyo aur aaram karo')
+        assert worker_b.get('p1')[0][1:] == ['Mujhe bukhar hai', 'Paani piyo aur aaram karo']
+        worker_b.record('p1', 'Dawai?', 'Paracetamol 500mg')
+        assert len(worker_a.get('p1')) == 2
+
+        memory = ProgressiveConversationMemory()
+        memory.create_or_get_user('p1')
+        memory.update_conversation_summary('p1', 'Fever since two days', 4)
+        summarizer = ConversationSummarizer(memory, recent_turns=1)
+        history = summarizer.build_context_history('p1', recent_messages=worker_a.messages('p1'))
+        assert history[0]['role'] == 'system' and 'Fever' in history[0]['content']
+        assert [m['content'] for m in history[1:]] == ['Dawai?', 'Paracetamol 500mg']
+        # No profile in this worker's memory: still gets the shared window
+        assert len(summarizer.build_context_history('p9', recent_messages=worker_a.messages('p1'))) == 2
+    print("PASS: Shared recent turns")
+
+
+def run_all_tests():
+    """Run all recent turns tests"""
+    setup_logging()
+    tests = [test_window_and_rehydration, test_shared_across_workers_and_summarizer]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"FAIL: {test.__name__}: {e}")
+    print(f"\n{passed}/{len(tests)} tests passed")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
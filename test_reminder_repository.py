@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Test script for the table-backed medicine reminder repository
+"""
+
+import sys
+import os
+import logging
+from datetime import datetime, date
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from flask import Flask
+
+from enhanced_database_models import db, MedicineReminder, AdherenceEvent
+from medicine_reminders import ReminderRepository
+from reminder_scheduler import LocalNotificationFeed
+
+
+def setup_logging():
+    """Setup logging for tests"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+
+def create_app():
+    """Empty in-memory database on the shared models"""
+    app = Flask(__name__)
+    app.config.update({
+        'SQLALCHEMY_DATABASE_URI': 'sqlite://',
+        'SQLALCHEMY_TRACK_MODIFICATIONS': False
+    })
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def medicine(name, times=('08:00', '20:00'), start_date='2026-03-01', duration_days=30):
+    return {'name': name, 'dosage': '1 tab', 'frequency': 'twice daily', 'times': list(times),
+            'start_date': start_date, 'duration_days': duration_days}
+
+
+class StaleRow:
+    """Another process's snapshot of a due row, read before this process claimed it"""
+
+    def __init__(self, row):
+        self.id, self.user_id, self.medicine_name = row.id, row.user_id, row.medicine_name
+        self.dosage, self.instructions, self.next_due_at = row.dosage, row.instructions, row.next_due_at
+        self._times = row.get_times()
+
+    def get_times(self):
+        return self._times
+
+
+def test_add_upsert_and_set_active():
+    """Reminders are created with their next slot; prescriptions and toggles match names case-insensitively"""
+    print("=" * 60)
+    print("TESTING ADD, UPSERT AND SET ACTIVE")
+    print("=" * 60)
+
+    app = create_app()
+    with app.app_context():
+        repo = ReminderRepository()
+        reminder = repo.add('u1', medicine('Paracetamol'), now=datetime(2026, 3, 1, 9, 0))
+        assert reminder.next_due_at == datetime(2026, 3, 1, 20, 0) and reminder.start_date == date(2026, 3, 1)
+
+        created = repo.upsert_prescription('u1', [{'name': 'PARACETAMOL', 'dosage': '2 tabs'},
+                                                  {'name': 'Amoxicillin', 'dosage': 'twice daily'}],
+                                           'Dr. Kaur', infer_timing=lambda dosage: ['09:00', '21:00'])
+        assert created == 1 and repo.count('u1') == 2
+        paracetamol = MedicineReminder.query.get(reminder.id)
+        assert paracetamol.dosage == '2 tabs' and paracetamol.source == 'prescription'
+        assert paracetamol.doctor_name == 'Dr. Kaur' and paracetamol.medicine_name == 'Paracetamol'
+
+        assert repo.set_active('u1', 'amoxicillin', False)
+        assert [r['medicine_name'] for r in repo.list_active('u1')] == ['Paracetamol']
+        assert MedicineReminder.query.filter_by(medicine_name='Amoxicillin').first().next_due_at is None
+        assert not repo.set_active('u1', 'Ibuprofen', False)
+        assert repo.set_active('u1', 'AMOXICILLIN', True) and len(repo.list_active('u1')) == 2
+        db.drop_all()
+    print("PASS: Add, upsert and set active")
+
+
+def test_record_adherence_matches_reminder():
+    """Different spellings of one medicine record a single event under the reminder's name"""
+    print("=" * 60)
+    print("TESTING ADHERENCE RECORDING")
+    print("=" * 60)
+
+    app = create_app()
+    with app.app_context():
+        repo = ReminderRepository()
+        reminder = repo.add('u1', medicine('Paracetamol'))
+        day = date(2026, 3, 2)
+        repo.record_adherence('u1', 'Paracetamol', '08:05', day=day)
+        repo.record_adherence('u1', 'paracetamol', '08:10', day=day)
+        events = AdherenceEvent.query.filter_by(user_id='u1').all()
+        assert len(events) == 1
+        assert events[0].medicine_name == 'Paracetamol' and events[0].reminder_id == reminder.id
+        assert events[0].taken_time == '08:10'
+
+        repo.record_adherence('u1', 'Vitamin D', '09:00', day=day)
+        unmatched = AdherenceEvent.query.filter_by(medicine_name='Vitamin D').first()
+        assert unmatched.reminder_id is None
+        db.drop_all()
+    print("PASS: Adherence recording")
+
+
+def test_fire_due_claims_each_slot_once():
+    """Due slots are published once, skipped when taken, and a second poller loses the claim"""
+    print("=" * 60)
+    print("TESTING FIRE DUE")
+    print("=" * 60)
+
+    app = create_app()
+    with app.app_context():
+        repo = ReminderRepository()
+        added = datetime(2026, 3, 2, 7, 0)
+        repo.add('u1', medicine('Paracetamol'), now=added)
+        repo.add('u1', medicine('Amoxicillin'), now=added)
+        repo.add('u2', medicine('Iron', times=('10:00',)), now=added)
+        repo.record_adherence('u1', 'amoxicillin', '07:55', day=date(2026, 3, 2))
+
+        now = datetime(2026, 3, 2, 8, 0, 30)
+        stale = [StaleRow(row) for row in repo.due_within(0, now=now)]
+        assert len(stale) == 2
+
+        feed = LocalNotificationFeed()
+        assert repo.fire_due(feed, now=now) == 2
+        events = feed.drain()
+        assert [e['medicine_name'] for e in events] == ['Paracetamol']  # Amoxicillin already taken
+        assert events[0]['time'] == '08:00' and events[0]['user_id'] == 'u1'
+        assert {row.next_due_at for row in MedicineReminder.query.filter_by(user_id='u1')} == \
+            {datetime(2026, 3, 2, 20, 0)}
+
+        # Another process read the same due rows before the claim: its compare-and-set finds nothing
+        racing = ReminderRepository()
+        racing.due_within = lambda minutes, now=None, limit=1000: stale
+        racing_feed = LocalNotificationFeed()
+        assert racing.fire_due(racing_feed, now=now) == 0 and len(racing_feed) == 0
+        assert repo.fire_due(feed, now=now) == 0
+        db.drop_all()
+    print("PASS: Fire due")
+
+
+def test_adherence_rates_count_matching_reminders():
+    """Only taken days of medicines with an active reminder count toward the rate"""
+    print("=" * 60)
+    print("TESTING ADHERENCE RATES")
+    print("=" * 60)
+
+    app = create_app()
+    with app.app_context():
+        repo = ReminderRepository()
+        repo.add('u1', medicine('Paracetamol'))
+        repo.add('u1', medicine('Amox'))
+        repo.add('u2', medicine('Iron'))
+        for day in (date(2026, 3, 1), date(2026, 3, 2)):
+            repo.record_adherence('u1', 'Paracetamol', '08:00', day=day)
+            repo.record_adherence('u1', 'paracetamol', '08:05', day=day)
+            repo.record_adherence('u1', 'Vitamin D', '09:00', day=day)
+        repo.record_adherence('u2', 'IRON', '08:00', day=date(2026, 3, 2))
+
+        now = datetime(2026, 3, 2, 22, 0)
+        rates = repo.adherence_rates(days=2, now=now)
+        assert rates['u1'] == {'taken': 2, 'expected': 4, 'rate': 0.5}
+        assert rates['u2'] == {'taken': 1, 'expected': 2, 'rate': 0.5}
+        assert list(repo.adherence_rates(user_ids=['u2'], days=2, now=now)) == ['u2']
+
+        # A paused reminder's events stop counting along with its expected days
+        repo.set_active('u1', 'Paracetamol', False)
+        assert repo.adherence_rates(['u1'], days=2, now=now)['u1'] == {'taken': 0, 'expected': 2, 'rate': 0.0}
+        db.drop_all()
+    print("PASS: Adherence rates")
+
+
+def test_export_and_delete_user():
+    """A user's rows are exported in full and deleted, after which the poller fires nothing for them"""
+    print("=" * 60)
+    print("TESTING EXPORT AND DELETE")
+    print("=" * 60)
+
+    app = create_app()
+    with app.app_context():
+        repo = ReminderRepository()
+        added = datetime(2026, 3, 2, 7, 0)
+        repo.add('u1', medicine('Paracetamol'), now=added)
+        repo.add('u2', medicine('Iron'), now=added)
+        repo.record_adherence('u1', 'paracetamol', '08:00', day=date(2026, 3, 1))
+
+        export = repo.export_user('u1')
+        assert [r['medicine_name'] for r in export['medicine_reminders']] == ['Paracetamol']
+        assert export['adherence_events'] == [{'medicine_name': 'Paracetamol', 'date': '2026-03-01',
+                                               'taken_time': '08:00', 'status': 'taken'}]
+
+        assert repo.delete_user('u1') == 2
+        assert repo.export_user('u1') == {'medicine_reminders': [], 'adherence_events': []}
+        feed = LocalNotificationFeed()
+        MedicineReminder.query.update({'next_due_at': datetime(2026, 3, 2, 8, 0)}, synchronize_session=False)
+        db.session.commit()
+        assert repo.fire_due(feed, now=datetime(2026, 3, 2, 8, 0, 30)) == 1
+        assert [e['user_id'] for e in feed.drain()] == ['u2']
+        db.drop_all()
+    print("PASS: Export and delete")
+
+
+def run_all_tests():
+    """Run all reminder repository tests"""
+    setup_logging()
+    tests = [test_add_upsert_and_set_active, test_record_adherence_matches_reminder,
+             test_fire_due_claims_each_slot_once, test_adherence_rates_count_matching_reminders,
+             test_export_and_delete_user]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"FAIL: {test.__name__}: {e}")
+    print(f"\n{passed}/{len(tests)} tests passed")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
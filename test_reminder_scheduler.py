@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Test script for the time-indexed medicine reminder scheduler
+"""
+
+import sys
+import os
+import logging
+from datetime import datetime, timedelta
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from conversation_memory import ProgressiveConversationMemory
+from reminder_scheduler import ReminderScheduler, LocalNotificationFeed
+
+
+def setup_logging():
+    """Setup logging for tests"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+
+class FakeClock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def reminder(name, times, enabled=True):
+    return {'medicine_name': name, 'dosage': '1 tab', 'times': times, 'instructions': '',
+            'reminder_enabled': enabled}
+
+
+def test_fires_into_feed_and_pending():
+    """Due slots fire in time order into the feed; passed slots at registration are pending but silent"""
+    print("=" * 60)
+    print("TESTING SCHEDULER FIRING")
+    print("=" * 60)
+
+    clock = FakeClock(datetime(2026, 3, 1, 9, 0))
+    feed = LocalNotificationFeed()
+    scheduler = ReminderScheduler(feed, clock=clock)
+    scheduler.add_reminder('u1', 0, reminder('Paracetamol', ['20:00', '08:00']))
+    scheduler.add_reminder('u1', 1, reminder('Cetirizine', ['14:00']))
+    scheduler.add_reminder('u2', 0, reminder('Metformin', ['bad', '13:55']))
+
+    assert [a['time'] for a in scheduler.pending_alerts('u1')] == ['08:00']
+    assert len(feed) == 0
+
+    clock.now = datetime(2026, 3, 1, 14, 0)
+    assert scheduler.poll() == 2
+    assert [(e['user_id'], e['medicine_name']) for e in feed.drain()] == [('u2', 'Metformin'), ('u1', 'Cetirizine')]
+    assert [a['medicine_name'] for a in scheduler.pending_alerts('u1')] == ['Paracetamol', 'Cetirizine']
+
+    scheduler.mark_taken('u1', 'Paracetamol')
+    clock.now = datetime(2026, 3, 1, 21, 0)
+    assert [a['medicine_name'] for a in scheduler.pending_alerts('u1')] == ['Cetirizine']
+    assert scheduler.get_stats()['suppressed_taken'] == 1
+
+    scheduler.disable_reminder('u1', 1)
+    assert scheduler.pending_alerts('u1') == []
+
+    # Next day: yesterday's alerts are gone, taken-state resets
+    clock.now = datetime(2026, 3, 2, 8, 30)
+    assert [a['time'] for a in scheduler.pending_alerts('u1')] == ['08:00']
+    clock.now = datetime(2026, 3, 2, 15, 0)
+    assert [a['time'] for a in scheduler.pending_alerts('u1')] == ['08:00']  # disabled Cetirizine skipped
+    assert scheduler.get_stats()['stale_entries'] == 1
+    print("PASS: Scheduler firing")
+
+
+def test_memory_matches_legacy_alerts():
+    """With the scheduler enabled get_reminder_alerts returns what the full scan returned"""
+    print("=" * 60)
+    print("TESTING MEMORY INTEGRATION")
+    print("=" * 60)
+
+    memory = ProgressiveConversationMemory()
+    now = datetime.now()
+    past = (now - timedelta(minutes=1)).strftime('%H:%M') if now.hour or now.minute else '00:00'
+    future = '23:59'
+    for name, times in (('Paracetamol', [past, future]), ('Cetirizine', [past]), ('Vitamin D', [future])):
+        memory.schedule_medicine_reminder('u1', {'name': name, 'dosage': '1 tab', 'frequency': 'daily',
+                                                 'times': times, 'duration_days': 5, 'start_date': '2026-03-01'})
+    memory.update_reminder_adherence('u1', 'Cetirizine', past)
+    legacy = memory.get_reminder_alerts('u1')
+
+    scheduler = memory.enable_reminder_scheduler(start=False)
+    assert scheduler.reminder_count() == 3
+    assert memory.get_reminder_alerts('u1') == legacy
+
+    memory.schedule_medicine_reminder('u1', {'name': 'Iron', 'dosage': '1 tab', 'frequency': 'daily',
+                                             'times': [past], 'duration_days': 5, 'start_date': '2026-03-01'})
+    assert [a['medicine_name'] for a in memory.get_reminder_alerts('u1')][-1] == 'Iron'
+    assert memory.set_reminder_enabled('u1', 'iron', False)
+    assert memory.get_reminder_alerts('u1') == legacy
+    assert not memory.set_reminder_enabled('u1', 'Unknown', False)
+
+    assert memory.delete_user_data('u1')
+    assert memory.get_reminder_alerts('u1') == [] and scheduler.reminder_count() == 0
+    print("PASS: Memory integration")
+
+
+def run_all_tests():
+    """Run all reminder scheduler tests"""
+    setup_logging()
+    tests = [test_fires_into_feed_and_pending, test_memory_matches_legacy_alerts]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"FAIL: {test.__name__}: {e}")
+    print(f"\n{passed}/{len(tests)} tests passed")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Test script for single-flight coalescing of identical concurrent LLM requests
+"""
+
+import sys
+import os
+import time
+import threading
+import logging
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from single_flight import SingleFlight, prompt_fingerprint
+
+
+def setup_logging():
+    """Setup logging for tests"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+
+def test_concurrent_calls_collapse():
+    """Ten concurrent identical requests make one upstream call and share its result"""
+    print("=" * 60)
+    print("TESTING CONCURRENT COLLAPSE")
+    print("=" * 60)
+
+    flight = SingleFlight("test")
+    upstream_calls = []
+    results = []
+    barrier = threading.Barrier(10)
+
+    def upstream():
+        upstream_calls.append(1)
+        time.sleep(0.2)
+        return "Namaste! How can I help?"
+
+    def worker():
+        barrier.wait()
+        results.append(flight.do("hello", upstream))
+
+    threads = [threading.Thread(target=worker) for _ in range(10)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(upstream_calls) == 1
+    assert results == ["Namaste! How can I help?"] * 10
+    stats = flight.get_stats()
+    assert stats['leaders'] == 1 and stats['collapsed'] == 9 and stats['in_flight'] == 0
+    assert stats['collapse_rate'] == 0.9
+
+    # Nothing is cached once the flight lands
+    flight.do("hello", upstream)
+    assert len(upstream_calls) == 2
+    print("PASS: Identical concurrent calls collapsed")
+
+
+def test_errors_and_timeouts():
+    """Leader exceptions reach followers; followers past their timeout fall back with None"""
+    print("=" * 60)
+    print("TESTING ERRORS AND FOLLOWER TIMEOUTS")
+    print("=" * 60)
+
+    flight = SingleFlight("test")
+    errors = []
+    started = threading.Event()
+
+    def failing():
+        started.set()
+        time.sleep(0.1)
+        raise RuntimeError("upstream down")
+
+    def call():
+        try:
+            flight.do("key", failing)
+        except RuntimeError as e:
+            errors.append(str(e))
+
+    leader = threading.Thread(target=call)
+    leader.start()
+    started.wait()
+    follower = threading.Thread(target=call)
+    follower.start()
+    leader.join()
+    follower.join()
+    assert errors == ["upstream down", "upstream down"]
+
+    started.clear()
+    leader = threading.Thread(target=lambda: flight.do("slow", lambda: (started.set(), time.sleep(0.3))))
+    leader.start()
+    started.wait()
+    assert flight.do("slow", lambda: "never runs", timeout=0.05) is None
+    leader.join()
+    assert flight.get_stats()['follower_timeouts'] == 1
+    print("PASS: Errors shared and timeouts honoured")
+
+
+def test_fingerprint_normalization():
+    """Whitespace differences share a fingerprint; different options do not"""
+    print("=" * 60)
+    print("TESTING PROMPT FINGERPRINTS")
+    print("=" * 60)
+
+    a = prompt_fingerprint(model="m", messages=[{"role": "user", "content": "book  appointment "}], temperature=0.7)
+    b = prompt_fingerprint(model="m", messages=[{"role": "user", "content": "book appointment"}], temperature=0.7)
+    c = prompt_fingerprint(model="m", messages=[{"role": "user", "content": "book appointment"}], temperature=0.2)
+    assert a == b
+    assert a != c
+    print("PASS: Fingerprints normalized")
+
+
+def run_all_tests():
+    """Run all single-flight tests"""
+    setup_logging()
+    tests = [test_concurrent_calls_collapse, test_errors_and_timeouts, test_fingerprint_normalization]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"FAIL: {test.__name__}: {e}")
+    print(f"\n{passed}/{len(tests)} tests passed")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
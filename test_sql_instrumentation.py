@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Test script for per-request SQL instrumentation
+"""
+
+import sys
+import os
+import threading
+import logging
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from sql_instrumentation import SQLInstrumentation, statement_shape
+
+
+def setup_logging():
+    """Setup logging for tests"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+
+def test_statement_shapes():
+    """Literals, placeholder lists and whitespace collapse to one shape"""
+    print("=" * 60)
+    print("TESTING STATEMENT SHAPES")
+    print("=" * 60)
+
+    assert statement_shape("SELECT * FROM users WHERE id = 7") == statement_shape("SELECT * FROM users\n WHERE id = 12")
+    assert statement_shape("SELECT name FROM users WHERE email = 'a@b.c'") == "SELECT name FROM users WHERE email = ?"
+    assert statement_shape("SELECT id FROM doctors WHERE id IN (?, ?, ?)") == "SELECT id FROM doctors WHERE id IN (?)"
+    assert statement_shape("SELECT id FROM doctors WHERE id IN (%(id_1)s, %(id_2)s)") == \
+        "SELECT id FROM doctors WHERE id IN (?)"
+    print("PASS: Statement shapes")
+
+
+def test_request_recording():
+    """Counts, DB time, slowest statements, N+1 flags and the slow log are kept per route"""
+    print("=" * 60)
+    print("TESTING REQUEST RECORDING")
+    print("=" * 60)
+
+    sql = SQLInstrumentation(slow_query_ms=50, n_plus_one_threshold=3, slowest_per_request=2)
+    assert sql.begin_request("GET /v1/appointments")
+    sql.record_query("SELECT * FROM appointments WHERE user_id = ?", 4.0)
+    for doctor_id in range(5):
+        sql.record_query(f"SELECT * FROM doctors WHERE id = {doctor_id}", 1.0)
+    sql.record_query("SELECT count(*) FROM medicine_orders", 60.0)
+    record = sql.end_request(200)
+
+    assert record.route == "GET /v1/appointments" and record.queries == 7 and record.db_ms == 69.0
+    assert [s['ms'] for s in record.slowest] == [60.0, 4.0]
+    assert record.repeated == [{'shape': "SELECT * FROM doctors WHERE id = ?", 'count': 5}]
+    assert sql.end_request(200) is None  # already finished
+
+    sql.begin_request("GET /v1/appointments")
+    sql.record_query("SELECT * FROM appointments WHERE user_id = ?", 2.0)
+    sql.end_request(200)
+    sql.record_query("SELECT 1", 0.1)  # outside any request
+
+    stats = sql.get_stats()
+    route = stats['by_route']["GET /v1/appointments"]
+    assert route['requests'] == 2 and route['queries'] == 8 and route['n_plus_one_requests'] == 1
+    assert route['top_repeated_shapes'][0]['requests'] == 1
+    assert [q['ms'] for q in stats['slow_queries']] == [60.0]
+    assert stats['requests_sampled'] == 2 and stats['unattributed_queries'] == 1
+    assert len(stats['recent_requests']) == 2 and stats['last_hour']['queries'] == 8
+    print("PASS: Request recording")
+
+
+def test_sampling_and_threads():
+    """Unsampled requests record nothing; concurrent requests do not mix their queries"""
+    print("=" * 60)
+    print("TESTING SAMPLING AND THREADS")
+    print("=" * 60)
+
+    unsampled = SQLInstrumentation(sample_rate=0.0)
+    assert not unsampled.begin_request("GET /v1/doctors")
+    unsampled.record_query("SELECT * FROM doctors", 1.0)
+    assert unsampled.end_request(200) is None
+    assert unsampled.get_stats()['requests_seen'] == 1 and unsampled.get_stats()['requests_sampled'] == 0
+
+    sql = SQLInstrumentation()
+    records = {}
+    barrier = threading.Barrier(4)
+
+    def handle(worker):
+        sql.begin_request(f"GET /route/{worker}")
+        barrier.wait()
+        for _ in range(worker + 1):
+            sql.record_query("SELECT 1", 1.0)
+        barrier.wait()
+        records[worker] = sql.end_request(200)
+
+    threads = [threading.Thread(target=handle, args=(worker,)) for worker in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert {worker: record.queries for worker, record in records.items()} == {0: 1, 1: 2, 2: 3, 3: 4}
+    assert len(sql.get_stats()['by_route']) == 4
+    print("PASS: Sampling and threads")
+
+
+def run_all_tests():
+    """Run all SQL instrumentation tests"""
+    setup_logging()
+    tests = [test_statement_shapes, test_request_recording, test_sampling_and_threads]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"FAIL: {test.__name__}: {e}")
+    print(f"\n{passed}/{len(tests)} tests passed")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
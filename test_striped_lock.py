@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Test script for per-user lock striping of conversation state
+"""
+
+import sys
+import os
+import time
+import tempfile
+import threading
+import logging
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from conversation_memory import ProgressiveConversationMemory
+from sehat_sahara_assistant import SehatSaharaAssistant
+from striped_lock import StripedLock
+
+
+def setup_logging():
+    """Setup logging for tests"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+
+def test_same_user_serializes_other_users_overlap():
+    """At most one thread inside a user's stripe; different users run concurrently"""
+    print("=" * 60)
+    print("TESTING STRIPED LOCK")
+    print("=" * 60)
+
+    locks = StripedLock(stripes=64)
+    users = [f"user_{i}" for i in range(8)]
+    assert len({id(locks.hold(user)) for user in users}) > 1
+    inside = defaultdict(int)
+    peak = {'same_user': 0, 'all_users': 0}
+    guard = threading.Lock()
+
+    def critical(user_id):
+        with locks.hold(user_id):
+            with locks.hold(user_id):  # reentrant
+                with guard:
+                    inside[user_id] += 1
+                    peak['same_user'] = max(peak['same_user'], inside[user_id])
+                    peak['all_users'] = max(peak['all_users'], sum(inside.values()))
+                time.sleep(0.002)
+                with guard:
+                    inside[user_id] -= 1
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        list(pool.map(critical, users * 10))
+    assert peak['same_user'] == 1 and peak['all_users'] > 1
+
+    # Deferred work runs only once the thread holds no stripe
+    ran = []
+    with locks.hold('user_0'):
+        with locks.hold('user_1'):
+            locks.defer(lambda: ran.append('wait'))
+        assert ran == []
+    assert ran == ['wait']
+    locks.defer(lambda: ran.append('now'))
+    assert ran == ['wait', 'now']
+    stats = locks.get_stats()
+    assert stats['stripes'] == 64 and stats['acquisitions'] >= 160 and stats['contended'] >= 1
+    print("PASS: Striped lock")
+
+
+def test_concurrent_memory_mutations():
+    """Interleaved mutations from a thread pool leave every counter and index consistent"""
+    print("=" * 60)
+    print("TESTING CONCURRENT MEMORY MUTATIONS")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        memory = ProgressiveConversationMemory(max_history_per_user=100, lock_stripes=16)
+        memory.enable_journal(os.path.join(tmp, 'memory.snap'), snapshot_format='binary',
+                              flush_interval=0.005, compact_every=200, snapshot_shards=4)
+        users = [f"user_{i}" for i in range(24)]
+        rounds = 30
+        nlu = {'primary_intent': 'appointment_booking'}
+
+        def mutate(job):
+            user_id, op = job
+            memory.add_conversation_turn(user_id, f"message {op}", 'ok', nlu, session_id=f"{user_id}_s")
+            memory.set_current_task(user_id, 'appointment_booking', {'step': op})
+            memory.complete_task(user_id)
+            memory.update_appointment_status(user_id, f"apt_{op}", 'booked')
+            memory.get_user_summary(user_id)
+            if op % 10 == 0:
+                memory.save_snapshot()
+
+        jobs = [(user_id, op) for op in range(rounds) for user_id in users]
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            list(pool.map(mutate, jobs))
+
+        for user_id in users:
+            profile = memory.get_user_profile(user_id)
+            assert profile.total_conversations == rounds and profile.total_appointments_booked == rounds
+            assert len(profile.conversation_history) == rounds and len(profile.appointment_status) == rounds
+            assert memory.get_session_context(f"{user_id}_s")['turns_count'] == rounds
+        stats = memory.get_system_stats()
+        assert stats['total_users'] == len(users)
+        assert stats['total_conversations'] == len(jobs) == stats['total_tasks_completed']
+        assert stats['storage']['user_locks']['acquisitions'] > len(jobs)
+
+        memory.save_snapshot()
+        memory.journal.stop()
+        restored = ProgressiveConversationMemory()
+        restored.enable_journal(os.path.join(tmp, 'memory.snap'), snapshot_format='binary', snapshot_shards=4)
+        assert restored.get_user_profile('user_7').total_conversations == rounds
+        restored.journal.stop()
+    print("PASS: Concurrent memory mutations")
+
+
+def test_assistant_conversation_states():
+    """Concurrent messages for one user advance its symptom flow one step at a time"""
+    print("=" * 60)
+    print("TESTING CONCURRENT ASSISTANT STATES")
+    print("=" * 60)
+
+    assistant = SehatSaharaAssistant(lock_stripes=8)
+    users = [f"patient_{i}" for i in range(12)]
+    for user_id in users:
+        assistant.process_message("Mujhe bukhar hai", user_id)
+
+    with ThreadPoolExecutor(max_workers=12) as pool:
+        responses = list(pool.map(lambda uid: assistant.process_message("sir dard bhi hai", uid), users * 2))
+
+    # Per user: the second answer asks the next question, the third closes the flow
+    for user_id in users:
+        state = assistant.get_conversation_state(user_id)
+        assert state['stage'] == 'initial' and state['symptom_count'] == 0
+    actions = [r['action'] for r in responses]
+    assert actions.count('CONTINUE_SYMPTOM_CHECK') == len(users)
+    assert actions.count('Maps_TO_APPOINTMENT_BOOKING') == len(users)
+    print("PASS: Concurrent assistant states")
+
+
+def run_all_tests():
+    """Run all striped lock tests"""
+    setup_logging()
+    tests = [test_same_user_serializes_other_users_overlap, test_concurrent_memory_mutations,
+             test_assistant_conversation_states]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"FAIL: {test.__name__}: {e}")
+    print(f"\n{passed}/{len(tests)} tests passed")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
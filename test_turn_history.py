@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Test script for the compact ring-buffer conversation history
+"""
+
+import sys
+import os
+import logging
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from turn_history import TurnHistory, TurnRecord, INTENT_CODES, CodeTable
+from conversation_memory import ProgressiveConversationMemory, UserProfile
+
+
+def setup_logging():
+    """Setup logging for tests"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+
+def test_ring_buffer_behaves_like_list():
+    """Indexing, slicing and iteration match the old list of turn dicts; the oldest turn is dropped"""
+    print("=" * 60)
+    print("TESTING RING BUFFER")
+    print("=" * 60)
+
+    history = TurnHistory(capacity=3)
+    assert not history and history[-2:] == []
+    for i in range(5):
+        history.append(TurnRecord.build(f"m{i}", f"r{i}", intent='find_medicine', language='pa'))
+
+    assert len(history) == 3
+    assert [t['user_message'] for t in history] == ['m2', 'm3', 'm4']
+    assert history[0]['user_message'] == 'm2' and history[-1]['bot_response'] == 'r4'
+    assert [t['user_message'] for t in history[:-1]] == ['m2', 'm3']
+    assert history[-1]['intent'] == 'find_medicine' and history[-1]['language'] == 'pa'
+    assert history[-1]['action_taken'] is None and history[-1]['urgency_level'] == 'low'
+
+    history.resize(2)
+    assert [t['user_message'] for t in history] == ['m3', 'm4']
+    history.resize(4)
+    history.append(TurnRecord.build("m5", "r5"))
+    assert [t['user_message'] for t in history] == ['m3', 'm4', 'm5']
+    print("PASS: Ring buffer")
+
+
+def test_codes_and_round_trip():
+    """Unknown values get new codes; to_dict/from_dict keep the legacy turn shape"""
+    print("=" * 60)
+    print("TESTING CODES AND ROUND TRIP")
+    print("=" * 60)
+
+    table = CodeTable(['a'])
+    assert table.code('a') == 1 and table.code('b') == 2 and table.name(2) == 'b'
+    assert table.code(None) == 0 and table.name(0) is None
+    assert INTENT_CODES.code('brand_new_intent') == INTENT_CODES.code('brand_new_intent')
+
+    legacy_turn = {
+        'timestamp': '2026-03-01T10:15:00', 'user_message': 'dawai kahan milegi', 'bot_response': '...',
+        'intent': 'find_medicine', 'language': 'hi', 'urgency_level': 'medium',
+        'action_taken': 'NAVIGATE_TO_PHARMACY_SEARCH', 'session_id': 's1'
+    }
+    profile = UserProfile.from_dict({'user_id': 'u1', 'conversation_history': [legacy_turn]})
+    assert isinstance(profile.conversation_history, TurnHistory)
+    assert profile.to_dict()['conversation_history'] == [legacy_turn]
+    assert not hasattr(profile, '__dict__')
+    print("PASS: Codes and round trip")
+
+
+def test_memory_uses_configured_capacity():
+    """add_conversation_turn keeps max_history_per_user turns without list copies"""
+    print("=" * 60)
+    print("TESTING MEMORY HISTORY CAPACITY")
+    print("=" * 60)
+
+    memory = ProgressiveConversationMemory(max_history_per_user=4)
+    for i in range(10):
+        memory.add_conversation_turn('u1', f"m{i}", f"r{i}", {'primary_intent': 'greeting'}, action_taken='SHOW_APP_FEATURES')
+    context = memory.get_conversation_context('u1', turns=10)
+    assert [t['user_message'] for t in context] == ['m6', 'm7', 'm8', 'm9']
+    assert context[-1]['intent'] == 'greeting' and context[-1]['action_taken'] == 'SHOW_APP_FEATURES'
+    assert memory.get_user_summary('u1')['usage_stats']['recent_intents'] == ['greeting'] * 4
+    print("PASS: Memory history capacity")
+
+
+def run_all_tests():
+    """Run all turn history tests"""
+    setup_logging()
+    tests = [test_ring_buffer_behaves_like_list, test_codes_and_round_trip, test_memory_uses_configured_capacity]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"FAIL: {test.__name__}: {e}")
+    print(f"\n{passed}/{len(tests)} tests passed")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
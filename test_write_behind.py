@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Test script for the write-behind flusher of conversation memory mutations
+"""
+
+import sys
+import os
+import json
+import tempfile
+import threading
+import logging
+
+# Add current directory to path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from conversation_memory import ProgressiveConversationMemory
+from memory_store import SQLiteMemoryStore
+from write_behind import WriteBehindQueue
+
+
+def setup_logging():
+    """Setup logging for tests"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+
+
+def test_queue_coalescing_and_backpressure():
+    """Pending keys coalesce to their newest value; a full queue waits, then writes inline"""
+    print("=" * 60)
+    print("TESTING WRITE-BEHIND QUEUE")
+    print("=" * 60)
+
+    written = []
+    gate = threading.Event()
+
+    def slow_write(key, value):
+        gate.wait(5)
+        written.append((key, value))
+
+    queue = WriteBehindQueue(slow_write, max_pending=2, flush_interval=0.01, batch_size=1, block_timeout=0.05)
+    gate.set()
+    queue.enqueue('a', 1)  # written inline: not started yet
+    assert written == [('a', 1)] and queue.get_stats()['inline_writes'] == 1
+
+    gate.clear()
+    queue.start()
+    queue.enqueue('b', 1)
+    queue.enqueue('b', 2)
+    queue.enqueue('c', 1)
+    queue.enqueue('d', 1)  # the flusher is stuck on its first batch: the queue stays full
+    assert queue.get_stats()['backpressure_waits'] >= 1
+    gate.set()
+    assert queue.flush(timeout=5)
+    assert dict(written)['b'] == 2 and {k for k, _ in written} == {'a', 'b', 'c', 'd'}
+
+    # A failed write is retried unless a newer value has been queued
+    failures = {'e': 1}
+
+    def flaky_write(key, value):
+        if failures.get(key):
+            failures[key] -= 1
+            raise IOError("backend down")
+        written.append((key, value))
+
+    queue.write = flaky_write
+    queue.enqueue('e', 1)
+    assert queue.flush(timeout=5) and ('e', 1) in written
+    assert queue.get_stats()['write_errors'] == 1
+    assert queue.stop()
+    print("PASS: Write-behind queue")
+
+
+def test_journal_write_behind():
+    """Mutations reach the journal after the window, survive a restart and deletes stay ordered"""
+    print("=" * 60)
+    print("TESTING WRITE-BEHIND WITH JOURNAL")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'conversation_memory.json')
+        memory = ProgressiveConversationMemory()
+        memory.enable_journal(path, flush_interval=0.01, compact_every=0)
+        memory.enable_write_behind(flush_interval=0.02)
+
+        memory.set_current_task('u1', 'appointment_booking', {'step': 1})
+        memory.add_prescription_summary('u1', {'medicines': [{'name': 'Paracetamol'}]})
+        for i in range(20):
+            memory.add_conversation_turn('u2', f'msg {i}', 'ok', {'primary_intent': 'general_inquiry'})
+        assert memory.write_behind.flush()
+        stats = memory.get_storage_stats()['write_behind']
+        assert stats['coalesced'] > 0 and stats['written'] < stats['enqueued']
+
+        memory.add_conversation_turn('u3', 'hello', 'hi', {'primary_intent': 'greeting'})
+        assert memory.delete_user_data('u3')
+        assert memory.stop_write_behind()
+        memory.journal.stop()
+
+        with open(path + '.journal') as f:
+            ops = [(r['op'], r['user_id']) for r in map(json.loads, f)]
+        assert ops.index(('delete', 'u3')) > ops.index(('upsert', 'u3'))
+
+        restored = ProgressiveConversationMemory()
+        restored.enable_journal(path)
+        assert restored.get_current_task('u1')['task'] == 'appointment_booking'
+        assert restored.get_conversation_context('u2', turns=1)[0]['user_message'] == 'msg 19'
+        assert 'u3' not in restored.user_profiles
+        restored.journal.stop()
+    print("PASS: Write-behind with journal")
+
+
+def test_store_write_behind():
+    """With a shared store the writing worker reads its own staged writes; others see them after a flush"""
+    print("=" * 60)
+    print("TESTING WRITE-BEHIND WITH SHARED STORE")
+    print("=" * 60)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'memory.db')
+        worker_a = ProgressiveConversationMemory()
+        worker_a.attach_store(SQLiteMemoryStore(path))
+        worker_a.enable_write_behind(flush_interval=5.0)
+        worker_b = ProgressiveConversationMemory()
+        worker_b.attach_store(SQLiteMemoryStore(path))
+
+        worker_a.set_current_task('u1', 'appointment_booking', {'step': 1})
+        worker_a.add_conversation_turn('u1', 'hello', 'hi', {'primary_intent': 'greeting'}, session_id='s1')
+        assert worker_a.active_tasks['u1']['task'] == 'appointment_booking'
+        assert worker_a.get_session_context('s1')['turns_count'] == 1
+        assert 'u1' not in worker_b.active_tasks  # still inside the durability window
+
+        assert worker_a.write_behind.flush()
+        assert worker_b.active_tasks['u1']['task'] == 'appointment_booking'
+        assert worker_b.get_session_context('s1')['turns_count'] == 1
+        assert len(worker_b.get_conversation_context('u1')) == 1
+        assert worker_a.get_storage_stats()['profiles']['write_conflicts'] == 0
+        assert worker_a.stop_write_behind()
+    print("PASS: Write-behind with shared store")
+
+
+def run_all_tests():
+    """Run all write-behind tests"""
+    setup_logging()
+    tests = [test_queue_coalescing_and_backpressure, test_journal_write_behind, test_store_write_behind]
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+        except AssertionError as e:
+            print(f"FAIL: {test.__name__}: {e}")
+    print(f"\n{passed}/{len(tests)} tests passed")
+    return passed == len(tests)
+
+
+if __name__ == "__main__":
+    success = run_all_tests()
+    sys.exit(0 if success else 1)
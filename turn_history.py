@@ -0,0 +1,176 @@
+"""
+Sehat Sahara Turn History
+Compact per-user conversation history: a fixed-capacity ring buffer of tuple records with
+small-int codes for intent, language, urgency and action and epoch-float timestamps.
+Reads hand out the same turn dicts the rest of the app has always used.
+"""
+
+import sys
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Any, Iterator, List, NamedTuple, Optional, Union
+
+from llm_json import SUPPORTED_ACTIONS
+
+DEFAULT_HISTORY_CAPACITY = 50
+
+
+class CodeTable:
+    """Bidirectional string <-> small int table; unknown values get the next free code"""
+
+    def __init__(self, values: List[str]):
+        self._names: List[Optional[str]] = [None]  # code 0 is None / missing
+        self._codes: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        for value in values:
+            self.code(value)
+
+    def code(self, value: Optional[str]) -> int:
+        if value is None:
+            return 0
+        code = self._codes.get(value)
+        if code is None:
+            with self._lock:
+                code = self._codes.get(value)
+                if code is None:
+                    code = len(self._names)
+                    self._names.append(sys.intern(value))
+                    self._codes[self._names[code]] = code
+        return code
+
+    def name(self, code: int) -> Optional[str]:
+        return self._names[code]
+
+    def __len__(self) -> int:
+        return len(self._names) - 1
+
+
+INTENT_CODES = CodeTable([
+    'unknown', 'appointment_booking', 'appointment_view', 'appointment_cancel', 'health_record_request',
+    'symptom_triage', 'find_medicine', 'prescription_inquiry', 'medicine_scan', 'emergency_assistance',
+    'report_issue', 'general_inquiry', 'post_appointment_followup', 'prescription_summary_request',
+    'out_of_scope'
+])
+LANGUAGE_CODES = CodeTable(['hi', 'pa', 'en'])
+URGENCY_CODES = CodeTable(['low', 'medium', 'high', 'emergency'])
+ACTION_CODES = CodeTable(sorted(SUPPORTED_ACTIONS))
+
+
+class TurnRecord(NamedTuple):
+    """One conversation turn; codes index the module-level CodeTables"""
+    timestamp: float
+    user_message: str
+    bot_response: str
+    intent: int
+    language: int
+    urgency: int
+    action: int
+    session_id: str
+
+    @classmethod
+    def build(cls, user_message: str, bot_response: str, intent: str = 'unknown', language: str = 'hi',
+              urgency: str = 'low', action: Optional[str] = None, session_id: str = '',
+              timestamp: float = None) -> 'TurnRecord':
+        return cls(timestamp if timestamp is not None else time.time(), user_message, bot_response,
+                   INTENT_CODES.code(intent), LANGUAGE_CODES.code(language), URGENCY_CODES.code(urgency),
+                   ACTION_CODES.code(action), sys.intern(session_id) if session_id else '')
+
+    @classmethod
+    def from_turn_dict(cls, turn: Dict[str, Any]) -> 'TurnRecord':
+        try:
+            timestamp = datetime.fromisoformat(turn['timestamp']).timestamp()
+        except (KeyError, TypeError, ValueError):
+            timestamp = time.time()
+        return cls.build(turn.get('user_message', ''), turn.get('bot_response', ''),
+                         turn.get('intent', 'unknown'), turn.get('language', 'hi'),
+                         turn.get('urgency_level', 'low'), turn.get('action_taken'),
+                         turn.get('session_id') or '', timestamp)
+
+    @classmethod
+    def from_row(cls, row: List[Any]) -> 'TurnRecord':
+        return cls.build(row[1], row[2], row[3], row[4], row[5], row[6], row[7], row[0])
+
+    @property
+    def intent_name(self) -> Optional[str]:
+        return INTENT_CODES.name(self.intent)
+
+    def to_row(self) -> List[Any]:
+        """Positional form for binary snapshots; codes are spelled out since they are per-process"""
+        return [self.timestamp, self.user_message, self.bot_response, INTENT_CODES.name(self.intent),
+                LANGUAGE_CODES.name(self.language), URGENCY_CODES.name(self.urgency),
+                ACTION_CODES.name(self.action), self.session_id]
+
+    def to_turn_dict(self) -> Dict[str, Any]:
+        """The legacy per-turn dict shape"""
+        return {
+            'timestamp': datetime.fromtimestamp(self.timestamp).isoformat(),
+            'user_message': self.user_message,
+            'bot_response': self.bot_response,
+            'intent': INTENT_CODES.name(self.intent),
+            'language': LANGUAGE_CODES.name(self.language),
+            'urgency_level': URGENCY_CODES.name(self.urgency),
+            'action_taken': ACTION_CODES.name(self.action),
+            'session_id': self.session_id
+        }
+
+
+class TurnHistory:
+    """
+    Fixed-capacity ring buffer of TurnRecords. Appending is O(1) (the oldest turn is
+    overwritten once full); indexing and slicing behave like the old list of turn dicts.
+    """
+
+    __slots__ = ('capacity', '_items', '_start', '_size')
+
+    def __init__(self, capacity: int = DEFAULT_HISTORY_CAPACITY, turns: List[Union[Dict[str, Any], TurnRecord]] = None):
+        self.capacity = max(1, capacity)
+        self._items: List[TurnRecord] = []  # grows to capacity, then wraps around _start
+        self._start = 0
+        self._size = 0
+        for turn in turns or []:
+            self.append(turn)
+
+    def append(self, turn: Union[Dict[str, Any], TurnRecord]) -> None:
+        record = turn if isinstance(turn, TurnRecord) else TurnRecord.from_turn_dict(turn)
+        if self._size < self.capacity:
+            self._items.append(record)
+            self._size += 1
+        else:
+            self._items[self._start] = record
+            self._start = (self._start + 1) % self.capacity
+
+    def resize(self, capacity: int) -> None:
+        """Change capacity, keeping the most recent turns"""
+        records = self.records()[-max(1, capacity):]
+        self.capacity = max(1, capacity)
+        self._items = records
+        self._start = 0
+        self._size = len(records)
+
+    def records(self) -> List[TurnRecord]:
+        """Turn records oldest-first, without building dicts"""
+        if self._start == 0:
+            return self._items[:]
+        return self._items[self._start:] + self._items[:self._start]
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __bool__(self) -> bool:
+        return self._size > 0
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        return (record.to_turn_dict() for record in self.records())
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[Dict[str, Any], List[Dict[str, Any]]]:
+        if isinstance(index, slice):
+            return [record.to_turn_dict() for record in self.records()[index]]
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError('turn index out of range')
+        return self._items[(self._start + index) % self.capacity].to_turn_dict()
+
+    def __repr__(self) -> str:
+        return f"TurnHistory(capacity={self.capacity}, turns={self._size})"
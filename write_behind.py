@@ -0,0 +1,227 @@
+"""
+Sehat Sahara Write-Behind Queue
+Defers persistence of conversation memory mutations to a background flusher: request threads
+record the latest object per key and return, the flusher writes coalesced batches within a
+configurable durability window. The queue is bounded; when it is full callers wait briefly
+and then write inline, so a stalled backend slows requests down instead of growing memory.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Callable, Hashable, List, Optional, Tuple
+
+from performance_metrics import Histogram
+
+logger = logging.getLogger(__name__)
+
+ENQUEUE_US_BUCKETS = [1, 2, 5, 10, 25, 50, 100, 250, 1000, 10000, 100000]
+LAG_MS_BUCKETS = [1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000, 30000]
+
+
+class WriteBehindQueue:
+    """
+    Coalescing key -> latest value map drained by one flusher thread.
+
+    Enqueueing a key that is already pending replaces its value in place (the write that
+    eventually happens is always the newest), so a chatty user costs one write per window.
+    A failed write is retried on the next batch unless a newer value has been queued since.
+    """
+
+    def __init__(self, write: Callable[[Hashable, Any], None], max_pending: int = 10000,
+                 flush_interval: float = 0.05, batch_size: int = 500, block_timeout: float = 1.0,
+                 name: str = 'write-behind'):
+        self.write = write
+        self.max_pending = max_pending
+        self.flush_interval = flush_interval  # durability window: longest a mutation waits to be written
+        self.batch_size = batch_size
+        self.block_timeout = block_timeout  # backpressure wait before writing on the caller's thread
+        self.name = name
+
+        self._pending: 'OrderedDict[Hashable, Tuple[Any, float]]' = OrderedDict()  # key -> (value, enqueued at)
+        self._in_flight = 0
+        self._in_flight_keys = set()
+        self._cond = threading.Condition()
+        self._flush_requested = False
+        self._running = False
+        self._thread: Optional[threading.Thread] = None
+
+        self.enqueue_us = Histogram(buckets=ENQUEUE_US_BUCKETS)
+        self.lag_ms = Histogram(buckets=LAG_MS_BUCKETS)
+        self.stats = {
+            'enqueued': 0,
+            'coalesced': 0,
+            'written': 0,
+            'batches': 0,
+            'write_errors': 0,
+            'backpressure_waits': 0,
+            'inline_writes': 0
+        }
+
+    # ---- lifecycle ----
+
+    def start(self) -> None:
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> bool:
+        """Stop the flusher after writing everything still queued; True if nothing was left behind"""
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+        while self._write_batch():  # whatever arrived after the flusher exited
+            pass
+        with self._cond:
+            return not self._pending
+
+    # ---- producers ----
+
+    def enqueue(self, key: Hashable, value: Any) -> None:
+        """
+        Record the newest value for key; blocks up to block_timeout when the queue is full.
+        Before start() and after stop() the write happens on the caller's thread.
+        """
+        start = time.perf_counter()
+        with self._cond:
+            if not self._running:
+                inline = True
+            elif key in self._pending:
+                self._pending[key] = (value, self._pending[key][1])
+                self.stats['coalesced'] += 1
+                self.stats['enqueued'] += 1
+                self.enqueue_us.observe((time.perf_counter() - start) * 1e6)
+                return
+            elif len(self._pending) >= self.max_pending:
+                self.stats['backpressure_waits'] += 1
+                self._flush_requested = True
+                self._cond.notify_all()
+                deadline = time.monotonic() + self.block_timeout
+                while len(self._pending) >= self.max_pending and self._running:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+            if self._running:
+                # An older value of this key may be mid-write; queue behind it rather than race it
+                inline = len(self._pending) >= self.max_pending and key not in self._in_flight_keys
+            if not inline:
+                self._pending[key] = (value, time.monotonic())
+                self.stats['enqueued'] += 1
+                if len(self._pending) >= self.batch_size:
+                    self._cond.notify_all()
+        if inline:
+            # Not running, or still full: write synchronously rather than grow without bound
+            with self._cond:
+                self.stats['inline_writes'] += 1
+            self._write_one(key, value)
+        self.enqueue_us.observe((time.perf_counter() - start) * 1e6)
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Block until everything queued so far has been written (or retried and failed)"""
+        deadline = time.monotonic() + timeout
+        if not self._running:
+            while self._write_batch():
+                pass
+            return self.pending_count() == 0
+        with self._cond:
+            self._flush_requested = True
+            self._cond.notify_all()
+            while self._pending or self._in_flight:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            return True
+
+    def pending_count(self) -> int:
+        with self._cond:
+            return len(self._pending)
+
+    # ---- flusher ----
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while self._running:
+                    if self._pending:
+                        if self._flush_requested or len(self._pending) >= self.batch_size:
+                            break
+                        oldest = next(iter(self._pending.values()))[1]
+                        remaining = oldest + self.flush_interval - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        self._cond.wait(remaining)
+                    else:
+                        self._flush_requested = False
+                        self._cond.wait()
+                if not self._running:
+                    return
+            self._write_batch()
+
+    def _write_batch(self) -> int:
+        with self._cond:
+            if not self._pending:
+                self._flush_requested = False
+                return 0
+            batch: List[Tuple[Hashable, Any, float]] = []
+            while self._pending and len(batch) < self.batch_size:
+                key, (value, enqueued_at) = self._pending.popitem(last=False)
+                batch.append((key, value, enqueued_at))
+                self._in_flight_keys.add(key)
+            self._in_flight += 1
+            self._cond.notify_all()  # room for producers waiting on backpressure
+
+        written = 0
+        failed: List[Tuple[Hashable, Any, float]] = []
+        now = time.monotonic()
+        for key, value, enqueued_at in batch:
+            if self._write_one(key, value):
+                written += 1
+                self.lag_ms.observe((now - enqueued_at) * 1000)
+            else:
+                failed.append((key, value, enqueued_at))
+
+        with self._cond:
+            for key, value, enqueued_at in failed:
+                if key not in self._pending:  # a newer value supersedes the failed one
+                    self._pending[key] = (value, enqueued_at)
+                    self._pending.move_to_end(key, last=False)
+            self._in_flight_keys.difference_update(key for key, _, _ in batch)
+            self._in_flight -= 1
+            self.stats['written'] += written
+            self.stats['batches'] += 1
+            if not self._pending:
+                self._flush_requested = False
+            self._cond.notify_all()
+        if failed:
+            time.sleep(min(self.flush_interval, 1.0))  # don't spin on a failing backend
+        return len(batch) - len(failed)
+
+    def _write_one(self, key: Hashable, value: Any) -> bool:
+        try:
+            self.write(key, value)
+            return True
+        except Exception as e:
+            with self._cond:
+                self.stats['write_errors'] += 1
+            logger.error(f"Write-behind write failed for {key}: {e}")
+            return False
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._cond:
+            stats = dict(self.stats)
+            stats['pending'] = len(self._pending)
+            stats['in_flight_batches'] = self._in_flight
+        stats['max_pending'] = self.max_pending
+        stats['flush_interval_ms'] = round(self.flush_interval * 1000, 1)
+        stats['enqueue_us'] = self.enqueue_us.snapshot()
+        stats['lag_ms'] = self.lag_ms.snapshot()
+        return stats